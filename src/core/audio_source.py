@@ -0,0 +1,687 @@
+"""
+Sources audio pour la détection de cloche.
+
+Une source audio fournit des échantillons mono float32 dans [-1, 1], soit
+par blocs de taille fixe (`blocks`), soit en un seul tableau (`read_all`).
+
+- `WavAudioSource` lit un fichier audio existant.
+- `FFmpegAudioSource` décode directement la sortie PCM brute de ffmpeg
+  (pipe stdout) dans des tampons NumPy préalloués, sans fichier WAV
+  intermédiaire sur disque.
+
+- `ArrayAudioSource` sert un tableau déjà en mémoire (ex. audio relu depuis
+  le cache disque d'analyse) ; `RecordingAudioSource` garde une copie des
+  blocs lus pour pouvoir mettre l'audio en cache après la détection.
+
+`DecodedAudioCache` garde en mémoire les derniers fichiers décodés pour les
+processus qui analysent plusieurs fois le même fichier.
+
+`FFmpegAudioSource.bell_envelope` déporte en plus le passe-bande, le
+redressement et la décimation dans le graphe de filtres ffmpeg : Python ne
+reçoit alors qu'une enveloppe de quelques centaines à quelques milliers
+d'échantillons par seconde (`is_envelope` vaut True).
+
+`ParallelAudioSource` décode chaque vidéo d'une session dans son propre
+processus ffmpeg, en parallèle, puis recolle les morceaux sur la chronologie
+du démultiplexeur concat.
+"""
+
+import collections
+import itertools
+import logging
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale par défaut du cache d'audio décodé (octets)
+DEFAULT_AUDIO_CACHE_BYTES = 512 * 1024 * 1024
+
+# Fréquence d'échantillonnage de l'extraction audio (Hz)
+DEFAULT_EXTRACT_SAMPLE_RATE = 44100
+
+# Fréquence de l'enveloppe produite par ffmpeg en mode enveloppe (Hz)
+DEFAULT_ENVELOPE_RATE = 1000
+
+# Facteur de normalisation PCM 16 bits -> float (identique à librosa/soundfile)
+PCM16_SCALE = 1.0 / 32768.0
+
+# Formats PCM bruts supportés en sortie de ffmpeg
+SAMPLE_FORMATS = {
+    's16le': np.int16,
+    'f32le': np.float32,
+}
+
+
+def to_pcm16(samples):
+    """
+    Convertit des échantillons float dans [-1, 1] en PCM 16 bits.
+
+    Inverse exact de la normalisation `PCM16_SCALE` pour de l'audio issu d'un
+    décodage s16 ; les calculs intermédiaires restent en float32 pour ne pas
+    quadrupler la mémoire d'une longue session.
+    """
+    pcm = np.multiply(samples, 1.0 / PCM16_SCALE, dtype=np.float32)
+    np.rint(pcm, out=pcm)
+    np.clip(pcm, -32768, 32767, out=pcm)
+    return pcm.astype(np.int16)
+
+
+def bell_envelope_filter(target_freq, bandwidth, envelope_rate=DEFAULT_ENVELOPE_RATE):
+    """
+    Construit le graphe de filtres ffmpeg produisant l'enveloppe de la cloche.
+
+    Deux passe-bandes du second ordre en cascade (gain unitaire au centre) isolent
+    [target_freq - bandwidth, target_freq + bandwidth], puis le signal est redressé
+    et décimé à `envelope_rate` par `aresample`, dont le filtre anti-repliement
+    lisse l'enveloppe. Le facteur pi/2 ramène la moyenne de |sin| à l'amplitude
+    crête, si bien que `min_peak_height` garde la même signification.
+
+    Args:
+        target_freq (float): Fréquence cible (Hz).
+        bandwidth (float): Bande passante autour de la fréquence cible (Hz).
+        envelope_rate (int): Fréquence d'échantillonnage de l'enveloppe (Hz).
+
+    Returns:
+        str: Graphe de filtres pour l'option `-af`.
+    """
+    bandpass = f"bandpass=f={target_freq}:width_type=h:width={2 * bandwidth}:csg=0"
+    return ",".join([
+        "aformat=channel_layouts=mono",
+        bandpass,
+        bandpass,
+        "aeval=abs(val(0))*PI/2",
+        f"aresample={envelope_rate}",
+    ])
+
+
+def bell_envelope_latency(bandwidth):
+    """
+    Retard de groupe (secondes) des passe-bandes de `bell_envelope_filter`.
+
+    Un résonateur du second ordre de largeur W Hz retarde son centre de
+    1 / (pi * W) ; le graphe en contient deux de largeur 2 * bandwidth.
+    """
+    return 2 / (np.pi * 2 * bandwidth)
+
+
+def _librosa_load(audio_path):
+    """Décode un fichier à sa fréquence d'échantillonnage native (mono float32)."""
+    import librosa
+
+    return librosa.load(audio_path, sr=None)
+
+
+class DecodedAudioCache:
+    """
+    Cache LRU en mémoire d'audio décodé, borné en octets.
+
+    Les entrées sont indexées par (chemin absolu, mtime, taille) : un fichier
+    modifié sur disque est décodé à nouveau, l'ancienne entrée étant évincée.
+    Le cache n'est jamais global : il est créé par l'appelant et passé
+    explicitement aux objets qui le partagent (ex. `SpectralAnalyzer`).
+
+    Exemple:
+        >>> cache = DecodedAudioCache(max_bytes=256 * 1024 * 1024)
+        >>> y, sr = cache.load("temp/temp_audio.wav")
+        >>> y, sr = cache.load("temp/temp_audio.wav")  # aucun nouveau décodage
+    """
+
+    def __init__(self, max_bytes=DEFAULT_AUDIO_CACHE_BYTES, loader=_librosa_load):
+        """
+        Args:
+            max_bytes (int): Taille maximale cumulée des tableaux en cache (octets).
+            loader (callable): Fonction `chemin -> (échantillons, fréquence)` de décodage.
+        """
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self._entries = collections.OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(audio_path):
+        path = os.path.abspath(audio_path)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def load(self, audio_path):
+        """
+        Retourne l'audio décodé de `audio_path`, en le décodant au besoin.
+
+        Le tableau retourné est partagé avec le cache et ne doit pas être modifié.
+
+        Args:
+            audio_path (str): Chemin vers le fichier audio.
+
+        Returns:
+            tuple: (échantillons, fréquence d'échantillonnage)
+        """
+        key = self._key(audio_path)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        # Une version précédente du même fichier n'est plus valide
+        self.evict(audio_path, _keep=key)
+        y, sr = self.loader(audio_path)
+        y.setflags(write=False)
+        if y.nbytes <= self.max_bytes:
+            self._entries[key] = (y, sr)
+            self.current_bytes += y.nbytes
+            self._shrink()
+        else:
+            logger.debug("Audio trop volumineux pour le cache (%d octets): %s", y.nbytes, audio_path)
+        return y, sr
+
+    def evict(self, audio_path, _keep=None):
+        """
+        Retire du cache toutes les versions de `audio_path`.
+
+        Returns:
+            int: Nombre d'entrées retirées.
+        """
+        path = os.path.abspath(audio_path)
+        stale = [key for key in self._entries if key[0] == path and key != _keep]
+        for key in stale:
+            self._drop(key)
+        return len(stale)
+
+    def clear(self):
+        """Vide le cache."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, audio_path):
+        try:
+            return self._key(audio_path) in self._entries
+        except OSError:
+            return False
+
+    def _drop(self, key):
+        y, _ = self._entries.pop(key)
+        self.current_bytes -= y.nbytes
+
+    def _shrink(self):
+        # Évincer les entrées les moins récemment utilisées
+        while self.current_bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+
+class WavAudioSource:
+    """Source audio lisant un fichier existant (WAV ou tout format soundfile)."""
+
+    def __init__(self, audio_path):
+        """
+        Args:
+            audio_path (str): Chemin vers le fichier audio.
+        """
+        import soundfile as sf
+
+        self.audio_path = audio_path
+        self.sample_rate = sf.info(audio_path).samplerate
+
+    def blocks(self, block_size):
+        """
+        Lit le fichier par blocs de taille fixe, mixés en mono.
+
+        Args:
+            block_size (int): Nombre d'échantillons par bloc.
+
+        Yields:
+            np.ndarray: Bloc d'échantillons float32.
+        """
+        import soundfile as sf
+
+        for block in sf.blocks(self.audio_path, blocksize=block_size, dtype='float32', always_2d=True):
+            yield block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+
+    def read_all(self, expected_seconds=None):
+        """Retourne tout le fichier en un tableau mono float32 (`expected_seconds` est ignoré)."""
+        import soundfile as sf
+
+        y, _ = sf.read(self.audio_path, dtype='float32', always_2d=True)
+        return y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+
+
+class ArrayAudioSource:
+    """Source audio servant un tableau d'échantillons déjà en mémoire."""
+
+    def __init__(self, samples, sample_rate, is_envelope=False, latency=0.0):
+        """
+        Args:
+            samples (np.ndarray): Échantillons mono float32 (ou enveloppe).
+            sample_rate (int): Fréquence d'échantillonnage (Hz).
+            is_envelope (bool): True si les échantillons sont une enveloppe filtrée.
+            latency (float): Retard du filtrage qui a produit l'enveloppe (secondes).
+        """
+        self.samples = np.asarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.is_envelope = is_envelope
+        self.latency = latency
+
+    def blocks(self, block_size):
+        """Retourne le tableau par blocs de taille fixe (vues, sans copie)."""
+        for start in range(0, len(self.samples), block_size):
+            yield self.samples[start:start + block_size]
+
+    def read_all(self, expected_seconds=None):
+        """Retourne tout le tableau (`expected_seconds` est ignoré)."""
+        return self.samples
+
+
+class RecordingAudioSource:
+    """
+    Enveloppe une source et garde une copie de chaque bloc lu.
+
+    Réservée aux flux de taille modeste (enveloppe ffmpeg) : la mémoire croît
+    avec la durée lue, contrairement à la lecture par blocs seule.
+    """
+
+    def __init__(self, source):
+        """
+        Args:
+            source: Source audio enveloppée (`blocks`, `read_all`, `sample_rate`).
+        """
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.is_envelope = getattr(source, 'is_envelope', False)
+        self.latency = getattr(source, 'latency', 0.0)
+        self._blocks = []
+
+    def blocks(self, block_size):
+        """Lit la source par blocs en les enregistrant."""
+        self._blocks = []
+        for block in self.source.blocks(block_size):
+            # Les blocs de FFmpegAudioSource réutilisent le même tampon
+            self._blocks.append(np.array(block, dtype=np.float32))
+            yield block
+
+    def read_all(self, expected_seconds=None):
+        """Lit toute la source en l'enregistrant."""
+        samples = self.source.read_all(expected_seconds)
+        self._blocks = [samples]
+        return samples
+
+    def recorded(self):
+        """Retourne les échantillons lus jusqu'ici en un seul tableau."""
+        return np.concatenate(self._blocks) if self._blocks else np.empty(0, dtype=np.float32)
+
+
+class FFmpegAudioSource:
+    """
+    Source audio décodée par ffmpeg et lue depuis son stdout.
+
+    ffmpeg écrit du PCM 16 bits mono brut (`-f s16le`) sur son stdout ; les
+    octets sont lus avec `readinto` dans un tampon préalloué puis convertis
+    en float32 dans un second tampon réutilisé d'un bloc à l'autre.
+
+    Exemple:
+        >>> source = FFmpegAudioSource.from_video_list("temp/temp_video_list.txt")
+        >>> for block in source.blocks(441000):
+        ...     detector.process_block(block)
+    """
+
+    def __init__(self, input_args, sample_rate=DEFAULT_EXTRACT_SAMPLE_RATE, audio_filter=None,
+                 sample_format='s16le', is_envelope=False, latency=0.0):
+        """
+        Args:
+            input_args (list): Arguments d'entrée ffmpeg (ex. ['-i', 'video.mp4']).
+            sample_rate (int): Fréquence d'échantillonnage de sortie (Hz).
+            audio_filter (str, optional): Graphe de filtres ffmpeg appliqué avant la sortie.
+            sample_format (str): Format PCM brut de sortie ('s16le' ou 'f32le').
+            is_envelope (bool): True si la sortie est déjà une enveloppe filtrée.
+            latency (float): Retard introduit par `audio_filter` (secondes).
+        """
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Format PCM non supporté: {sample_format}. Formats supportés: {', '.join(SAMPLE_FORMATS)}")
+        self.input_args = list(input_args)
+        self.sample_rate = sample_rate
+        self.audio_filter = audio_filter
+        self.sample_format = sample_format
+        self.is_envelope = is_envelope
+        self.latency = latency
+        self.samples_read = 0
+        # Suivi de progression du décodage (ProgressMonitor, None sans suivi)
+        self.monitor = None
+
+    @property
+    def name(self):
+        """Nom du décodage dans les bilans de progression (fichier d'entrée)."""
+        inputs = [arg for previous, arg in zip(self.input_args, self.input_args[1:]) if previous == "-i"]
+        return "audio " + ", ".join(os.path.basename(path) for path in inputs)
+
+    @staticmethod
+    def concat_input(video_list_path):
+        """Arguments d'entrée ffmpeg pour une liste de vidéos (démultiplexeur concat)."""
+        return ["-f", "concat", "-safe", "0", "-i", video_list_path]
+
+    @classmethod
+    def from_video_list(cls, video_list_path, sample_rate=DEFAULT_EXTRACT_SAMPLE_RATE):
+        """Crée une source décodant une liste de vidéos via le démultiplexeur concat."""
+        return cls(cls.concat_input(video_list_path), sample_rate=sample_rate)
+
+    @classmethod
+    def bell_envelope(cls, input_args, target_freq, bandwidth, envelope_rate=DEFAULT_ENVELOPE_RATE):
+        """
+        Crée une source qui reçoit directement l'enveloppe de la cloche calculée par ffmpeg.
+
+        Args:
+            input_args (list): Arguments d'entrée ffmpeg.
+            target_freq (float): Fréquence cible (Hz).
+            bandwidth (float): Bande passante autour de la fréquence cible (Hz).
+            envelope_rate (int): Fréquence d'échantillonnage de l'enveloppe (Hz).
+
+        Returns:
+            FFmpegAudioSource: Source d'enveloppe float32.
+        """
+        return cls(
+            input_args,
+            sample_rate=envelope_rate,
+            audio_filter=bell_envelope_filter(target_freq, bandwidth, envelope_rate),
+            sample_format='f32le',
+            is_envelope=True,
+            latency=bell_envelope_latency(bandwidth)
+        )
+
+    def command(self):
+        """Retourne la commande ffmpeg utilisée pour le décodage."""
+        filter_args = ["-af", self.audio_filter] if self.audio_filter else []
+        return [
+            "ffmpeg", "-v", "error", "-nostdin",
+            *self.input_args,
+            "-vn",                      # pas de vidéo
+            *filter_args,
+            "-acodec", f"pcm_{self.sample_format}", "-f", self.sample_format,
+            "-ar", str(self.sample_rate), "-ac", "1",
+            "pipe:1",
+        ]
+
+    def _to_float(self, raw, out):
+        """Convertit les échantillons bruts en float32 dans `out`."""
+        if raw.dtype == np.int16:
+            np.multiply(raw, PCM16_SCALE, out=out, casting='unsafe')
+        else:
+            out[:] = raw
+
+    def _start(self, expected_seconds=None):
+        progress = None
+        if self.monitor is None:
+            process = subprocess.Popen(self.command(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        else:
+            process, job, reader = self.monitor.popen(self.command(), self.name, expected_seconds,
+                                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            progress = (job, reader)
+
+        # Vider stderr en continu pour éviter un blocage du pipe
+        stderr_tail = collections.deque(maxlen=200)
+
+        def drain():
+            for line in process.stderr:
+                stderr_tail.append(line.decode(errors='replace').rstrip())
+
+        drainer = threading.Thread(target=drain, daemon=True)
+        drainer.start()
+        return process, drainer, stderr_tail, progress
+
+    def _finish(self, process, drainer, stderr_tail, progress, check=True):
+        process.stdout.close()
+        returncode = process.wait() if progress is None else self.monitor.finish(*progress, process)
+        drainer.join()
+        logger.debug("FFmpeg stderr: %s", "\n".join(stderr_tail))
+        if check and returncode != 0:
+            raise RuntimeError(f"Échec du décodage audio ffmpeg (code {returncode}): {' | '.join(list(stderr_tail)[-3:])}")
+
+    @staticmethod
+    def _fill(stream, view):
+        """Remplit `view` depuis `stream` ; retourne le nombre d'octets lus."""
+        filled = 0
+        while filled < len(view):
+            n = stream.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        return filled
+
+    def blocks(self, block_size):
+        """
+        Décode l'audio et le retourne par blocs de taille fixe.
+
+        Le tableau retourné est réutilisé au bloc suivant : il doit être
+        consommé (ou copié) avant de reprendre l'itération.
+
+        Args:
+            block_size (int): Nombre d'échantillons par bloc.
+
+        Yields:
+            np.ndarray: Bloc d'échantillons float32.
+        """
+        raw = np.empty(block_size, dtype=SAMPLE_FORMATS[self.sample_format])
+        # Les flux float32 sont lus directement dans le tampon de sortie
+        samples = raw if raw.dtype == np.float32 else np.empty(block_size, dtype=np.float32)
+        raw_view = memoryview(raw).cast('B')
+
+        process, drainer, stderr_tail, progress = self._start()
+        self.samples_read = 0
+        exhausted = False
+        try:
+            while not exhausted:
+                n = self._fill(process.stdout, raw_view) // raw.itemsize
+                exhausted = n < block_size
+                if n == 0:
+                    break
+                if samples is not raw:
+                    self._to_float(raw[:n], samples[:n])
+                self.samples_read += n
+                yield samples[:n]
+        finally:
+            # Itération interrompue par l'appelant : arrêter ffmpeg
+            if not exhausted:
+                process.kill()
+            self._finish(process, drainer, stderr_tail, progress, check=exhausted)
+
+    def read_all(self, expected_seconds=None):
+        """
+        Décode tout l'audio dans un seul tableau préalloué.
+
+        Le tableau est dimensionné d'après la durée attendue (durée de la
+        session sondée par `SourceTimeline`), puis agrandi ou réduit sur place
+        (`ndarray.resize`, realloc) : le tableau retourné a exactement la
+        taille décodée et ne retient pas de tampon surdimensionné.
+
+        Args:
+            expected_seconds (float, optional): Durée attendue, pour dimensionner le tampon
+                (défaut : 60 secondes, doublées à chaque dépassement).
+
+        Returns:
+            np.ndarray: Échantillons float32 de toute la session.
+        """
+        dtype = SAMPLE_FORMATS[self.sample_format]
+        # Une seconde de marge : la piste audio peut dépasser un peu la durée du conteneur
+        capacity = int(((expected_seconds + 1) if expected_seconds else 60) * self.sample_rate)
+        raw = np.empty(capacity, dtype=dtype)
+
+        process, drainer, stderr_tail, progress = self._start(expected_seconds)
+        filled = 0
+        try:
+            while True:
+                if filled == len(raw):
+                    # Durée attendue dépassée : doubler la capacité sur place
+                    raw.resize(2 * len(raw), refcheck=False)
+                n = self._fill(process.stdout, memoryview(raw[filled:]).cast('B')) // raw.itemsize
+                if n == 0:
+                    break
+                filled += n
+        finally:
+            self._finish(process, drainer, stderr_tail, progress)
+
+        self.samples_read = filled
+        if raw.dtype == np.float32:
+            raw.resize(filled, refcheck=False)
+            return raw
+        samples = np.empty(filled, dtype=np.float32)
+        self._to_float(raw[:filled], samples)
+        return samples
+
+
+class ParallelAudioSource:
+    """
+    Source audio décodée fichier par fichier, avec un processus ffmpeg par fichier.
+
+    Le démultiplexeur concat décode les fichiers d'une session l'un après
+    l'autre, sur un seul fil de décodage. Ici chaque fichier a sa propre
+    `FFmpegAudioSource` et jusqu'à `max_workers` fichiers sont décodés en même
+    temps. Les morceaux sont recollés bout à bout : chaque fichier commence à
+    l'offset égal au nombre d'échantillons décodés des fichiers qui le
+    précèdent. C'est exactement la chronologie de la sortie PCM du concat, qui
+    enchaîne les échantillons décodés sans combler les écarts entre durée du
+    conteneur et durée de la piste audio ; les instants détectés sont donc les
+    mêmes.
+
+    Tout l'audio décodé est gardé en mémoire : réservé au décodage complet
+    (`read_all`) et à l'enveloppe ffmpeg, pas à la détection en flux à mémoire
+    constante.
+
+    Exemple:
+        >>> source = ParallelAudioSource.from_videos(["GX010001.MP4", "GX020001.MP4"])
+        >>> samples = source.read_all()
+        >>> source.offsets  # début de chaque fichier (secondes)
+    """
+
+    def __init__(self, sources, max_workers=None):
+        """
+        Args:
+            sources (list): `FFmpegAudioSource` de chaque fichier, dans l'ordre de la session.
+            max_workers (int, optional): Fichiers décodés simultanément (défaut : tous).
+        """
+        if not sources:
+            raise ValueError("Au moins une source audio est requise")
+        self.sources = list(sources)
+        self.sample_rate = self.sources[0].sample_rate
+        self.is_envelope = self.sources[0].is_envelope
+        self.latency = self.sources[0].latency
+        self.max_workers = max(1, min(max_workers or len(self.sources), len(self.sources)))
+        self.offsets = []
+        self.samples_read = 0
+
+    @property
+    def monitor(self):
+        """Suivi de progression, partagé par le décodage de chaque fichier."""
+        return self.sources[0].monitor
+
+    @monitor.setter
+    def monitor(self, monitor):
+        for source in self.sources:
+            source.monitor = monitor
+
+    @classmethod
+    def from_videos(cls, video_files, sample_rate=DEFAULT_EXTRACT_SAMPLE_RATE, max_workers=None):
+        """Crée une source décodant l'audio de chaque vidéo."""
+        return cls([FFmpegAudioSource(['-i', video], sample_rate=sample_rate) for video in video_files], max_workers)
+
+    @classmethod
+    def bell_envelope(cls, video_files, target_freq, bandwidth, envelope_rate=DEFAULT_ENVELOPE_RATE, max_workers=None):
+        """Crée une source recevant l'enveloppe de la cloche de chaque vidéo, calculée par ffmpeg."""
+        return cls([FFmpegAudioSource.bell_envelope(['-i', video], target_freq, bandwidth, envelope_rate)
+                    for video in video_files], max_workers)
+
+    def pieces(self, expected_seconds=None):
+        """
+        Décode les fichiers en parallèle.
+
+        Au plus `max_workers` fichiers sont décodés d'avance sur celui attendu :
+        les morceaux déjà décodés mais pas encore servis restent en nombre borné,
+        et chaque morceau n'est plus référencé ici une fois servi.
+
+        Args:
+            expected_seconds (float, optional): Durée attendue de la session, répartie
+                également entre les fichiers pour dimensionner leur tampon.
+
+        Yields:
+            np.ndarray: Audio de chaque fichier, dans l'ordre de la session, dès que
+                ce fichier et ceux qui le précèdent sont décodés.
+        """
+        self.offsets = []
+        self.samples_read = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            sources = iter(self.sources)
+            file_seconds = expected_seconds / len(self.sources) if expected_seconds else None
+            futures = collections.deque(executor.submit(source.read_all, file_seconds)
+                                        for source in itertools.islice(sources, self.max_workers))
+            while futures:
+                piece = futures.popleft().result()
+                for source in itertools.islice(sources, 1):
+                    futures.append(executor.submit(source.read_all, file_seconds))
+                self.offsets.append(self.samples_read / self.sample_rate)
+                self.samples_read += len(piece)
+                yield piece
+                del piece
+        finally:
+            # Itération interrompue ou décodage en échec : ne pas lancer les fichiers restants
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def blocks(self, block_size):
+        """
+        Retourne l'audio recollé par blocs de taille fixe.
+
+        Les premiers blocs sont servis dès que le premier fichier est décodé,
+        pendant que les suivants le sont encore.
+
+        Args:
+            block_size (int): Nombre d'échantillons par bloc.
+
+        Yields:
+            np.ndarray: Bloc d'échantillons float32.
+        """
+        carry = np.empty(0, dtype=np.float32)
+        for piece in self.pieces():
+            if len(carry):
+                piece = np.concatenate((carry, piece))
+            full = len(piece) - len(piece) % block_size
+            for start in range(0, full, block_size):
+                yield piece[start:start + block_size]
+            carry = piece[full:]
+        if len(carry):
+            yield carry
+
+    def read_all(self, expected_seconds=None):
+        """
+        Décode tous les fichiers et retourne l'audio recollé en un seul tableau.
+
+        Chaque morceau est copié dans le tableau de sortie dès qu'il est décodé,
+        puis libéré : la mémoire crête est celle de la session plus les morceaux
+        en cours de décodage, et non le double de la session. Le tableau est
+        dimensionné d'après la durée attendue, ou à défaut d'après le premier
+        fichier (les chapitres d'une caméra ont la même durée), puis agrandi ou
+        réduit sur place (`ndarray.resize`, realloc) quand l'estimation ne tombe
+        pas juste.
+
+        Args:
+            expected_seconds (float, optional): Durée attendue de la session.
+        """
+        output = np.empty(0, dtype=np.float32)
+        filled = 0
+        for index, piece in enumerate(self.pieces(expected_seconds)):
+            if index == 0:
+                capacity = (int((expected_seconds + 1) * self.sample_rate) if expected_seconds
+                            else len(piece) * len(self.sources))
+                output = np.empty(capacity, dtype=np.float32)
+            if filled + len(piece) > len(output):
+                # Estimation dépassée : place pour ce morceau et les suivants à sa taille
+                output.resize(filled + len(piece) * (len(self.sources) - index), refcheck=False)
+            output[filled:filled + len(piece)] = piece
+            filled += len(piece)
+            del piece
+        output.resize(filled, refcheck=False)
+        return output
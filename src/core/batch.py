@@ -0,0 +1,321 @@
+"""
+Traitement par lots de plusieurs sessions avec un budget commun de workers.
+
+`split_rounds.py` traite une session par appel ; enchaîner les sessions laisse
+les cœurs inoccupés pendant l'extraction et la détection de chacune. Le mode
+batch traite toutes les sessions (un répertoire de vidéos par session) dans
+un même processus, sur un budget partagé :
+
+- extraction et détection (lecture complète des sources) : au plus
+  `analysis_workers` sessions à la fois (budget d'entrées/sorties) ;
+- encodage des rounds : un seul `EncodeGovernor` pour toutes les sessions,
+  dont le nombre d'encodages simultanés est un budget commun (budget CPU).
+
+Une session dont l'analyse est terminée encode ses rounds pendant que les
+suivantes sont analysées. Chaque session écrit ses rounds dans son propre
+répertoire (`<sortie>/<session>/<date>-boxing`) et un rapport consolidé
+(JSON) résume le débit de l'ensemble.
+
+Exemple:
+    python src/core/batch.py --output-root rounds /ingest/2024-03-01 /ingest/2024-03-02
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter src au chemin pour permettre l'exécution directe du script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.governor import EncodeGovernor, available_cores
+from core.split_rounds import (TEMP_DIR, SessionError, add_session_arguments, check_session_arguments,
+                               log_session_parameters, open_caches, open_progress_monitor, open_tracer,
+                               process_session, resolve_logo_path, save_cache_stats, write_trace)
+from core.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+# Extensions des vidéos d'une session (les copies basse résolution .lrv sont ignorées)
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.mkv', '.avi')
+
+# Nom du rapport consolidé dans le répertoire de sortie
+REPORT_NAME = "batch_report.json"
+
+# Répertoire des fichiers temporaires des sessions
+BATCH_TEMP_DIR = os.path.join(TEMP_DIR, "batch")
+
+
+def default_analysis_workers():
+    """Sessions analysées simultanément par défaut : un quart des cœurs, au moins une."""
+    return max(1, len(available_cores()) // 4)
+
+
+def find_session_videos(session_dir):
+    """
+    Liste les vidéos d'un répertoire de session (non récursif).
+
+    Returns:
+        list: Chemins des vidéos, par nom (l'ordre de traitement suit la date de création).
+    """
+    return sorted(
+        os.path.join(session_dir, name) for name in os.listdir(session_dir)
+        if name.lower().endswith(VIDEO_EXTENSIONS) and os.path.isfile(os.path.join(session_dir, name))
+    )
+
+
+def session_names(session_dirs):
+    """
+    Nom de chaque session (nom du répertoire), rendu unique par un suffixe.
+
+    Returns:
+        list: Noms, dans l'ordre de `session_dirs`.
+    """
+    names = []
+    for session_dir in session_dirs:
+        base = os.path.basename(os.path.normpath(os.path.abspath(session_dir))) or "session"
+        name = base
+        index = 2
+        while name in names:
+            name = f"{base}_{index}"
+            index += 1
+        names.append(name)
+    return names
+
+
+class BatchScheduler:
+    """
+    Traite plusieurs sessions en parallèle sur un budget commun.
+
+    Chaque session est traitée dans son propre thread par `process` (par défaut
+    `process_session`), qui reçoit le sémaphore d'analyse et le gouverneur
+    partagés. Une session en échec est reportée dans le bilan sans arrêter
+    les autres.
+    """
+
+    def __init__(self, governor, analysis_workers=None, max_sessions=None, process=process_session, monitor=None,
+                 tracer=None):
+        """
+        Args:
+            governor (EncodeGovernor): Gouverneur partagé par les encodages de toutes les sessions.
+            analysis_workers (int, optional): Sessions en extraction/détection simultanées
+                (défaut : un quart des cœurs).
+            max_sessions (int, optional): Sessions en cours simultanément, analyse ou encodage
+                (défaut : deux fois `analysis_workers`).
+            process (callable): Traitement d'une session, avec la signature de `process_session`.
+            monitor (ProgressMonitor, optional): Suivi de progression partagé par les ffmpeg de toutes les sessions.
+            tracer (Tracer, optional): Traceur partagé par toutes les sessions.
+        """
+        self.governor = governor
+        self.analysis_workers = max(1, analysis_workers or default_analysis_workers())
+        self.max_sessions = max(self.analysis_workers, max_sessions or 2 * self.analysis_workers)
+        self.analysis_slot = threading.BoundedSemaphore(self.analysis_workers)
+        self.process = process
+        self.monitor = monitor
+        self.tracer = tracer
+
+    def process_files(self, name, video_files, args, logo_path, output_root=".", temp_root=BATCH_TEMP_DIR, **caches):
+        """
+        Traite une session donnée par ses vidéos, sur le budget partagé.
+
+        Args:
+            name (str): Nom de la session (sous-répertoire de sortie et temporaire).
+            video_files (list): Vidéos de la session.
+            args (argparse.Namespace): Options de `add_session_arguments`.
+            logo_path (str): Logo superposé aux rounds.
+            output_root (str): Répertoire contenant un sous-répertoire par session.
+            temp_root (str): Répertoire contenant les fichiers temporaires de chaque session.
+            **caches: `metadata_cache` et `disk_cache` partagés, transmis à `process`.
+
+        Returns:
+            dict: Bilan de la session, avec `status` ('ok', 'failed' si des rounds ont
+                échoué, 'error' si la session a été interrompue et `error`).
+        """
+        report = dict(session=name)
+        try:
+            if not video_files:
+                raise SessionError("aucune vidéo")
+            logger.info(f"Session {name}: {len(video_files)} vidéo(s)")
+            with trace_span(self.tracer, f"session {name}", "session", videos=len(video_files)):
+                report.update(self.process(
+                    video_files, args, logo_path, self.governor,
+                    temp_dir=os.path.join(temp_root, name),
+                    output_root=os.path.join(output_root, name),
+                    analysis_slot=self.analysis_slot,
+                    monitor=self.monitor,
+                    tracer=self.tracer,
+                    **caches
+                ))
+            report['status'] = 'ok' if not report['failed'] else 'failed'
+        except Exception as e:
+            logger.error(f"Session {name} en échec: {e}")
+            report.update(status='error', error=str(e))
+        return report
+
+    def run(self, sessions, args, logo_path, output_root=".", temp_root=BATCH_TEMP_DIR, **caches):
+        """
+        Traite toutes les sessions.
+
+        Args:
+            sessions (list): Tuples (nom, répertoire de session).
+            args (argparse.Namespace): Options de `add_session_arguments`.
+            logo_path (str): Logo superposé aux rounds.
+            output_root (str): Répertoire contenant un sous-répertoire par session.
+            temp_root (str): Répertoire contenant les fichiers temporaires de chaque session.
+            **caches: `metadata_cache` et `disk_cache` partagés, transmis à `process`.
+
+        Returns:
+            tuple: (bilans des sessions dans l'ordre de `sessions`, durée totale en secondes)
+        """
+        started = time.monotonic()
+
+        def run_session(name, session_dir):
+            try:
+                video_files = find_session_videos(session_dir)
+            except OSError as e:
+                logger.error(f"Session {name} en échec: {e}")
+                return dict(session=name, session_dir=session_dir, status='error', error=str(e))
+            report = self.process_files(name, video_files, args, logo_path, output_root, temp_root, **caches)
+            return dict(report, session_dir=session_dir)
+
+        with ThreadPoolExecutor(max_workers=self.max_sessions) as executor:
+            futures = [executor.submit(run_session, name, session_dir) for name, session_dir in sessions]
+            reports = [future.result() for future in futures]
+        return reports, time.monotonic() - started
+
+
+def summarize(reports, elapsed_seconds):
+    """
+    Totaux du rapport consolidé.
+
+    Le débit est la durée de vidéo encodée par seconde de temps réel, toutes
+    sessions confondues ; le taux d'occupation de l'analyse compare le temps
+    cumulé d'extraction/détection à la durée du lot.
+
+    Returns:
+        dict: Totaux du lot.
+    """
+    def total(key):
+        return sum(report.get(key, 0) for report in reports)
+
+    media_seconds = total('media_seconds')
+    return dict(
+        sessions=len(reports),
+        failed_sessions=sum(report['status'] != 'ok' for report in reports),
+        rounds=total('rounds'),
+        encoded=total('encoded'),
+        skipped=total('skipped'),
+        failed=total('failed'),
+        media_seconds=media_seconds,
+        analysis_seconds=total('analysis_seconds'),
+        encode_seconds=total('encode_seconds'),
+        elapsed_seconds=elapsed_seconds,
+        throughput=media_seconds / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+    )
+
+
+def write_report(path, reports, elapsed_seconds, settings=None):
+    """
+    Écrit le rapport consolidé du lot (écriture atomique).
+
+    Args:
+        path (str): Chemin du rapport JSON.
+        reports (list): Bilans des sessions (`BatchScheduler.run`).
+        elapsed_seconds (float): Durée totale du lot.
+        settings (dict, optional): Budget utilisé (cœurs, encodages, analyses simultanées).
+
+    Returns:
+        dict: Contenu du rapport.
+    """
+    report = dict(settings=settings or {}, totals=summarize(reports, elapsed_seconds), sessions=reports)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(temp_path, path)
+    return report
+
+
+def log_report(report):
+    """Affiche le bilan de chaque session et les totaux du lot."""
+    logger.info("Bilan du lot:")
+    for session in report['sessions']:
+        if session['status'] == 'error':
+            logger.info(f"  {session['session']:<24} erreur: {session['error']}")
+            continue
+        logger.info(f"  {session['session']:<24} {session['encoded']} encodé(s), {session['skipped']} conservé(s), "
+                    f"{session['failed']} en échec, analyse {session['analysis_seconds']:.1f} s, "
+                    f"encodage {session['encode_seconds']:.1f} s -> {session['output_dir']}")
+    totals = report['totals']
+    logger.info(f"{totals['sessions']} session(s) en {totals['elapsed_seconds']:.1f} s: "
+                f"{totals['encoded']} round(s) encodé(s), {totals['skipped']} conservé(s), "
+                f"{totals['failed']} en échec, {totals['failed_sessions']} session(s) en échec")
+    logger.info(f"Débit: {totals['throughput']:.2f} s de vidéo encodée par seconde")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Découpe en rounds les vidéos de plusieurs sessions, '
+                                                 'sur un budget commun de workers.')
+    parser.add_argument('session_dirs', nargs='+', help='Répertoire(s) de session, chacun contenant les vidéos d\'une session')
+    parser.add_argument('--output-root', type=str, default='.',
+                        help='Répertoire de sortie, un sous-répertoire par session (par défaut: répertoire courant)')
+    parser.add_argument('--analysis-workers', type=int, default=None,
+                        help='Sessions en extraction/détection simultanées (par défaut: un quart des cœurs)')
+    parser.add_argument('--max-sessions', type=int, default=None,
+                        help='Sessions en cours simultanément, analyse ou encodage (par défaut: deux fois --analysis-workers)')
+    parser.add_argument('--report', type=str, default=None,
+                        help=f'Chemin du rapport consolidé (par défaut: {REPORT_NAME} dans --output-root)')
+    add_session_arguments(parser)
+
+    args = parser.parse_args()
+    missing = [session_dir for session_dir in args.session_dirs if not os.path.isdir(session_dir)]
+    if missing:
+        parser.error(f"répertoire(s) de session introuvable(s): {', '.join(missing)}")
+    check_session_arguments(parser, args)
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+
+    try:
+        logo_path = resolve_logo_path(args.logo)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Erreur de logo: {e}")
+        sys.exit(1)
+
+    log_session_parameters(args)
+
+    metadata_cache, disk_cache = open_caches(args)
+    governor = EncodeGovernor(max_jobs=args.max_workers, pin=args.pin_cores)
+    tracer = open_tracer(args)
+    monitor = open_progress_monitor(args, tracer)
+    scheduler = BatchScheduler(governor, args.analysis_workers, args.max_sessions, monitor=monitor, tracer=tracer)
+    logger.info(f"Lot de {len(args.session_dirs)} session(s): {len(governor.cores)} cœurs, au plus "
+                f"{governor.max_jobs} encodages et {scheduler.analysis_workers} analyse(s) simultanés")
+
+    sessions = list(zip(session_names(args.session_dirs), args.session_dirs))
+    try:
+        reports, elapsed = scheduler.run(sessions, args, logo_path, output_root=args.output_root,
+                                         metadata_cache=metadata_cache, disk_cache=disk_cache)
+    finally:
+        monitor.stop()
+        write_trace(tracer, args.trace)
+        save_cache_stats(disk_cache)
+
+    report_path = args.report or os.path.join(args.output_root, REPORT_NAME)
+    settings = dict(cores=len(governor.cores), max_encodes=governor.max_jobs,
+                    analysis_workers=scheduler.analysis_workers, max_sessions=scheduler.max_sessions,
+                    cut_mode=args.cut_mode)
+    report = write_report(report_path, reports, elapsed, settings)
+    log_report(report)
+    logger.info(f"Rapport consolidé écrit dans {report_path}")
+
+    if report['totals']['failed_sessions']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
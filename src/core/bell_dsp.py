@@ -0,0 +1,570 @@
+"""
+Primitives DSP partagées pour la détection de cloche.
+
+Ce module regroupe les briques utilisées par le mode de détection en flux
+(`detect_bell_ringing_streaming`) : filtre passe-bande causal à état,
+détection de pics par blocs et regroupement incrémental des pics en
+événements. Chaque brique conserve son état entre deux blocs, ce qui permet
+de traiter une session de plusieurs heures avec une mémoire constante.
+
+Il fournit aussi l'enveloppe crête (`peak_hold_envelope`, `find_bell_peaks`)
+utilisée par tous les modes : la détection de pics tourne sur une série
+réduite à quelques centaines de trames par seconde au lieu de chaque
+échantillon, sans perdre la précision des timestamps.
+
+Détails et tolérances documentés dans /docs/design/bell_detection.md
+"""
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfreqz, find_peaks
+
+from core.tracing import trace_span
+
+# Durée d'un bloc audio en mode flux (secondes)
+DEFAULT_BLOCK_SECONDS = 10.0
+
+# Distance minimale entre deux pics (secondes), identique au mode batch
+PEAK_DISTANCE_SECONDS = 0.1
+
+# Fréquence des trames de l'enveloppe crête (Hz) ; 0 détecte les pics sur chaque échantillon
+DEFAULT_PEAK_HOLD_RATE = 500
+
+
+def peak_hold_hop(sample_rate, peak_hold_rate):
+    """
+    Nombre d'échantillons par trame d'enveloppe crête.
+
+    Args:
+        sample_rate (float): Fréquence d'échantillonnage (Hz).
+        peak_hold_rate (float): Fréquence des trames (Hz), 0 pour désactiver.
+
+    Returns:
+        int: Taille de trame (1 si l'enveloppe crête est désactivée).
+    """
+    if not peak_hold_rate:
+        return 1
+    return max(1, int(sample_rate // peak_hold_rate))
+
+
+def peak_hold_envelope(amplitude, hop, previous=np.inf, following=np.inf, local_maxima=True):
+    """
+    Réduit une amplitude à son maximum par trame de `hop` échantillons.
+
+    La position du maximum dans chaque trame est conservée : un pic détecté
+    sur l'enveloppe est ramené à l'échantillon exact du maximum, ce qui garde
+    la précision des timestamps à l'échantillon près. Une trame dont le
+    maximum n'est pas un maximum local de `amplitude` (bord de trame sur une
+    pente) vaut 0 : comme pour `find_peaks`, ce n'est pas un pic.
+
+    Sur une enveloppe déjà démodulée (|z| du banc de filtres), lisse, chaque
+    échantillon représente une crête de la porteuse : avec `local_maxima`
+    à False, aucune trame n'est mise à 0.
+
+    Args:
+        amplitude (np.ndarray): Amplitude (valeur absolue du signal filtré).
+        hop (int): Nombre d'échantillons par trame.
+        previous (float): Échantillon précédant `amplitude` (inf au début du signal).
+        following (float): Échantillon suivant `amplitude` (inf à la fin du signal).
+        local_maxima (bool): Ne garder que les trames dont le maximum est un maximum local.
+
+    Returns:
+        tuple: (maximum de chaque trame, index d'échantillon de ce maximum)
+    """
+    n = len(amplitude)
+    full = n // hop
+    frames = amplitude[:full * hop].reshape(full, hop)
+    argmax = frames.argmax(axis=1)
+    offsets = np.arange(full) * hop + argmax
+    if full * hop < n:
+        # Dernière trame incomplète
+        offsets = np.append(offsets, full * hop + amplitude[full * hop:].argmax())
+    envelope = amplitude[offsets]
+    if not local_maxima:
+        return envelope, offsets
+
+    # Voisins du maximum, contexte compris : strictement au-dessus à gauche
+    # (premier échantillon d'un plateau), au moins égal à droite
+    left = amplitude[np.maximum(offsets - 1, 0)]
+    right = amplitude[np.minimum(offsets + 1, max(n - 1, 0))]
+    if len(offsets):
+        if offsets[0] == 0:
+            left[0] = previous
+        if offsets[-1] == n - 1:
+            right[-1] = following
+    is_peak = (envelope > left) & (envelope >= right)
+    return np.where(is_peak, envelope, 0).astype(amplitude.dtype, copy=False), offsets
+
+
+def interleave_candidates(envelope):
+    """
+    Intercale des zéros entre les trames d'une enveloppe crête.
+
+    Après passe-bande, |x| présente un maximum local à chaque demi-période de
+    la porteuse, donc dans chaque trame : `find_peaks(distance)` sur le signal
+    brut garde ainsi un pic tous les `PEAK_DISTANCE_SECONDS` le long d'une
+    sonnerie prolongée. L'enveloppe crête, lisse, n'aurait plus qu'un maximum ;
+    intercaler des zéros fait de chaque trame un maximum local candidat et
+    conserve ce comportement. La trame k devient l'index 2k + 1.
+
+    Args:
+        envelope (np.ndarray): Maximum de chaque trame.
+
+    Returns:
+        np.ndarray: Série de longueur 2 * len(envelope).
+    """
+    series = np.zeros(2 * len(envelope), dtype=envelope.dtype)
+    series[1::2] = envelope
+    return series
+
+
+def candidate_distance(sample_rate, hop):
+    """
+    Distance `find_peaks` (en index de `interleave_candidates`) équivalente à `PEAK_DISTANCE_SECONDS`.
+
+    L'écart minimal entre pics est arrondi au nombre de trames le plus proche,
+    soit une tolérance de ±1 trame (±2 ms à 500 Hz) par rapport au mode historique.
+    """
+    return 2 * max(1, int(round(sample_rate * PEAK_DISTANCE_SECONDS / hop)))
+
+
+def find_bell_peaks(amplitude, sample_rate, min_peak_height, peak_hold_rate=DEFAULT_PEAK_HOLD_RATE):
+    """
+    Détecte les pics d'amplitude espacés d'au moins `PEAK_DISTANCE_SECONDS`.
+
+    Avec `peak_hold_rate` > 0, les pics sont sélectionnés parmi les maxima de
+    trames (`peak_hold_envelope`, `interleave_candidates`) puis ramenés à
+    l'échantillon du maximum ; avec 0, `find_peaks` parcourt chaque échantillon
+    (comportement historique). `peak_hold_rate` doit rester bien inférieur à
+    deux fois la fréquence cible pour que chaque trame contienne une crête.
+
+    Args:
+        amplitude (np.ndarray): Amplitude (valeur absolue du signal filtré).
+        sample_rate (float): Fréquence d'échantillonnage (Hz).
+        min_peak_height (float): Hauteur minimale de pic.
+        peak_hold_rate (float): Fréquence des trames de l'enveloppe crête (Hz).
+
+    Returns:
+        np.ndarray: Indices d'échantillons des pics.
+    """
+    hop = peak_hold_hop(sample_rate, peak_hold_rate)
+    if hop == 1:
+        peaks, _ = find_peaks(amplitude, height=min_peak_height, distance=sample_rate * PEAK_DISTANCE_SECONDS)
+        return peaks
+    envelope, offsets = peak_hold_envelope(amplitude, hop)
+    peaks, _ = find_peaks(interleave_candidates(envelope), height=min_peak_height,
+                          distance=candidate_distance(sample_rate, hop))
+    return offsets[peaks // 2]
+
+
+def find_envelope_peaks(envelope, sample_rate, min_peak_height, peak_hold_rate=DEFAULT_PEAK_HOLD_RATE):
+    """
+    Détecte les pics d'une enveloppe démodulée comme `find_bell_peaks` sur |x|.
+
+    L'enveloppe complexe |z| d'une sonnerie n'a qu'une bosse là où |x| a une
+    crête par demi-période de la porteuse : `find_peaks` n'y trouverait qu'un
+    pic par sonnerie. Chaque trame de l'enveloppe devient donc un candidat
+    (`interleave_candidates`), ce qui garde un pic tous les
+    `PEAK_DISTANCE_SECONDS` tant que l'enveloppe dépasse `min_peak_height`.
+
+    Args:
+        envelope (np.ndarray): Enveloppe démodulée (|z|).
+        sample_rate (float): Fréquence d'échantillonnage de l'enveloppe (Hz).
+        min_peak_height (float): Hauteur minimale de pic.
+        peak_hold_rate (float): Fréquence des trames de l'enveloppe crête (Hz).
+
+    Returns:
+        np.ndarray: Indices d'échantillons des pics.
+    """
+    hop = peak_hold_hop(sample_rate, peak_hold_rate)
+    frames, offsets = peak_hold_envelope(envelope, hop, local_maxima=False)
+    peaks, _ = find_peaks(interleave_candidates(frames), height=min_peak_height,
+                          distance=candidate_distance(sample_rate, hop))
+    return offsets[peaks // 2]
+
+
+def group_peak_times(peak_times, max_gap, min_peaks):
+    """
+    Regroupe des temps de pics triés en événements (noyau vectorisé).
+
+    Un nouvel événement commence dès que l'écart avec le pic précédent dépasse
+    `max_gap` ; seuls les événements d'au moins `min_peaks` pics sont gardés.
+    Les événements sont rendus sous forme de bornes d'index : l'événement k
+    est `peak_times[starts[k]:stops[k]]`.
+
+    Args:
+        peak_times (np.ndarray): Temps de pics triés (secondes).
+        max_gap (float): Écart maximal entre deux pics d'un même événement (secondes).
+        min_peaks (int): Nombre minimal de pics d'un événement valide.
+
+    Returns:
+        tuple: (starts, stops) tableaux d'index des événements valides.
+    """
+    n = len(peak_times)
+    if n == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    breaks = np.flatnonzero(np.diff(peak_times) > max_gap) + 1
+    starts = np.concatenate(([0], breaks))
+    stops = np.concatenate((breaks, [n]))
+    valid = stops - starts >= min_peaks
+    return starts[valid], stops[valid]
+
+
+def events_from_bounds(peak_times, starts, stops):
+    """Convertit les bornes de `group_peak_times` en listes de timestamps (secondes)."""
+    peak_times = np.asarray(peak_times, dtype=float)
+    return [peak_times[start:stop].tolist() for start, stop in zip(starts, stops)]
+
+
+def design_bandpass(sample_rate, target_freq, bandwidth):
+    """
+    Conçoit le filtre passe-bande Butterworth d'ordre 4 utilisé pour la détection.
+
+    Args:
+        sample_rate (int): Fréquence d'échantillonnage (Hz).
+        target_freq (float): Fréquence centrale (Hz).
+        bandwidth (float): Demi-largeur de bande (Hz).
+
+    Returns:
+        np.ndarray: Sections du second ordre (format `sos`).
+    """
+    nyquist = sample_rate / 2
+    low = (target_freq - bandwidth) / nyquist
+    high = (target_freq + bandwidth) / nyquist
+    return butter(N=4, Wn=[low, high], btype='band', output='sos')
+
+
+def bandpass_group_delay(sos, target_freq, sample_rate):
+    """
+    Estime le retard de groupe (secondes) d'un filtre à la fréquence cible.
+
+    Le filtre causal retarde l'enveloppe de ce retard alors que `filtfilt`
+    est à phase nulle : on le soustrait aux timestamps pour rester aligné
+    sur le mode batch.
+
+    Args:
+        sos (np.ndarray): Sections du second ordre du filtre.
+        target_freq (float): Fréquence à laquelle mesurer le retard (Hz).
+        sample_rate (int): Fréquence d'échantillonnage (Hz).
+
+    Returns:
+        float: Retard de groupe en secondes.
+    """
+    delta = 0.5
+    _, h = sosfreqz(sos, worN=[target_freq - delta, target_freq + delta], fs=sample_rate)
+    phase = np.unwrap(np.angle(h))
+    return float(-(phase[1] - phase[0]) / (2 * np.pi * 2 * delta))
+
+
+class StreamingPeakPicker:
+    """
+    Détection de pics par blocs, identique à `find_peaks(height, distance)`.
+
+    Le critère `distance` ne lie que des pics candidats (au-dessus de `height`)
+    distants de moins de `distance` échantillons. Dès qu'un écart d'au moins
+    `distance` sépare deux candidats, tout ce qui précède est indépendant de
+    la suite du flux et peut être tranché exactement.
+
+    Si une chaîne de candidats rapprochés dépasse `max_pending` échantillons
+    (son continu au-dessus du seuil), la zone est tranchée de force en gardant
+    `distance` échantillons de contexte de chaque côté, ce qui borne la mémoire
+    au prix d'écarts possibles avec le mode batch sur ces seules zones.
+    """
+
+    def __init__(self, height, distance, max_pending=None):
+        self.height = height
+        self.distance = max(1, int(np.ceil(distance)))
+        self.max_pending = max_pending if max_pending is not None else 64 * self.distance
+        self._buffer = np.empty(0, dtype=np.float32)
+        self._offset = 0   # Index global de self._buffer[0]
+        self._decided = 0  # Index global jusqu'où les pics ont été émis
+
+    @property
+    def pending_start(self):
+        """Index global le plus ancien qui peut encore être émis comme pic."""
+        return self._offset
+
+    def _select(self, buffer):
+        peaks, _ = find_peaks(buffer, height=self.height, distance=self.distance)
+        peaks = peaks + self._offset
+        return peaks[peaks >= self._decided]
+
+    def _keep(self, buffer, start):
+        self._buffer = buffer[start:]
+        self._offset += start
+
+    def push(self, values):
+        """
+        Ajoute un bloc d'enveloppe et retourne les pics désormais confirmés.
+
+        Args:
+            values (np.ndarray): Valeurs d'enveloppe du bloc.
+
+        Returns:
+            np.ndarray: Indices globaux des pics confirmés.
+        """
+        buffer = np.concatenate((self._buffer, values))
+        if len(buffer) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Début du plateau final : un pic futur ne peut apparaître qu'à partir d'ici
+        changes = np.flatnonzero(buffer != buffer[-1])
+        frontier = changes[-1] + 1 if len(changes) else 0
+
+        candidates, _ = find_peaks(buffer, height=self.height)
+        if len(candidates) == 0:
+            self._keep(buffer, max(0, frontier - 1))
+            return np.empty(0, dtype=np.int64)
+
+        following = np.append(candidates[1:], frontier)
+        independent = np.flatnonzero(following - candidates >= self.distance)
+
+        if len(independent):
+            last = independent[-1]
+            confirmed = self._select(buffer[:following[last] + 1])
+            self._decided = self._offset + candidates[last] + 1
+            self._keep(buffer, candidates[last] + 1)
+            return confirmed
+
+        if len(buffer) > self.max_pending:
+            limit = len(buffer) - self.distance
+            confirmed = self._select(buffer)
+            confirmed = confirmed[confirmed < self._offset + limit]
+            self._decided = self._offset + limit
+            self._keep(buffer, limit - self.distance - 1)
+            return confirmed
+
+        self._buffer = buffer
+        return np.empty(0, dtype=np.int64)
+
+    def flush(self):
+        """Tranche la fin du signal et retourne les derniers pics."""
+        confirmed = self._select(self._buffer)
+        self._decided = self._offset + len(self._buffer)
+        self._keep(self._buffer, len(self._buffer))
+        return confirmed
+
+
+class StreamingPeakHold:
+    """
+    Enveloppe crête par blocs, identique à `peak_hold_envelope` sur tout le flux.
+
+    Les trames sont alignées sur le début du flux. Une trame n'est émise que
+    lorsque l'échantillon qui la suit est connu (test de maximum local) ; la
+    fin de bloc est conservée et complétée par le bloc suivant.
+    """
+
+    def __init__(self, hop):
+        self.hop = hop
+        self._tail = np.empty(0, dtype=np.float32)
+        self._previous = np.inf  # Échantillon précédant self._tail
+        self._position = 0       # Index global d'échantillon de self._tail[0]
+
+    def _emit(self, buffer, count, following):
+        envelope, offsets = peak_hold_envelope(buffer[:count], self.hop, self._previous, following)
+        offsets += self._position
+        if count:
+            self._previous = buffer[count - 1]
+        self._tail = np.array(buffer[count:])
+        self._position += count
+        return envelope, offsets
+
+    def push(self, amplitude):
+        """
+        Ajoute un bloc d'amplitude et retourne les trames complètes.
+
+        Returns:
+            tuple: (maximum de chaque trame, index global d'échantillon de ce maximum)
+        """
+        buffer = np.concatenate((self._tail, amplitude)) if len(self._tail) else amplitude
+        count = max(0, len(buffer) - 1) // self.hop * self.hop
+        following = buffer[count] if count else np.inf
+        return self._emit(buffer, count, following)
+
+    def flush(self):
+        """Retourne les dernières trames, la dernière pouvant être incomplète."""
+        return self._emit(self._tail, len(self._tail), np.inf)
+
+
+class StreamingPeakGrouper:
+    """
+    Regroupement incrémental des temps de pics en événements de cloche.
+
+    Le groupe en cours est conservé entre deux blocs ; il n'est émis qu'une
+    fois refermé (pic suivant au-delà de `max_gap`, ou `close_before` quand le
+    flux a avancé de plus de `max_gap` sans pic) ou à la fin du flux.
+    """
+
+    def __init__(self, max_gap, min_peaks):
+        self.max_gap = max_gap
+        self.min_peaks = min_peaks
+        self._current = np.empty(0)
+
+    def push(self, peak_times):
+        """
+        Ajoute des temps de pics (triés) et retourne les événements refermés.
+
+        Args:
+            peak_times (iterable): Temps de pics en secondes.
+
+        Returns:
+            list: Événements valides refermés par ces pics.
+        """
+        times = np.concatenate((self._current, np.asarray(peak_times, dtype=float)))
+        breaks = np.flatnonzero(np.diff(times) > self.max_gap) + 1
+        if len(breaks) == 0:
+            self._current = times
+            return []
+
+        # Tout ce qui précède la dernière coupure est refermé
+        closed = times[:breaks[-1]]
+        self._current = times[breaks[-1]:]
+        return events_from_bounds(closed, *group_peak_times(closed, self.max_gap, self.min_peaks))
+
+    def close_before(self, time):
+        """
+        Referme le groupe en cours si plus aucun pic ne peut s'y rattacher.
+
+        Args:
+            time (float): Instant (secondes) avant lequel tous les pics ont été poussés.
+
+        Returns:
+            list: Le groupe refermé s'il est valide, sinon une liste vide.
+        """
+        if len(self._current) and time - self._current[-1] > self.max_gap:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """Referme le dernier groupe et le retourne s'il est valide."""
+        current, self._current = self._current, np.empty(0)
+        return events_from_bounds(current, *group_peak_times(current, self.max_gap, self.min_peaks))
+
+
+class StreamingBellDetector:
+    """
+    Détecteur de cloche incrémental à mémoire bornée.
+
+    Chaque bloc passe dans un filtre passe-bande causal à état (`sosfilt`),
+    puis dans l'enveloppe crête, la détection de pics et le regroupement,
+    dont les états sont conservés d'un bloc à l'autre. Les timestamps sont
+    corrigés du retard de groupe du filtre causal.
+
+    Avec `prefiltered=True`, les blocs sont une enveloppe déjà filtrée et
+    redressée (par exemple calculée par ffmpeg à basse fréquence) : seules
+    la détection de pics et le regroupement sont appliqués, avec les mêmes
+    `min_peak_height`, `peaks_in_row` et `max_gap`.
+
+    Exemple:
+        >>> detector = StreamingBellDetector(44100)
+        >>> for block in blocks:
+        ...     events.extend(detector.process_block(block))
+        >>> events.extend(detector.finish())
+    """
+
+    def __init__(self, sample_rate, target_freq=2080, bandwidth=50,
+                 min_peak_height=0.03, peaks_in_row=4, max_gap=0.6,
+                 prefiltered=False, prefilter_delay=0.0,
+                 peak_hold_rate=DEFAULT_PEAK_HOLD_RATE, tracer=None):
+        """
+        Args:
+            sample_rate (int): Fréquence d'échantillonnage du flux (Hz).
+            target_freq (float): Fréquence cible pour la détection de cloche (Hz).
+            bandwidth (float): Bande passante autour de la fréquence cible (Hz).
+            min_peak_height (float): Hauteur minimale de pic pour la détection.
+            peaks_in_row (int): Nombre minimal de pics consécutifs pour une détection.
+            max_gap (float): Gap maximal entre pics (secondes).
+            prefiltered (bool): True si les blocs sont déjà une enveloppe filtrée.
+            prefilter_delay (float): Retard introduit par le filtrage externe (secondes).
+            peak_hold_rate (float): Fréquence des trames de l'enveloppe crête (Hz),
+                0 pour chercher les pics sur chaque échantillon. Ignoré si `prefiltered`.
+            tracer (Tracer, optional): Traceur des étapes de chaque bloc (filtrage, pics, regroupement).
+        """
+        self.sample_rate = sample_rate
+        self.tracer = tracer
+        self.prefiltered = prefiltered
+        if prefiltered:
+            self._sos = None
+            self._delay = prefilter_delay
+        else:
+            self._sos = design_bandpass(sample_rate, target_freq, bandwidth)
+            self._zi = np.zeros((self._sos.shape[0], 2))
+            self._delay = bandpass_group_delay(self._sos, target_freq, sample_rate)
+        hop = 1 if prefiltered else peak_hold_hop(sample_rate, peak_hold_rate)
+        self._hold = StreamingPeakHold(hop) if hop > 1 else None
+        # Index d'échantillon du maximum de chaque trame encore susceptible d'être un pic
+        self._frame_offsets = np.empty(0, dtype=np.int64)
+        self._frame_base = 0
+        if self._hold is None:
+            self._peaks = StreamingPeakPicker(min_peak_height, sample_rate * PEAK_DISTANCE_SECONDS)
+        else:
+            self._peaks = StreamingPeakPicker(min_peak_height, candidate_distance(sample_rate, hop))
+        self._grouper = StreamingPeakGrouper(max_gap, peaks_in_row)
+
+    def _to_times(self, peaks):
+        return np.maximum(peaks / self.sample_rate - self._delay, 0.0)
+
+    def _pick(self, amplitude, final=False):
+        """Détecte les pics confirmés et retourne leurs index d'échantillons."""
+        if self._hold is None:
+            peaks = self._peaks.push(amplitude)
+            return np.concatenate((peaks, self._peaks.flush())) if final else peaks
+
+        envelope, offsets = self._hold.push(amplitude)
+        if final:
+            tail_envelope, tail_offsets = self._hold.flush()
+            envelope = np.concatenate((envelope, tail_envelope))
+            offsets = np.concatenate((offsets, tail_offsets))
+        self._frame_offsets = np.concatenate((self._frame_offsets, offsets))
+
+        candidates = self._peaks.push(interleave_candidates(envelope))
+        if final:
+            candidates = np.concatenate((candidates, self._peaks.flush()))
+        peaks = self._frame_offsets[candidates // 2 - self._frame_base]
+
+        # Oublier les trames qui ne peuvent plus être émises
+        drop = self._peaks.pending_start // 2 - self._frame_base
+        self._frame_offsets = self._frame_offsets[drop:]
+        self._frame_base += drop
+        return peaks
+
+    def process_block(self, block):
+        """
+        Traite un bloc d'échantillons audio mono.
+
+        Args:
+            block (np.ndarray): Échantillons du bloc (float), ou enveloppe si `prefiltered`.
+
+        Returns:
+            list: Événements de cloche refermés pendant ce bloc.
+        """
+        if self.prefiltered:
+            amplitude = np.asarray(block, dtype=np.float32)
+        else:
+            with trace_span(self.tracer, "filter", "detection", samples=len(block)):
+                filtered, self._zi = sosfilt(self._sos, block, zi=self._zi)
+                amplitude = np.abs(filtered).astype(np.float32)
+        with trace_span(self.tracer, "peak-pick", "detection"):
+            peaks = self._pick(amplitude)
+        with trace_span(self.tracer, "group", "detection"):
+            events = self._grouper.push(self._to_times(peaks))
+            # Émettre un événement dès que le flux a dépassé son dernier pic de plus de max_gap
+            return events + self._grouper.close_before(self._to_times(self._pending_sample()))
+
+    def _pending_sample(self):
+        """Index du plus ancien échantillon qui peut encore donner un pic."""
+        if self._hold is None:
+            return self._peaks.pending_start
+        # Les trames sont alignées sur le début du flux : la trame k commence à k * hop
+        return self._peaks.pending_start // 2 * self._hold.hop
+
+    def finish(self):
+        """
+        Termine le flux et retourne les derniers événements.
+
+        Returns:
+            list: Événements restants (dernier groupe compris).
+        """
+        events = self._grouper.push(self._to_times(self._pick(np.empty(0, dtype=np.float32), final=True)))
+        return events + self._grouper.flush()
+
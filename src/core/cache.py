@@ -0,0 +1,410 @@
+"""
+Cache disque des analyses audio, persistant d'une exécution à l'autre.
+
+Relancer le découpage sur les mêmes vidéos pour changer le logo ou la durée
+des rounds n'a pas besoin de réextraire l'audio ni de refaire la détection.
+
+- `file_fingerprint` identifie rapidement une vidéo source : chemin, taille,
+  date de modification et empreinte de quelques extraits du contenu (le fichier
+  n'est pas lu en entier).
+- `DiskLRUCache` stocke des tableaux NumPy (un fichier `.npz` par entrée) dans
+  un répertoire borné en octets ; les entrées les moins récemment utilisées sont
+  évincées en premier.
+- `MetadataCache` conserve dans un petit fichier JSON les métadonnées sondées
+  de chaque vidéo (ex. date de création), indexées par l'identité du fichier
+  (chemin, taille, mtime), pour trier les sources sans relancer ffprobe.
+- `AnalysisCache` range dans ce cache les événements de cloche détectés et
+  l'audio analysé (enveloppe réduite, ou audio décodé complet en PCM 16 bits
+  sur demande), sous des clés dérivées des empreintes des sources et des
+  paramètres d'extraction et de détection.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from core.audio_source import PCM16_SCALE, to_pcm16
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale par défaut du cache disque (octets)
+DEFAULT_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+
+# Nombre et taille des extraits lus pour l'empreinte d'un fichier
+FINGERPRINT_SAMPLES = 8
+FINGERPRINT_SAMPLE_BYTES = 64 * 1024
+
+# Nom du fichier du cache de métadonnées dans le répertoire du cache
+METADATA_NAME = "metadata.json"
+
+# Extension des entrées et fichier des compteurs du cache
+ENTRY_SUFFIX = ".npz"
+STATS_NAME = "stats.json"
+
+
+def file_fingerprint(path, samples=FINGERPRINT_SAMPLES, sample_bytes=FINGERPRINT_SAMPLE_BYTES):
+    """
+    Empreinte rapide d'un fichier : chemin absolu, taille, mtime et extraits du contenu.
+
+    Les extraits sont répartis uniformément du début à la fin du fichier, si
+    bien qu'une vidéo réécrite ou tronquée change d'empreinte sans qu'il faille
+    la lire en entier.
+
+    Args:
+        path (str): Chemin du fichier.
+        samples (int): Nombre d'extraits lus.
+        sample_bytes (int): Taille de chaque extrait (octets).
+
+    Returns:
+        str: Empreinte hexadécimale.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    last = max(0, stat.st_size - sample_bytes)
+    with open(path, "rb") as f:
+        for offset in sorted({last * i // max(1, samples - 1) for i in range(samples)}):
+            f.seek(offset)
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+
+def file_checksum(path, chunk_bytes=1024 * 1024):
+    """
+    Somme de contrôle SHA-256 de tout le contenu d'un fichier.
+
+    Returns:
+        str: Somme de contrôle hexadécimale.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(*parts):
+    """Clé d'entrée stable pour des parties sérialisables en JSON."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DiskLRUCache:
+    """
+    Cache LRU de tableaux NumPy sur disque, borné en octets.
+
+    Chaque entrée est un fichier `<clé>.npz` ; sa date de modification sert
+    d'horodatage d'utilisation (mise à jour à chaque lecture). Les compteurs de
+    succès et d'échecs sont tenus en mémoire et ajoutés à `stats.json` par
+    `flush_stats`, une fois par exécution.
+
+    Exemple:
+        >>> cache = DiskLRUCache("temp/analysis_cache", max_bytes=512 * 1024 * 1024)
+        >>> cache.put("cle", samples=y)
+        >>> cache.get("cle")["samples"]
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Args:
+            directory (str): Répertoire du cache (créé au besoin).
+            max_bytes (int): Taille maximale cumulée des entrées (octets).
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Une instance peut être partagée entre sessions traitées en parallèle (mode batch)
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _entries(self):
+        """Entrées du cache : liste de (date d'utilisation, taille, chemin)."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _saved_counters(self):
+        try:
+            with open(os.path.join(self.directory, STATS_NAME)) as f:
+                return collections.Counter(json.load(f))
+        except (OSError, ValueError):
+            return collections.Counter()
+
+    def flush_stats(self):
+        """
+        Ajoute les succès et échecs comptés depuis le dernier appel à `stats.json`.
+
+        Le fichier est réécrit de façon atomique (fichier temporaire puis
+        renommage) : une exécution concurrente ne le trouve jamais à moitié écrit.
+        """
+        with self._lock:
+            if not self._counters:
+                return
+            counters = self._saved_counters() + self._counters
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(dict(counters), f)
+            os.replace(temp_path, os.path.join(self.directory, STATS_NAME))
+            self._counters.clear()
+
+    def get(self, key):
+        """
+        Lit une entrée.
+
+        Returns:
+            dict: Tableaux de l'entrée, ou None si elle est absente ou illisible.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            if os.path.exists(path):
+                logger.warning(f"Entrée de cache illisible, ignorée: {path} ({e})")
+            self._count("misses")
+            return None
+        # Marquer l'entrée comme la plus récemment utilisée (elle a pu être évincée entre-temps)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self._count("hits")
+        return arrays
+
+    def put(self, key, **arrays):
+        """
+        Écrit une entrée puis évince les plus anciennes au-delà de `max_bytes`.
+
+        L'entrée est écrite dans un fichier temporaire puis renommée, si bien
+        qu'une exécution interrompue ne laisse jamais d'entrée partielle. Une
+        entrée dont les tableaux dépassent à eux seuls `max_bytes` n'est pas écrite.
+
+        Returns:
+            bool: True si l'entrée a été conservée.
+        """
+        if sum(np.asarray(array).nbytes for array in arrays.values()) > self.max_bytes:
+            logger.debug(f"Entrée trop volumineuse pour le cache: {key}")
+            return False
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            if os.path.getsize(temp_path) > self.max_bytes:
+                logger.debug(f"Entrée trop volumineuse pour le cache: {key}")
+                return False
+            os.replace(temp_path, self._path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._shrink()
+        return os.path.exists(self._path(key))
+
+    def _shrink(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            # Évincer les entrées les moins récemment utilisées
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                logger.debug(f"Entrée de cache évincée: {path}")
+
+    def clear(self):
+        """Vide le cache et remet ses compteurs à zéro."""
+        for _, _, path in self._entries():
+            os.remove(path)
+        with self._lock:
+            self._counters.clear()
+        stats_path = os.path.join(self.directory, STATS_NAME)
+        if os.path.exists(stats_path):
+            os.remove(stats_path)
+
+    def stats(self):
+        """
+        Returns:
+            dict: entries, bytes, max_bytes, hits, misses (y compris ceux pas encore écrits).
+        """
+        entries = self._entries()
+        with self._lock:
+            counters = self._saved_counters() + self._counters
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+        }
+
+
+class MetadataCache:
+    """
+    Métadonnées des vidéos sources, persistées dans un fichier JSON.
+
+    Une entrée est indexée par l'identité du fichier (chemin absolu, taille,
+    mtime) : une vidéo remplacée ou modifiée est sondée à nouveau. Les accès
+    sont protégés par un verrou (sondage concurrent) ; `save` écrit le fichier
+    seulement s'il a changé.
+
+    Exemple:
+        >>> cache = MetadataCache("temp/analysis_cache/metadata.json")
+        >>> cache.get("video.mp4") or cache.put("video.mp4", {"creation_time": None})
+        >>> cache.save()
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Chemin du fichier JSON (créé à la première sauvegarde).
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path) as f:
+                self._entries = json.load(f)
+            if not isinstance(self._entries, dict):
+                raise ValueError("format inattendu")
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache de métadonnées illisible, ignoré: {path} ({e})")
+            self._entries = {}
+
+    @staticmethod
+    def _identity(video_path):
+        path = os.path.abspath(video_path)
+        stat = os.stat(path)
+        return path, f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def get(self, video_path):
+        """
+        Returns:
+            dict: Métadonnées enregistrées pour cette version du fichier, ou None.
+        """
+        try:
+            path, identity = self._identity(video_path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry.get('identity') != identity:
+            return None
+        return entry['metadata']
+
+    def put(self, video_path, metadata):
+        """Enregistre les métadonnées de la version actuelle du fichier."""
+        path, identity = self._identity(video_path)
+        with self._lock:
+            self._entries[path] = {'identity': identity, 'metadata': metadata}
+            self._dirty = True
+
+    def save(self):
+        """Écrit le cache sur disque s'il a changé (écriture atomique)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AnalysisCache:
+    """
+    Audio extrait et événements de cloche d'une session, mis en cache par source.
+
+    L'audio décodé (non enveloppe) est stocké en PCM 16 bits, sa résolution
+    d'origine, soit deux fois moins qu'en float32. L'audio est indexé par les empreintes des vidéos et les paramètres
+    d'extraction ; les événements le sont en plus par les paramètres de
+    détection. Changer le logo ou la durée des rounds réutilise donc les
+    événements, et changer un paramètre de détection réutilise l'audio.
+    """
+
+    def __init__(self, disk_cache, video_files):
+        """
+        Args:
+            disk_cache (DiskLRUCache): Cache disque sous-jacent.
+            video_files (list): Vidéos sources, dans l'ordre de la session.
+        """
+        self.disk_cache = disk_cache
+        self.fingerprints = [file_fingerprint(video) for video in video_files]
+
+    def audio_key(self, extraction_params):
+        """Clé de l'audio extrait avec `extraction_params`."""
+        return cache_key("audio", self.fingerprints, extraction_params)
+
+    def events_key(self, extraction_params, detection_params):
+        """Clé des événements détectés avec `detection_params` sur cet audio."""
+        return cache_key("events", self.fingerprints, extraction_params, detection_params)
+
+    def load_audio(self, extraction_params):
+        """
+        Returns:
+            tuple: (échantillons, fréquence, is_envelope, latence), ou None.
+        """
+        entry = self.disk_cache.get(self.audio_key(extraction_params))
+        if entry is None:
+            return None
+        samples = entry['samples']
+        if samples.dtype == np.int16:
+            samples = np.multiply(samples, PCM16_SCALE, dtype=np.float32)
+        return samples, int(entry['sample_rate']), bool(entry['is_envelope']), float(entry['latency'])
+
+    def store_audio(self, extraction_params, samples, sample_rate, is_envelope=False, latency=0.0):
+        """Met en cache l'audio extrait ; retourne True s'il a été conservé."""
+        if is_envelope:
+            samples = np.asarray(samples, dtype=np.float32)
+        else:
+            samples = to_pcm16(samples)
+        return self.disk_cache.put(self.audio_key(extraction_params), samples=samples,
+                                   sample_rate=sample_rate, is_envelope=is_envelope, latency=latency)
+
+    def load_events(self, extraction_params, detection_params):
+        """
+        Returns:
+            list: Événements (listes de timestamps en secondes), ou None.
+        """
+        entry = self.disk_cache.get(self.events_key(extraction_params, detection_params))
+        if entry is None:
+            return None
+        bounds = np.cumsum(entry['counts'])
+        return [times.tolist() for times in np.split(entry['times'], bounds[:-1])] if len(bounds) else []
+
+    def store_events(self, extraction_params, detection_params, valid_events):
+        """Met en cache les événements détectés ; retourne True s'ils ont été conservés."""
+        times = np.array([t for group in valid_events for t in group], dtype=float)
+        counts = np.array([len(group) for group in valid_events], dtype=np.int64)
+        return self.disk_cache.put(self.events_key(extraction_params, detection_params), times=times, counts=counts)
@@ -0,0 +1,1006 @@
+"""
+Stratégies de découpage des rounds (pattern Strategy, voir patterns-conception.md).
+
+- `ReencodeCutter` : comportement historique. Chaque round est réencodé en
+  libx264 avec la date incrustée et le logo superposé ; la coupe tombe
+  exactement sur `start_time`. Le round est lu directement dans le ou les
+  fichiers sources qu'il recouvre (`core.timeline`).
+- `StreamCopyCutter` : mode rapide pour une relecture. Les flux sont copiés
+  (`-c copy`) sans réencodage ni habillage ; la coupe commence sur l'image clé
+  qui précède `start_time`, le round démarre donc un peu plus tôt que demandé.
+- `GraphCutter` : tous les rounds sont produits par un seul processus ffmpeg.
+  Les sources sont décodées une seule fois ; le graphe de filtres répartit les
+  images (split/trim) vers un encodeur habillé par round. Coupe exacte ; si le
+  graphe échoue, les rounds sont réencodés un par un.
+- `SmartCutCutter` : coupe exacte sans tout réencoder. Seules les images entre
+  `start_time` et l'image clé suivante sont réencodées, avec le codec et les
+  paramètres de la source, le reste de la vidéo est copié, puis les morceaux
+  sont joints par le démultiplexeur concat. Sans habillage ; si la source n'a
+  pas d'encodeur compatible, si la découpe échoue ou si la jonction ne se
+  décode pas proprement, le round est entièrement réencodé.
+
+Chaque découpe renvoie une entrée de manifeste qui indique le
+début demandé, le début réel et l'écart entre les deux (`drift`, en secondes).
+`write_manifest` écrit ces entrées dans `manifest.json` du répertoire de sortie ;
+`IncrementalRun` y ajoute la signature et la somme de contrôle de chaque round
+pour qu'une nouvelle exécution ne refasse que les rounds absents, en échec ou
+modifiés.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from datetime import timedelta
+
+import numpy as np
+
+from core.cache import file_checksum
+from core.governor import EncodeGovernor, apply_resources
+from core.timeline import SourceTimeline, concat_inputs
+from core.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+# Modes de découpage disponibles en ligne de commande
+CUT_MODES = ('reencode', 'copy', 'smart', 'graph')
+
+# Réglages des rounds réencodés (vidéo et audio)
+VIDEO_ENCODING = ["-c:v", "libx264", "-b:v", "4M", "-preset", "fast"]
+AUDIO_ENCODING = ["-c:a", "aac", "-b:a", "48k"]
+
+# Encodeur et filtre de flux (paramètres de séquence dans le flux) par codec source
+# pour la tête réencodée du mode 'smart' ; les autres codecs sont entièrement réencodés
+SMART_CUT_CODECS = {
+    'h264': ('libx264', 'h264_mp4toannexb'),
+    'hevc': ('libx265', 'hevc_mp4toannexb'),
+}
+
+# Durée décodée après la jonction pour valider une découpe 'smart' (secondes)
+SMART_CUT_CHECK_SECONDS = 2.0
+
+# Nom du manifeste écrit dans le répertoire de sortie
+MANIFEST_NAME = "manifest.json"
+
+# Verrou pour la sortie console (les rounds sont découpés en parallèle)
+console_lock = threading.Lock()
+
+
+def round_output_file(round_number, creation_date, output_root=""):
+    """Chemin du fichier de sortie d'un round (sous `output_root`, par défaut le répertoire courant)."""
+    return os.path.join(output_root, f"{creation_date}-boxing", f"{creation_date}_round_{round_number:02d}.mp4")
+
+
+def preceding_keyframe(keyframe_times, start_time):
+    """
+    Instant de la dernière image clé au plus tard à `start_time`.
+
+    Args:
+        keyframe_times (np.ndarray): Instants des images clés, triés (secondes).
+        start_time (float): Début demandé (secondes).
+
+    Returns:
+        float: Instant de l'image clé, 0.0 si aucune ne précède `start_time`.
+    """
+    index = np.searchsorted(keyframe_times, start_time, side='right') - 1
+    return float(keyframe_times[index]) if index >= 0 else 0.0
+
+
+def following_keyframe(keyframe_times, start_time):
+    """
+    Instant de la première image clé à partir de `start_time`.
+
+    Returns:
+        float: Instant de l'image clé, None si aucune ne suit `start_time`.
+    """
+    index = np.searchsorted(keyframe_times, start_time, side='left')
+    return float(keyframe_times[index]) if index < len(keyframe_times) else None
+
+
+def keyframes_from_probe(probe, offset=0.0):
+    """
+    Extrait les instants des images clés d'une sortie JSON de ffprobe.
+
+    Args:
+        probe (dict): Sortie de `ffprobe -show_entries packet=pts_time,flags`.
+        offset (float): Décalage ajouté (position du fichier dans la liste concat).
+
+    Returns:
+        np.ndarray: Instants des images clés, triés (secondes).
+    """
+    times = [float(packet['pts_time']) for packet in probe.get('packets', [])
+             if 'K' in packet.get('flags', '') and packet.get('pts_time', 'N/A') != 'N/A']
+    return np.sort(np.asarray(times, dtype=float)) + offset
+
+
+def probe_keyframes(timeline):
+    """
+    Liste les images clés vidéo de la concaténation des sources de `timeline`.
+
+    Un appel ffprobe par fichier lit les paquets vidéo sans les décoder ; les
+    instants sont décalés du début du fichier sur la chronologie de la session.
+
+    Args:
+        timeline (SourceTimeline): Chronologie des vidéos sources.
+
+    Returns:
+        np.ndarray: Instants des images clés sur la chronologie concaténée (secondes).
+    """
+    keyframes = []
+    for source in timeline.sources:
+        command = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-print_format', 'json',
+            source.path
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe a échoué sur {source.path}: {result.stderr.strip()}")
+        keyframes.append(keyframes_from_probe(json.loads(result.stdout), source.offset))
+    return np.concatenate(keyframes) if keyframes else np.empty(0)
+
+
+def probe_video_stream(timeline):
+    """
+    Décrit le flux vidéo commun aux sources de `timeline`.
+
+    Args:
+        timeline (SourceTimeline): Chronologie des vidéos sources.
+
+    Returns:
+        dict: Champs ffprobe du premier flux vidéo (codec_name, profile, level,
+            pix_fmt, width, height, time_base), None si les sources diffèrent.
+    """
+    fields = ('codec_name', 'profile', 'level', 'pix_fmt', 'width', 'height', 'time_base')
+    streams = []
+    for source in timeline.sources:
+        command = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'stream=' + ','.join(fields),
+            '-print_format', 'json',
+            source.path
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe a échoué sur {source.path}: {result.stderr.strip()}")
+        stream = (json.loads(result.stdout).get('streams') or [{}])[0]
+        streams.append({field: stream.get(field) for field in fields})
+    if not streams or any(stream != streams[0] for stream in streams[1:]):
+        return None
+    return streams[0]
+
+
+def smart_cut_encoding(video_stream):
+    """
+    Réglages d'encodage d'une tête de round compatible avec le flux source.
+
+    La tête doit pouvoir être jointe au reste du round copié sans réencodage :
+    même codec, profil, niveau, format de pixels et résolution.
+
+    Args:
+        video_stream (dict): Flux vidéo source (`probe_video_stream`).
+
+    Returns:
+        tuple: (options d'encodage ffmpeg, filtre de flux Annex B), None si
+            aucun encodeur compatible n'est disponible.
+    """
+    if not video_stream or video_stream.get('codec_name') not in SMART_CUT_CODECS:
+        return None
+    encoder, bitstream_filter = SMART_CUT_CODECS[video_stream['codec_name']]
+    encoding = ["-c:v", encoder, "-b:v", "4M", "-preset", "fast"]
+
+    profile = (video_stream.get('profile') or "").lower().replace("constrained ", "").replace(" ", "")
+    if profile:
+        encoding += ["-profile:v", profile]
+    level = video_stream.get('level')
+    if level and level > 0:
+        if encoder == 'libx264':
+            encoding += ["-level:v", f"{level / 10:g}"]
+        else:
+            # ffprobe donne le niveau HEVC multiplié par 30
+            encoding += ["-x265-params", f"level-idc={level / 30:g}:log-level=error"]
+    if video_stream.get('pix_fmt'):
+        encoding += ["-pix_fmt", video_stream['pix_fmt']]
+    if video_stream.get('width') and video_stream.get('height'):
+        encoding += ["-s", f"{video_stream['width']}x{video_stream['height']}"]
+    return encoding, bitstream_filter
+
+
+def write_keyframe_list(list_path, timeline, keyframe_time):
+    """
+    Écrit une liste concat qui démarre sur l'image clé `keyframe_time`.
+
+    Le fichier qui contient l'image clé est ouvert avec la directive `inpoint`,
+    suivi des fichiers suivants. La recherche se fait ainsi dans ce seul fichier :
+    un `-ss` appliqué au démultiplexeur concat peut retomber sur le GOP précédent
+    et ajouter des paquets masqués en tête de la copie.
+
+    Args:
+        list_path (str): Liste concat à écrire.
+        timeline (SourceTimeline): Chronologie des vidéos sources.
+        keyframe_time (float): Instant de l'image clé sur la chronologie concaténée.
+    """
+    first = timeline.source_index(keyframe_time)
+    with open(list_path, "w") as f:
+        for index, source in enumerate(timeline.sources[first:]):
+            f.write(f"file '{source.path}'\n")
+            if index == 0 and keyframe_time > source.offset:
+                # Précision de ffprobe : un arrondi sous l'instant de l'image clé
+                # ferait reculer la copie jusqu'à l'image clé précédente
+                f.write(f"inpoint {keyframe_time - source.offset:.6f}\n")
+
+
+class RoundCutter:
+    """
+    Interface des stratégies de découpage : `cut` produit un round.
+
+    Les sous-classes définissent `commands`, la suite de commandes ffmpeg qui
+    produit le fichier du round dans un répertoire de travail temporaire.
+    """
+
+    mode = None
+
+    # Logo superposé aux rounds (None sans habillage)
+    logo_path = None
+
+    # Répertoire contenant les répertoires `<date>-boxing` (vide : répertoire courant)
+    output_root = ""
+
+    # Suivi de progression des ffmpeg lancés (ProgressMonitor, None sans suivi)
+    monitor = None
+
+    # Traceur des rounds découpés (Tracer, None sans trace)
+    tracer = None
+
+    def settings(self):
+        """Réglages d'encodage enregistrés dans le manifeste ; un round est refait s'ils changent."""
+        return dict(mode=self.mode)
+
+    def plan(self, start_time, delta_sec):
+        """
+        Début réel et durée de la coupe pour un round demandé.
+
+        Returns:
+            tuple: (actual_start, duration) en secondes.
+        """
+        return start_time, delta_sec
+
+    def commands(self, temp_video_list, output_file, actual_start, duration, creation_date, work_dir):
+        """
+        Commandes ffmpeg produisant `output_file`, à exécuter dans l'ordre.
+
+        Returns:
+            list: Commandes, None si la stratégie ne peut pas découper ce round.
+        """
+        raise NotImplementedError
+
+    def execute(self, command, name, duration=None):
+        """
+        Exécute une commande ffmpeg, suivie par `monitor` s'il est défini.
+
+        Args:
+            command (list): Commande ffmpeg.
+            name (str): Nom de la tâche dans les bilans de progression.
+            duration (float, optional): Durée de sortie attendue (secondes).
+
+        Returns:
+            subprocess.CompletedProcess: Résultat (sorties capturées en texte).
+        """
+        if self.monitor is None:
+            return subprocess.run(command, capture_output=True, text=True)
+        return self.monitor.run(command, name, duration)
+
+    def run(self, temp_video_list, output_file, actual_start, duration, creation_date, resources=None):
+        """
+        Produit `output_file`.
+
+        Args:
+            resources (JobResources, optional): Threads et cœurs attribués par le gouverneur.
+
+        Returns:
+            tuple: (résultat subprocess de la dernière commande exécutée ou None,
+                mode effectivement utilisé)
+        """
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(output_file) or None) as work_dir:
+            result = None
+            commands = self.commands(temp_video_list, output_file, actual_start, duration,
+                                     creation_date, work_dir) or []
+            for step, cmd in enumerate(commands, 1):
+                # Seule la dernière commande produit le round entier : les étapes intermédiaires n'ont pas d'ETA
+                last = step == len(commands)
+                name = os.path.basename(output_file) + ("" if len(commands) == 1 else f" ({step}/{len(commands)})")
+                result = self.execute(apply_resources(cmd, resources), name, duration if last else None)
+                if result.returncode != 0:
+                    break
+        return result, self.mode
+
+    def cut(self, round_params, temp_video_list, resources=None):
+        """
+        Découpe un round.
+
+        Args:
+            round_params (tuple): (round_number, start_time, delta_sec, creation_date)
+            temp_video_list (str): Chemin vers la liste concat des vidéos sources.
+            resources (JobResources, optional): Threads et cœurs attribués par le gouverneur.
+
+        Returns:
+            dict: Entrée de manifeste (round, output_file, mode, requested_start,
+                actual_start, drift, duration, success).
+        """
+        round_number, start_time, delta_sec, creation_date = round_params
+        start_time = max(0.0, start_time)
+        output_file = round_output_file(round_number, creation_date, self.output_root)
+        actual_start, duration = self.plan(start_time, delta_sec)
+
+        with trace_span(self.tracer, f"round {round_number}", "encode", duration=duration,
+                        threads=resources.threads if resources is not None else None):
+            result, mode = self.run(temp_video_list, output_file, actual_start, duration, creation_date, resources)
+        return report_cut(round_number, output_file, mode, start_time, actual_start, duration, result)
+
+    def cut_all(self, round_params_list, temp_video_list, max_workers=None, governor=None, on_cut=None):
+        """
+        Découpe tous les rounds en parallèle, au rythme fixé par le gouverneur d'encodage.
+
+        Args:
+            round_params_list (iterable): Tuples (round_number, start_time, delta_sec, creation_date).
+            temp_video_list (str): Chemin vers la liste concat des vidéos sources.
+            max_workers (int, optional): Nombre maximum de rounds découpés en parallèle.
+            governor (EncodeGovernor, optional): Répartition du CPU (défaut : gouverneur
+                limité à `max_workers` encodages).
+            on_cut (callable, optional): Appelé avec l'entrée de manifeste de chaque round terminé.
+
+        Returns:
+            list: Entrées de manifeste des rounds découpés, dans l'ordre de fin.
+        """
+        if governor is None:
+            governor = EncodeGovernor(max_jobs=max_workers)
+
+        def cut_round(params, resources):
+            return self.cut(params, temp_video_list, resources)
+
+        cuts = []
+        # Attendre la fin de toutes les tâches et collecter les entrées du manifeste
+        for future in governor.map(cut_round, round_params_list, media_seconds=lambda params: params[2]):
+            try:
+                # Le résultat est déjà journalisé par report_cut
+                cuts.append(future.result())
+            except Exception as e:
+                logger.error(f"Erreur lors de la création d'un round: {e}")
+                continue
+            if on_cut is not None:
+                on_cut(cuts[-1])
+        return cuts
+
+
+def report_cut(round_number, output_file, mode, start_time, actual_start, duration, result):
+    """
+    Journalise le résultat d'une découpe et construit son entrée de manifeste.
+
+    Args:
+        result (subprocess.CompletedProcess): Résultat de la dernière commande ffmpeg, ou None.
+
+    Returns:
+        dict: Entrée de manifeste (round, output_file, mode, requested_start,
+            actual_start, drift, duration, success).
+    """
+    success = result is not None and result.returncode == 0
+
+    # Afficher le résultat avec verrouillage pour éviter les mélanges de sortie
+    with console_lock:
+        if success:
+            hh_mm_ss = str(timedelta(seconds=actual_start)).split(".")[0]
+            delta_str = str(timedelta(seconds=duration)).split(".")[0].rjust(8, "0")
+            logger.info(f"Création du round {round_number}: {output_file} ({hh_mm_ss} pour {delta_str})")
+        else:
+            logger.error(f"Échec de la création du round {round_number}: {output_file}")
+            if result is not None:
+                logger.debug("FFmpeg stdout: %s", result.stdout)
+                logger.debug("FFmpeg stderr: %s", result.stderr)
+
+    return dict(
+        round=round_number,
+        output_file=output_file,
+        mode=mode,
+        requested_start=round(start_time, 3),
+        actual_start=round(actual_start, 3),
+        drift=round(start_time - actual_start, 3),
+        duration=round(duration, 3),
+        success=success,
+    )
+
+
+def branding_filter(video_label, logo_label, creation_date, output_label):
+    """
+    Chaîne de filtres de l'habillage : date incrustée en haut à gauche, logo en haut à droite.
+
+    Args:
+        video_label (str): Étiquette de la vidéo d'entrée (ex. '0:v').
+        logo_label (str): Étiquette de l'image du logo (ex. '1:v').
+        creation_date (str): Date affichée.
+        output_label (str): Étiquette de la vidéo habillée.
+
+    Returns:
+        str: Fragment de `-filter_complex`.
+    """
+    return (
+        "[{video}]drawtext=text='{date}':"
+        "fontsize=24:x=10:y=10:fontcolor=white:box=1:boxcolor=black@0.5[{out}_text];"
+        "[{out}_text][{logo}]overlay=W-w-10:10[{out}]"
+    ).format(video=video_label, logo=logo_label, date=creation_date, out=output_label)
+
+
+class ReencodeCutter(RoundCutter):
+    """
+    Réencode le round en libx264 avec la date et le logo (coupe exacte).
+
+    Avec une chronologie des sources, le round est lu directement dans le ou les
+    fichiers qu'il recouvre (recherche rapide par fichier) ; sinon la liste concat
+    complète est utilisée.
+    """
+
+    mode = 'reencode'
+
+    def __init__(self, logo_path, timeline=None):
+        """
+        Args:
+            logo_path (str): Chemin vers le fichier logo superposé.
+            timeline (SourceTimeline, optional): Chronologie des vidéos sources.
+        """
+        self.logo_path = logo_path
+        self.timeline = timeline
+
+    @classmethod
+    def from_videos(cls, video_files, logo_path):
+        """Crée le découpeur avec la chronologie des sources, ou sur la liste concat si elle est indisponible."""
+        try:
+            timeline = SourceTimeline.from_videos(video_files) if video_files else None
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning(f"Chronologie des sources indisponible, recherche dans la liste concat: {e}")
+            timeline = None
+        return cls(logo_path, timeline)
+
+    def settings(self):
+        return dict(mode=self.mode, video=VIDEO_ENCODING, audio=AUDIO_ENCODING)
+
+    def inputs(self, temp_video_list, actual_start, duration, audio=True, video=True):
+        """Entrées ffmpeg du round (`RoundInputs`)."""
+        if self.timeline is None:
+            return concat_inputs(temp_video_list, actual_start, duration)
+        return self.timeline.round_inputs(temp_video_list, actual_start, duration, audio=audio, video=video)
+
+    def commands(self, temp_video_list, output_file, actual_start, duration, creation_date, work_dir):
+        inputs = self.inputs(temp_video_list, actual_start, duration)
+        audio_map = ["-map", inputs.audio] if inputs.audio else []
+        return [[
+            "nice", "-n", "10",
+            "ffmpeg", "-y",
+        ] + inputs.args + [
+            "-i", self.logo_path,
+            "-filter_complex",
+            inputs.filter + branding_filter(inputs.video, f"{inputs.count}:v", creation_date, "outv"),
+            "-map", "[outv]",
+        ] + audio_map + AUDIO_ENCODING + VIDEO_ENCODING + [
+            "-movflags", "+faststart",
+            output_file,
+        ]]
+
+
+class StreamCopyCutter(RoundCutter):
+    """
+    Copie les flux sans réencodage à partir de l'image clé précédant le début.
+
+    La durée est allongée de l'écart pour que le round se termine toujours à
+    `start_time + delta_sec`.
+    """
+
+    mode = 'copy'
+
+    def __init__(self, keyframe_times, timeline):
+        """
+        Args:
+            keyframe_times (array-like): Instants des images clés sur la chronologie
+                concaténée (secondes).
+            timeline (SourceTimeline): Chronologie des vidéos sources.
+        """
+        self.keyframe_times = np.sort(np.asarray(keyframe_times, dtype=float))
+        self.timeline = timeline
+
+    @classmethod
+    def from_videos(cls, video_files, **kwargs):
+        """Crée le découpeur en sondant la chronologie et les images clés des vidéos sources."""
+        timeline = SourceTimeline.from_videos(video_files)
+        keyframe_times = probe_keyframes(timeline)
+        logger.info(f"{len(keyframe_times)} images clés trouvées dans {len(video_files)} vidéo(s)")
+        return cls(keyframe_times, timeline, **kwargs)
+
+    def plan(self, start_time, delta_sec):
+        actual_start = preceding_keyframe(self.keyframe_times, start_time)
+        return actual_start, delta_sec + (start_time - actual_start)
+
+    def copy_command(self, keyframe_time, duration, output_file, list_path, audio=True,
+                     output_options=("-movflags", "+faststart")):
+        """Commande de copie des flux depuis l'image clé `keyframe_time`."""
+        write_keyframe_list(list_path, self.timeline, keyframe_time)
+        return [
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0",
+            "-i", list_path,
+            "-t", f"{duration:.6f}",
+            "-map", "0:v",
+        ] + (["-map", "0:a?"] if audio else ["-an"]) + [
+            "-c", "copy",
+        ] + list(output_options) + [
+            output_file,
+        ]
+
+    def commands(self, temp_video_list, output_file, actual_start, duration, creation_date, work_dir):
+        return [self.copy_command(actual_start, duration, output_file, os.path.join(work_dir, "sources.txt"))]
+
+
+class SmartCutCutter(StreamCopyCutter):
+    """
+    Réencode uniquement la tête du round jusqu'à la première image clé et copie le reste.
+
+    La vidéo est produite en deux morceaux (tête réencodée avec le codec, le
+    profil, le format de pixels et la résolution de la source, suite copiée
+    depuis l'image clé) joints par le démultiplexeur concat. Les morceaux
+    passent par des fichiers NUT en Annex B : chacun porte ses propres
+    paramètres de séquence (SPS/PPS, VPS), la suite copiée reste donc
+    décodable même si l'encodeur de la tête en a choisi d'autres. L'audio du
+    round est réencodé d'un seul tenant (AAC, peu coûteux) pour rester continu
+    à la jonction. Le début est exact, comme en mode 'reencode'.
+
+    Une source sans encodeur compatible (`SMART_CUT_CODECS`) est entièrement
+    réencodée, comme un round dont la jonction ne se décode pas sans erreur.
+    """
+
+    mode = 'smart'
+
+    def __init__(self, keyframe_times, timeline, logo_path=None, video_stream=None):
+        """
+        Args:
+            keyframe_times (array-like): Instants des images clés sur la chronologie
+                concaténée (secondes).
+            timeline (SourceTimeline): Chronologie des vidéos sources.
+            logo_path (str, optional): Logo du réencodage complet utilisé en repli.
+            video_stream (dict, optional): Flux vidéo source (`probe_video_stream`) ;
+                sans flux connu, tous les rounds sont entièrement réencodés.
+        """
+        super().__init__(keyframe_times, timeline)
+        self.fallback = ReencodeCutter(logo_path, timeline)
+        self.video_stream = video_stream
+        self.head_encoding = smart_cut_encoding(video_stream)
+        if self.head_encoding is None:
+            codec = (video_stream or {}).get('codec_name')
+            logger.warning(f"Découpe hybride impossible pour le codec {codec}, rounds entièrement réencodés")
+
+    @classmethod
+    def from_videos(cls, video_files, **kwargs):
+        """Crée le découpeur en sondant la chronologie, les images clés et le flux vidéo des sources."""
+        timeline = SourceTimeline.from_videos(video_files)
+        keyframe_times = probe_keyframes(timeline)
+        logger.info(f"{len(keyframe_times)} images clés trouvées dans {len(video_files)} vidéo(s)")
+        return cls(keyframe_times, timeline, video_stream=probe_video_stream(timeline), **kwargs)
+
+    @property
+    def logo_path(self):
+        """Logo du réencodage complet utilisé en repli."""
+        return self.fallback.logo_path
+
+    @property
+    def monitor(self):
+        """Suivi de progression, partagé avec le réencodage de repli."""
+        return self.fallback.monitor
+
+    @monitor.setter
+    def monitor(self, monitor):
+        self.fallback.monitor = monitor
+
+    def settings(self):
+        video = self.head_encoding[0] if self.head_encoding else VIDEO_ENCODING
+        return dict(mode=self.mode, video=video, audio=AUDIO_ENCODING)
+
+    def plan(self, start_time, delta_sec):
+        return start_time, delta_sec
+
+    def commands(self, temp_video_list, output_file, actual_start, duration, creation_date, work_dir):
+        end_time = actual_start + duration
+        keyframe = following_keyframe(self.keyframe_times, actual_start)
+        if self.head_encoding is None or keyframe is None or keyframe >= end_time:
+            return None
+        encoding, bitstream_filter = self.head_encoding
+        # Morceaux en Annex B : paramètres de séquence répétés dans le flux
+        part_options = ["-bsf:v", bitstream_filter, "-f", "nut"]
+
+        # Morceaux et durée imposée à chacun : le décalage des images B au début
+        # d'un fichier NUT allongerait la durée lue et décalerait la suite
+        parts = []
+        commands = []
+        if keyframe > actual_start:
+            head = os.path.join(work_dir, "head.nut")
+            inputs = self.fallback.inputs(temp_video_list, actual_start, keyframe - actual_start, audio=False)
+            video_map = ["-filter_complex", inputs.filter.rstrip(";"), "-map", f"[{inputs.video}]"] \
+                if inputs.filter else ["-map", inputs.video]
+            commands.append([
+                "nice", "-n", "10",
+                "ffmpeg", "-y",
+            ] + inputs.args + video_map + ["-an"] + encoding + part_options + [head])
+            parts.append((head, keyframe - actual_start))
+
+        tail = os.path.join(work_dir, "tail.nut")
+        commands.append(self.copy_command(keyframe, end_time - keyframe, tail,
+                                          os.path.join(work_dir, "sources.txt"), audio=False,
+                                          output_options=part_options))
+        parts.append((tail, end_time - keyframe))
+
+        parts_list = os.path.join(work_dir, "parts.txt")
+        with open(parts_list, "w") as f:
+            for part, part_duration in parts:
+                f.write(f"file '{os.path.abspath(part)}'\nduration {part_duration:.6f}\n")
+
+        # Base de temps de la piste vidéo identique à celle de la source
+        timescale = (self.video_stream.get('time_base') or "").partition("/")[2]
+        timescale_option = ["-video_track_timescale", timescale] if timescale.isdigit() else []
+
+        # Joindre la vidéo par copie et réencoder l'audio du round d'un seul tenant, lu dans
+        # ses fichiers sources comme la tête ; les morceaux vidéo sont la dernière entrée
+        inputs = self.fallback.inputs(temp_video_list, actual_start, duration, video=False)
+        audio_graph = ["-filter_complex", inputs.filter.rstrip(";")] if inputs.filter else []
+        audio_map = ["-map", inputs.audio] if inputs.audio else []
+        commands.append([
+            "ffmpeg", "-y",
+        ] + inputs.args + [
+            "-f", "concat", "-safe", "0",
+            "-i", parts_list,
+        ] + audio_graph + [
+            "-map", f"{inputs.count}:v",
+        ] + audio_map + [
+            "-c:v", "copy",
+        ] + AUDIO_ENCODING + timescale_option + [
+            "-movflags", "+faststart",
+            output_file,
+        ])
+        return commands
+
+    def junction_errors(self, output_file, actual_start, duration):
+        """
+        Décode le round jusqu'à `SMART_CUT_CHECK_SECONDS` après la jonction.
+
+        Returns:
+            str: Erreurs du décodeur, vide si la tête et le début de la suite se décodent proprement.
+        """
+        keyframe = following_keyframe(self.keyframe_times, actual_start)
+        check = min(duration, keyframe - actual_start + SMART_CUT_CHECK_SECONDS)
+        result = subprocess.run([
+            "ffmpeg", "-v", "error", "-nostdin",
+            "-t", f"{check:.6f}",
+            "-i", output_file,
+            "-map", "0:v",
+            "-f", "null", "-",
+        ], capture_output=True, text=True)
+        if result.returncode != 0 and not result.stderr.strip():
+            return f"ffmpeg a échoué (code {result.returncode})"
+        return result.stderr.strip()
+
+    def run(self, temp_video_list, output_file, actual_start, duration, creation_date, resources=None):
+        result, mode = super().run(temp_video_list, output_file, actual_start, duration, creation_date, resources)
+        if result is not None and result.returncode == 0:
+            errors = self.junction_errors(output_file, actual_start, duration)
+            if not errors:
+                return result, mode
+            logger.warning(f"Jonction illisible dans {output_file}, réencodage complet")
+            logger.debug("Erreurs de décodage: %s", errors)
+        elif result is None:
+            logger.debug(f"Découpe hybride non applicable au round {output_file}, réencodage complet")
+        else:
+            logger.warning(f"Découpe hybride impossible pour {output_file}, réencodage complet")
+            logger.debug("FFmpeg stderr: %s", result.stderr)
+        return self.fallback.run(temp_video_list, output_file, actual_start, duration, creation_date, resources)
+
+
+class GraphCutter(ReencodeCutter):
+    """
+    Produit tous les rounds depuis un seul graphe ffmpeg (décoder une fois, encoder N fois).
+
+    Les sources sont lues une seule fois, du début du premier round à la fin du
+    dernier, directement dans les fichiers concernés comme en mode 'reencode'
+    (liste concat en repli) ; `split`/`trim` envoient à chaque round ses images,
+    habillées comme en mode 'reencode', vers sa propre sortie. Le décodage est
+    ainsi proportionnel à la durée de la session et non au nombre de rounds.
+    ffmpeg encodant les sorties en parallèle, le graphe réserve toute la machine
+    auprès du gouverneur ; ses threads sont répartis entre les encodeurs des
+    rounds. Si le graphe échoue, aucun round n'est complet : tous sont refaits
+    un par un en mode 'reencode', au rythme du gouverneur.
+    """
+
+    mode = 'graph'
+
+    def __init__(self, logo_path, timeline=None, has_audio=None):
+        """
+        Args:
+            logo_path (str): Chemin vers le fichier logo superposé.
+            timeline (SourceTimeline, optional): Chronologie des vidéos sources.
+            has_audio (bool, optional): Les sources contiennent-elles une piste audio
+                (défaut : d'après la chronologie, vrai sans chronologie).
+        """
+        super().__init__(logo_path, timeline)
+        self.has_audio = has_audio if has_audio is not None else timeline is None or timeline.has_audio
+
+    def graph_command(self, rounds, temp_video_list, resources=None):
+        """
+        Commande ffmpeg produisant tous les rounds.
+
+        Args:
+            rounds (list): Tuples (output_file, start_time, duration, creation_date).
+            temp_video_list (str): Chemin vers la liste concat des vidéos sources.
+            resources (JobResources, optional): Ressources réservées pour tout le graphe.
+
+        Returns:
+            list: Commande ffmpeg.
+        """
+        first = min(start for _, start, _, _ in rounds)
+        last = max(start + duration for _, start, duration, _ in rounds)
+        inputs = self.inputs(temp_video_list, first, last - first, audio=self.has_audio)
+        # La liste concat en repli propose toujours l'audio ('0:a?'), le graphe exige qu'il existe
+        audio = inputs.audio if self.has_audio else None
+        labels = range(len(rounds))
+
+        graph = ["[{}]split={}{}".format(inputs.video, len(rounds), "".join(f"[v{i}]" for i in labels)),
+                 "[{}:v]split={}{}".format(inputs.count, len(rounds), "".join(f"[l{i}]" for i in labels))]
+        if audio:
+            # '0:a?' (argument de -map) ou '[src_a]' (sortie du filtre concat)
+            audio = audio if audio.startswith("[") else f"[{audio.rstrip('?')}]"
+            graph.append("{}asplit={}{}".format(audio, len(rounds), "".join(f"[a{i}]" for i in labels)))
+        # Les threads de la réservation sont partagés entre les encodeurs des rounds
+        threads = ["-threads", str(max(1, resources.threads // len(rounds)))] if resources is not None else []
+
+        outputs = []
+        for i, (output_file, start, duration, creation_date) in enumerate(rounds):
+            # Les horodatages repartent de 0 au début de la plage lue
+            trim = f"start={start - first:.6f}:end={start - first + duration:.6f}"
+            graph.append(f"[v{i}]trim={trim},setpts=PTS-STARTPTS[r{i}]")
+            graph.append(branding_filter(f"r{i}", f"l{i}", creation_date, f"outv{i}"))
+            outputs += ["-map", f"[outv{i}]"]
+            if audio:
+                graph.append(f"[a{i}]atrim={trim},asetpts=PTS-STARTPTS[outa{i}]")
+                outputs += ["-map", f"[outa{i}]"] + AUDIO_ENCODING
+            outputs += VIDEO_ENCODING + threads + ["-movflags", "+faststart", output_file]
+
+        command = [
+            "nice", "-n", "10",
+            "ffmpeg", "-y",
+        ] + inputs.args + [
+            "-i", self.logo_path,
+            "-filter_complex", inputs.filter + ";".join(graph),
+        ] + outputs
+        if resources is not None and resources.cpus:
+            command = ["taskset", "-c", ",".join(str(cpu) for cpu in resources.cpus)] + command
+        return command
+
+    def commands(self, temp_video_list, output_file, actual_start, duration, creation_date, work_dir):
+        return [self.graph_command([(output_file, actual_start, duration, creation_date)], temp_video_list)]
+
+    def cut_all(self, round_params_list, temp_video_list, max_workers=None, governor=None, on_cut=None):
+        if governor is None:
+            governor = EncodeGovernor(max_jobs=max_workers)
+        round_params_list = list(round_params_list)
+        rounds = []
+        for round_number, start_time, delta_sec, creation_date in round_params_list:
+            start_time = max(0.0, start_time)
+            output_file = round_output_file(round_number, creation_date, self.output_root)
+            rounds.append((round_number, output_file, start_time, delta_sec, creation_date))
+        if not rounds:
+            return []
+
+        # La progression suit la position dans la plage lue, du début du premier round à la fin du dernier
+        span = max(start + duration for _, _, start, duration, _ in rounds) - min(start for _, _, start, _, _ in rounds)
+        resources = governor.reserve_machine()
+        try:
+            cmd = self.graph_command([(output_file, start, duration, creation_date)
+                                      for _, output_file, start, duration, creation_date in rounds],
+                                     temp_video_list, resources)
+            with trace_span(self.tracer, f"{len(rounds)} rounds", "encode", duration=span,
+                            threads=resources.threads):
+                result = self.execute(cmd, f"{len(rounds)} rounds", span)
+        finally:
+            governor.release_machine(resources)
+
+        if result.returncode != 0:
+            logger.warning(f"Échec du graphe unique, les {len(rounds)} rounds sont réencodés un par un")
+            logger.debug("FFmpeg stderr: %s", result.stderr)
+            fallback = ReencodeCutter(self.logo_path, self.timeline)
+            fallback.output_root, fallback.monitor, fallback.tracer = self.output_root, self.monitor, self.tracer
+            return fallback.cut_all(round_params_list, temp_video_list, max_workers, governor, on_cut)
+
+        cuts = [report_cut(round_number, output_file, self.mode, start, start, duration, result)
+                for round_number, output_file, start, duration, _ in rounds]
+        for cut in cuts if on_cut is not None else []:
+            on_cut(cut)
+        return cuts
+
+
+class CutterFactory:
+    """Crée la stratégie de découpage correspondant au mode demandé."""
+
+    @staticmethod
+    def create_cutter(mode, logo_path=None, video_files=None):
+        """
+        Args:
+            mode (str): 'reencode', 'copy', 'smart' ou 'graph'.
+            logo_path (str, optional): Logo superposé en modes 'reencode' et 'graph' (et repli du mode 'smart').
+            video_files (list, optional): Vidéos sources, sondées pour construire leur chronologie.
+
+        Returns:
+            RoundCutter: Stratégie de découpage.
+        """
+        if mode == 'reencode':
+            return ReencodeCutter.from_videos(video_files or [], logo_path)
+        elif mode == 'copy':
+            return StreamCopyCutter.from_videos(video_files or [])
+        elif mode == 'smart':
+            return SmartCutCutter.from_videos(video_files or [], logo_path=logo_path)
+        elif mode == 'graph':
+            return GraphCutter.from_videos(video_files or [], logo_path)
+        else:
+            raise ValueError(f"Mode de découpage inconnu: {mode}")
+
+
+def write_manifest(output_dir, cuts, mode):
+    """
+    Écrit le manifeste des rounds découpés.
+
+    Le manifeste est écrit dans un fichier temporaire puis renommé : une
+    exécution interrompue laisse toujours le manifeste précédent intact.
+
+    Args:
+        output_dir (str): Répertoire de sortie des rounds.
+        cuts (list): Entrées renvoyées par `RoundCutter.cut`, dans n'importe quel ordre.
+        mode (str): Mode de découpage utilisé.
+
+    Returns:
+        str: Chemin du manifeste.
+    """
+    cuts = sorted(cuts, key=lambda cut: cut['round'])
+    manifest = {
+        'mode': mode,
+        'max_drift': max((cut['drift'] for cut in cuts), default=0.0),
+        'rounds': cuts,
+    }
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    fd, temp_path = tempfile.mkstemp(dir=output_dir, prefix=MANIFEST_NAME, suffix=".tmp")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+    return manifest_path
+
+
+def read_manifest(output_dir):
+    """
+    Lit les entrées du manifeste d'un répertoire de sortie.
+
+    Returns:
+        dict: Entrées par numéro de round (vide si le manifeste est absent ou illisible).
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path) as f:
+            rounds = json.load(f).get('rounds', [])
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Manifeste illisible, tous les rounds seront refaits: {manifest_path} ({e})")
+        return {}
+    return {entry['round']: entry for entry in rounds if isinstance(entry, dict) and 'round' in entry}
+
+
+class IncrementalRun:
+    """
+    Reprise d'une exécution à partir du manifeste du répertoire de sortie.
+
+    Chaque entrée du manifeste porte la signature du round (empreintes des
+    sources, début et durée demandés, réglages d'encodage, empreinte du logo) et
+    la somme de contrôle du fichier produit. Un round planifié est conservé sans
+    réencodage si son entrée précédente a réussi, a la même signature et si le
+    fichier n'a pas changé ; les rounds absents, en échec ou modifiés sont
+    refaits. Le manifeste est réécrit après chaque round terminé, si bien qu'une
+    exécution interrompue reprend là où elle s'est arrêtée.
+
+    Exemple:
+        >>> run = IncrementalRun(output_dir, cutter, fingerprints)
+        >>> cutter.cut_all(run.pending(round_params_list), temp_video_list, on_cut=run.record)
+        >>> run.write()
+    """
+
+    def __init__(self, output_dir, cutter, source_fingerprints, force=False):
+        """
+        Args:
+            output_dir (str): Répertoire de sortie des rounds.
+            cutter (RoundCutter): Stratégie de découpage de cette exécution.
+            source_fingerprints (list): Empreintes des vidéos sources (`file_fingerprint`).
+            force (bool): Ignorer le manifeste précédent et refaire tous les rounds.
+        """
+        self.output_dir = output_dir
+        self.mode = cutter.mode
+        self.output_root = cutter.output_root
+        self.settings = cutter.settings()
+        self.logo_hash = file_checksum(cutter.logo_path) if cutter.logo_path else None
+        self.sources = list(source_fingerprints)
+        self.previous = {} if force else read_manifest(output_dir)
+        self.entries = {}
+        self.skipped = 0
+        self._signatures = {}
+        self._lock = threading.Lock()
+
+    def signature(self, round_params):
+        """Signature d'un round planifié, comparée à celle du manifeste précédent."""
+        _, start_time, delta_sec, _ = round_params
+        return dict(
+            sources=self.sources,
+            start=round(max(0.0, start_time), 3),
+            duration=round(delta_sec, 3),
+            settings=self.settings,
+            logo_hash=self.logo_hash,
+        )
+
+    def up_to_date(self, round_params):
+        """True si le fichier du round, produit par une exécution précédente, peut être conservé."""
+        round_number, _, _, creation_date = round_params
+        entry = self.previous.get(round_number)
+        if not entry or not entry.get('success') or entry.get('signature') != self.signature(round_params):
+            return False
+        output_file = round_output_file(round_number, creation_date, self.output_root)
+        if entry.get('output_file') != output_file or not os.path.isfile(output_file):
+            return False
+        return file_checksum(output_file) == entry.get('checksum')
+
+    def pending(self, round_params_list):
+        """
+        Filtre les rounds à découper ; les rounds inchangés sont reportés tels quels.
+
+        Args:
+            round_params_list (iterable): Tuples (round_number, start_time, delta_sec, creation_date).
+
+        Yields:
+            tuple: Paramètres des rounds à (re)découper.
+        """
+        for round_params in round_params_list:
+            self._signatures[round_params[0]] = self.signature(round_params)
+            if self.up_to_date(round_params):
+                entry = self.previous[round_params[0]]
+                logger.info(f"Round {round_params[0]} inchangé, conservé: {entry['output_file']}")
+                self.skipped += 1
+                self.record(entry)
+            else:
+                yield round_params
+
+    def record(self, cut):
+        """
+        Enregistre un round terminé (signature et somme de contrôle) et réécrit le manifeste.
+
+        Args:
+            cut (dict): Entrée renvoyée par `RoundCutter.cut`, ou entrée conservée.
+        """
+        entry = dict(cut)
+        if 'signature' not in entry:
+            entry['signature'] = self._signatures.get(cut['round'])
+            entry['checksum'] = file_checksum(cut['output_file']) if cut['success'] else None
+        with self._lock:
+            self.entries[entry['round']] = entry
+            write_manifest(self.output_dir, list(self.entries.values()), self.mode)
+
+    def write(self):
+        """
+        Écrit le manifeste final (rounds de cette exécution uniquement).
+
+        Returns:
+            str: Chemin du manifeste.
+        """
+        with self._lock:
+            return write_manifest(self.output_dir, list(self.entries.values()), self.mode)
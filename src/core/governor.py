@@ -0,0 +1,367 @@
+"""
+Répartition du CPU entre les encodages ffmpeg concurrents.
+
+Lancer un ffmpeg par cœur, chacun avec le pool de threads de libx264,
+surcharge la machine : les caches sont évincés et le débit total baisse.
+`EncodeGovernor` choisit ensemble le nombre d'encodages simultanés et le
+nombre de threads (`-threads`) de chacun, de sorte que leur produit reste égal
+au nombre de cœurs disponibles.
+
+Le nombre d'encodages est ajusté pendant l'exécution :
+
+- après chaque « génération » (autant de rounds terminés que d'encodages
+  simultanés), le débit mesuré (secondes de vidéo encodées par seconde) est
+  comparé au meilleur débit obtenu ; le gouverneur essaie un encodage de plus,
+  puis un de moins, et se fixe sur le meilleur réglage ;
+- la charge des autres processus est estimée en retirant de la charge moyenne
+  du système les threads des encodages en cours : si elle dépasse une part des
+  cœurs, un encodage est retiré, puis rendu quand elle retombe. Les encodages
+  du gouverneur, qui occupent déjà tous les cœurs, ne le font donc pas reculer.
+
+Les éléments à encoder peuvent être produits au fil de l'eau (mode pipeline) :
+un encodage démarre dès que son élément est disponible.
+
+Un même gouverneur peut servir plusieurs appels simultanés à `map` (mode batch,
+une session par appel) : le nombre d'encodages simultanés est un budget commun
+à tous les appels.
+
+Les encodages peuvent en option être épinglés sur des ensembles de cœurs
+disjoints (`taskset`).
+
+Un encodage qui se parallélise lui-même sur toute la machine (le graphe unique
+du mode 'graph') réserve tous les cœurs d'un coup (`reserve_machine`) : il
+attend la fin des encodages en cours et aucun autre ne démarre avant lui.
+"""
+
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Threads libx264 par encodage au départ (bon compromis parallélisme / efficacité)
+DEFAULT_THREADS_PER_JOB = 4
+
+# Gain relatif minimal pour préférer un autre nombre d'encodages
+THROUGHPUT_TOLERANCE = 0.05
+
+# Charge extérieure (charge moyenne moins les threads alloués aux encodages), relative
+# au nombre de cœurs, au-delà de laquelle un encodage est retiré ; la marge absorbe les
+# threads de décodage et de filtrage de ffmpeg, non comptés dans `-threads`
+LOAD_FACTOR = 0.25
+
+# Charge extérieure relative en deçà de laquelle un encodage retiré pour la charge est rendu
+LOAD_RECOVERY_FACTOR = 0.1
+
+# Intervalle de consultation des éléments produits pendant que des encodages tournent (secondes)
+FEED_POLL_SECONDS = 0.1
+
+# Marque la fin des éléments transmis à `EncodeGovernor.map`
+_END_OF_ITEMS = object()
+
+# Aucun élément en attente d'un encodage libre dans `EncodeGovernor.map`
+_NO_ITEM = object()
+
+# Ressources d'un encodage : threads de l'encodeur et cœurs réservés (tuple vide sans épinglage)
+JobResources = namedtuple('JobResources', 'threads cpus')
+
+
+def available_cores():
+    """Cœurs utilisables par le processus."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def apply_resources(command, resources):
+    """
+    Adapte une commande ffmpeg aux ressources d'un encodage.
+
+    `-threads` est inséré juste avant le fichier de sortie (dernier argument),
+    où il s'applique aux encodeurs ; la commande est préfixée par `taskset`
+    quand des cœurs sont réservés.
+
+    Args:
+        command (list): Commande ffmpeg (éventuellement préfixée par nice).
+        resources (JobResources): Ressources de l'encodage, ou None.
+
+    Returns:
+        list: Nouvelle commande.
+    """
+    if resources is None:
+        return command
+    command = command[:-1] + ["-threads", str(resources.threads), command[-1]]
+    if resources.cpus:
+        command = ["taskset", "-c", ",".join(str(cpu) for cpu in resources.cpus)] + command
+    return command
+
+
+class EncodeGovernor:
+    """Choisit et ajuste le nombre d'encodages simultanés et leurs threads."""
+
+    def __init__(self, cores=None, max_jobs=None, threads_per_job=DEFAULT_THREADS_PER_JOB, pin=False,
+                 load_average=os.getloadavg, clock=time.monotonic):
+        """
+        Args:
+            cores (list, optional): Cœurs disponibles (défaut : affinité du processus).
+            max_jobs (int, optional): Nombre maximal d'encodages simultanés (défaut : un par cœur).
+            threads_per_job (int): Threads par encodage pour le réglage initial.
+            pin (bool): Épingler chaque encodage sur des cœurs disjoints.
+            load_average (callable): Renvoie la charge moyenne (1, 5, 15 minutes).
+            clock (callable): Horloge monotone (secondes).
+        """
+        self.cores = list(cores) if cores is not None else available_cores()
+        self.max_jobs = max(1, min(max_jobs or len(self.cores), len(self.cores)))
+        self.pin = pin and self._can_pin()
+        self._load_average = load_average
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._free_cores = list(self.cores)
+        self.active = 0
+        self._busy_threads = 0
+        # Machine entière réservée par `reserve_machine`
+        self._exclusive = False
+        # Encodages retirés à cause de la charge extérieure, rendus quand elle retombe
+        self._shed = 0
+
+        self.jobs = max(1, min(self.max_jobs, len(self.cores) // max(1, threads_per_job)))
+        self._initial_jobs = self.jobs
+        self._direction = 1
+        self._reversed = False
+        self._settled = self.max_jobs == 1
+        self._best = None
+        self._start_generation()
+
+    def _can_pin(self):
+        if shutil.which("taskset"):
+            return True
+        logger.warning("taskset introuvable, les encodages ne seront pas épinglés")
+        return False
+
+    @property
+    def threads(self):
+        """Threads de l'encodeur par encodage au réglage courant."""
+        return max(1, len(self.cores) // self.jobs)
+
+    def _start_generation(self):
+        self._generation_start = self._clock()
+        self._generation_done = 0
+        self._generation_media = 0.0
+
+    def acquire(self):
+        """Réserve les ressources d'un nouvel encodage."""
+        with self._lock:
+            return self._acquire()
+
+    def reserve(self, block=True):
+        """
+        Réserve les ressources d'un nouvel encodage si le réglage courant le permet.
+
+        Args:
+            block (bool): Attendre qu'un encodage (de n'importe quel appel à `map`) se termine.
+
+        Returns:
+            JobResources: Ressources réservées, None si aucun encodage n'est libre et `block` est faux.
+        """
+        with self._lock:
+            while self._exclusive or self.active >= self.jobs:
+                if not block:
+                    return None
+                self._slot_freed.wait()
+            return self._acquire()
+
+    def reserve_machine(self):
+        """
+        Réserve toute la machine pour un seul encodage.
+
+        Attend que les encodages en cours (de tous les appels à `map`) se
+        terminent ; aucun autre ne démarre avant `release_machine`. Cet encodage
+        ne compte pas dans la mesure du débit du réglage.
+
+        Returns:
+            JobResources: Un thread par cœur, et tous les cœurs en cas d'épinglage.
+        """
+        with self._lock:
+            while self._exclusive or self.active:
+                self._slot_freed.wait()
+            self._exclusive = True
+            cpus = ()
+            if self.pin:
+                cpus = tuple(self._free_cores)
+                self._free_cores = []
+            return JobResources(len(self.cores), cpus)
+
+    def release_machine(self, resources):
+        """
+        Libère la machine réservée par `reserve_machine`.
+
+        Args:
+            resources (JobResources): Ressources rendues par `reserve_machine`.
+        """
+        with self._lock:
+            self._free_cores = sorted(self._free_cores + list(resources.cpus))
+            self._exclusive = False
+            self._slot_freed.notify_all()
+
+    def _acquire(self):
+        self.active += 1
+        self._busy_threads += self.threads
+        cpus = ()
+        if self.pin:
+            count = min(self.threads, len(self._free_cores))
+            cpus = tuple(self._free_cores[:count])
+            del self._free_cores[:count]
+        return JobResources(self.threads, cpus)
+
+    def release(self, resources, media_seconds):
+        """
+        Libère les ressources d'un encodage terminé et ajuste le réglage.
+
+        Args:
+            resources (JobResources): Ressources rendues par `acquire`.
+            media_seconds (float): Durée de vidéo encodée (secondes).
+        """
+        with self._lock:
+            # Threads des encodages qui tournaient jusqu'ici, celui-ci compris
+            own_threads = self._busy_threads
+            self._free_cores = sorted(self._free_cores + list(resources.cpus))
+            self.active -= 1
+            self._busy_threads -= resources.threads
+            self._generation_done += 1
+            self._generation_media += media_seconds
+            self._adapt(own_threads)
+            self._slot_freed.notify_all()
+
+    def _set_jobs(self, jobs, reason):
+        jobs = max(1, min(self.max_jobs, jobs))
+        if jobs != self.jobs:
+            self.jobs = jobs
+            logger.info(f"Encodages simultanés: {self.jobs} x {self.threads} threads ({reason})")
+        self._start_generation()
+
+    def _adapt(self, own_threads):
+        # Charge des autres processus. La charge moyenne sur une minute retarde : les
+        # threads du réglage courant restent comptés pendant que les encodages se terminent
+        own = min(max(own_threads, self.jobs * self.threads), len(self.cores))
+        external = self._load_average()[0] - own
+        if external > LOAD_FACTOR * len(self.cores) and self.jobs > 1:
+            self._shed += 1
+            self._set_jobs(self.jobs - 1, f"charge extérieure {external:.1f}")
+            return
+        if self._shed and external < LOAD_RECOVERY_FACTOR * len(self.cores):
+            self._shed -= 1
+            self._set_jobs(self.jobs + 1, f"charge extérieure {external:.1f}")
+            return
+        if self._settled or self._generation_done < self.jobs:
+            return
+
+        elapsed = max(self._clock() - self._generation_start, 1e-9)
+        throughput = self._generation_media / elapsed
+        logger.debug(f"Débit avec {self.jobs} encodages: {throughput:.2f} s de vidéo par seconde")
+
+        if self._best is None or throughput > self._best[1] * (1 + THROUGHPUT_TOLERANCE):
+            self._best = (self.jobs, throughput)
+        elif self._reversed or self._best[0] != self._initial_jobs:
+            # L'autre côté du meilleur réglage est déjà connu
+            self._settle()
+            return
+        else:
+            self._reverse()
+
+        candidate = self._best[0] + self._direction
+        if not 1 <= candidate <= self.max_jobs:
+            if self._reversed:
+                self._settle()
+                return
+            self._reverse()
+            candidate = self._best[0] + self._direction
+            if not 1 <= candidate <= self.max_jobs:
+                self._settle()
+                return
+        self._set_jobs(candidate, "exploration")
+
+    def _reverse(self):
+        self._reversed = True
+        self._direction = -self._direction
+
+    def _settle(self):
+        self._settled = True
+        self._set_jobs(self._best[0], "réglage fixé")
+
+    def map(self, function, items, media_seconds):
+        """
+        Exécute `function(item, resources)` pour chaque élément, en respectant le réglage courant.
+
+        `items` est parcouru dans un thread dédié : un générateur lent (par exemple
+        la détection qui produit les rounds au fil de l'audio) n'empêche pas de
+        lancer les encodages des éléments déjà produits ni de traiter ceux qui se
+        terminent. Une exception levée par `items` est propagée une fois les
+        encodages en cours terminés. Les encodages lancés par des appels
+        simultanés (autres sessions) comptent dans le même réglage.
+
+        Args:
+            function (callable): Tâche d'encodage.
+            items (iterable): Éléments à traiter, éventuellement produits au fil de l'eau.
+            media_seconds (callable): Durée de vidéo encodée pour un élément (secondes).
+
+        Yields:
+            concurrent.futures.Future: Tâches terminées, dans l'ordre de fin.
+        """
+        feed = queue.Queue()
+        threading.Thread(target=self._feed, args=(items, feed), daemon=True).start()
+        running = {}
+        pending = _NO_ITEM
+        exhausted = False
+        error = None
+        logger.info(f"Encodages simultanés: {self.jobs} x {self.threads} threads (départ, {len(self.cores)} cœurs)")
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+            while not exhausted or running or pending is not _NO_ITEM:
+                while True:
+                    if pending is _NO_ITEM:
+                        if exhausted:
+                            break
+                        try:
+                            # Attendre un élément seulement si aucun encodage n'est en cours
+                            pending = feed.get(block=not running)
+                        except queue.Empty:
+                            break
+                        if pending is _END_OF_ITEMS:
+                            pending = _NO_ITEM
+                            exhausted = True
+                            error = feed.get()
+                            break
+                    # Sans encodage en cours, attendre qu'un autre appel libère un encodage
+                    resources = self.reserve(block=not running)
+                    if resources is None:
+                        break
+                    running[executor.submit(function, pending, resources)] = (pending, resources)
+                    pending = _NO_ITEM
+                if not running:
+                    continue
+                idle = exhausted and pending is _NO_ITEM
+                done, _ = wait(running, timeout=None if idle else FEED_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item, resources = running.pop(future)
+                    self.release(resources, media_seconds(item))
+                    yield future
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def _feed(items, feed):
+        """Parcourt `items` et les transmet à `map`, puis la fin de la série et l'éventuelle exception."""
+        error = None
+        try:
+            for item in items:
+                feed.put(item)
+        except Exception as e:
+            error = e
+        feed.put(_END_OF_ITEMS)
+        feed.put(error)
@@ -0,0 +1,224 @@
+"""
+Lecture native de la date de création des fichiers MP4/MOV (ISO-BMFF).
+
+Trier les sources ne demande que la date de création du conteneur. Plutôt que
+de lancer ffprobe pour chaque fichier, `read_creation_time` parcourt l'arbre
+des boîtes avec quelques petites lectures : les boîtes de premier niveau sont
+sautées jusqu'à `moov` (sans lire `mdat`), puis la date est lue dans `mvhd`.
+
+La valeur renvoyée est celle que ffprobe expose dans `format.tags.creation_time`
+(date de `mvhd`, secondes depuis 1904, au format `AAAA-MM-JJTHH:MM:SS.000000Z`).
+Si `mvhd` ne porte pas de date, les atomes de métadonnées sont consultés :
+`com.apple.quicktime.creationdate` (`meta`/`keys`/`ilst`) puis `©day` (`udta`).
+
+Les conteneurs que ce lecteur ne sait pas analyser lèvent `UnsupportedContainer` ;
+l'appelant se rabat alors sur ffprobe.
+"""
+
+import struct
+from datetime import datetime, timezone
+
+# Secondes entre l'origine des dates MP4 (1904-01-01) et l'époque Unix
+MP4_EPOCH_OFFSET = 2082844800
+
+# Types de boîtes qui peuvent ouvrir un fichier ISO-BMFF/QuickTime
+LEADING_BOX_TYPES = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pdin', b'uuid', b'styp'}
+
+# Taille maximale lue pour une boîte de métadonnées (keys, ilst, udta)
+MAX_METADATA_BOX_BYTES = 1024 * 1024
+
+# Clé QuickTime de la date de création
+QUICKTIME_CREATION_KEY = b'com.apple.quicktime.creationdate'
+
+# Format de `creation_time` dans les métadonnées ffprobe
+CREATION_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+class UnsupportedContainer(ValueError):
+    """Le fichier n'est pas un conteneur ISO-BMFF que ce lecteur sait analyser."""
+
+
+def _boxes(f, start, end):
+    """
+    Parcourt les boîtes d'un intervalle du fichier.
+
+    Yields:
+        tuple: (type, début du contenu, fin de la boîte)
+    """
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        content = position + 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            size = struct.unpack('>Q', large)[0]
+            content += 8
+        elif size == 0:
+            size = end - position
+        if size < content - position:
+            raise UnsupportedContainer(f"boîte {box_type!r} de taille invalide")
+        yield box_type, content, min(position + size, end)
+        position += size
+
+
+def _find(f, start, end, box_type):
+    """Retourne (début du contenu, fin) de la première boîte `box_type`, ou None."""
+    for found, content, box_end in _boxes(f, start, end):
+        if found == box_type:
+            return content, box_end
+    return None
+
+
+def _read(f, start, end, limit=MAX_METADATA_BOX_BYTES):
+    f.seek(start)
+    return f.read(min(end - start, limit))
+
+
+def _mvhd_creation_time(f, start, end):
+    """Date de `mvhd` en secondes Unix, ou None si elle vaut 0 (comme ffmpeg)."""
+    data = _read(f, start, end, limit=32)
+    if len(data) < 8:
+        raise UnsupportedContainer("boîte mvhd tronquée")
+    if data[0] == 1:
+        if len(data) < 12:
+            raise UnsupportedContainer("boîte mvhd tronquée")
+        seconds = struct.unpack('>Q', data[4:12])[0]
+    else:
+        seconds = struct.unpack('>I', data[4:8])[0]
+    if not seconds:
+        return None
+    # Heuristique de ffmpeg (mov_metadata_creation_time) : l'écart 1904-1970 n'est
+    # retiré que si la valeur le dépasse ; une valeur plus petite, qui serait une
+    # date MP4 antérieure à 1970, est lue telle quelle comme une date Unix
+    if seconds >= MP4_EPOCH_OFFSET:
+        seconds -= MP4_EPOCH_OFFSET
+    return seconds
+
+
+def _meta_children(f, start, end):
+    """Intervalle des boîtes filles de `meta` (avec ou sans en-tête version/flags)."""
+    f.seek(start + 4)
+    # QuickTime : `meta` n'a pas d'en-tête version/flags, sa première fille suit directement
+    if f.read(4) in (b'hdlr', b'keys', b'ilst'):
+        return start, end
+    return start + 4, end
+
+
+def _quicktime_creation_date(f, start, end):
+    """Valeur de `com.apple.quicktime.creationdate` dans une boîte `meta`, ou None."""
+    start, end = _meta_children(f, start, end)
+    keys = _find(f, start, end, b'keys')
+    ilst = _find(f, start, end, b'ilst')
+    if keys is None or ilst is None:
+        return None
+
+    data = _read(f, *keys)
+    index = None
+    position = 8  # version/flags, nombre d'entrées
+    number = 1
+    while position + 8 <= len(data):
+        size = struct.unpack('>I', data[position:position + 4])[0]
+        if size < 8:
+            break
+        if data[position + 8:position + size] == QUICKTIME_CREATION_KEY:
+            index = number
+            break
+        position += size
+        number += 1
+    if index is None:
+        return None
+
+    # Dans ilst, le type de chaque boîte est l'index (base 1) de sa clé
+    for item_type, content, item_end in _boxes(f, *ilst):
+        if struct.unpack('>I', item_type)[0] == index:
+            value = _find(f, content, item_end, b'data')
+            if value is not None:
+                # Indicateur de type (4 octets) et locale (4 octets) précèdent la valeur
+                return _read(f, value[0] + 8, value[1]).decode('utf-8', errors='replace')
+    return None
+
+
+def _udta_day(f, start, end):
+    """Valeur de l'atome QuickTime `©day` dans `udta`, ou None."""
+    day = _find(f, start, end, b'\xa9day')
+    if day is None:
+        return None
+    data = _read(f, *day)
+    # Chaîne internationale QuickTime : longueur (2 octets), langue (2 octets), texte
+    if len(data) >= 4:
+        length = struct.unpack('>H', data[:2])[0]
+        return data[4:4 + length].decode('utf-8', errors='replace')
+    return None
+
+
+def _iso_to_unix(value):
+    """Convertit une date ISO 8601 (avec ou sans fuseau, supposé UTC) en secondes Unix."""
+    value = value.strip().replace('Z', '+00:00')
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+def format_creation_time(seconds):
+    """Formate des secondes Unix comme `creation_time` de ffprobe (UTC, microsecondes)."""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime(CREATION_TIME_FORMAT)
+
+
+def read_creation_time(path):
+    """
+    Lit la date de création d'un fichier MP4/MOV sans lancer ffprobe.
+
+    Args:
+        path (str): Chemin du fichier.
+
+    Returns:
+        str: Date au format de ffprobe (`AAAA-MM-JJTHH:MM:SS.ffffffZ`), ou None si
+            le conteneur n'en porte pas.
+
+    Raises:
+        UnsupportedContainer: Si le fichier n'est pas un conteneur ISO-BMFF lisible
+            (ex. Matroska, AVI, `moov` compressé ou absent).
+        OSError: Si le fichier ne peut pas être lu.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(4)
+        if f.read(4) not in LEADING_BOX_TYPES:
+            raise UnsupportedContainer("pas de boîte ISO-BMFF en tête de fichier")
+
+        moov = _find(f, 0, size, b'moov')
+        if moov is None:
+            raise UnsupportedContainer("boîte moov introuvable")
+        mvhd = _find(f, *moov, b'mvhd')
+        if mvhd is None:
+            raise UnsupportedContainer("boîte mvhd introuvable")
+
+        seconds = _mvhd_creation_time(f, *mvhd)
+        if seconds is not None:
+            return format_creation_time(seconds)
+
+        # Sans date dans mvhd : atomes de métadonnées QuickTime
+        value = None
+        for meta_parent in (moov, _find(f, *moov, b'udta')):
+            meta = _find(f, *meta_parent, b'meta') if meta_parent is not None else None
+            if meta is not None:
+                value = _quicktime_creation_date(f, *meta)
+            if value:
+                break
+        if not value:
+            udta = _find(f, *moov, b'udta')
+            value = _udta_day(f, *udta) if udta is not None else None
+        if not value:
+            return None
+        try:
+            return format_creation_time(_iso_to_unix(value))
+        except ValueError:
+            return None
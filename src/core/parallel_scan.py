@@ -0,0 +1,192 @@
+"""
+Balayage de fréquences parallèle sur un pool de processus.
+
+Le signal est copié une seule fois dans un segment `multiprocessing.shared_memory` ;
+les tâches envoyées aux processus ne contiennent que le nom du segment, sa forme
+et les fréquences à évaluer, jamais les échantillons eux-mêmes.
+
+- Moteur 'exact' : le signal pleine bande est partagé et chaque tâche évalue une
+  fréquence avec `SpectralAnalyzer.evaluate_frequency`.
+- Moteur 'filterbank' : le signal pleine bande est partagé et les processus
+  calculent chacun une tranche temporelle du signal en bande de base décimé
+  (`SpectralAnalyzer.baseband`), écrite dans un second segment partagé ; chaque
+  tâche évalue ensuite un lot contigu de fréquences avec `evaluate_baseband`.
+  Les tranches sont identiques au calcul en un bloc : les résultats sont ceux
+  du balayage séquentiel.
+
+Les résultats sont renvoyés dans l'ordre des fréquences demandées.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.spectral_analyzer import SpectralAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Paramètres de SpectralAnalyzer transmis aux processus de calcul
+ANALYZER_PARAMETERS = ('min_peak_height', 'bandwidth', 'max_gap', 'min_peaks', 'peak_hold_rate')
+
+# Nombre de lots de fréquences par processus en mode filterbank (équilibrage de charge)
+CHUNKS_PER_JOB = 4
+
+
+def default_jobs():
+    """Nombre de processus par défaut : un par cœur disponible."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class SharedArray:
+    """
+    Copie d'un tableau NumPy dans un segment de mémoire partagée.
+
+    S'utilise comme gestionnaire de contexte : le segment est libéré à la sortie.
+    `descriptor` est la description picklable transmise aux processus, qui
+    s'y rattachent avec `SharedArray.attach`.
+    """
+
+    def __init__(self, array=None, shape=None, dtype=None):
+        """
+        Args:
+            array (np.ndarray, optional): Tableau à partager (copié une fois).
+            shape (tuple, optional): Forme d'un segment non initialisé, sans `array`.
+            dtype (np.dtype, optional): Type d'un segment non initialisé, sans `array`.
+        """
+        if array is not None:
+            array = np.ascontiguousarray(array)
+            shape, dtype = array.shape, array.dtype
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        if array is not None:
+            view = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+            view[:] = array
+            del view
+        self.descriptor = (self._shm.name, shape, dtype.str)
+
+    @staticmethod
+    def attach(descriptor, writable=False):
+        """
+        Se rattache à un segment existant depuis un processus de calcul.
+
+        Args:
+            descriptor (tuple): `descriptor` du segment.
+            writable (bool): Rendre le tableau modifiable (résultats écrits par les processus).
+
+        Returns:
+            tuple: (segment, tableau sur le segment, en lecture seule par défaut)
+        """
+        name, shape, dtype = descriptor
+        shm = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.setflags(write=writable)
+        return shm, array
+
+    def close(self):
+        """Libère le segment de mémoire partagée."""
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _run_task(task):
+    """Exécute une tâche d'évaluation dans un processus de calcul."""
+    engine, descriptor, parameters, rate, center, frequencies = task
+    analyzer = SpectralAnalyzer(**parameters)
+    shm, samples = SharedArray.attach(descriptor)
+    try:
+        if engine == 'filterbank':
+            return analyzer.evaluate_baseband(samples, rate, center, frequencies)
+        return [analyzer.evaluate_frequency(samples, freq, sample_rate=rate) for freq in frequencies]
+    finally:
+        del samples
+        shm.close()
+
+
+def _run_baseband_slice(task):
+    """Calcule une tranche du signal en bande de base dans le segment de sortie partagé."""
+    descriptor, output, parameters, sr, low_freq, high_freq, start, stop = task
+    analyzer = SpectralAnalyzer(**parameters)
+    shm, samples = SharedArray.attach(descriptor)
+    out_shm, baseband = SharedArray.attach(output, writable=True)
+    try:
+        baseband[start:stop], _, _ = analyzer.baseband(samples, sr, low_freq, high_freq, start, stop)
+    finally:
+        del samples, baseband
+        shm.close()
+        out_shm.close()
+
+
+def _chunks(frequencies, count):
+    """Découpe `frequencies` en au plus `count` lots contigus non vides."""
+    return [list(chunk) for chunk in np.array_split(np.asarray(frequencies, dtype=float), count) if len(chunk)]
+
+
+def _map_tasks(executor, engine, descriptor, parameters, rate, center, chunks):
+    """Évalue les lots de fréquences `chunks` sur le segment `descriptor`."""
+    tasks = [(engine, descriptor, parameters, rate, center, chunk) for chunk in chunks]
+    # map conserve l'ordre des tâches, donc celui des fréquences
+    return [result for chunk_results in executor.map(_run_task, tasks) for result in chunk_results]
+
+
+def scan_frequencies_parallel(analyzer, y, sr, frequencies, engine='filterbank', jobs=None):
+    """
+    Évalue `frequencies` sur un pool de processus.
+
+    Args:
+        analyzer (SpectralAnalyzer): Analyseur dont les paramètres sont utilisés.
+        y (np.ndarray): Échantillons audio décodés.
+        sr (int): Fréquence d'échantillonnage (Hz).
+        frequencies (list): Fréquences à tester (Hz).
+        engine (str): 'filterbank' ou 'exact'.
+        jobs (int, optional): Nombre de processus (défaut : un par cœur).
+
+    Returns:
+        list: Résultats d'évaluation, dans l'ordre de `frequencies`.
+    """
+    if engine not in ('filterbank', 'exact'):
+        raise ValueError(f"Moteur de balayage inconnu: {engine}")
+    if len(frequencies) == 0:
+        return []
+
+    jobs = min(jobs or default_jobs(), len(frequencies))
+    parameters = {name: getattr(analyzer, name) for name in ANALYZER_PARAMETERS}
+
+    if engine == 'filterbank':
+        chunks = _chunks(frequencies, jobs * CHUNKS_PER_JOB)
+    else:
+        chunks = [[freq] for freq in frequencies]
+
+    logger.info(f"Balayage parallèle: {len(frequencies)} fréquences, {len(chunks)} tâches, {jobs} processus ({engine})")
+
+    with SharedArray(y) as samples, ProcessPoolExecutor(max_workers=jobs) as executor:
+        if engine == 'exact':
+            results = _map_tasks(executor, engine, samples.descriptor, parameters, sr, None, chunks)
+        else:
+            low_freq, high_freq = min(frequencies), max(frequencies)
+            factor, rate, center = analyzer.baseband_layout(sr, low_freq, high_freq)
+            count = -(-len(y) // factor)
+            with SharedArray(shape=(count,), dtype=complex) as baseband:
+                # Mise en bande de base répartie par tranches temporelles
+                bounds = np.linspace(0, count, jobs + 1).astype(int)
+                slices = [(samples.descriptor, baseband.descriptor, parameters, sr, low_freq, high_freq, start, stop)
+                          for start, stop in zip(bounds, bounds[1:]) if stop > start]
+                list(executor.map(_run_baseband_slice, slices))
+                results = _map_tasks(executor, engine, baseband.descriptor, parameters, rate, center, chunks)
+
+    # Rétablir les fréquences exactes demandées (les lots sont convertis en float)
+    for freq, result in zip(frequencies, results):
+        result['frequency'] = freq
+    return results
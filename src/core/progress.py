@@ -0,0 +1,385 @@
+"""
+Suivi en direct de la progression des processus ffmpeg.
+
+Chaque ffmpeg lancé par `ProgressMonitor` écrit son état sur un canal de
+progression lisible par machine (`-progress pipe:N`, un descripteur hérité,
+distinct de stdout et stderr) : un bloc `clé=valeur` environ toutes les
+demi-secondes (image courante, images par seconde, position dans la sortie,
+vitesse, octets écrits). Un thread par processus lit ce canal et met à jour
+l'état de la tâche.
+
+Le moniteur agrège l'état de toutes les tâches en cours : images par seconde,
+facteur de vitesse, octets écrits et temps restant estimé, par tâche et au
+total. `snapshot` renvoie ces données sous forme structurée ; `start` les
+journalise à intervalle régulier et peut les écrire dans un fichier JSON.
+
+Comme le gouverneur d'encodage, le moniteur n'est jamais global : il est créé
+par le point d'entrée et passé explicitement aux objets qui lancent ffmpeg.
+
+Exemple:
+    >>> monitor = ProgressMonitor(interval=10)
+    >>> monitor.start()
+    >>> result = monitor.run(command, "round 3", duration=120.0)
+    >>> monitor.snapshot()["totals"]["fps"]
+    >>> monitor.stop()
+"""
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+# Intervalle par défaut entre deux bilans de progression (secondes)
+DEFAULT_PROGRESS_INTERVAL = 10.0
+
+# Période de mise à jour demandée à ffmpeg (`-stats_period`, secondes)
+STATS_PERIOD = 0.5
+
+# Tâches terminées conservées dans les bilans
+MAX_FINISHED_JOBS = 50
+
+
+def progress_command(command, fd):
+    """
+    Ajoute le canal de progression à une commande ffmpeg.
+
+    Les options sont insérées juste après l'exécutable ffmpeg, éventuellement
+    précédé de `nice` ou `taskset`.
+
+    Args:
+        command (list): Commande ffmpeg.
+        fd (int): Descripteur hérité sur lequel ffmpeg écrit sa progression.
+
+    Returns:
+        list: Nouvelle commande.
+    """
+    index = next(i for i, arg in enumerate(command) if os.path.basename(arg) == "ffmpeg")
+    return command[:index + 1] + ["-progress", f"pipe:{fd}", "-stats_period", str(STATS_PERIOD)] + command[index + 1:]
+
+
+def wait_process(process):
+    """
+    Attend la fin d'un processus et mesure les ressources qu'il a consommées.
+
+    Le processus est récupéré avec `os.wait4`, qui donne le temps CPU et le pic
+    de RSS de ce seul processus (et non de tous les processus fils terminés).
+
+    Returns:
+        tuple: (code de retour, resource.struct_rusage ou None si indisponible)
+    """
+    if process.returncode is None and hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            pass  # Déjà récupéré ailleurs : Popen.wait retrouve le code de retour
+        else:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return process.returncode, usage
+    return process.wait(), None
+
+
+def read_outputs(process):
+    """
+    Lit stdout et stderr jusqu'à leur fermeture, comme `communicate` mais sans attendre le processus.
+
+    Returns:
+        tuple: (stdout, stderr)
+    """
+    outputs = {}
+
+    def read(name, stream):
+        with stream:
+            outputs[name] = stream.read()
+
+    readers = [threading.Thread(target=read, args=(name, stream), daemon=True)
+               for name, stream in (('stdout', process.stdout), ('stderr', process.stderr))]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    return outputs.get('stdout'), outputs.get('stderr')
+
+
+def _format_eta(seconds):
+    return str(timedelta(seconds=int(seconds))) if seconds is not None else "?"
+
+
+class JobProgress:
+    """État d'un processus ffmpeg, mis à jour depuis son canal de progression."""
+
+    def __init__(self, name, duration=None, clock=time.monotonic):
+        """
+        Args:
+            name (str): Nom de la tâche (ex. round et session).
+            duration (float, optional): Durée de sortie attendue (secondes), pour l'ETA.
+            clock (callable): Horloge monotone (secondes).
+        """
+        self.name = name
+        self.duration = duration
+        self._clock = clock
+        self.started = clock()
+        self.updated = self.started
+        self.finished = None
+        self.returncode = None
+        self.frame = 0
+        self.fps = 0.0
+        self.out_time = 0.0
+        self.speed = 0.0
+        self.total_size = 0
+        # Processus suivi et son lancement sur l'horloge du traceur (renseignés par `ProgressMonitor.popen`)
+        self.pid = None
+        self.trace_start = None
+
+    def update(self, values):
+        """
+        Applique un bloc du canal de progression.
+
+        Args:
+            values (dict): Paires clé/valeur d'un bloc (`frame`, `fps`, `out_time_us`,
+                `speed`, `total_size`...), valeurs textuelles telles qu'écrites par ffmpeg.
+        """
+        for key, attribute, convert in (('frame', 'frame', int), ('fps', 'fps', float),
+                                        ('total_size', 'total_size', int),
+                                        ('speed', 'speed', lambda value: float(value.rstrip('x')))):
+            try:
+                setattr(self, attribute, convert(values[key]))
+            except (KeyError, ValueError):
+                pass  # Valeur absente ou 'N/A' (ex. flux audio sans images)
+        try:
+            self.out_time = max(0.0, int(values['out_time_us']) / 1e6)
+        except (KeyError, ValueError):
+            pass
+        self.updated = self._clock()
+
+    def finish(self, returncode):
+        """Marque la tâche terminée."""
+        self.finished = self._clock()
+        self.returncode = returncode
+
+    @property
+    def remaining(self):
+        """Durée de sortie restante (secondes), None si la durée attendue est inconnue."""
+        if self.duration is None:
+            return None
+        return max(0.0, self.duration - self.out_time)
+
+    @property
+    def eta(self):
+        """Temps restant estimé (secondes) au rythme actuel, None s'il ne peut être estimé."""
+        if self.finished is not None:
+            return 0.0
+        if self.remaining is None or self.speed <= 0:
+            return None
+        return self.remaining / self.speed
+
+    def as_dict(self):
+        """État de la tâche (données structurées)."""
+        end = self.finished if self.finished is not None else self._clock()
+        return dict(
+            name=self.name,
+            running=self.finished is None,
+            returncode=self.returncode,
+            elapsed=end - self.started,
+            frame=self.frame,
+            fps=self.fps,
+            out_time=self.out_time,
+            duration=self.duration,
+            speed=self.speed,
+            bytes=self.total_size,
+            eta=self.eta,
+        )
+
+
+class ProgressMonitor:
+    """Lance des processus ffmpeg avec un canal de progression et agrège leur état."""
+
+    def __init__(self, interval=DEFAULT_PROGRESS_INTERVAL, report_path=None, clock=time.monotonic, tracer=None):
+        """
+        Args:
+            interval (float): Intervalle entre deux bilans journalisés (secondes), 0 pour aucun.
+            report_path (str, optional): Fichier JSON réécrit à chaque bilan avec `snapshot`.
+            clock (callable): Horloge monotone (secondes).
+            tracer (Tracer, optional): Traceur recevant chaque processus ffmpeg (durée,
+                temps CPU et pic de RSS mesurés par le noyau).
+        """
+        self.interval = interval
+        self.report_path = report_path
+        self.tracer = tracer
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._running = []
+        self._finished = []
+        self._completed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _watch(self, job, read_fd):
+        """Lit le canal de progression d'un processus jusqu'à sa fermeture."""
+        values = {}
+        with os.fdopen(read_fd, 'r', errors='replace') as channel:
+            for line in channel:
+                key, _, value = line.strip().partition('=')
+                values[key] = value
+                # Chaque bloc se termine par progress=continue ou progress=end
+                if key == 'progress':
+                    job.update(values)
+                    values = {}
+
+    def popen(self, command, name, duration=None, **kwargs):
+        """
+        Lance ffmpeg avec un canal de progression.
+
+        L'appelant lit les sorties du processus puis appelle `finish`, qui attend sa fin.
+
+        Args:
+            command (list): Commande ffmpeg.
+            name (str): Nom de la tâche dans les bilans.
+            duration (float, optional): Durée de sortie attendue (secondes).
+            **kwargs: Arguments de `subprocess.Popen`.
+
+        Returns:
+            tuple: (subprocess.Popen, JobProgress, thread de lecture du canal)
+        """
+        read_fd, write_fd = os.pipe()
+        try:
+            process = subprocess.Popen(progress_command(command, write_fd), pass_fds=(write_fd,), **kwargs)
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        job = JobProgress(name, duration, clock=self._clock)
+        job.pid = process.pid
+        if self.tracer is not None:
+            job.trace_start = self.tracer.now()
+        reader = threading.Thread(target=self._watch, args=(job, read_fd), daemon=True)
+        reader.start()
+        with self._lock:
+            self._running.append(job)
+        return process, job, reader
+
+    def finish(self, job, reader, process):
+        """
+        Attend la fin d'une tâche lancée par `popen` et l'enregistre.
+
+        Returns:
+            int: Code de retour du processus.
+        """
+        returncode, usage = wait_process(process)
+        reader.join()
+        job.finish(returncode)
+        with self._lock:
+            self._running.remove(job)
+            self._finished.append(job)
+            del self._finished[:-MAX_FINISHED_JOBS]
+            self._completed += 1
+        if self.tracer is not None:
+            self.tracer.add_process(job.name, job.pid, job.trace_start, self.tracer.now(), usage,
+                                    returncode=returncode, frames=job.frame, speed=job.speed,
+                                    bytes=job.total_size)
+        logger.debug(f"ffmpeg {job.name} terminé: {job.frame} images, x{job.speed:.2f}, "
+                     f"{job.total_size / 1e6:.1f} Mo en {job.finished - job.started:.1f} s")
+        return returncode
+
+    def run(self, command, name, duration=None):
+        """
+        Équivalent de `subprocess.run(command, capture_output=True, text=True)` avec suivi de progression.
+
+        Returns:
+            subprocess.CompletedProcess: Résultat du processus.
+        """
+        process, job, reader = self.popen(command, name, duration,
+                                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            stdout, stderr = read_outputs(process)
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            returncode = self.finish(job, reader, process)
+        return subprocess.CompletedProcess(process.args, returncode, stdout, stderr)
+
+    def snapshot(self):
+        """
+        État courant des tâches (données structurées).
+
+        Returns:
+            dict: `jobs` (tâches en cours), `recent` (dernières tâches terminées) et
+                `totals` : tâches en cours et terminées, images par seconde et facteur de
+                vitesse cumulés des tâches en cours, octets écrits, ETA (durée restante
+                cumulée des tâches de durée connue, divisée par leur vitesse cumulée).
+        """
+        with self._lock:
+            running = list(self._running)
+            finished = list(self._finished)
+            completed = self._completed
+        timed = [job for job in running if job.remaining is not None and job.speed > 0]
+        timed_speed = sum(job.speed for job in timed)
+        return dict(
+            jobs=[job.as_dict() for job in running],
+            recent=[job.as_dict() for job in finished],
+            totals=dict(
+                running=len(running),
+                completed=completed,
+                fps=sum(job.fps for job in running),
+                speed=sum(job.speed for job in running),
+                bytes=sum(job.total_size for job in running + finished),
+                eta=sum(job.remaining for job in timed) / timed_speed if timed_speed > 0 else None,
+            ),
+        )
+
+    def report(self):
+        """Journalise l'état des tâches en cours et l'écrit dans `report_path`."""
+        snapshot = self.snapshot()
+        totals = snapshot['totals']
+        if snapshot['jobs']:
+            for job in snapshot['jobs']:
+                position = (f"{job['out_time']:.0f}/{job['duration']:.0f} s" if job['duration']
+                            else f"{job['out_time']:.0f} s")
+                logger.info(f"  {job['name']}: {position}, {job['fps']:.0f} img/s, x{job['speed']:.2f}, "
+                            f"{job['bytes'] / 1e6:.1f} Mo, fin dans {_format_eta(job['eta'])}")
+            logger.info(f"Progression: {totals['running']} ffmpeg en cours, {totals['completed']} terminé(s), "
+                        f"{totals['fps']:.0f} img/s, x{totals['speed']:.2f}, {totals['bytes'] / 1e6:.1f} Mo écrits, "
+                        f"fin estimée dans {_format_eta(totals['eta'])}")
+        if self.report_path:
+            directory = os.path.dirname(self.report_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(temp_path, self.report_path)
+        return snapshot
+
+    def start(self):
+        """Démarre les bilans périodiques (sans effet si `interval` vaut 0)."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.report()
+                except OSError as e:
+                    logger.warning(f"Impossible d'écrire le bilan de progression: {e}")
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête les bilans périodiques et écrit un dernier bilan."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.report_path:
+            try:
+                self.report()
+            except OSError as e:
+                logger.warning(f"Impossible d'écrire le bilan de progression: {e}")
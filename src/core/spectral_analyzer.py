@@ -1,12 +1,17 @@
 import librosa
 import numpy as np
-from scipy.signal import butter, filtfilt, find_peaks, welch
+from scipy.signal import butter, filtfilt, find_peaks, firwin, kaiserord, sosfiltfilt, upfirdn, welch
 from scipy import stats
 import json
 import os
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional, Union
 
+from core.audio_source import DecodedAudioCache
+from core.bell_dsp import (DEFAULT_PEAK_HOLD_RATE, events_from_bounds, find_bell_peaks, find_envelope_peaks,
+                           group_peak_times)
+from core.tracing import Tracer, trace_span, traced
+
 # Constantes configurables
 DEFAULT_MIN_PEAK_HEIGHT = 0.03
 DEFAULT_BANDWIDTH = 50
@@ -14,6 +19,18 @@ DEFAULT_MAX_GAP = 0.6
 DEFAULT_MIN_PEAKS = 4
 DEFAULT_SAMPLE_RATE = 44100
 
+# Banc de filtres : fréquence minimale du signal en bande de base (Hz), qui fixe
+# la résolution des timestamps, et taille maximale d'un lot de fréquences traité
+# d'un coup (en nombre d'échantillons complexes)
+FILTERBANK_MIN_RATE = 1000
+FILTERBANK_MAX_BATCH_ELEMENTS = 2 ** 23
+
+# Atténuation du filtre anti-repliement de la mise en bande de base (dB)
+FILTERBANK_ANTIALIAS_DB = 60
+
+# Entrée audio : chemin de fichier ou échantillons déjà décodés
+AudioInput = Union[str, np.ndarray]
+
 class SpectralAnalyzer:
     """
     Classe pour l'analyse spectrale et la détection de sons de cloche.
@@ -22,12 +39,23 @@ class SpectralAnalyzer:
     - Analyser la réponse spectrale
     - Évaluer des fréquences spécifiques
     - Détecter et regrouper des événements
+
+    Les méthodes d'analyse acceptent un chemin de fichier ou un tableau
+    d'échantillons déjà décodés (avec `sample_rate`). Les chemins sont décodés
+    via `audio_cache` : un même fichier n'est décodé qu'une fois tant qu'il
+    reste dans le cache.
+
+    Avec un `tracer`, chaque appel des méthodes d'analyse est enregistré
+    (durée, temps CPU, pic de mémoire), y compris les appels imbriqués.
     """
 
     def __init__(self, min_peak_height: float = DEFAULT_MIN_PEAK_HEIGHT,
                  bandwidth: float = DEFAULT_BANDWIDTH,
                  max_gap: float = DEFAULT_MAX_GAP,
-                 min_peaks: int = DEFAULT_MIN_PEAKS):
+                 min_peaks: int = DEFAULT_MIN_PEAKS,
+                 audio_cache: Optional[DecodedAudioCache] = None,
+                 peak_hold_rate: float = DEFAULT_PEAK_HOLD_RATE,
+                 tracer: Optional[Tracer] = None):
         """
         Initialise le SpectralAnalyzer avec des paramètres configurables.
 
@@ -36,11 +64,37 @@ class SpectralAnalyzer:
             bandwidth: Bande passante autour de la fréquence cible (Hz)
             max_gap: Gap maximal entre pics pour un même événement (secondes)
             min_peaks: Nombre minimal de pics pour valider un événement
+            audio_cache: Cache d'audio décodé à partager entre analyseurs
+                (un cache propre à l'instance est créé si absent)
+            peak_hold_rate: Fréquence de l'enveloppe crête sur laquelle
+                `evaluate_frequency` cherche les pics (Hz), 0 pour chaque échantillon
+            tracer: Traceur des méthodes d'analyse (aucune trace si absent)
         """
         self.min_peak_height = min_peak_height
         self.bandwidth = bandwidth
         self.max_gap = max_gap
         self.min_peaks = min_peaks
+        self.audio_cache = audio_cache if audio_cache is not None else DecodedAudioCache()
+        self.peak_hold_rate = peak_hold_rate
+        self.tracer = tracer
+
+    @traced("load", "spectral")
+    def load_audio(self, audio: AudioInput, sample_rate: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """
+        Retourne les échantillons et la fréquence d'échantillonnage d'une entrée audio.
+
+        Args:
+            audio: Chemin vers le fichier audio ou échantillons déjà décodés
+            sample_rate: Fréquence d'échantillonnage (Hz), obligatoire pour un tableau
+
+        Returns:
+            Tuple (échantillons, fréquence d'échantillonnage)
+        """
+        if isinstance(audio, np.ndarray):
+            if sample_rate is None:
+                raise ValueError("sample_rate est obligatoire pour des échantillons déjà décodés")
+            return audio, sample_rate
+        return self.audio_cache.load(audio)
 
     def _save_audio(self, output_path: str, audio: np.ndarray, sample_rate: int) -> None:
         """Sauvegarde l'audio dans un fichier WAV."""
@@ -55,6 +109,7 @@ class SpectralAnalyzer:
                 audio_int16 = (audio * 32767).astype(np.int16)
                 write(output_path, sample_rate, audio_int16)
 
+    @traced("group", "spectral")
     def group_peaks_into_events(self, peak_times: np.ndarray) -> List[List[float]]:
         """
         Regroupe les temps de pics en événements de sonnerie de cloche.
@@ -65,25 +120,8 @@ class SpectralAnalyzer:
         Returns:
             Liste d'événements, où chaque événement est une liste de temps de pics
         """
-        if len(peak_times) == 0:
-            return []
-
-        valid_events = []
-        current_group = [peak_times[0]]
-
-        for t in peak_times[1:]:
-            if t - current_group[-1] <= self.max_gap:
-                current_group.append(t)
-            else:
-                if len(current_group) >= self.min_peaks:
-                    valid_events.append(current_group)
-                current_group = [t]
-
-        # Vérifier le dernier groupe
-        if len(current_group) >= self.min_peaks:
-            valid_events.append(current_group)
-
-        return valid_events
+        starts, stops = group_peak_times(peak_times, self.max_gap, self.min_peaks)
+        return events_from_bounds(peak_times, starts, stops)
 
     def calculate_event_consistency(self, events: List[List[float]]) -> float:
         """
@@ -117,36 +155,195 @@ class SpectralAnalyzer:
             return max(0, 1 - (std_diff / avg_diff))
         return 0.0
 
-    def evaluate_frequency(self, audio_path: str, target_freq: float) -> Dict:
+    @traced("evaluate_frequency", "spectral")
+    def evaluate_frequency(self, audio: AudioInput, target_freq: float,
+                           sample_rate: Optional[int] = None) -> Dict:
         """
         Évalue la performance de détection de cloche à une fréquence spécifique.
 
         Args:
-            audio_path: Chemin vers le fichier audio
+            audio: Chemin vers le fichier audio ou échantillons déjà décodés
             target_freq: Fréquence à tester (Hz)
+            sample_rate: Fréquence d'échantillonnage si `audio` est un tableau (Hz)
 
         Returns:
             Dictionnaire avec les résultats d'évaluation
         """
         # Charger l'audio
-        y, sr = librosa.load(audio_path, sr=None)
+        y, sr = self.load_audio(audio, sample_rate)
 
-        # Créer un filtre passe-bande
-        low = (target_freq - self.bandwidth) / (sr / 2)
-        high = (target_freq + self.bandwidth) / (sr / 2)
-        b, a = butter(N=4, Wn=[low, high], btype='band')
-        filtered = filtfilt(b, a, y)
+        with trace_span(self.tracer, "filter", "spectral", frequency=target_freq):
+            # Créer un filtre passe-bande
+            low = (target_freq - self.bandwidth) / (sr / 2)
+            high = (target_freq + self.bandwidth) / (sr / 2)
+            b, a = butter(N=4, Wn=[low, high], btype='band')
+            filtered = filtfilt(b, a, y)
 
-        # Calculer l'enveloppe d'amplitude
-        amplitude = np.abs(filtered)
+            # Calculer l'enveloppe d'amplitude
+            amplitude = np.abs(filtered)
 
-        # Détecter les pics
-        peaks, _ = find_peaks(amplitude, height=self.min_peak_height, distance=sr*0.1)
-        peak_times = peaks / sr
+        with trace_span(self.tracer, "peak-pick", "spectral"):
+            # Détecter les pics (sur l'enveloppe crête si peak_hold_rate > 0)
+            peaks = find_bell_peaks(amplitude, sr, self.min_peak_height, self.peak_hold_rate)
+            peak_times = peaks / sr
 
         # Regrouper en événements
         events = self.group_peaks_into_events(peak_times)
 
+        return self._frequency_result(target_freq, events, amplitude)
+
+    @traced("evaluate_frequencies", "spectral")
+    def evaluate_frequencies(self, audio: AudioInput, frequencies: List[float],
+                             sample_rate: Optional[int] = None) -> List[Dict]:
+        """
+        Évalue un ensemble de fréquences sur un signal décimé commun.
+
+        Le signal pleine cadence n'est parcouru qu'une fois : il est ramené en
+        bande de base complexe autour du centre de la plage scannée puis décimé
+        (`baseband`). Chaque fréquence est ensuite évaluée sur ce signal réduit
+        (`evaluate_baseband`) : décalage de fréquence puis passe-bas Butterworth
+        d'ordre 4 de coupure `bandwidth`, équivalent au passe-bande
+        [f - bandwidth, f + bandwidth] de `evaluate_frequency`. Cette seconde
+        étape reste linéaire en nombre de fréquences (un décalage et un
+        `sosfiltfilt` par fréquence, par lots vectorisés) : le coût par fréquence
+        est seulement divisé par le facteur de décimation (typiquement 40 à
+        44,1 kHz), soit O(N + K × N / D) au total.
+
+        L'amplitude est l'enveloppe complexe |z| : `max` correspond à
+        `evaluate_frequency`, `mean` et `std` sont plus élevés que ceux de |x|.
+        Les pics sont cherchés sur |z| par `find_envelope_peaks`, qui donne le
+        même nombre de pics par sonnerie que `find_bell_peaks` sur |x|.
+
+        Args:
+            audio: Chemin vers le fichier audio ou échantillons déjà décodés
+            frequencies: Fréquences à tester (Hz)
+            sample_rate: Fréquence d'échantillonnage si `audio` est un tableau (Hz)
+
+        Returns:
+            Liste de dictionnaires de résultats, dans l'ordre de `frequencies`
+        """
+        if len(frequencies) == 0:
+            return []
+
+        y, sr = self.load_audio(audio, sample_rate)
+
+        baseband, rate, center = self.baseband(y, sr, min(frequencies), max(frequencies))
+        return self.evaluate_baseband(baseband, rate, center, frequencies)
+
+    @traced("evaluate_baseband", "spectral")
+    def evaluate_baseband(self, baseband: np.ndarray, rate: float, center: float,
+                          frequencies: List[float]) -> List[Dict]:
+        """
+        Évalue des fréquences sur un signal déjà ramené en bande de base par `baseband`.
+
+        Un décalage et un filtrage par fréquence : le coût est linéaire en nombre
+        de fréquences, sur le signal décimé.
+
+        Args:
+            baseband: Signal complexe décimé
+            rate: Fréquence d'échantillonnage du signal en bande de base (Hz)
+            center: Fréquence ramenée à 0 Hz (Hz)
+            frequencies: Fréquences à tester (Hz), comprises dans la plage de `baseband`
+
+        Returns:
+            Liste de dictionnaires de résultats, dans l'ordre de `frequencies`
+        """
+        lowpass = butter(N=4, Wn=self.bandwidth, btype='low', fs=rate, output='sos')
+        n = np.arange(len(baseband))
+        batch_size = max(1, FILTERBANK_MAX_BATCH_ELEMENTS // max(1, len(baseband)))
+
+        results = []
+        for start in range(0, len(frequencies), batch_size):
+            batch = np.asarray(frequencies[start:start + batch_size], dtype=float)
+            # Décaler chaque fréquence testée vers 0 Hz (une ligne par fréquence)
+            shift = np.exp(-2j * np.pi * np.outer(batch - center, n) / rate)
+            envelopes = np.abs(sosfiltfilt(lowpass, baseband[np.newaxis, :] * shift, axis=1))
+
+            for freq, amplitude in zip(batch, envelopes):
+                peaks = find_envelope_peaks(amplitude, rate, self.min_peak_height, self.peak_hold_rate)
+                events = self.group_peaks_into_events(peaks / rate)
+                results.append(self._frequency_result(float(freq), events, amplitude))
+
+        return results
+
+    def baseband_layout(self, sr: int, low_freq: float, high_freq: float) -> Tuple[int, float, float]:
+        """
+        Paramètres de la mise en bande de base de `baseband`, sans la calculer.
+
+        Args:
+            sr: Fréquence d'échantillonnage (Hz)
+            low_freq: Plus basse fréquence à évaluer (Hz)
+            high_freq: Plus haute fréquence à évaluer (Hz)
+
+        Returns:
+            Tuple (facteur de décimation, fréquence d'échantillonnage décimée, fréquence centrale)
+        """
+        center = (low_freq + high_freq) / 2
+        cutoff = (high_freq - low_freq) / 2 + 2 * self.bandwidth
+        factor = max(1, int(sr // max(FILTERBANK_MIN_RATE, 2.5 * cutoff)))
+        return factor, sr / factor, center
+
+    @traced("baseband", "spectral")
+    def baseband(self, y: np.ndarray, sr: int, low_freq: float, high_freq: float,
+                 start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, float, float]:
+        """
+        Ramène la plage [low_freq - bandwidth, high_freq + bandwidth] en bande de base.
+
+        Le mélange et le filtre anti-repliement sont fusionnés en un filtre RIF
+        complexe à phase linéaire, appliqué en polyphase (`upfirdn`) : seuls les
+        échantillons décimés sont calculés, sans signal complexe pleine longueur.
+        Le retard du filtre, multiple du facteur de décimation, est compensé.
+
+        Chaque échantillon décimé ne dépend que des échantillons voisins : une
+        tranche [start, stop) est identique à la même tranche du signal complet,
+        ce qui permet de répartir le calcul entre plusieurs processus.
+
+        Args:
+            y: Échantillons audio
+            sr: Fréquence d'échantillonnage (Hz)
+            low_freq: Plus basse fréquence à évaluer (Hz)
+            high_freq: Plus haute fréquence à évaluer (Hz)
+            start: Premier échantillon décimé à calculer
+            stop: Fin (exclue) des échantillons décimés à calculer (défaut : fin du signal)
+
+        Returns:
+            Tuple (signal complexe décimé, fréquence d'échantillonnage, fréquence centrale)
+        """
+        factor, rate, center = self.baseband_layout(sr, low_freq, high_freq)
+        cutoff = (high_freq - low_freq) / 2 + 2 * self.bandwidth
+        omega = 2 * np.pi * center / sr
+        count = -(-len(y) // factor)
+        stop = count if stop is None else min(stop, count)
+
+        if factor == 1:
+            # Le facteur 2 compense la moitié d'énergie perdue avec la fréquence négative
+            return 2 * y[start:stop] * np.exp(-1j * omega * np.arange(start, stop)), rate, center
+
+        # Passe-bas jusqu'à `cutoff`, coupé avant le repliement dans [-cutoff, cutoff]
+        numtaps, beta = kaiserord(FILTERBANK_ANTIALIAS_DB, (rate - 2 * cutoff) / (sr / 2))
+        delay = factor * int(np.ceil((numtaps - 1) / (2 * factor)))
+        lowpass = firwin(2 * delay + 1, rate / 2, window=('kaiser', beta), fs=sr)
+
+        # z[k] = e^(-jω n) (h e^(jωm) * y)[n] avec n = k * factor + delay ; les parties
+        # réelle et imaginaire du filtre sont appliquées séparément, dans le type de `y`,
+        # pour que `upfirdn` ne convertisse pas le signal complet
+        taps = 2 * lowpass * np.exp(1j * omega * np.arange(len(lowpass)))
+        dtype = np.result_type(y.dtype, np.float32)
+        # Échantillons d'entrée utiles à la tranche, à partir d'un multiple de `factor` ;
+        # la marge d'une longueur de filtre en fin de tranche garantit que `upfirdn`
+        # calcule chaque sortie comme sur le signal complet (même ordre de sommation)
+        first = max(0, start - delay // factor)
+        segment = y[first * factor:stop * factor + 3 * delay + 1]
+        skip = start - first + delay // factor
+        mixed = upfirdn(taps.real.astype(dtype), segment, down=factor)[skip:skip + stop - start].astype(complex)
+        mixed += 1j * upfirdn(taps.imag.astype(dtype), segment, down=factor)[skip:skip + stop - start]
+        mixed *= np.exp(-1j * omega * (np.arange(start, stop) * factor + delay))
+
+        return mixed, rate, center
+
+    def _frequency_result(self, target_freq: float, events: List[List[float]],
+                          amplitude: np.ndarray) -> Dict:
+        """Construit le dictionnaire de résultats d'évaluation d'une fréquence."""
         return {
             'frequency': target_freq,
             'events_detected': len(events),
@@ -159,29 +356,35 @@ class SpectralAnalyzer:
             'consistency_score': self.calculate_event_consistency(events)
         }
 
-    def analyze_spectral_response(self, audio_path: str, analysis_band: Tuple[float, float] = (2000, 2100),
-                                output_report: Optional[str] = None, n_peaks: int = 5) -> Dict:
+    @traced("analyze_spectral_response", "spectral")
+    def analyze_spectral_response(self, audio: AudioInput, analysis_band: Tuple[float, float] = (2000, 2100),
+                                output_report: Optional[str] = None, n_peaks: int = 5,
+                                sample_rate: Optional[int] = None) -> Dict:
         """
         Effectue une analyse spectrale pour identifier la fréquence optimale de détection de cloche.
 
+        L'audio n'est décodé qu'une fois : chaque pic spectral est évalué sur
+        les mêmes échantillons.
+
         Args:
-            audio_path: Chemin vers le fichier WAV
+            audio: Chemin vers le fichier WAV ou échantillons déjà décodés
             analysis_band: Plage de fréquences à analyser (Hz)
             output_report: Chemin pour sauvegarder le rapport d'analyse (JSON)
             n_peaks: Nombre de pics spectraux à analyser
+            sample_rate: Fréquence d'échantillonnage si `audio` est un tableau (Hz)
 
         Returns:
             Dictionnaire avec les résultats de l'analyse spectrale
         """
         # Valider les entrées
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Fichier audio non trouvé: {audio_path}")
+        if isinstance(audio, str) and not os.path.exists(audio):
+            raise FileNotFoundError(f"Fichier audio non trouvé: {audio}")
 
         if analysis_band[0] >= analysis_band[1]:
             raise ValueError("La bande d'analyse doit avoir une fréquence de début inférieure à la fréquence de fin")
 
         # Charger l'audio
-        y, sr = librosa.load(audio_path, sr=None)
+        y, sr = self.load_audio(audio, sample_rate)
 
         # Créer un filtre passe-bande large pour l'analyse
         low = analysis_band[0] / (sr / 2)
@@ -203,7 +406,7 @@ class SpectralAnalyzer:
 
         # Analyser chaque pic significatif
         results = {
-            'audio_file': os.path.basename(audio_path),
+            'audio_file': os.path.basename(audio) if isinstance(audio, str) else None,
             'sample_rate': sr,
             'analysis_band': analysis_band,
             'analysis_date': datetime.now().isoformat(),
@@ -217,7 +420,7 @@ class SpectralAnalyzer:
                 continue
 
             # Évaluer cette fréquence
-            freq_result = self.evaluate_frequency(audio_path, freq)
+            freq_result = self.evaluate_frequency(y, freq, sample_rate=sr)
             freq_result.update({
                 'spectral_power': float(power),
                 'power_percentage': float(power / Pxx.max())
@@ -235,6 +438,7 @@ class SpectralAnalyzer:
 
         return results
 
+    @traced("select_optimal_frequency", "spectral")
     def select_optimal_frequency(self, frequency_results: List[Dict]) -> float:
         """
         Sélectionne la fréquence optimale basée sur plusieurs critères.
@@ -1,6 +1,6 @@
 import librosa
 import numpy as np
-from scipy.signal import butter, filtfilt, find_peaks
+from scipy.signal import butter, filtfilt
 from datetime import timedelta
 import subprocess
 import os
@@ -9,9 +9,24 @@ import json
 from datetime import datetime
 import logging
 import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+import contextlib
 import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter src au chemin pour permettre l'exécution directe du script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bell_dsp import (DEFAULT_BLOCK_SECONDS, DEFAULT_PEAK_HOLD_RATE, StreamingBellDetector,
+                           events_from_bounds, find_bell_peaks, group_peak_times)
+from core.audio_source import (DEFAULT_ENVELOPE_RATE, DEFAULT_EXTRACT_SAMPLE_RATE, ArrayAudioSource, FFmpegAudioSource,
+                               ParallelAudioSource, RecordingAudioSource, WavAudioSource, to_pcm16)
+from core.cache import DEFAULT_CACHE_BYTES, METADATA_NAME, AnalysisCache, DiskLRUCache, MetadataCache, file_fingerprint
+from core.governor import EncodeGovernor
+from core.progress import DEFAULT_PROGRESS_INTERVAL, ProgressMonitor
+from core.tracing import Tracer, trace_span
+from core.mp4_meta import UnsupportedContainer, read_creation_time
+from core.cutting import CUT_MODES, CutterFactory, IncrementalRun, ReencodeCutter
 
 # Configure logging (default to INFO level)
 logging.basicConfig(level=logging.INFO,
@@ -24,13 +39,17 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 
 TEMP_WAV = os.path.join(TEMP_DIR, "temp_audio.wav")
 TEMP_VIDEO_LIST = os.path.join(TEMP_DIR, "temp_video_list.txt")
+ANALYSIS_CACHE_DIR = os.path.join(TEMP_DIR, "analysis_cache")
 
 # ========== PARAMÈTRES COURANTS (modifiables facilement) ==========
 # Temps d'un round en secondes (modifiable couramment)
 DEFAULT_ROUND_TIME = 120  # secondes
 
-# Nombre maximum de threads pour le traitement parallèle (basé sur le nombre de cœurs)
-DEFAULT_MAX_WORKERS = multiprocessing.cpu_count()  # Utilise tous les cœurs disponibles
+# Nombre maximum d'encodages parallèles (le gouverneur d'encodage en choisit le nombre effectif)
+DEFAULT_MAX_WORKERS = multiprocessing.cpu_count()  # Au plus un encodage par cœur
+
+# Nombre maximal de sondages simultanés (lecture MP4 ou ffprobe) pour trier les sources
+DEFAULT_PROBE_WORKERS = 8
 
 # ========== PARAMÈTRES EXPERTS (déconseillés à modifier) ==========
 # Paramètres de détection de cloche - NE PAS MODIFIER SAUF SI VOUS SAVEZ CE QUE VOUS FAITES
@@ -40,9 +59,6 @@ DEFAULT_MIN_PEAK_HEIGHT = 0.03  # Niveau minimal pour détecter un pic
 DEFAULT_PEAKS_IN_ROW = 4  # Nombre minimal de pics consécutifs pour une détection
 DEFAULT_MAX_GAP = 0.6  # Secondes maximales entre pics consécutifs
 
-# Verrou pour la sortie console
-console_lock = threading.Lock()
-
 def validate_logo_path(logo_path):
     """
     Valide le chemin du fichier logo et le convertit en chemin absolu.
@@ -82,7 +98,8 @@ def validate_logo_path(logo_path):
 
 def detect_bell_ringing(audio_path, output_debug_file=None, target_freq=DEFAULT_TARGET_FREQ,
                        bandwidth=DEFAULT_BANDWIDTH, min_peak_height=DEFAULT_MIN_PEAK_HEIGHT,
-                       peaks_in_row=DEFAULT_PEAKS_IN_ROW, max_gap=DEFAULT_MAX_GAP):
+                       peaks_in_row=DEFAULT_PEAKS_IN_ROW, max_gap=DEFAULT_MAX_GAP,
+                       peak_hold_rate=DEFAULT_PEAK_HOLD_RATE):
     """
     Détecte les événements de sonnerie de cloche dans un fichier audio et retourne leurs timestamps.
 
@@ -96,6 +113,8 @@ def detect_bell_ringing(audio_path, output_debug_file=None, target_freq=DEFAULT_
         min_peak_height (float): Hauteur minimale de pic pour la détection.
         peaks_in_row (int): Nombre minimal de pics consécutifs pour une détection.
         max_gap (float): Gap maximal entre pics (secondes).
+        peak_hold_rate (float): Fréquence de l'enveloppe crête sur laquelle les pics sont cherchés (Hz),
+            0 pour chercher les pics sur chaque échantillon.
 
     Returns:
         list: Une liste de listes, où chaque sous-liste contient les timestamps d'un événement de sonnerie de cloche détecté.
@@ -103,62 +122,279 @@ def detect_bell_ringing(audio_path, output_debug_file=None, target_freq=DEFAULT_
     # Charger l'audio avec librosa
     y, sr = librosa.load(audio_path, sr=None)
 
-    # Créer un filtre passe-bande autour de target_freq
-    low = (target_freq - bandwidth) / (sr / 2)
-    high = (target_freq + bandwidth) / (sr / 2)
-    b, a = butter(N=4, Wn=[low, high], btype='band')
-    filtered_audio = filtfilt(b, a, y)
+    return detect_bell_ringing_samples(
+        y, sr, output_debug_file,
+        target_freq=target_freq,
+        bandwidth=bandwidth,
+        min_peak_height=min_peak_height,
+        peaks_in_row=peaks_in_row,
+        max_gap=max_gap,
+        peak_hold_rate=peak_hold_rate
+    )
 
-    # Calculer l'enveloppe d'amplitude
-    amplitude = np.abs(filtered_audio)
+def detect_bell_ringing_samples(y, sr, output_debug_file=None, target_freq=DEFAULT_TARGET_FREQ,
+                                bandwidth=DEFAULT_BANDWIDTH, min_peak_height=DEFAULT_MIN_PEAK_HEIGHT,
+                                peaks_in_row=DEFAULT_PEAKS_IN_ROW, max_gap=DEFAULT_MAX_GAP,
+                                peak_hold_rate=DEFAULT_PEAK_HOLD_RATE, tracer=None):
+    """
+    Détecte les événements de sonnerie de cloche dans des échantillons audio déjà décodés.
 
-    # Détecter les pics
-    peaks, properties = find_peaks(amplitude, height=min_peak_height, distance=sr*0.1)
+    Args:
+        y (np.ndarray): Échantillons audio mono.
+        sr (int): Fréquence d'échantillonnage (Hz).
+        output_debug_file (str, optional): Chemin vers un fichier où les informations de débogage seront écrites.
+        target_freq (float): Fréquence cible pour la détection de cloche (Hz).
+        bandwidth (float): Bande passante autour de la fréquence cible (Hz).
+        min_peak_height (float): Hauteur minimale de pic pour la détection.
+        peaks_in_row (int): Nombre minimal de pics consécutifs pour une détection.
+        max_gap (float): Gap maximal entre pics (secondes).
+        peak_hold_rate (float): Fréquence de l'enveloppe crête sur laquelle les pics sont cherchés (Hz),
+            0 pour chercher les pics sur chaque échantillon.
+        tracer (Tracer, optional): Traceur des étapes (filtrage, pics, regroupement).
+
+    Returns:
+        list: Une liste de listes, où chaque sous-liste contient les timestamps d'un événement de sonnerie de cloche détecté.
+    """
+    with trace_span(tracer, "filter", "detection", samples=len(y)):
+        # Créer un filtre passe-bande autour de target_freq
+        low = (target_freq - bandwidth) / (sr / 2)
+        high = (target_freq + bandwidth) / (sr / 2)
+        b, a = butter(N=4, Wn=[low, high], btype='band')
+        filtered_audio = filtfilt(b, a, y)
+
+        # Calculer l'enveloppe d'amplitude
+        amplitude = np.abs(filtered_audio)
+
+    with trace_span(tracer, "peak-pick", "detection") as span:
+        # Détecter les pics (sur l'enveloppe crête si peak_hold_rate > 0)
+        peaks = find_bell_peaks(amplitude, sr, min_peak_height, peak_hold_rate)
+        span['peaks'] = len(peaks)
 
     # Convertir les indices de pics en temps en secondes
     peak_times = peaks / sr
 
-    # Regrouper les pics en événements de sonnerie de cloche
-    valid_events = []
+    with trace_span(tracer, "group", "detection") as span:
+        # Regrouper les pics en événements de sonnerie de cloche
+        starts, stops = group_peak_times(peak_times, max_gap, peaks_in_row)
+        valid_events = events_from_bounds(peak_times, starts, stops)
+        span['events'] = len(valid_events)
 
-    # Ne procéder que si nous avons des pics
-    if len(peak_times) > 0:
-        current_group = [peak_times[0]]
+    # Écrire les informations de débogage si demandées
+    if output_debug_file:
+        write_bell_debug_file(valid_events, output_debug_file)
 
-        for t in peak_times[1:]:
-            if t - current_group[-1] <= max_gap:
-                current_group.append(t)
-            else:
-                if len(current_group) >= peaks_in_row:
-                    valid_events.append(current_group)
-                current_group = [t]
+    return valid_events
+
+def detect_bell_ringing_streaming(audio_path, output_debug_file=None, target_freq=DEFAULT_TARGET_FREQ,
+                                  bandwidth=DEFAULT_BANDWIDTH, min_peak_height=DEFAULT_MIN_PEAK_HEIGHT,
+                                  peaks_in_row=DEFAULT_PEAKS_IN_ROW, max_gap=DEFAULT_MAX_GAP,
+                                  block_seconds=DEFAULT_BLOCK_SECONDS, peak_hold_rate=DEFAULT_PEAK_HOLD_RATE):
+    """
+    Variante de `detect_bell_ringing` qui lit l'audio par blocs à mémoire constante.
 
-        # Vérifier le dernier groupe
-        if len(current_group) >= peaks_in_row:
-            valid_events.append(current_group)
+    Le filtre passe-bande est causal (avec état conservé entre les blocs) au lieu de
+    `filtfilt` ; les timestamps sont corrigés du retard de groupe du filtre. Les
+    événements détectés sont les mêmes que ceux du mode batch et leur premier pic
+    coïncide à ±10 ms près ; seuls des pics proches du seuil peuvent différer à
+    l'intérieur d'un événement (voir /docs/design/bell_detection.md).
+
+    Args:
+        audio_path (str): Chemin vers le fichier audio (format WAV).
+        output_debug_file (str, optional): Chemin vers un fichier où les informations de débogage seront écrites.
+        target_freq (float): Fréquence cible pour la détection de cloche (Hz).
+        bandwidth (float): Bande passante autour de la fréquence cible (Hz).
+        min_peak_height (float): Hauteur minimale de pic pour la détection.
+        peaks_in_row (int): Nombre minimal de pics consécutifs pour une détection.
+        max_gap (float): Gap maximal entre pics (secondes).
+        block_seconds (float): Durée d'un bloc audio lu en une fois (secondes).
+        peak_hold_rate (float): Fréquence de l'enveloppe crête sur laquelle les pics sont cherchés (Hz),
+            0 pour chercher les pics sur chaque échantillon.
+
+    Returns:
+        list: Une liste de listes, où chaque sous-liste contient les timestamps d'un événement de sonnerie de cloche détecté.
+    """
+    return detect_bell_ringing_from_source(
+        WavAudioSource(audio_path), output_debug_file,
+        target_freq=target_freq,
+        bandwidth=bandwidth,
+        min_peak_height=min_peak_height,
+        peaks_in_row=peaks_in_row,
+        max_gap=max_gap,
+        block_seconds=block_seconds,
+        peak_hold_rate=peak_hold_rate
+    )
+
+def detect_bell_ringing_from_source(audio_source, output_debug_file=None, target_freq=DEFAULT_TARGET_FREQ,
+                                    bandwidth=DEFAULT_BANDWIDTH, min_peak_height=DEFAULT_MIN_PEAK_HEIGHT,
+                                    peaks_in_row=DEFAULT_PEAKS_IN_ROW, max_gap=DEFAULT_MAX_GAP,
+                                    block_seconds=DEFAULT_BLOCK_SECONDS, peak_hold_rate=DEFAULT_PEAK_HOLD_RATE,
+                                    tracer=None):
+    """
+    Détecte la cloche en flux sur une source audio (`WavAudioSource`, `FFmpegAudioSource`).
+
+    Si la source fournit déjà une enveloppe filtrée (`is_envelope`, voir
+    `FFmpegAudioSource.bell_envelope`), le filtrage Python est sauté.
+
+    Args:
+        audio_source: Source audio fournissant `sample_rate` et `blocks(block_size)`.
+        output_debug_file (str, optional): Chemin vers un fichier où les informations de débogage seront écrites.
+        target_freq (float): Fréquence cible pour la détection de cloche (Hz).
+        bandwidth (float): Bande passante autour de la fréquence cible (Hz).
+        min_peak_height (float): Hauteur minimale de pic pour la détection.
+        peaks_in_row (int): Nombre minimal de pics consécutifs pour une détection.
+        max_gap (float): Gap maximal entre pics (secondes).
+        block_seconds (float): Durée d'un bloc audio (secondes).
+        peak_hold_rate (float): Fréquence de l'enveloppe crête (Hz), 0 pour chercher les pics
+            sur chaque échantillon. Ignoré si la source fournit déjà une enveloppe.
+        tracer (Tracer, optional): Traceur de la lecture et des étapes de détection de chaque bloc.
+
+    Returns:
+        list: Une liste de listes, où chaque sous-liste contient les timestamps d'un événement de sonnerie de cloche détecté.
+    """
+    valid_events = list(iter_bell_events_from_source(
+        audio_source,
+        target_freq=target_freq,
+        bandwidth=bandwidth,
+        min_peak_height=min_peak_height,
+        peaks_in_row=peaks_in_row,
+        max_gap=max_gap,
+        block_seconds=block_seconds,
+        peak_hold_rate=peak_hold_rate,
+        tracer=tracer
+    ))
 
-    # Écrire les informations de débogage si demandées
     if output_debug_file:
-        with open(output_debug_file, 'w') as f:
-            f.write("Informations de Débogage de Détection de Sonnerie de Cloche\n")
-            f.write("=" * 40 + "\n")
-            for i, group in enumerate(valid_events):
-                # Convertir les timestamps en format hh:mm:ss.ssss
-                formatted_times = [f"{int(t // 3600):02d}:{int((t % 3600) // 60):02d}:{int(t % 60):02d}.{int((t % 1) * 1000):03d}" for t in group]
-                f.write(f"Événement {i+1}: {formatted_times}\n")
-            f.write("=" * 40 + "\n")
+        write_bell_debug_file(valid_events, output_debug_file)
 
     return valid_events
 
-def get_video_creation_info(video_path):
+def iter_bell_events_from_source(audio_source, target_freq=DEFAULT_TARGET_FREQ, bandwidth=DEFAULT_BANDWIDTH,
+                                 min_peak_height=DEFAULT_MIN_PEAK_HEIGHT, peaks_in_row=DEFAULT_PEAKS_IN_ROW,
+                                 max_gap=DEFAULT_MAX_GAP, block_seconds=DEFAULT_BLOCK_SECONDS,
+                                 peak_hold_rate=DEFAULT_PEAK_HOLD_RATE, tracer=None):
+    """
+    Produit les événements de cloche au fil de la lecture de `audio_source`.
+
+    Chaque événement est émis dès qu'il est confirmé (plus aucun pic ne peut s'y
+    ajouter), sans attendre la fin de l'audio. Les paramètres sont ceux de
+    `detect_bell_ringing_from_source`.
+
+    Yields:
+        list: Timestamps (secondes) d'un événement de sonnerie de cloche.
+    """
+    sr = audio_source.sample_rate
+    is_envelope = getattr(audio_source, 'is_envelope', False)
+    detector = StreamingBellDetector(
+        sr,
+        target_freq=target_freq,
+        bandwidth=bandwidth,
+        min_peak_height=min_peak_height,
+        peaks_in_row=peaks_in_row,
+        max_gap=max_gap,
+        prefiltered=is_envelope,
+        prefilter_delay=audio_source.latency if is_envelope else 0.0,
+        peak_hold_rate=peak_hold_rate,
+        tracer=tracer
+    )
+
+    blocks = audio_source.blocks(int(sr * block_seconds))
+    while True:
+        # Attente du bloc suivant : décodage ffmpeg ou lecture du fichier
+        with trace_span(tracer, "read block", "audio"):
+            block = next(blocks, None)
+        if block is None:
+            break
+        yield from detector.process_block(block)
+    yield from detector.finish()
+
+def write_bell_debug_file(valid_events, output_debug_file):
+    """
+    Écrit les événements de sonnerie de cloche détectés dans un fichier de débogage.
+
+    Args:
+        valid_events (list): Événements détectés (listes de timestamps en secondes).
+        output_debug_file (str): Chemin du fichier de débogage à écrire.
+    """
+    with open(output_debug_file, 'w') as f:
+        f.write("Informations de Débogage de Détection de Sonnerie de Cloche\n")
+        f.write("=" * 40 + "\n")
+        for i, group in enumerate(valid_events):
+            # Convertir les timestamps en format hh:mm:ss.ssss
+            formatted_times = [f"{int(t // 3600):02d}:{int((t % 3600) // 60):02d}:{int(t % 60):02d}.{int((t % 1) * 1000):03d}" for t in group]
+            f.write(f"Événement {i+1}: {formatted_times}\n")
+        f.write("=" * 40 + "\n")
+
+def probe_creation_time(video_path):
+    """
+    Lit la balise `creation_time` du conteneur.
+
+    Les fichiers MP4/MOV sont lus directement en Python (`core.mp4_meta`, quelques
+    petites lectures, aucun processus lancé) ; FFprobe n'est appelé que pour les
+    conteneurs que ce lecteur ne sait pas analyser.
+
+    Args:
+        video_path (str): Chemin vers le fichier vidéo.
+
+    Returns:
+        str: Valeur de la balise, ou None si elle est absente.
+
+    Raises:
+        RuntimeError: Si ffprobe échoue.
+    """
+    try:
+        return read_creation_time(video_path)
+    except UnsupportedContainer as e:
+        logger.debug(f"Lecture native impossible pour {video_path} ({e}), appel à ffprobe")
+    return ffprobe_creation_time(video_path)
+
+def ffprobe_creation_time(video_path):
+    """
+    Lit la balise `creation_time` du conteneur avec FFprobe.
+
+    Repli de `probe_creation_time`, utilisé seulement pour les conteneurs que le
+    lecteur natif (`core.mp4_meta`) refuse (`UnsupportedContainer`). Seule cette
+    balise est demandée (`-show_entries format_tags=creation_time`), ffprobe n'a
+    donc pas à décrire les flux ni le format complet.
+
+    Args:
+        video_path (str): Chemin vers le fichier vidéo.
+
+    Returns:
+        str: Valeur de la balise, ou None si elle est absente.
+
+    Raises:
+        RuntimeError: Si ffprobe échoue.
+    """
+    command = [
+        'ffprobe',
+        '-v', 'error',
+        '-show_entries', 'format_tags=creation_time',
+        '-print_format', 'json',
+        video_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe a échoué: {result.stderr.strip()}")
+    metadata = json.loads(result.stdout)
+    return metadata.get('format', {}).get('tags', {}).get('creation_time', None)
+
+def get_video_creation_info(video_path, metadata_cache=None):
     """
-    Extrait les métadonnées de création d'un fichier vidéo en un seul appel FFprobe.
+    Extrait les métadonnées de création d'un fichier vidéo.
 
-    Cette fonction optimisée récupère à la fois la date formatée (AAAA-MM-JJ) et
-    l'objet datetime complet pour le tri, en un seul appel FFprobe.
+    Récupère à la fois la date formatée (AAAA-MM-JJ) et l'objet datetime complet
+    pour le tri, à partir d'une seule lecture de `creation_time`, cherchée dans
+    cet ordre :
+
+    1. le cache de métadonnées, pour un fichier déjà sondé et inchangé ;
+    2. la boîte `mvhd` lue directement dans le fichier (`core.mp4_meta`) ;
+    3. ffprobe, seulement si ce lecteur refuse le conteneur (`UnsupportedContainer`).
+
+    Une date lue en 2 ou 3 est ajoutée au cache.
 
     Args:
         video_path (str): Chemin vers le fichier vidéo.
+        metadata_cache (MetadataCache, optional): Cache persistant des métadonnées.
 
     Returns:
         tuple: (formatted_date_str, datetime_obj) où:
@@ -170,18 +406,13 @@ def get_video_creation_info(video_path):
         >>> print(f"Date: {formatted_date}, Full datetime: {datetime_obj}")
     """
     try:
-        # Appel unique à FFprobe pour obtenir toutes les métadonnées
-        command = [
-            'ffprobe',
-            '-v', 'error',
-            '-show_format',
-            '-print_format', 'json',
-            video_path
-        ]
-        result = subprocess.run(command, capture_output=True, text=True)
-        metadata = json.loads(result.stdout)
+        metadata = metadata_cache.get(video_path) if metadata_cache is not None else None
+        if metadata is None:
+            metadata = {'creation_time': probe_creation_time(video_path)}
+            if metadata_cache is not None:
+                metadata_cache.put(video_path, metadata)
 
-        creation_time = metadata['format'].get('tags', {}).get('creation_time', None)
+        creation_time = metadata['creation_time']
 
         if creation_time:
             datetime_obj = datetime.strptime(creation_time, '%Y-%m-%dT%H:%M:%S.%fZ')
@@ -222,15 +453,20 @@ def get_video_metadata(video_path):
     formatted_date, _ = get_video_creation_info(video_path)
     return formatted_date
 
-def sort_videos_by_creation_date(video_files):
+def sort_videos_by_creation_date(video_files, metadata_cache=None, max_workers=DEFAULT_PROBE_WORKERS, tracer=None):
     """
     Trie une liste de fichiers vidéo par leur date de création et retourne la liste triée avec la date de la première vidéo.
 
     Cette fonction optimisée extrait les métadonnées une seule fois par vidéo et retourne à la fois la liste triée
-    et la date de création de la première vidéo pour le nommage du répertoire de sortie.
+    et la date de création de la première vidéo pour le nommage du répertoire de sortie. Les vidéos sont sondées
+    en parallèle (lectures limitées par les entrées/sorties), et seules celles absentes du cache de
+    métadonnées sont sondées.
 
     Args:
         video_files (list): Liste des chemins des fichiers vidéo.
+        metadata_cache (MetadataCache, optional): Cache persistant des métadonnées (sauvegardé à la fin).
+        max_workers (int): Nombre maximal de sondages simultanés.
+        tracer (Tracer, optional): Traceur du sondage de chaque vidéo.
 
     Returns:
         tuple: (sorted_video_files, first_video_date, sorted_video_info) où:
@@ -244,11 +480,22 @@ def sort_videos_by_creation_date(video_files):
         >>> for video, date, _ in video_info:
         ...     print(f"{video}: {date}")
     """
-    # Obtenir les informations de création pour toutes les vidéos en une seule passe
+    # Obtenir les informations de création pour toutes les vidéos en une seule passe (ordre conservé)
     video_info = []
-    for video in video_files:
-        formatted_date, creation_datetime = get_video_creation_info(video)
-        video_info.append((video, formatted_date, creation_datetime))
+    if video_files:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(video_files)))) as executor:
+            def probe(video):
+                with trace_span(tracer, "probe", "probe", video=os.path.basename(video)):
+                    return get_video_creation_info(video, metadata_cache)
+
+            infos = executor.map(probe, video_files)
+            for video, (formatted_date, creation_datetime) in zip(video_files, infos):
+                video_info.append((video, formatted_date, creation_datetime))
+    if metadata_cache is not None:
+        try:
+            metadata_cache.save()
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache de métadonnées: {e}")
 
     # Trier par datetime de création (du plus ancien au plus récent), les vidéos sans date vont à la fin
     sorted_videos = sorted(
@@ -264,7 +511,131 @@ def sort_videos_by_creation_date(video_files):
 
     return sorted_video_files, first_video_date, sorted_videos
 
-def create_round_video(round_params, logo_path, temp_video_list, round_time):
+def cache_analysis(analysis_cache, audio_source, extraction_params, detection_params, valid_events):
+    """
+    Met en cache les événements détectés et, s'il a été enregistré, l'audio analysé.
+
+    Args:
+        analysis_cache (AnalysisCache): Cache d'analyse, ou None s'il est désactivé.
+        audio_source: Source audio analysée (`RecordingAudioSource` pour mettre l'audio en cache).
+        extraction_params (dict): Paramètres d'extraction de l'audio.
+        detection_params (dict): Paramètres de détection.
+        valid_events (list): Événements détectés.
+    """
+    if analysis_cache is None:
+        return
+    try:
+        analysis_cache.store_events(extraction_params, detection_params, valid_events)
+        if isinstance(audio_source, RecordingAudioSource):
+            analysis_cache.store_audio(extraction_params, audio_source.recorded(), audio_source.sample_rate,
+                                       is_envelope=audio_source.is_envelope, latency=audio_source.latency)
+    except OSError as e:
+        logger.warning(f"Impossible d'écrire dans le cache d'analyse: {e}")
+
+def wav_is_current(wav_path, audio_key):
+    """
+    Indique si `wav_path` contient déjà l'audio de clé `audio_key`.
+
+    La clé de l'audio (`AnalysisCache.audio_key`) est écrite à côté du WAV
+    (`<wav>.key`) ; le répertoire temporaire étant partagé entre les exécutions,
+    un WAV sans clé ou d'une autre session est considéré comme absent.
+    """
+    try:
+        with open(wav_path + ".key") as f:
+            return f.read().strip() == audio_key and os.path.exists(wav_path)
+    except OSError:
+        return False
+
+def record_wav_key(wav_path, audio_key):
+    """Associe `audio_key` au WAV qui vient d'être écrit (voir `wav_is_current`)."""
+    with open(wav_path + ".key", "w") as f:
+        f.write(audio_key)
+
+def write_wav_samples(wav_path, samples, sample_rate):
+    """
+    Écrit des échantillons float (audio PCM relu du cache) en WAV PCM 16 bits mono.
+
+    Les échantillons issus d'un décodage s16 sont des multiples exacts de
+    `PCM16_SCALE` : le WAV est identique à celui qu'aurait écrit ffmpeg.
+    """
+    import soundfile as sf
+
+    sf.write(wav_path, to_pcm16(samples), sample_rate, subtype='PCM_16')
+
+class RoundPlanner:
+    """
+    Transforme les événements de cloche, reçus dans l'ordre, en rounds.
+
+    Un round commence 0.5 s avant le premier pic d'un événement et se termine 1 s
+    après le premier pic de l'événement suivant ; il n'est retenu que si sa durée
+    vaut `round_time` à ±2 secondes près. Un round est donc connu dès que
+    l'événement qui le suit est confirmé.
+    """
+
+    def __init__(self, round_time, creation_date):
+        """
+        Args:
+            round_time (int): Durée d'un round en secondes.
+            creation_date (str): Date utilisée pour nommer les fichiers de sortie.
+        """
+        self.round_time = round_time
+        self.creation_date = creation_date
+        self.rounds = 0
+        self._previous = None
+
+    def push(self, group):
+        """
+        Ajoute l'événement suivant.
+
+        Args:
+            group (list): Timestamps (secondes) de l'événement.
+
+        Returns:
+            tuple: (round_number, start_time, delta_sec, creation_date) du round qui
+                se termine sur cet événement, ou None.
+        """
+        round_params = None
+        if self._previous is not None:
+            start_time = self._previous[0] - 0.5
+            delta_sec = group[0] - start_time + 1
+
+            # Vérifier si delta est d'environ 2 minutes +- 2 secondes
+            if self.round_time - 2 <= delta_sec <= self.round_time + 2:
+                self.rounds += 1
+                round_params = (self.rounds, start_time, delta_sec, self.creation_date)
+        self._previous = group
+        return round_params
+
+    def plan(self, events):
+        """
+        Produit les rounds au fil des événements.
+
+        Args:
+            events (iterable): Événements de cloche, dans l'ordre.
+
+        Yields:
+            tuple: Paramètres des rounds retenus.
+        """
+        for group in events:
+            round_params = self.push(group)
+            if round_params is not None:
+                yield round_params
+
+def plan_rounds(valid_events, round_time, creation_date):
+    """
+    Liste les rounds délimités par des événements de cloche consécutifs.
+
+    Args:
+        valid_events (list): Événements détectés (listes de timestamps en secondes).
+        round_time (int): Durée d'un round en secondes.
+        creation_date (str): Date utilisée pour nommer les fichiers de sortie.
+
+    Returns:
+        list: Tuples (round_number, start_time, delta_sec, creation_date).
+    """
+    return list(RoundPlanner(round_time, creation_date).plan(valid_events))
+
+def create_round_video(round_params, logo_path, temp_video_list, round_time, cutter=None):
     """
     Crée un fichier vidéo pour un round spécifique.
 
@@ -273,67 +644,46 @@ def create_round_video(round_params, logo_path, temp_video_list, round_time):
         logo_path (str): Chemin vers le fichier logo
         temp_video_list (str): Chemin vers le fichier de liste vidéo temporaire
         round_time (int): Durée d'un round en secondes
+        cutter (RoundCutter, optional): Stratégie de découpage (défaut : réencodage avec logo)
 
     Returns:
-        str: Message de résultat
-    """
-    round_number, start_time, delta_sec, creation_date = round_params
-
-    # Nom de fichier de sortie
-    output_file = os.path.join(f"{creation_date}-boxing", f"{creation_date}_round_{round_number:02d}.mp4")
-
-    cmd = [
-        "nice", "-n", "10",
-        "ffmpeg", "-y",
-        "-ss", f"{max(0, start_time):.3f}",
-        "-t", f"{delta_sec:.3f}",
-        "-f", "concat", "-safe", "0",
-        "-i", temp_video_list,
-        "-i", logo_path,
-        "-filter_complex",
-        (
-            "[0:v]drawtext=text='{}':"
-            "fontsize=24:x=10:y=10:fontcolor=white:box=1:boxcolor=black@0.5[text];"
-            "[text][1:v]overlay=W-w-10:10[outv]"
-        ).format(creation_date),
-        "-map", "[outv]",
-        "-map", "0:a?",
-        "-c:a", "aac", "-b:a", "48k",
-        "-c:v", "libx264",
-        "-b:v", "4M",
-        "-preset", "fast",
-        "-movflags",  "+faststart",
-        output_file,
-    ]
+        dict: Entrée de manifeste du round (fichier, début demandé et réel, écart)
+    """
+    if cutter is None:
+        cutter = ReencodeCutter(logo_path)
+    return cutter.cut(round_params, temp_video_list)
 
-    # Exécuter la commande ffmpeg
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    # Afficher le résultat avec verrouillage pour éviter les mélanges de sortie
-    with console_lock:
-        if result.returncode == 0:
-            td = timedelta(seconds=start_time)
-            hh_mm_ss = str(td).split(".")[0]
-            delta_td = timedelta(seconds=delta_sec)
-            delta_str = str(delta_td).split(".")[0].rjust(8, "0")
-            logger.info(f"Création du round {round_number}: {output_file} ({hh_mm_ss} pour {delta_str})")
-        else:
-            logger.error(f"Échec de la création du round {round_number}: {output_file}")
-            logger.debug("FFmpeg stdout: %s", result.stdout)
-            logger.debug("FFmpeg stderr: %s", result.stderr)
+class SessionError(RuntimeError):
+    """Erreur qui interrompt le traitement d'une session."""
 
-    return output_file
+def add_session_arguments(parser):
+    """
+    Ajoute les options de traitement d'une session (découpage, cache, détection).
 
-def main():
-    # Analyser les arguments de la ligne de commande
-    parser = argparse.ArgumentParser(description='Découpe les vidéos de boxe en rounds individuels basés sur les sons de cloche.')
+    Partagées par `split_rounds.py` et le mode batch.
 
+    Args:
+        parser (argparse.ArgumentParser): Analyseur à compléter.
+    """
     # Paramètres courants
-    parser.add_argument('video_files', nargs='+', help='Chemin(s) vers le(s) fichier(s) vidéo à traiter')
     parser.add_argument('--debug', action='store_true', help='Activer le logging de débogage')
     parser.add_argument('--logo', type=str, help='Chemin vers le fichier logo à superposer sur les vidéos de sortie', default=None)
     parser.add_argument('--round-time', type=int, help='Durée d\'un round en secondes (par défaut: 120)', default=DEFAULT_ROUND_TIME)
-    parser.add_argument('--max-workers', type=int, help='Nombre maximum de threads pour le traitement parallèle (par défaut: basé sur le nombre de cœurs)', default=DEFAULT_MAX_WORKERS)
+    parser.add_argument('--cut-mode', choices=CUT_MODES, default='reencode',
+                        help='Découpage des rounds: reencode (logo et date, coupe exacte), copy (copie des flux sans habillage, '
+                             'coupe sur l\'image clé précédente, quelques secondes pour une relecture rapide) ou smart '
+                             '(coupe exacte sans habillage, seule la tête jusqu\'à la première image clé est réencodée) ou graph '
+                             '(un seul processus ffmpeg décode les sources une fois et encode tous les rounds habillés)')
+    parser.add_argument('--max-workers', type=int, help='Nombre maximum de rounds encodés en parallèle (par défaut: nombre de cœurs). Le nombre effectif et les threads de chaque encodage sont ajustés automatiquement', default=DEFAULT_MAX_WORKERS)
+    parser.add_argument('--pin-cores', action='store_true', help='Épingler chaque encodage sur des cœurs disjoints (taskset)')
+    parser.add_argument('--force', action='store_true', help='Réencoder tous les rounds, même ceux que le manifeste du répertoire de sortie indique inchangés')
+    parser.add_argument('--cache-dir', type=str, help=f'Répertoire du cache d\'analyse audio entre exécutions (par défaut: {ANALYSIS_CACHE_DIR})', default=ANALYSIS_CACHE_DIR)
+    parser.add_argument('--cache-max-mb', type=int, help=f'Taille maximale du cache d\'analyse en Mo (par défaut: {DEFAULT_CACHE_BYTES // (1024 * 1024)})', default=DEFAULT_CACHE_BYTES // (1024 * 1024))
+    parser.add_argument('--no-cache', action='store_true', help='Ne pas lire ni écrire le cache d\'analyse')
+    parser.add_argument('--cache-audio', action='store_true', help='Garder aussi l\'audio décodé complet dans le cache d\'analyse (PCM 16 bits, environ 320 Mo par heure), pour changer un paramètre de détection sans redécoder les vidéos ; sans cette option seuls les événements et l\'enveloppe --ffmpeg-envelope sont gardés')
+    parser.add_argument('--progress-interval', type=float, help=f'Intervalle entre deux bilans de progression des processus ffmpeg (images/s, vitesse, octets écrits, fin estimée), 0 pour les désactiver (par défaut: {DEFAULT_PROGRESS_INTERVAL:g} s)', default=DEFAULT_PROGRESS_INTERVAL)
+    parser.add_argument('--progress-file', type=str, help='Fichier JSON réécrit à chaque bilan avec la progression de chaque ffmpeg et les totaux', default=None)
+    parser.add_argument('--trace', type=str, help='Écrire une trace des étapes (durée, temps CPU, pic de mémoire de chaque étape, thread et ffmpeg) dans ce fichier JSON, à ouvrir dans chrome://tracing ou Perfetto', default=None)
 
     # Paramètres experts (groupés sous un groupe d'options)
     expert_group = parser.add_argument_group('Paramètres experts (utiliser avec prudence)')
@@ -342,23 +692,146 @@ def main():
     expert_group.add_argument('--min-peak-height', type=float, help='Hauteur minimale de pic pour la détection (par défaut: 0.03)', default=DEFAULT_MIN_PEAK_HEIGHT)
     expert_group.add_argument('--peaks-in-row', type=int, help='Nombre minimal de pics consécutifs pour la détection (par défaut: 4)', default=DEFAULT_PEAKS_IN_ROW)
     expert_group.add_argument('--max-gap', type=float, help='Gap maximal entre pics (par défaut: 0.6)', default=DEFAULT_MAX_GAP)
-
-    args = parser.parse_args()
+    expert_group.add_argument('--peak-hold-rate', type=int, help=f'Fréquence de l\'enveloppe crête sur laquelle les pics sont cherchés, 0 pour chaque échantillon (par défaut: {DEFAULT_PEAK_HOLD_RATE} Hz)', default=DEFAULT_PEAK_HOLD_RATE)
+    expert_group.add_argument('--write-wav', action='store_true', help=f'Écrire l\'audio extrait dans {TEMP_WAV} au lieu de le décoder en mémoire (ex. pour analyze_bell_frequency.py)')
+    expert_group.add_argument('--ffmpeg-envelope', action='store_true', help='Calculer le passe-bande, le redressement et la décimation dans ffmpeg (détection sur une enveloppe basse fréquence)')
+    expert_group.add_argument('--envelope-rate', type=int, help=f'Fréquence de l\'enveloppe en mode --ffmpeg-envelope (par défaut: {DEFAULT_ENVELOPE_RATE} Hz)', default=DEFAULT_ENVELOPE_RATE)
+    expert_group.add_argument('--extract-workers', type=int, help='Fichiers sources décodés en parallèle pour l\'extraction audio, 1 pour décoder la liste concat d\'un seul tenant (par défaut: un par fichier, au plus un par cœur). Sans effet en mode --streaming ou --pipeline sans --ffmpeg-envelope', default=None)
+    expert_group.add_argument('--streaming', action='store_true', help='Détecter la cloche par blocs à mémoire constante (sessions de plusieurs heures)')
+    expert_group.add_argument('--pipeline', action='store_true', help='Encoder chaque round dès sa détection, pendant que l\'analyse audio continue (détection en flux)')
+    expert_group.add_argument('--block-seconds', type=float, help=f'Durée d\'un bloc audio en mode --streaming ou --pipeline (par défaut: {DEFAULT_BLOCK_SECONDS:g})', default=DEFAULT_BLOCK_SECONDS)
+
+def check_session_arguments(parser, args):
+    """Vérifie la cohérence des options de session et configure le niveau de logging."""
+    if args.pipeline and args.cut_mode == 'graph':
+        logger.warning("Le mode graph encode tous les rounds en une fois: ils ne seront lancés qu'après la détection")
+
+    if args.ffmpeg_envelope and args.write_wav:
+        parser.error("--ffmpeg-envelope et --write-wav sont incompatibles")
 
     # Configurer le logging en fonction de l'option debug
     log_level = logging.DEBUG if args.debug else logging.INFO
     logger.setLevel(log_level)
 
-    # Afficher le nombre de cœurs détectés et le nombre de workers utilisé
-    cpu_count = multiprocessing.cpu_count()
-    logger.info(f"Nombre de cœurs CPU détectés: {cpu_count}")
-    logger.info(f"Nombre de workers utilisé: {args.max_workers}")
+def resolve_logo_path(logo):
+    """
+    Logo à superposer : celui demandé, sinon le logo par défaut.
+
+    Raises:
+        FileNotFoundError: Si le logo (ou le logo par défaut) est introuvable.
+        ValueError: Si le logo n'est pas un format d'image supporté.
+    """
+    if logo:
+        return validate_logo_path(logo)
+
+    # Utiliser le logo par défaut si aucun logo n'est spécifié
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    logo_path = os.path.join(script_dir, "logo.png")
+    if not os.path.exists(logo_path):
+        raise FileNotFoundError(f"Logo par défaut introuvable à: {logo_path}")
+
+    logger.info(f"Utilisation du logo par défaut: {logo_path}")
+    return logo_path
+
+def log_session_parameters(args):
+    """Affiche les paramètres de détection et de découpage utilisés."""
+    logger.info("Paramètres de détection de cloche:")
+    logger.info(f"  Fréquence cible: {args.target_freq} Hz")
+    logger.info(f"  Bande passante: {args.bandwidth} Hz")
+    logger.info(f"  Hauteur minimale de pic: {args.min_peak_height}")
+    logger.info(f"  Pics consécutifs: {args.peaks_in_row}")
+    logger.info(f"  Gap maximal: {args.max_gap} secondes")
+    logger.info(f"  Enveloppe crête: {args.peak_hold_rate} Hz" if args.peak_hold_rate else "  Enveloppe crête: désactivée (pics sur chaque échantillon)")
+
+    logger.info(f"Durée du round: {args.round_time} secondes")
+    logger.info(f"Nombre maximum de workers: {args.max_workers}")
+    logger.info(f"Mode de découpage: {args.cut_mode}")
+
+def open_caches(args):
+    """
+    Ouvre le cache de métadonnées et le cache d'analyse désignés par les options.
 
-    # Obtenir les fichiers vidéo depuis les arguments de la ligne de commande
-    video_files = args.video_files
+    Returns:
+        tuple: (MetadataCache, DiskLRUCache), None pour un cache désactivé ou indisponible.
+    """
+    if args.no_cache:
+        return None, None
+    metadata_cache = MetadataCache(os.path.join(args.cache_dir, METADATA_NAME))
+    try:
+        disk_cache = DiskLRUCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    except OSError as e:
+        logger.warning(f"Cache d'analyse indisponible: {e}")
+        disk_cache = None
+    return metadata_cache, disk_cache
+
+def save_cache_stats(disk_cache):
+    """Écrit les compteurs du cache d'analyse (sans effet si le cache est désactivé)."""
+    if disk_cache is None:
+        return
+    try:
+        disk_cache.flush_stats()
+    except OSError as e:
+        logger.warning(f"Impossible d'écrire les statistiques du cache: {e}")
+
+def open_tracer(args):
+    """Crée le traceur demandé par `--trace`, None si le traçage est désactivé."""
+    return Tracer() if args.trace else None
+
+def write_trace(tracer, path, clear=False):
+    """
+    Écrit la trace de l'exécution (sans effet si le traçage est désactivé).
+
+    `clear` vide ensuite le traceur (rotation de la trace d'un processus de longue durée).
+    """
+    if tracer is None:
+        return
+    try:
+        tracer.write(path, clear=clear)
+        logger.info(f"Trace écrite dans {path} (chrome://tracing ou https://ui.perfetto.dev)")
+    except OSError as e:
+        logger.warning(f"Impossible d'écrire la trace: {e}")
+
+def open_progress_monitor(args, tracer=None):
+    """Crée le suivi de progression des processus ffmpeg désigné par les options et lance ses bilans."""
+    monitor = ProgressMonitor(interval=args.progress_interval, report_path=args.progress_file, tracer=tracer)
+    monitor.start()
+    return monitor
+
+def process_session(video_files, args, logo_path, governor, temp_dir=TEMP_DIR, output_root="",
+                    metadata_cache=None, disk_cache=None, analysis_slot=None, monitor=None, tracer=None):
+    """
+    Traite une session : tri des sources, extraction, détection et encodage des rounds.
+
+    Args:
+        video_files (list): Vidéos de la session, dans n'importe quel ordre.
+        args (argparse.Namespace): Options de `add_session_arguments`.
+        logo_path (str): Logo superposé aux rounds.
+        governor (EncodeGovernor): Répartition du CPU entre les encodages (partagée en mode batch).
+        temp_dir (str): Répertoire des fichiers temporaires de la session (liste concat, debug).
+        output_root (str): Répertoire contenant le répertoire de sortie `<date>-boxing`.
+        metadata_cache (MetadataCache, optional): Dates de création déjà sondées.
+        disk_cache (DiskLRUCache, optional): Cache d'analyse audio (None : désactivé).
+        analysis_slot (optional): Gestionnaire de contexte tenu pendant l'extraction et la
+            détection (sémaphore du mode batch) ; aucune limite par défaut.
+        monitor (ProgressMonitor, optional): Suivi de progression de chaque ffmpeg lancé
+            (partagé en mode batch) ; aucun suivi par défaut.
+        tracer (Tracer, optional): Traceur des étapes de la session ; aucune trace par défaut.
+
+    Returns:
+        dict: Bilan de la session (creation_date, output_dir, videos, rounds, encoded,
+            skipped, failed, media_seconds, analysis_seconds, encode_seconds, elapsed_seconds).
+
+    Raises:
+        SessionError: Si les sources ne peuvent pas être lues ou découpées.
+    """
+    started = time.monotonic()
+    analysis_slot = analysis_slot if analysis_slot is not None else contextlib.nullcontext()
+    os.makedirs(temp_dir, exist_ok=True)
 
     # Trier les vidéos par date de création et obtenir la date de la première vidéo en un seul appel
-    sorted_video_files, creation_date, sorted_video_info = sort_videos_by_creation_date(video_files)
+    with trace_span(tracer, "sort", "probe", videos=len(video_files)):
+        sorted_video_files, creation_date, sorted_video_info = sort_videos_by_creation_date(
+            video_files, metadata_cache, tracer=tracer)
 
     if len(sorted_video_files) != len(video_files) or any(
         sorted_video_files[i] != video_files[i]
@@ -369,113 +842,250 @@ def main():
             date_str = formatted_date if formatted_date and formatted_date != 'Non disponible' else 'Inconnu'
             logger.info(f"  {i}. {os.path.basename(video)} - {date_str}")
 
-    # Gérer le paramètre logo - s'assurer que nous avons toujours un logo
-    if args.logo:
-        try:
-            logo_path = validate_logo_path(args.logo)
-        except (FileNotFoundError, ValueError) as e:
-            logger.error(f"Erreur de logo: {e}")
-            sys.exit(1)
-    else:
-        # Utiliser le logo par défaut si aucun logo n'est spécifié
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        logo_path = os.path.join(script_dir, "logo.png")
-
-        if not os.path.exists(logo_path):
-            logger.error(f"Logo par défaut introuvable à: {logo_path}")
-            sys.exit(1)
-
-        logger.info(f"Utilisation du logo par défaut: {logo_path}")
-
-    # Afficher les paramètres experts utilisés
-    logger.info("Paramètres de détection de cloche:")
-    logger.info(f"  Fréquence cible: {args.target_freq} Hz")
-    logger.info(f"  Bande passante: {args.bandwidth} Hz")
-    logger.info(f"  Hauteur minimale de pic: {args.min_peak_height}")
-    logger.info(f"  Pics consécutifs: {args.peaks_in_row}")
-    logger.info(f"  Gap maximal: {args.max_gap} secondes")
-
     logger.info(f"Date de création: {creation_date}")
-    logger.info(f"Durée du round: {args.round_time} secondes")
-    logger.info(f"Nombre maximum de workers: {args.max_workers}")
 
-    # Créer temp_video_list.txt avec des chemins absolus (en utilisant les vidéos triées)
-    with open(TEMP_VIDEO_LIST, "w") as f:
+    # Créer la liste concat avec des chemins absolus (en utilisant les vidéos triées)
+    temp_video_list = os.path.join(temp_dir, os.path.basename(TEMP_VIDEO_LIST))
+    with open(temp_video_list, "w") as f:
         for video in sorted_video_files:
             # Convertir les chemins relatifs en chemins absolus
             abs_video_path = os.path.abspath(video)
             f.write(f"file '{abs_video_path}'\n")
 
-    # Étape 1: Extraire l'audio de la vidéo .lrv en utilisant ffmpeg
-    logger.info("Extraction de l'audio avec ffmpeg vers %s", TEMP_WAV)
-    ffmpeg_cmd = [
-        "ffmpeg", "-v", "debug", "-y",  "-f", "concat", "-safe", "0",
-        "-i", TEMP_VIDEO_LIST, "-vn",      # pas de vidéo
-        "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "1", TEMP_WAV
-    ]
-    result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-    logger.debug("FFmpeg stdout: %s", result.stdout)
-    logger.debug("FFmpeg stderr: %s", result.stderr)
-
-    # Étape 2: Détecter les événements de sonnerie de cloche
-    logger.info("Détection des événements de sonnerie de cloche...")
-    bell_ringing_file = os.path.join(TEMP_DIR, "bell_ringing_debug.txt")
-    valid_events = detect_bell_ringing(
-        TEMP_WAV,
-        bell_ringing_file,
+    bell_ringing_file = os.path.join(temp_dir, "bell_ringing_debug.txt")
+    temp_wav = os.path.join(temp_dir, os.path.basename(TEMP_WAV))
+    detection_params = dict(
         target_freq=args.target_freq,
         bandwidth=args.bandwidth,
         min_peak_height=args.min_peak_height,
         peaks_in_row=args.peaks_in_row,
-        max_gap=args.max_gap
+        max_gap=args.max_gap,
+        peak_hold_rate=args.peak_hold_rate
     )
-    logger.info("Informations de débogage écrites dans %s", bell_ringing_file)
 
-    # Préparer les paramètres pour la création des rounds
-    round_params_list = []
-    round = 0
+    # Le détecteur en flux est utilisé pour l'enveloppe ffmpeg, --streaming et --pipeline
+    streaming = args.streaming or args.ffmpeg_envelope or args.pipeline
+    if args.ffmpeg_envelope:
+        extraction_params = dict(mode='envelope', target_freq=args.target_freq, bandwidth=args.bandwidth,
+                                 envelope_rate=args.envelope_rate)
+    else:
+        extraction_params = dict(mode='pcm', sample_rate=DEFAULT_EXTRACT_SAMPLE_RATE)
+    cache_params = dict(detection_params, streaming=streaming)
 
-    for i, group in enumerate(valid_events):
-        start_time = group[0] - 0.5
+    # Relire l'analyse d'une exécution précédente sur les mêmes vidéos
+    analysis_cache = None
+    valid_events = None
+    if disk_cache is not None:
+        try:
+            with trace_span(tracer, "cache lookup", "cache"):
+                analysis_cache = AnalysisCache(disk_cache, sorted_video_files)
+                valid_events = analysis_cache.load_events(extraction_params, cache_params)
+        except OSError as e:
+            logger.warning(f"Cache d'analyse indisponible: {e}")
+            analysis_cache = None
+    if valid_events is not None:
+        logger.info(f"{len(valid_events)} événements de cloche relus depuis le cache {disk_cache.directory}")
+
+    # Décoder chaque fichier dans son propre ffmpeg quand tout l'audio est gardé en mémoire
+    # (décodage complet ou enveloppe) ; la détection en flux garde le concat à mémoire constante
+    extract_workers = min(args.extract_workers or DEFAULT_MAX_WORKERS, len(sorted_video_files))
+    parallel_extraction = extract_workers > 1 and (args.ffmpeg_envelope or not streaming)
+
+    # Le WAV demandé n'est réécrit que s'il ne provient pas déjà de ces mêmes vidéos
+    wav_key = analysis_cache.audio_key(extraction_params) if analysis_cache is not None else None
+    wav_ready = args.write_wav and wav_key is not None and wav_is_current(temp_wav, wav_key)
+    if wav_ready:
+        logger.info("Audio déjà extrait pour ces vidéos dans %s", temp_wav)
+    write_wav = args.write_wav and not wav_ready
+
+    cached_audio = None
+    if analysis_cache is not None and ((valid_events is None and not wav_ready) or write_wav):
+        with trace_span(tracer, "cache load", "cache"):
+            cached_audio = analysis_cache.load_audio(extraction_params)
+
+    if write_wav and cached_audio is not None:
+        # Étape 1: Écrire le WAV à partir de l'audio relu depuis le cache, sans ffmpeg
+        logger.info("Écriture de l'audio relu depuis le cache vers %s", temp_wav)
+        with trace_span(tracer, "write wav", "audio"):
+            write_wav_samples(temp_wav, cached_audio[0], cached_audio[1])
+    elif write_wav:
+        # Étape 1: Extraire l'audio de la vidéo .lrv en utilisant ffmpeg
+        logger.info("Extraction de l'audio avec ffmpeg vers %s", temp_wav)
+        ffmpeg_cmd = [
+            "ffmpeg", "-v", "debug", "-y",  "-f", "concat", "-safe", "0",
+            "-i", temp_video_list, "-vn",      # pas de vidéo
+            "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "1", temp_wav
+        ]
+        with analysis_slot, trace_span(tracer, "extract", "audio"):
+            if monitor is None:
+                result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+            else:
+                result = monitor.run(ffmpeg_cmd, f"audio {creation_date}")
+        logger.debug("FFmpeg stdout: %s", result.stdout)
+        logger.debug("FFmpeg stderr: %s", result.stderr)
+    if write_wav and wav_key is not None:
+        try:
+            record_wav_key(temp_wav, wav_key)
+        except OSError as e:
+            logger.warning(f"Impossible d'associer le WAV à ses vidéos: {e}")
+
+    audio_source = None
+    if valid_events is not None:
+        # Événements relus depuis le cache: aucun audio à analyser
+        pass
+    elif cached_audio is not None:
+        # Étape 1: Audio (ou enveloppe) relu depuis le cache, sans ffmpeg
+        logger.info(f"Audio relu depuis le cache {disk_cache.directory}")
+        audio_source = ArrayAudioSource(*cached_audio)
+    elif args.write_wav:
+        audio_source = WavAudioSource(temp_wav)
+    elif args.ffmpeg_envelope:
+        # Étape 1: Laisser ffmpeg filtrer et décimer, ne recevoir que l'enveloppe
+        logger.info(f"Calcul de l'enveloppe de cloche par ffmpeg à {args.envelope_rate} Hz")
+        if parallel_extraction:
+            logger.info(f"Extraction en parallèle: {len(sorted_video_files)} fichiers, {extract_workers} décodages simultanés")
+            audio_source = ParallelAudioSource.bell_envelope(
+                sorted_video_files, args.target_freq, args.bandwidth,
+                envelope_rate=args.envelope_rate, max_workers=extract_workers
+            )
+        else:
+            audio_source = FFmpegAudioSource.bell_envelope(
+                FFmpegAudioSource.concat_input(temp_video_list),
+                args.target_freq,
+                args.bandwidth,
+                envelope_rate=args.envelope_rate
+            )
+    else:
+        # Étape 1: Décoder l'audio directement depuis le pipe ffmpeg (pas de WAV intermédiaire)
+        logger.info("Décodage de l'audio avec ffmpeg (pipe, sans fichier intermédiaire)")
+        if parallel_extraction:
+            logger.info(f"Extraction en parallèle: {len(sorted_video_files)} fichiers, {extract_workers} décodages simultanés")
+            audio_source = ParallelAudioSource.from_videos(sorted_video_files, max_workers=extract_workers)
+        else:
+            audio_source = FFmpegAudioSource.from_video_list(temp_video_list)
 
-        # Regarder en avant pour le prochain groupe
-        if i + 1 < len(valid_events):
-            next_start = valid_events[i + 1][0]
-            delta_sec = next_start - start_time + 1
+    if isinstance(audio_source, (FFmpegAudioSource, ParallelAudioSource)):
+        audio_source.monitor = monitor
 
-            # Vérifier si delta est d'environ 2 minutes +- 2 secondes
-            if args.round_time - 2 <= delta_sec <= args.round_time + 2:
-                round += 1
-                round_params_list.append((round, start_time, delta_sec, creation_date))
+    # Garder l'audio lu pour le cache : l'enveloppe ffmpeg, petite, toujours ; l'audio décodé
+    # complet (plusieurs centaines de Mo par session) seulement sur demande et s'il tient en mémoire
+    if (analysis_cache is not None and valid_events is None and cached_audio is None
+            and (args.ffmpeg_envelope or (args.cache_audio and not streaming))):
+        audio_source = RecordingAudioSource(audio_source)
 
     # Créer le répertoire de sortie
-    output_dir = f"{creation_date}-boxing"
+    output_dir = os.path.join(output_root, f"{creation_date}-boxing")
     os.makedirs(output_dir, exist_ok=True)
 
-    # Étape 3: Créer les vidéos des rounds en parallèle
-    logger.info(f"Création de {len(round_params_list)} rounds en parallèle avec {args.max_workers} workers...")
-
-    # Utiliser ThreadPoolExecutor pour le traitement parallèle
-    with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
-        # Soumettre toutes les tâches
-        futures = []
-        for params in round_params_list:
-            future = executor.submit(
-                create_round_video,
-                params,
-                logo_path,
-                TEMP_VIDEO_LIST,
-                args.round_time
-            )
-            futures.append(future)
+    # Choisir la stratégie de découpage (le mode copy sonde les images clés une seule fois)
+    try:
+        with trace_span(tracer, "prepare cut", "encode", mode=args.cut_mode):
+            cutter = CutterFactory.create_cutter(args.cut_mode, logo_path=logo_path, video_files=sorted_video_files)
+    except (OSError, RuntimeError, ValueError) as e:
+        raise SessionError(f"Erreur de préparation du découpage: {e}") from e
+    cutter.output_root = output_root
+    cutter.monitor = monitor
+    cutter.tracer = tracer
+
+    # Reprendre l'exécution précédente: seuls les rounds absents, en échec ou modifiés sont refaits
+    try:
+        fingerprints = (analysis_cache.fingerprints if analysis_cache is not None
+                        else [file_fingerprint(video) for video in sorted_video_files])
+        run = IncrementalRun(output_dir, cutter, fingerprints, force=args.force)
+    except OSError as e:
+        raise SessionError(f"Erreur de lecture des sources: {e}") from e
+
+    # Étape 2: Détecter les événements de sonnerie de cloche
+    timings = dict(analysis=0.0)
+    from_cache = valid_events is not None
+    if from_cache:
+        write_bell_debug_file(valid_events, bell_ringing_file)
+    else:
+        logger.info("Détection des événements de sonnerie de cloche...")
 
-        # Attendre la fin de toutes les tâches et collecter les résultats
-        for future in as_completed(futures):
+    if args.pipeline:
+        # Étapes 2 et 3 en parallèle: chaque round est encodé dès que l'événement qui le termine est confirmé
+        if from_cache:
+            events = iter(valid_events)
+        else:
+            logger.info(f"Mode pipeline: blocs de {args.block_seconds:g} secondes, rounds encodés au fil de la détection")
+            valid_events = []
+
+            def confirmed_events():
+                with analysis_slot:
+                    analysis_start = time.monotonic()
+                    for group in iter_bell_events_from_source(audio_source, block_seconds=args.block_seconds,
+                                                              tracer=tracer, **detection_params):
+                        valid_events.append(group)
+                        yield group
+                    timings['analysis'] = time.monotonic() - analysis_start
+
+            events = confirmed_events()
+
+        round_params = RoundPlanner(args.round_time, creation_date).plan(events)
+        encode_start = time.monotonic()
+        try:
+            with trace_span(tracer, "encode", "encode", pipeline=True):
+                cuts = cutter.cut_all(run.pending(round_params), temp_video_list, max_workers=args.max_workers,
+                                      governor=governor, on_cut=run.record)
+        except RuntimeError as e:
+            raise SessionError(f"Erreur d'extraction audio: {e}") from e
+        encode_seconds = time.monotonic() - encode_start
+        if not from_cache:
+            write_bell_debug_file(valid_events, bell_ringing_file)
+            cache_analysis(analysis_cache, audio_source, extraction_params, cache_params, valid_events)
+        logger.info("Informations de débogage écrites dans %s", bell_ringing_file)
+        round_count = run.skipped + len(cuts)
+    else:
+        if not from_cache:
             try:
-                result = future.result()
-                # Le résultat est déjà journalisé dans la fonction create_round_video
-            except Exception as e:
-                logger.error(f"Erreur lors de la création d'un round: {e}")
+                with analysis_slot:
+                    analysis_start = time.monotonic()
+                    # L'enveloppe ffmpeg est toujours traitée par le détecteur en flux
+                    if streaming:
+                        logger.info(f"Mode flux: blocs de {args.block_seconds:g} secondes")
+                        with trace_span(tracer, "detect", "detection", streaming=True):
+                            valid_events = detect_bell_ringing_from_source(
+                                audio_source, bell_ringing_file, block_seconds=args.block_seconds,
+                                tracer=tracer, **detection_params
+                            )
+                    else:
+                        # Durée sondée pour le découpage : dimensionne d'emblée le tampon de décodage
+                        timeline = getattr(cutter, 'timeline', None)
+                        with trace_span(tracer, "load", "audio") as span:
+                            samples = audio_source.read_all(timeline.duration if timeline is not None else None)
+                            span['seconds'] = len(samples) / audio_source.sample_rate
+                        with trace_span(tracer, "detect", "detection"):
+                            valid_events = detect_bell_ringing_samples(
+                                samples, audio_source.sample_rate, bell_ringing_file, tracer=tracer,
+                                **detection_params
+                            )
+                    timings['analysis'] = time.monotonic() - analysis_start
+            except RuntimeError as e:
+                raise SessionError(f"Erreur d'extraction audio: {e}") from e
+            cache_analysis(analysis_cache, audio_source, extraction_params, cache_params, valid_events)
+        logger.info("Informations de débogage écrites dans %s", bell_ringing_file)
+
+        # Préparer les paramètres pour la création des rounds
+        with trace_span(tracer, "plan", "stage", events=len(valid_events)):
+            round_params_list = plan_rounds(valid_events, args.round_time, creation_date)
+        round_count = len(round_params_list)
+
+        # Étape 3: Créer les vidéos des rounds en parallèle
+        logger.info(f"Création de {len(round_params_list)} rounds en parallèle (au plus {args.max_workers} encodages)...")
+        encode_start = time.monotonic()
+        with trace_span(tracer, "encode", "encode", rounds=len(round_params_list)):
+            cuts = cutter.cut_all(run.pending(round_params_list), temp_video_list, max_workers=args.max_workers,
+                                  governor=governor, on_cut=run.record)
+        encode_seconds = time.monotonic() - encode_start
+
+    with trace_span(tracer, "manifest", "stage"):
+        manifest_path = run.write()
+    entries = list(run.entries.values())
+    if run.skipped:
+        logger.info(f"{run.skipped} round(s) inchangé(s) conservé(s) sans réencodage")
+    if entries:
+        logger.info(f"Manifeste écrit dans {manifest_path} (écart maximal: {max(cut['drift'] for cut in entries):.3f} s)")
 
     # Afficher les événements qui n'ont pas de groupe suivant
     for i, group in enumerate(valid_events):
@@ -488,5 +1098,70 @@ def main():
             delta_str = "N/A (dernier groupe)"
             logger.info(f"Événement {i+1:<6} n'a pas de groupe suivant: {hh_mm_ss:<12} {delta_str:<15}")
 
+    encoded = [cut for cut in cuts if cut['success']]
+    return dict(
+        creation_date=creation_date,
+        output_dir=output_dir,
+        videos=len(sorted_video_files),
+        rounds=round_count,
+        encoded=len(encoded),
+        skipped=run.skipped,
+        failed=len(cuts) - len(encoded),
+        media_seconds=sum(cut['duration'] for cut in encoded),
+        analysis_seconds=timings['analysis'],
+        encode_seconds=encode_seconds,
+        elapsed_seconds=time.monotonic() - started,
+    )
+
+def main():
+    # Analyser les arguments de la ligne de commande
+    parser = argparse.ArgumentParser(description='Découpe les vidéos de boxe en rounds individuels basés sur les sons de cloche.')
+    parser.add_argument('video_files', nargs='*', help='Chemin(s) vers le(s) fichier(s) vidéo à traiter')
+    add_session_arguments(parser)
+    parser.add_argument('--cache-stats', action='store_true', help='Afficher les statistiques du cache d\'analyse et quitter')
+
+    args = parser.parse_args()
+
+    if args.cache_stats:
+        stats = DiskLRUCache(args.cache_dir, args.cache_max_mb * 1024 * 1024).stats()
+        logger.info(f"Cache d'analyse {args.cache_dir}: {stats['entries']} entrées, "
+                    f"{stats['bytes'] / (1024 * 1024):.1f} / {stats['max_bytes'] / (1024 * 1024):.0f} Mo, "
+                    f"{stats['hits']} succès, {stats['misses']} échecs")
+        return
+    if not args.video_files:
+        parser.error("au moins un fichier vidéo est requis")
+
+    check_session_arguments(parser, args)
+
+    # Afficher le nombre de cœurs détectés et le nombre de workers utilisé
+    cpu_count = multiprocessing.cpu_count()
+    logger.info(f"Nombre de cœurs CPU détectés: {cpu_count}")
+    logger.info(f"Nombre de workers utilisé: {args.max_workers}")
+
+    # Gérer le paramètre logo - s'assurer que nous avons toujours un logo
+    try:
+        logo_path = resolve_logo_path(args.logo)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Erreur de logo: {e}")
+        sys.exit(1)
+
+    log_session_parameters(args)
+
+    metadata_cache, disk_cache = open_caches(args)
+    governor = EncodeGovernor(max_jobs=args.max_workers, pin=args.pin_cores)
+    tracer = open_tracer(args)
+    monitor = open_progress_monitor(args, tracer)
+    try:
+        with trace_span(tracer, "session", "session", videos=len(args.video_files)):
+            process_session(args.video_files, args, logo_path, governor, metadata_cache=metadata_cache,
+                            disk_cache=disk_cache, monitor=monitor, tracer=tracer)
+    except SessionError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    finally:
+        monitor.stop()
+        write_trace(tracer, args.trace)
+        save_cache_stats(disk_cache)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,201 @@
+"""
+Chronologie des vidéos sources d'une session.
+
+Les vidéos triées sont mises bout à bout comme le fait le démultiplexeur concat
+de ffmpeg. `SourceTimeline` garde le début et la durée de chaque fichier sur
+cette chronologie globale, ce qui permet de convertir un intervalle global
+(`start_time`, `delta_sec` d'un round) en intervalles locaux dans le ou les
+fichiers concernés. Un round peut ainsi être lu directement dans ses fichiers
+avec une recherche rapide (`-ss` avant `-i`), au lieu de parcourir toute la
+concaténation pour atteindre les rounds tardifs.
+"""
+
+import json
+import logging
+import os
+import subprocess
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de fichiers lus directement pour un round ; au-delà, la liste concat est utilisée
+MAX_DIRECT_SOURCES = 2
+
+# Intervalles plus courts ignorés (arrondis des durées de conteneur, secondes)
+MIN_SPAN_SECONDS = 1e-3
+
+# Fichier source sur la chronologie : chemin absolu, début global, durée (secondes), piste audio
+Source = namedtuple('Source', 'path offset duration has_audio')
+
+# Partie d'un intervalle global dans un fichier : chemin, début local, durée (secondes)
+Span = namedtuple('Span', 'path start duration')
+
+# Entrées ffmpeg d'un round :
+# - args : arguments d'entrée (-ss/-t/-i ...)
+# - count : nombre d'entrées (index de la première entrée suivante, ex. le logo)
+# - filter : début de graphe qui produit `video` et `audio`, chaîne vide si inutile
+# - video : étiquette de la vidéo ('0:v' ou sortie de `filter`)
+# - audio : argument de -map pour l'audio, None sans audio
+RoundInputs = namedtuple('RoundInputs', 'args count filter video audio')
+
+
+def concat_inputs(temp_video_list, start_time, duration):
+    """
+    Entrées d'un round lu dans la liste concat complète (recherche dans la concaténation).
+
+    Args:
+        temp_video_list (str): Chemin vers la liste concat des vidéos sources.
+        start_time (float): Début global (secondes).
+        duration (float): Durée (secondes).
+
+    Returns:
+        RoundInputs: Entrées ffmpeg.
+    """
+    args = [
+        "-ss", f"{start_time:.3f}",
+        "-t", f"{duration:.3f}",
+        "-f", "concat", "-safe", "0",
+        "-i", temp_video_list,
+    ]
+    return RoundInputs(args, 1, "", "0:v", "0:a?")
+
+
+def probe_source(video_file):
+    """
+    Lit la durée du conteneur et la présence d'audio d'une vidéo (en-têtes uniquement).
+
+    Returns:
+        tuple: (durée en secondes, True si une piste audio est présente)
+    """
+    command = [
+        'ffprobe',
+        '-v', 'error',
+        '-show_entries', 'format=duration:stream=codec_type',
+        '-print_format', 'json',
+        video_file
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe a échoué sur {video_file}: {result.stderr.strip()}")
+    probe = json.loads(result.stdout)
+    duration = float(probe.get('format', {}).get('duration', 0.0))
+    has_audio = any(stream.get('codec_type') == 'audio' for stream in probe.get('streams', []))
+    return duration, has_audio
+
+
+class SourceTimeline:
+    """Position de chaque vidéo source sur la chronologie de la session."""
+
+    def __init__(self, sources):
+        """
+        Args:
+            sources (list): `Source` dans l'ordre de la liste concat.
+        """
+        self.sources = [Source(*source) for source in sources]
+        self._ends = np.array([source.offset + source.duration for source in self.sources])
+
+    @classmethod
+    def from_durations(cls, video_files, durations, has_audio=True):
+        """Construit la chronologie en mettant bout à bout des durées connues."""
+        offsets = np.concatenate([[0.0], np.cumsum(durations)[:-1]]) if len(durations) else []
+        return cls([Source(os.path.abspath(video), float(offset), float(duration), has_audio)
+                    for video, offset, duration in zip(video_files, offsets, durations)])
+
+    @classmethod
+    def from_videos(cls, video_files):
+        """Construit la chronologie en sondant la durée de chaque vidéo (un appel ffprobe par fichier)."""
+        sources = []
+        offset = 0.0
+        for video in video_files:
+            duration, has_audio = probe_source(video)
+            sources.append(Source(os.path.abspath(video), offset, duration, has_audio))
+            offset += duration
+        logger.info(f"Chronologie des sources: {len(sources)} vidéo(s), {offset:.1f} secondes")
+        return cls(sources)
+
+    @property
+    def has_audio(self):
+        """True si toutes les sources ont une piste audio."""
+        return bool(self.sources) and all(source.has_audio for source in self.sources)
+
+    @property
+    def duration(self):
+        """Durée totale de la session (secondes)."""
+        return float(self._ends[-1]) if len(self._ends) else 0.0
+
+    def __len__(self):
+        return len(self.sources)
+
+    def source_index(self, time):
+        """Index du fichier contenant l'instant global `time` (le dernier au-delà de la fin)."""
+        index = int(np.searchsorted(self._ends, time, side='right'))
+        return min(index, len(self.sources) - 1)
+
+    def spans(self, start_time, duration):
+        """
+        Découpe un intervalle global en intervalles locaux aux fichiers qu'il recouvre.
+
+        Args:
+            start_time (float): Début global (secondes).
+            duration (float): Durée (secondes).
+
+        Returns:
+            list: `Span` dans l'ordre ; le dernier fichier absorbe un éventuel
+                dépassement de la fin de la session.
+        """
+        if not self.sources:
+            return []
+        end_time = start_time + duration
+        spans = []
+        for index in range(self.source_index(start_time), len(self.sources)):
+            source = self.sources[index]
+            if source.offset >= end_time - MIN_SPAN_SECONDS:
+                break
+            local_start = max(0.0, start_time - source.offset)
+            last = index == len(self.sources) - 1
+            local_end = end_time - source.offset if last else min(source.duration, end_time - source.offset)
+            if local_end - local_start >= MIN_SPAN_SECONDS:
+                spans.append(Span(source.path, local_start, local_end - local_start))
+        return spans
+
+    def round_inputs(self, temp_video_list, start_time, duration, audio=True, video=True):
+        """
+        Entrées ffmpeg d'un round, lues directement dans les fichiers qu'il recouvre.
+
+        Un round dans un seul fichier y est lu avec une recherche rapide ; un round à
+        cheval sur deux fichiers lit les deux morceaux et les joint par le filtre
+        concat. Au-delà de `MAX_DIRECT_SOURCES` fichiers, la liste concat complète
+        sert de repli.
+
+        Args:
+            temp_video_list (str): Liste concat complète (repli).
+            start_time (float): Début global (secondes).
+            duration (float): Durée (secondes).
+            audio (bool): Inclure l'audio.
+            video (bool): Inclure la vidéo ; sans elle, un round à cheval ne joint que
+                l'audio et aucune image n'est décodée (`video` vaut alors None).
+
+        Returns:
+            RoundInputs: Entrées ffmpeg.
+        """
+        spans = self.spans(start_time, duration)
+        if not spans or len(spans) > MAX_DIRECT_SOURCES:
+            return concat_inputs(temp_video_list, start_time, duration)
+
+        args = []
+        for span in spans:
+            args += ["-ss", f"{span.start:.6f}", "-t", f"{span.duration:.6f}", "-i", span.path]
+        if len(spans) == 1:
+            return RoundInputs(args, 1, "", "0:v" if video else None, "0:a?" if audio else None)
+
+        # Le filtre concat exige les mêmes flux dans chaque morceau
+        with_audio = audio and self.has_audio
+        if not video and not with_audio:
+            return RoundInputs(args, len(spans), "", None, None)
+        streams = "".join((f"[{i}:v]" if video else "") + (f"[{i}:a]" if with_audio else "")
+                          for i in range(len(spans)))
+        outputs = ("[src_v]" if video else "") + ("[src_a]" if with_audio else "")
+        graph = f"{streams}concat=n={len(spans)}:v={int(video)}:a={int(with_audio)}{outputs};"
+        return RoundInputs(args, len(spans), graph, "src_v" if video else None, "[src_a]" if with_audio else None)
@@ -0,0 +1,234 @@
+"""
+Traçage des étapes d'une exécution au format Chrome trace / Perfetto.
+
+Un `Tracer` enregistre des intervalles (« spans ») : nom, catégorie, thread,
+début et durée, ainsi que le temps CPU du thread et du processus pendant
+l'intervalle et la mémoire résidente (RSS) du processus à ses bornes. Les
+processus ffmpeg sont enregistrés à part, chacun sur sa propre piste, avec le
+temps CPU et le pic de RSS mesurés par le noyau pour ce processus.
+
+Les événements restent en mémoire jusqu'à `write` ; un processus de longue
+durée (démon de surveillance) écrit et vide la trace après chaque session
+(`write(path, clear=True)`) pour que sa mémoire reste bornée.
+
+Le fichier écrit par `write` est un JSON « trace event » qui s'ouvre dans
+chrome://tracing ou https://ui.perfetto.dev : une piste par thread et par
+ffmpeg, ce qui montre les étapes sérialisées et les cœurs inoccupés.
+
+Le traçage est optionnel : comme le suivi de progression, le traceur est créé
+par le point d'entrée (`--trace`) et passé explicitement ; `trace_span`
+accepte `None` et ne mesure alors rien.
+
+Exemple:
+    >>> tracer = Tracer()
+    >>> with trace_span(tracer, "detect", "detection") as span:
+    ...     events = detect(samples)
+    ...     span["events"] = len(events)
+    >>> tracer.write("trace.json")
+"""
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows : pas de getrusage, le pic de RSS n'est pas mesuré
+    resource = None
+
+# Unité de `ru_maxrss` : kilo-octets sous Linux, octets sous macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# Mémoire du processus courant, en pages (Linux)
+STATM_PATH = "/proc/self/statm"
+
+
+def peak_rss():
+    """
+    Pic de mémoire résidente du processus depuis son lancement (octets), None si indisponible.
+
+    C'est un maximum sur toute la vie du processus : il ne redescend jamais et ne
+    décrit pas à lui seul un intervalle.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def current_rss():
+    """Mémoire résidente actuelle du processus (octets), None si indisponible (hors Linux)."""
+    try:
+        with open(STATM_PATH) as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def trace_span(tracer, name, category="stage", **args):
+    """
+    Intervalle mesuré par `tracer`, ou contexte sans effet si `tracer` vaut None.
+
+    Args:
+        tracer (Tracer, optional): Traceur de l'exécution.
+        name (str): Nom de l'intervalle.
+        category (str): Catégorie (filtrable dans le visualiseur).
+        **args: Valeurs affichées avec l'intervalle.
+
+    Returns:
+        Gestionnaire de contexte qui fournit le dictionnaire `args`, complétable
+        pendant l'intervalle.
+    """
+    if tracer is None:
+        return contextlib.nullcontext({})
+    return tracer.span(name, category, **args)
+
+
+def traced(name, category="stage"):
+    """
+    Décorateur de méthode : trace chaque appel avec le traceur `self.tracer` (None : pas de trace).
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with trace_span(self.tracer, name, category):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class Tracer:
+    """Enregistre les intervalles d'une exécution et les exporte en JSON trace event."""
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        Args:
+            clock (callable): Horloge monotone (secondes).
+        """
+        self._clock = clock
+        self._origin = clock()
+        self._lock = threading.Lock()
+        self._events = []
+        self._threads = {}
+        self._processes = {}
+        self.pid = os.getpid()
+
+    def now(self):
+        """Instant courant sur l'horloge du traceur (secondes)."""
+        return self._clock()
+
+    def _timestamp(self, instant):
+        return (instant - self._origin) * 1e6
+
+    def _record(self, event):
+        with self._lock:
+            self._events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category="stage", **args):
+        """
+        Mesure un intervalle dans le thread courant.
+
+        Enregistre la durée, le temps CPU du thread (`thread_cpu_ms`) et du processus
+        entier (`process_cpu_ms`, tous threads confondus), la RSS à la fin (`rss_mb`)
+        et sa variation pendant l'intervalle (`rss_delta_mb`), ainsi que la hausse du
+        pic de RSS de toute la vie du processus (`lifetime_peak_rss_delta_mb`) : non
+        nulle seulement si l'intervalle a dépassé le pic atteint avant lui.
+
+        Yields:
+            dict: Valeurs affichées avec l'intervalle, complétables par l'appelant.
+        """
+        thread = threading.current_thread()
+        tid = threading.get_native_id()
+        with self._lock:
+            self._threads.setdefault(tid, thread.name)
+        start = self._clock()
+        thread_cpu = time.thread_time()
+        process_cpu = time.process_time()
+        start_rss = current_rss()
+        start_peak = peak_rss()
+        try:
+            yield args
+        finally:
+            end = self._clock()
+            args.update(thread_cpu_ms=(time.thread_time() - thread_cpu) * 1e3,
+                        process_cpu_ms=(time.process_time() - process_cpu) * 1e3)
+            rss = current_rss()
+            if rss is not None and start_rss is not None:
+                args.update(rss_mb=rss / 1e6, rss_delta_mb=(rss - start_rss) / 1e6)
+            if start_peak is not None:
+                args['lifetime_peak_rss_delta_mb'] = (peak_rss() - start_peak) / 1e6
+            self._record(dict(name=name, cat=category, ph="X", pid=self.pid, tid=tid,
+                              ts=self._timestamp(start), dur=(end - start) * 1e6, args=args))
+
+    def add_process(self, name, pid, start, end, usage=None, category="ffmpeg", **args):
+        """
+        Enregistre l'exécution d'un processus externe sur sa propre piste.
+
+        Args:
+            name (str): Nom de la tâche.
+            pid (int): Identifiant du processus.
+            start (float): Lancement, sur l'horloge du traceur (`now`).
+            end (float): Fin, sur l'horloge du traceur.
+            usage (resource.struct_rusage, optional): Ressources consommées par le processus
+                (`os.wait4`) : temps CPU utilisateur et système, pic de RSS.
+            category (str): Catégorie.
+            **args: Valeurs affichées avec l'intervalle.
+        """
+        if usage is not None:
+            args.update(user_cpu_ms=usage.ru_utime * 1e3, system_cpu_ms=usage.ru_stime * 1e3,
+                        peak_rss_mb=usage.ru_maxrss * RSS_UNIT / 1e6)
+        with self._lock:
+            self._processes[pid] = name
+        self._record(dict(name=name, cat=category, ph="X", pid=pid, tid=pid,
+                          ts=self._timestamp(start), dur=(end - start) * 1e6, args=args))
+
+    def events(self, clear=False):
+        """
+        Événements enregistrés, précédés des noms de pistes.
+
+        Args:
+            clear (bool): Retirer les événements renvoyés du traceur, ainsi que les noms
+                des processus terminés et des threads qui n'existent plus.
+
+        Returns:
+            list: Événements au format trace event (durées complètes `X` et métadonnées `M`).
+        """
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+            processes = dict(self._processes)
+            if clear:
+                self._events = []
+                self._processes = {}
+                alive = {thread.native_id for thread in threading.enumerate()}
+                self._threads = {tid: name for tid, name in self._threads.items() if tid in alive}
+        metadata = [dict(name="process_name", ph="M", pid=self.pid, tid=0, args=dict(name="split_rounds"))]
+        metadata += [dict(name="thread_name", ph="M", pid=self.pid, tid=tid, args=dict(name=name))
+                     for tid, name in threads.items()]
+        for pid, name in processes.items():
+            metadata.append(dict(name="process_name", ph="M", pid=pid, tid=0, args=dict(name=f"ffmpeg {pid}")))
+            metadata.append(dict(name="thread_name", ph="M", pid=pid, tid=pid, args=dict(name=name)))
+        return metadata + sorted(events, key=lambda event: event['ts'])
+
+    def write(self, path, clear=False):
+        """
+        Écrit la trace (JSON trace event) de façon atomique.
+
+        Args:
+            path (str): Fichier de sortie.
+            clear (bool): Vider ensuite le traceur (voir `events`) : le fichier suivant ne
+                contiendra que les événements enregistrés après celui-ci.
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        events = self.events(clear=clear)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit="ms"), f)
+        os.replace(temp_path, path)
@@ -0,0 +1,458 @@
+"""
+Démon de surveillance d'un répertoire d'ingestion.
+
+Les vidéos copiées depuis les cartes des caméras sont traitées dès qu'elles
+sont complètes, sans lancer `split_rounds.py` à la main :
+
+1. le répertoire est parcouru à intervalle régulier ; un fichier est
+   considéré complet quand sa taille et sa date de modification n'ont pas
+   changé depuis `settle_seconds` (copie terminée) ;
+2. tant qu'un fichier est en cours d'écriture, aucune session n'est formée
+   (il peut appartenir à n'importe laquelle) ;
+3. les fichiers complets sont regroupés en sessions par date de création :
+   un écart de plus de `session_gap` entre deux fichiers consécutifs ouvre une
+   nouvelle session ;
+4. chaque session nouvelle ou modifiée est placée dans une file bornée, puis
+   traitée par le chemin habituel (tri, extraction, détection, encodage) sur
+   le budget partagé du mode batch.
+
+L'état (fichiers de chaque session, statut) est enregistré dans un fichier
+JSON : après un redémarrage, les sessions en file ou en cours sont reprises
+(les rounds déjà encodés sont conservés grâce au manifeste) et les sessions
+terminées ne sont pas retraitées.
+
+Les sessions sont traitées dans le processus du démon : les imports lourds
+(librosa, scipy), l'ouverture des caches et la validation du logo ne sont
+payés qu'une fois, au démarrage.
+
+Avec `--trace`, la trace est écrite après chaque session dans un fichier
+propre à la session, puis vidée : la mémoire du traceur reste bornée quelle
+que soit la durée de fonctionnement du démon.
+
+Exemple:
+    python src/core/watch.py --output-root /rounds /ingest
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Ajouter src au chemin pour permettre l'exécution directe du script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.batch import VIDEO_EXTENSIONS, BatchScheduler
+from core.governor import EncodeGovernor
+from core.split_rounds import (TEMP_DIR, add_session_arguments, check_session_arguments, get_video_creation_info,
+                               log_session_parameters, open_caches, open_progress_monitor, open_tracer,
+                               resolve_logo_path, save_cache_stats, write_trace)
+
+logger = logging.getLogger(__name__)
+
+# Répertoire de l'état et des fichiers temporaires du démon
+WATCH_DIR = os.path.join(TEMP_DIR, "watch")
+
+# Nom du fichier d'état
+STATE_NAME = "watch_state.json"
+
+DEFAULT_POLL_SECONDS = 30  # Intervalle entre deux parcours du répertoire d'ingestion
+DEFAULT_SETTLE_SECONDS = 60  # Délai sans modification avant qu'un fichier soit considéré complet
+DEFAULT_SESSION_GAP = 60  # minutes - Écart de dates de création qui sépare deux sessions
+DEFAULT_MAX_QUEUED = 4  # Sessions en attente de traitement
+
+# Format du nom d'une session (date de création de son premier fichier)
+SESSION_NAME_FORMAT = '%Y-%m-%d_%H%M%S'
+
+
+def session_trace_path(trace_path, name):
+    """Trace d'une session du démon : `trace.json` devient `trace-<session>.json`."""
+    root, ext = os.path.splitext(trace_path)
+    return f"{root}-{name}{ext or '.json'}"
+
+
+def file_identity(stat):
+    """Identité d'une version de fichier : taille et date de modification."""
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class IngestWatcher:
+    """
+    Parcourt le répertoire d'ingestion et signale les fichiers complets.
+
+    Un fichier est complet quand sa date de modification a au moins
+    `settle_seconds` et que son identité (taille, date de modification) n'a
+    pas changé depuis au moins aussi longtemps entre deux parcours (outils de
+    copie qui rétablissent la date d'origine).
+    """
+
+    def __init__(self, ingest_dir, settle_seconds=DEFAULT_SETTLE_SECONDS, exclude=(), clock=time.time):
+        """
+        Args:
+            ingest_dir (str): Répertoire surveillé (parcouru récursivement).
+            settle_seconds (float): Délai sans modification avant qu'un fichier soit complet.
+            exclude (iterable): Répertoires ignorés (sorties et fichiers temporaires).
+            clock (callable): Horloge murale (secondes depuis l'époque).
+        """
+        self.ingest_dir = ingest_dir
+        self.settle_seconds = settle_seconds
+        self.exclude = {os.path.abspath(directory) for directory in exclude}
+        self._clock = clock
+        self._seen = {}
+
+    def _videos(self):
+        for directory, subdirs, names in os.walk(self.ingest_dir):
+            subdirs[:] = sorted(name for name in subdirs
+                                if os.path.abspath(os.path.join(directory, name)) not in self.exclude)
+            for name in sorted(names):
+                if name.lower().endswith(VIDEO_EXTENSIONS) and not name.startswith('.'):
+                    yield os.path.abspath(os.path.join(directory, name))
+
+    def scan(self):
+        """
+        Parcourt le répertoire.
+
+        Returns:
+            tuple: (fichiers complets {chemin: identité}, nombre de fichiers en cours d'écriture)
+        """
+        now = self._clock()
+        complete = {}
+        seen = {}
+        for path in self._videos():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Supprimé ou renommé pendant le parcours
+            identity = file_identity(stat)
+            previous = self._seen.get(path)
+            if previous is None:
+                # Première observation : le fichier n'a pas changé depuis sa date de modification
+                since = min(now, stat.st_mtime)
+            else:
+                since = previous[1] if previous[0] == identity else now
+            seen[path] = (identity, since)
+            if now - since >= self.settle_seconds and now - stat.st_mtime >= self.settle_seconds:
+                complete[path] = identity
+        self._seen = seen
+        return complete, len(seen) - len(complete)
+
+
+def group_sessions(dated_files, session_gap):
+    """
+    Regroupe des fichiers en sessions par date de création.
+
+    Args:
+        dated_files (list): Tuples (chemin, datetime de création).
+        session_gap (timedelta): Écart maximal entre deux fichiers consécutifs d'une session.
+
+    Returns:
+        list: Sessions, chacune une liste de (chemin, datetime) triée par date.
+    """
+    sessions = []
+    for path, created in sorted(dated_files, key=lambda item: (item[1], item[0])):
+        if sessions and created - sessions[-1][-1][1] <= session_gap:
+            sessions[-1].append((path, created))
+        else:
+            sessions.append([(path, created)])
+    return sessions
+
+
+class WatchState:
+    """
+    État persistant du démon : fichiers et statut de chaque session.
+
+    Statuts : 'queued' (en file), 'running', 'ok', 'failed' (des rounds ont
+    échoué) et 'error'. Le fichier est réécrit (atomiquement) à chaque
+    changement de statut.
+    """
+
+    # Sessions reprises au redémarrage
+    RESUMABLE = ('queued', 'running')
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Chemin du fichier JSON (créé à la première sauvegarde).
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.sessions = json.load(f)['sessions']
+        except FileNotFoundError:
+            self.sessions = {}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"État du démon illisible, ignoré: {path} ({e})")
+            self.sessions = {}
+
+    def get(self, name):
+        with self._lock:
+            return self.sessions.get(name)
+
+    def resumable(self):
+        """Sessions en file ou en cours lors de l'arrêt précédent : liste de (nom, fichiers)."""
+        with self._lock:
+            return sorted((name, list(session['files'])) for name, session in self.sessions.items()
+                          if session['status'] in self.RESUMABLE)
+
+    def update(self, name, status, files=None, report=None):
+        """Change le statut d'une session (et ses fichiers ou son bilan) puis sauvegarde."""
+        with self._lock:
+            session = self.sessions.setdefault(name, {})
+            session['status'] = status
+            if files is not None:
+                session['files'] = files
+            if report is not None:
+                session['report'] = report
+            session['updated'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({'sessions': self.sessions}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class WatchDaemon:
+    """
+    Forme les sessions à partir des fichiers complets et les traite en arrière-plan.
+
+    `poll` place les sessions nouvelles ou modifiées dans une file bornée ; des
+    threads de traitement (`max_sessions` du planificateur) les en retirent.
+    Quand la file est pleine, les sessions restantes sont reprises au parcours
+    suivant.
+    """
+
+    def __init__(self, watcher, state, scheduler, session_options, session_gap=timedelta(minutes=DEFAULT_SESSION_GAP),
+                 max_queued=DEFAULT_MAX_QUEUED, metadata_cache=None, trace_path=None):
+        """
+        Args:
+            watcher (IngestWatcher): Détection des fichiers complets.
+            state (WatchState): État persistant.
+            scheduler (BatchScheduler): Traitement des sessions sur le budget partagé.
+            session_options (dict): Arguments de `BatchScheduler.process_files` communs aux
+                sessions (args, logo_path, output_root, temp_root, caches).
+            session_gap (timedelta): Écart de dates de création qui sépare deux sessions.
+            max_queued (int): Taille de la file des sessions en attente.
+            metadata_cache (MetadataCache, optional): Dates de création déjà sondées.
+            trace_path (str, optional): Trace du démon (`--trace`) : après chaque session, la
+                trace du traceur du planificateur est écrite dans `session_trace_path` puis vidée.
+        """
+        self.watcher = watcher
+        self.state = state
+        self.scheduler = scheduler
+        self.session_options = session_options
+        self.session_gap = session_gap
+        self.metadata_cache = metadata_cache
+        self.trace_path = trace_path
+        self.jobs = queue.Queue(maxsize=max(1, max_queued))
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def creation_time(self, path):
+        """Date de création du conteneur, ou date de modification à défaut."""
+        _, created = get_video_creation_info(path, self.metadata_cache)
+        if created is None:
+            created = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).replace(tzinfo=None)
+        return created
+
+    def _enqueue(self, name, files):
+        """Place une session dans la file ; False si la file est pleine."""
+        with self._lock:
+            if name in self._queued:
+                return True
+            try:
+                self.jobs.put_nowait((name, files))
+            except queue.Full:
+                return False
+            self._queued.add(name)
+        self.state.update(name, 'queued', files=files)
+        logger.info(f"Session {name} en file: {len(files)} vidéo(s)")
+        return True
+
+    def resume(self):
+        """Remet en file les sessions interrompues par l'arrêt précédent."""
+        for name, files in self.state.resumable():
+            logger.info(f"Reprise de la session {name}")
+            if not self._enqueue(name, files):
+                break
+
+    def poll(self):
+        """
+        Parcourt le répertoire d'ingestion et met en file les sessions prêtes.
+
+        Returns:
+            int: Nombre de sessions mises en file.
+        """
+        complete, writing = self.watcher.scan()
+        if writing:
+            logger.debug(f"{writing} fichier(s) en cours d'écriture, sessions non formées")
+            return 0
+        if not complete:
+            return 0
+
+        dated = [(path, self.creation_time(path)) for path in complete]
+        if self.metadata_cache is not None:
+            try:
+                self.metadata_cache.save()
+            except OSError as e:
+                logger.warning(f"Impossible d'écrire le cache de métadonnées: {e}")
+
+        queued = 0
+        for session in group_sessions(dated, self.session_gap):
+            name = session[0][1].strftime(SESSION_NAME_FORMAT)
+            files = [[path, complete[path]] for path, _ in session]
+            previous = self.state.get(name)
+            if previous is not None and previous.get('files') == files:
+                continue  # Déjà traitée (ou en file) avec exactement ces fichiers
+            if not self._enqueue(name, files):
+                logger.info("File des sessions pleine, les sessions restantes attendent le prochain parcours")
+                break
+            queued += 1
+        return queued
+
+    def _work(self, stop):
+        while not stop.is_set():
+            try:
+                name, files = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.state.update(name, 'running')
+                report = self.scheduler.process_files(name, [path for path, _ in files], **self.session_options)
+                status = report['status']
+                if status != 'ok' and stop.is_set():
+                    # Encodages probablement interrompus par l'arrêt : reprendre la session au redémarrage
+                    status = 'queued'
+                self.state.update(name, status, report=report)
+                # Le démon tourne longtemps : ne pas attendre l'arrêt pour écrire les compteurs du cache
+                save_cache_stats(self.session_options.get('disk_cache'))
+                if self.trace_path is not None:
+                    # Borner la mémoire du traceur : une trace par session terminée
+                    write_trace(self.scheduler.tracer, session_trace_path(self.trace_path, name), clear=True)
+            finally:
+                with self._lock:
+                    self._queued.discard(name)
+                self.jobs.task_done()
+
+    def start(self, stop):
+        """Démarre les threads de traitement, qui s'arrêtent quand `stop` est levé."""
+        self._workers = [threading.Thread(target=self._work, args=(stop,), daemon=True)
+                         for _ in range(self.scheduler.max_sessions)]
+        for worker in self._workers:
+            worker.start()
+
+    def join(self):
+        """Attend la fin des sessions en cours de traitement."""
+        for worker in self._workers:
+            worker.join()
+
+    def run(self, stop, poll_seconds=DEFAULT_POLL_SECONDS, once=False):
+        """
+        Boucle principale : reprise, puis parcours périodiques jusqu'à `stop`.
+
+        Args:
+            stop (threading.Event): Demande d'arrêt ; les sessions en cours se terminent,
+                celles en file sont reprises au redémarrage.
+            poll_seconds (float): Intervalle entre deux parcours.
+            once (bool): Traiter les fichiers déjà complets puis s'arrêter.
+        """
+        self.resume()
+        self.start(stop)
+        while not stop.is_set():
+            queued = self.poll()
+            if once:
+                # Attendre les sessions en file, puis reparcourir pour celles qui n'y tenaient pas.
+                # Pas de `jobs.join()` : après un arrêt demandé, les threads de traitement ne vident
+                # plus la file et l'attente ne finirait jamais
+                while self.jobs.unfinished_tasks and not stop.is_set():
+                    stop.wait(0.5)
+                if not queued:
+                    stop.set()
+                continue
+            stop.wait(poll_seconds)
+        self.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Surveille un répertoire d\'ingestion et découpe en rounds '
+                                                 'les sessions dès que leurs vidéos sont copiées.')
+    parser.add_argument('ingest_dir', help='Répertoire d\'ingestion (parcouru récursivement)')
+    parser.add_argument('--output-root', type=str, default='.',
+                        help='Répertoire de sortie, un sous-répertoire par session (par défaut: répertoire courant)')
+    parser.add_argument('--state-dir', type=str, default=WATCH_DIR,
+                        help=f'Répertoire de l\'état du démon et des fichiers temporaires (par défaut: {WATCH_DIR})')
+    parser.add_argument('--poll-seconds', type=float, default=DEFAULT_POLL_SECONDS,
+                        help=f'Intervalle entre deux parcours du répertoire (par défaut: {DEFAULT_POLL_SECONDS})')
+    parser.add_argument('--settle-seconds', type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help=f'Délai sans modification avant qu\'un fichier soit considéré complet (par défaut: {DEFAULT_SETTLE_SECONDS})')
+    parser.add_argument('--session-gap', type=float, default=DEFAULT_SESSION_GAP,
+                        help=f'Écart en minutes entre dates de création qui sépare deux sessions (par défaut: {DEFAULT_SESSION_GAP})')
+    parser.add_argument('--max-queued', type=int, default=DEFAULT_MAX_QUEUED,
+                        help=f'Sessions en attente de traitement au plus (par défaut: {DEFAULT_MAX_QUEUED})')
+    parser.add_argument('--analysis-workers', type=int, default=None,
+                        help='Sessions en extraction/détection simultanées (par défaut: un quart des cœurs)')
+    parser.add_argument('--max-sessions', type=int, default=None,
+                        help='Sessions traitées simultanément, analyse ou encodage (par défaut: deux fois --analysis-workers)')
+    parser.add_argument('--once', action='store_true', help='Traiter les fichiers déjà complets puis quitter')
+    add_session_arguments(parser)
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.ingest_dir):
+        parser.error(f"répertoire d'ingestion introuvable: {args.ingest_dir}")
+    check_session_arguments(parser, args)
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+
+    try:
+        logo_path = resolve_logo_path(args.logo)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Erreur de logo: {e}")
+        sys.exit(1)
+
+    log_session_parameters(args)
+
+    metadata_cache, disk_cache = open_caches(args)
+    governor = EncodeGovernor(max_jobs=args.max_workers, pin=args.pin_cores)
+    tracer = open_tracer(args)
+    monitor = open_progress_monitor(args, tracer)
+    scheduler = BatchScheduler(governor, args.analysis_workers, args.max_sessions, monitor=monitor, tracer=tracer)
+    watcher = IngestWatcher(args.ingest_dir, args.settle_seconds,
+                            exclude=[args.output_root, args.state_dir, args.cache_dir, TEMP_DIR])
+    session_options = dict(args=args, logo_path=logo_path, output_root=args.output_root,
+                           temp_root=os.path.join(args.state_dir, "sessions"),
+                           metadata_cache=metadata_cache, disk_cache=disk_cache)
+    daemon = WatchDaemon(watcher, WatchState(os.path.join(args.state_dir, STATE_NAME)), scheduler, session_options,
+                         session_gap=timedelta(minutes=args.session_gap), max_queued=args.max_queued,
+                         metadata_cache=metadata_cache, trace_path=args.trace)
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Arrêt demandé: fin des sessions en cours, les sessions en file seront reprises au redémarrage")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    logger.info(f"Surveillance de {args.ingest_dir} (parcours toutes les {args.poll_seconds:g} s, "
+                f"fichiers complets après {args.settle_seconds:g} s)")
+    try:
+        daemon.run(stop, poll_seconds=args.poll_seconds, once=args.once)
+    finally:
+        monitor.stop()
+        write_trace(tracer, args.trace)
+        save_cache_stats(disk_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,9 @@ import numpy as np
 sys.path.insert(0, os.path.abspath('src'))
 
 from core.spectral_analyzer import SpectralAnalyzer
+from core.bell_dsp import DEFAULT_PEAK_HOLD_RATE
+from core.parallel_scan import default_jobs, scan_frequencies_parallel
+from core.tracing import Tracer, trace_span
 
 # Optional import for visualization
 try:
@@ -124,133 +127,209 @@ def calculate_frequency_score(result, max_amplitude):
         'events_detected': result['events_detected']
     }
 
-def analyze_spectral_response_with_steps(audio_path, analysis_band=(2000, 2100),
-                                       step_size=50.0, output_report=None, main_output_dir=None):
+class FrequencyScan:
     """
-    Perform spectral analysis with frequency scanning using step size.
+    Result of one frequency scan, built once and shared by every artifact.
+
+    Holds the full evaluation result of each scanned frequency (including event
+    timestamps) and its score. The JSON report, debug files, README,
+    visualization and console summary all read from this object; no frequency
+    is evaluated twice.
+    """
+
+    def __init__(self, audio_path, sample_rate, analysis_band, step_size, engine, frequency_results):
+        """
+        Args:
+            audio_path: Path to the analyzed audio file
+            sample_rate: Sample rate of the analyzed audio (Hz)
+            analysis_band: Frequency range that was scanned (Hz)
+            step_size: Frequency step size used for the scan (Hz)
+            engine: Scan engine that produced the results
+            frequency_results: Evaluation results, in scan order
+        """
+        self.audio_path = audio_path
+        self.sample_rate = sample_rate
+        self.analysis_band = tuple(analysis_band)
+        self.step_size = step_size
+        self.engine = engine
+        self.frequency_results = frequency_results
+
+        # Score every frequency against the strongest one
+        max_amplitude = max((result['amplitude_stats']['max'] for result in frequency_results), default=0)
+        self.scored_frequencies = [calculate_frequency_score(result, max_amplitude)
+                                   for result in frequency_results]
+
+        if self.scored_frequencies:
+            self.recommended_frequency = max(self.scored_frequencies, key=lambda x: x['score'])['frequency']
+        else:
+            self.recommended_frequency = None
+
+    def ranked(self):
+        """Return the frequency scores sorted by descending score."""
+        return sorted(self.scored_frequencies, key=lambda x: x['score'], reverse=True)
+
+    def result_for(self, frequency):
+        """Return the full evaluation result of a scanned frequency."""
+        return next((result for result in self.frequency_results if result['frequency'] == frequency), None)
+
+    def recommended_result(self):
+        """Return the full evaluation result of the recommended frequency."""
+        return self.result_for(self.recommended_frequency)
+
+    def top_candidates(self, count=3):
+        """Summaries of the best `count` frequencies by score, for the JSON report."""
+        candidates = []
+        for freq_data in self.ranked()[:count]:
+            freq_result = self.result_for(freq_data['frequency'])
+            candidates.append({
+                'frequency': freq_data['frequency'],
+                'events_detected': freq_result['events_detected'],
+                'consistency_score': freq_result['consistency_score'],
+                'amplitude_stats': freq_result['amplitude_stats'],
+                'density_score': freq_data['density_score']
+            })
+        return candidates
+
+    def to_report(self):
+        """Build the JSON-serializable analysis report."""
+        return {
+            'audio_file': os.path.basename(self.audio_path),
+            'analysis_band': self.analysis_band,
+            'sample_rate': self.sample_rate,
+            'step_analysis': {
+                'step_size': self.step_size,
+                'scanned_frequencies': [{
+                    'frequency': result['frequency'],
+                    'events_detected': result['events_detected'],
+                    'consistency_score': result['consistency_score'],
+                    'amplitude_stats': result['amplitude_stats']
+                } for result in self.frequency_results],
+                'optimal_frequency_by_step': self.recommended_frequency,
+                'scoring_details': self.ranked()
+            },
+            'recommended_frequency': self.recommended_frequency,
+            'top_candidates': self.top_candidates()
+        }
+
+def scan_frequencies(analyzer, audio_path, analysis_band=(2000, 2100), step_size=50.0,
+                     engine='filterbank', jobs=1):
+    """
+    Scan a frequency band with a fixed step and score every frequency.
 
     Args:
+        analyzer: SpectralAnalyzer configured with the detection parameters
         audio_path: Path to WAV file
         analysis_band: Frequency range to analyze (Hz)
         step_size: Frequency step size in Hz for scanning
-        output_report: Path to save analysis report (JSON)
-        main_output_dir: Main output directory for README generation
+        engine: 'filterbank' decimates the signal once to complex baseband, then
+            filters each frequency on the decimated signal
+            (SpectralAnalyzer.evaluate_frequencies), 'exact' runs one full
+            bandpass filter per frequency (SpectralAnalyzer.evaluate_frequency)
+        jobs: Number of worker processes; above 1 the decoded audio is placed in
+            shared memory and the scan is spread over a process pool
 
     Returns:
-        dict: Spectral analysis results
+        FrequencyScan: Scan results
     """
-    # Initialize the analyzer
-    analyzer = SpectralAnalyzer()
-
-    # Initialize results structure
-    results = {
-        'audio_file': os.path.basename(audio_path),
-        'analysis_band': analysis_band,
-        'step_analysis': {
-            'step_size': step_size,
-            'scanned_frequencies': [],
-            'optimal_frequency_by_step': None
-        },
-        'recommended_frequency': None
-    }
-
-    # Get sample rate for reference
-    y, sr = librosa.load(audio_path, sr=None)
-    results['sample_rate'] = sr
+    # Decode once: every evaluation below reuses the same samples
+    y, sr = analyzer.load_audio(audio_path)
 
     # Scan the frequency band with the specified step size
     start_freq = analysis_band[0]
     end_freq = analysis_band[1]
     current_freq = start_freq
 
-    frequency_results = []
-
-    logger.info(f"Scanning frequencies from {start_freq}Hz to {end_freq}Hz with {step_size}Hz steps...")
-
+    frequencies = []
     while current_freq <= end_freq:
-        freq_result = analyzer.evaluate_frequency(audio_path, current_freq)
-        frequency_results.append(freq_result)
-
-        # Add to scanned frequencies list
-        results['step_analysis']['scanned_frequencies'].append({
-            'frequency': current_freq,
-            'events_detected': freq_result['events_detected'],
-            'consistency_score': freq_result['consistency_score'],
-            'amplitude_stats': freq_result['amplitude_stats']
-        })
-
+        frequencies.append(current_freq)
         current_freq += step_size
 
-    logger.info(f"Scanned {len(frequency_results)} frequencies")
+    logger.info(f"Scanning frequencies from {start_freq}Hz to {end_freq}Hz with {step_size}Hz steps ({engine} engine)...")
 
-    # Find optimal frequency from step scanning
-    if frequency_results:
-        # Find max amplitude for normalization
-        max_amplitude = max(result['amplitude_stats']['max'] for result in frequency_results)
+    if jobs > 1:
+        # Worker processes are not traced: the span covers the whole pool
+        with trace_span(analyzer.tracer, "scan_frequencies_parallel", "spectral", jobs=jobs):
+            frequency_results = scan_frequencies_parallel(analyzer, y, sr, frequencies, engine=engine, jobs=jobs)
+    elif engine == 'filterbank':
+        frequency_results = analyzer.evaluate_frequencies(y, frequencies, sample_rate=sr)
+    elif engine == 'exact':
+        frequency_results = [analyzer.evaluate_frequency(y, freq, sample_rate=sr) for freq in frequencies]
+    else:
+        raise ValueError(f"Unknown scan engine: {engine}")
 
-        # Calculate scores for all frequencies
-        scored_freqs = []
-        for result in frequency_results:
-            scored_freqs.append(calculate_frequency_score(result, max_amplitude))
+    logger.info(f"Scanned {len(frequency_results)} frequencies")
 
-        # Find frequency with highest score
-        optimal_step_freq = max(scored_freqs, key=lambda x: x['score'])
-        results['step_analysis']['optimal_frequency_by_step'] = optimal_step_freq['frequency']
-        results['recommended_frequency'] = optimal_step_freq['frequency']
+    scan = FrequencyScan(audio_path, sr, analysis_band, step_size, engine, frequency_results)
+    if scan.recommended_frequency is not None:
+        best = scan.ranked()[0]
+        logger.info(f"Optimal frequency found: {best['frequency']:.1f}Hz (score: {best['score']:.2f})")
 
-        # Add detailed scoring information
-        results['step_analysis']['scoring_details'] = scored_freqs
+    return scan
 
-        logger.info(f"Optimal frequency found: {optimal_step_freq['frequency']:.1f}Hz (score: {optimal_step_freq['score']:.2f})")
+def write_analysis_artifacts(scan, output_report, main_output_dir=None, metadata=None):
+    """
+    Write the JSON report, per-frequency debug files and README of a scan.
 
-    # Save report if requested
-    if output_report:
-        # Enhance the report with detailed event timestamps for top 3 frequencies
-        enhanced_results = results.copy()
+    Args:
+        scan: FrequencyScan to report
+        output_report: Path to save analysis report (JSON)
+        main_output_dir: Main output directory for README generation
+        metadata: Optional 'analysis_metadata' entry for the JSON report
 
-        # Get top 3 frequencies from step analysis based on score
-        step_events = results.get('step_analysis', {}).get('scanned_frequencies', [])
-        scored_freqs = results.get('step_analysis', {}).get('scoring_details', [])
+    Returns:
+        dict: The report written to `output_report`
+    """
+    report = scan.to_report()
+    if metadata:
+        report['analysis_metadata'] = metadata
 
-        # Sort by score (descending) to get top 3
-        scored_freqs.sort(key=lambda x: x['score'], reverse=True)
-        top_3_freqs = [freq['frequency'] for freq in scored_freqs[:3]]
+    # Generate individual frequency debug files
+    output_dir = os.path.join(os.path.dirname(output_report), 'frequency_files')
+    generate_frequency_debug_files(scan, output_dir)
+    if main_output_dir:
+        generate_readme(scan, main_output_dir)
 
-        enhanced_results['top_candidates'] = []
+    with open(output_report, 'w') as f:
+        json.dump(report, f, indent=2)
 
-        for freq in top_3_freqs:
-            # Re-evaluate this frequency to get full details including timestamps
-            freq_result = analyzer.evaluate_frequency(audio_path, freq)
+    return report
 
-            candidate_info = {
-                'frequency': freq,
-                'events_detected': freq_result['events_detected'],
-                'consistency_score': freq_result['consistency_score'],
-                'amplitude_stats': freq_result['amplitude_stats'],
-                'density_score': calculate_event_density(freq_result['event_timestamps'])
-            }
+def analyze_spectral_response_with_steps(audio_path, analysis_band=(2000, 2100),
+                                       step_size=50.0, output_report=None, main_output_dir=None,
+                                       engine='filterbank', jobs=1, analyzer=None):
+    """
+    Perform spectral analysis with frequency scanning using step size.
 
-            enhanced_results['top_candidates'].append(candidate_info)
+    Args:
+        audio_path: Path to WAV file
+        analysis_band: Frequency range to analyze (Hz)
+        step_size: Frequency step size in Hz for scanning
+        output_report: Path to save analysis report (JSON)
+        main_output_dir: Main output directory for README generation
+        engine: Scan engine, see scan_frequencies
+        jobs: Number of worker processes, see scan_frequencies
+        analyzer: SpectralAnalyzer to use (default parameters if omitted)
 
-        # Generate individual frequency debug files
-        output_dir = os.path.join(os.path.dirname(output_report), 'frequency_files')
-        generate_frequency_debug_files(audio_path, step_events, output_report, output_dir, main_output_dir, results, frequency_results)
+    Returns:
+        tuple: (report dict, full frequency evaluation results)
+    """
+    if analyzer is None:
+        analyzer = SpectralAnalyzer()
 
-        with open(output_report, 'w') as f:
-            json.dump(enhanced_results, f, indent=2)
+    scan = scan_frequencies(analyzer, audio_path, analysis_band, step_size, engine=engine, jobs=jobs)
+    if output_report:
+        write_analysis_artifacts(scan, output_report, main_output_dir)
 
-    return results, frequency_results
+    return scan.to_report(), scan.frequency_results
 
-def generate_visualization(results, audio_path, output_dir="visualizations", frequency_results=None):
-    """Generate visualizations of the spectral analysis."""
+def generate_visualization(scan, y, sr, output_dir="visualizations"):
+    """Generate visualizations of the spectral analysis from the decoded audio."""
     if not HAS_MATPLOTLIB:
         logger.warning("matplotlib not available - skipping visualization")
         return None
 
     os.makedirs(output_dir, exist_ok=True)
 
-    # Load audio for visualization
-    y, sr = librosa.load(audio_path, sr=None)
     times = np.arange(len(y)) / sr
 
     # Create figure
@@ -268,28 +347,20 @@ def generate_visualization(results, audio_path, output_dir="visualizations", fre
     plt.subplot(3, 1, 2)
     plt.plot(times, y, alpha=0.3, color='gray', label='Original')
 
-    # Plot events from step analysis (top 3 frequencies)
-    step_events = results.get('step_analysis', {}).get('scanned_frequencies', [])
-
     # Get top 3 frequencies by event count
-    top_freqs = sorted(step_events, key=lambda x: x['events_detected'], reverse=True)[:3]
+    top_freqs = sorted(scan.frequency_results, key=lambda x: x['events_detected'], reverse=True)[:3]
     colors = plt.cm.rainbow(np.linspace(0, 1, len(top_freqs)))
 
-    for i, (freq_info, color) in enumerate(zip(top_freqs, colors)):
-        freq = freq_info['frequency']
-        # Find the full frequency result with timestamps
-        if frequency_results:
-            for freq_result in frequency_results:
-                if abs(freq_result['frequency'] - freq) < 1 and 'event_timestamps' in freq_result:
-                    for event in freq_result['event_timestamps']:
-                        for timestamp in event:
-                            # Find closest index
-                            idx = int(timestamp * sr)
-                            if 0 <= idx < len(y):
-                                plt.scatter(timestamp, y[idx],
-                                           color=color, s=50, alpha=0.7,
-                                           label=f'{freq:.1f}Hz' if i == 0 else "")
-                    break
+    for i, (freq_result, color) in enumerate(zip(top_freqs, colors)):
+        freq = freq_result['frequency']
+        for event in freq_result['event_timestamps']:
+            for timestamp in event:
+                # Find closest index
+                idx = int(timestamp * sr)
+                if 0 <= idx < len(y):
+                    plt.scatter(timestamp, y[idx],
+                               color=color, s=50, alpha=0.7,
+                               label=f'{freq:.1f}Hz' if i == 0 else "")
 
     plt.title('Detected Bell Events (Step Analysis Overlay)')
     plt.xlabel('Time (seconds)')
@@ -300,20 +371,15 @@ def generate_visualization(results, audio_path, output_dir="visualizations", fre
     # Plot 3: Zoom on detected events
     plt.subplot(3, 1, 3)
 
-    for i, (freq_info, color) in enumerate(zip(top_freqs, colors)):
-        freq = freq_info['frequency']
-        # Find the full frequency result with timestamps
-        if frequency_results:
-            for freq_result in frequency_results:
-                if abs(freq_result['frequency'] - freq) < 1 and 'event_timestamps' in freq_result:
-                    for event in freq_result['event_timestamps']:
-                        if event:  # If we have timestamps
-                            start_time = event[0] - 0.1  # 100ms before
-                            end_time = event[-1] + 0.1  # 100ms after
-                            mask = (times >= start_time) & (times <= end_time)
-                            plt.plot(times[mask], y[mask], color=color, alpha=0.7,
-                                    label=f'{freq:.1f}Hz at {format_timestamp(event[0])}')
-                    break
+    for i, (freq_result, color) in enumerate(zip(top_freqs, colors)):
+        freq = freq_result['frequency']
+        for event in freq_result['event_timestamps']:
+            if event:  # If we have timestamps
+                start_time = event[0] - 0.1  # 100ms before
+                end_time = event[-1] + 0.1  # 100ms after
+                mask = (times >= start_time) & (times <= end_time)
+                plt.plot(times[mask], y[mask], color=color, alpha=0.7,
+                        label=f'{freq:.1f}Hz at {format_timestamp(event[0])}')
 
     plt.title('Zoom on Detected Bell Events')
     plt.xlabel('Time (seconds)')
@@ -324,39 +390,30 @@ def generate_visualization(results, audio_path, output_dir="visualizations", fre
     plt.tight_layout()
 
     # Save visualization
-    viz_path = os.path.join(output_dir, f"spectral_analysis_{os.path.basename(audio_path)}.png")
+    viz_path = os.path.join(output_dir, f"spectral_analysis_{os.path.basename(scan.audio_path)}.png")
     plt.savefig(viz_path, dpi=150, bbox_inches='tight')
     plt.close()
 
     return viz_path
 
-def generate_frequency_debug_files(audio_path, step_events, output_report, output_dir=None, main_output_dir=None, results=None, frequency_results=None):
+def generate_frequency_debug_files(scan, output_dir):
     """
     Generate individual debug files for each frequency analyzed.
 
     Args:
-        audio_path: Path to the audio file
-        step_events: List of frequency analysis results
-        output_report: Path to the main JSON report
-        output_dir: Directory to save debug files (default: frequency_files subdirectory)
-        main_output_dir: Main output directory for README and organization
-        results: Analysis results dictionary for README generation
-        frequency_results: Full frequency evaluation results for README generation
-    """
-    analyzer = SpectralAnalyzer()
-
-    if output_dir is None:
-        output_dir = os.path.join(os.path.dirname(output_report), 'frequency_files')
+        scan: FrequencyScan holding the evaluation results
+        output_dir: Directory to save debug files
 
+    Returns:
+        list: Paths of the generated files
+    """
     os.makedirs(output_dir, exist_ok=True)
     logger.info(f"Generating individual frequency debug files in: {output_dir}/")
 
     generated_files = []
 
-    for freq_info in step_events:
-        freq = freq_info['frequency']
-        # Re-evaluate this frequency to get full details including timestamps
-        freq_result = analyzer.evaluate_frequency(audio_path, freq)
+    for freq_result in scan.frequency_results:
+        freq = freq_result['frequency']
 
         # Generate individual debug file for this frequency
         debug_filename = f"bell_events_{int(freq)}Hz.txt"
@@ -371,15 +428,14 @@ def generate_frequency_debug_files(audio_path, step_events, output_report, outpu
             debug_file.write("=" * 60 + "\n")
 
             # Add timestamps for each event
-            if 'event_timestamps' in freq_result:
-                for event_idx, event in enumerate(freq_result['event_timestamps'], 1):
-                    if event and len(event) > 0:
-                        # Format all timestamps in this event
-                        formatted_times = []
-                        for ts in event:
-                            formatted_times.append(format_timestamp(ts))
+            for event_idx, event in enumerate(freq_result['event_timestamps'], 1):
+                if event and len(event) > 0:
+                    # Format all timestamps in this event
+                    formatted_times = []
+                    for ts in event:
+                        formatted_times.append(format_timestamp(ts))
 
-                        debug_file.write(f"Event {event_idx}: {formatted_times}\n")
+                    debug_file.write(f"Event {event_idx}: {formatted_times}\n")
 
             debug_file.write("=" * 60 + "\n")
 
@@ -389,66 +445,75 @@ def generate_frequency_debug_files(audio_path, step_events, output_report, outpu
     logger.info(f"✓ Generated {len(generated_files)} individual frequency debug files")
     logger.info("  Use: meld {}/ or vimdiff to compare files".format(output_dir))
 
-    # Generate README file if we have a main output directory and results
-    if main_output_dir and results and frequency_results:
-        readme_path = os.path.join(main_output_dir, "README_ANALYSIS_RESULTS.md")
-        with open(readme_path, 'w') as readme_file:
-            readme_file.write("# Bell Frequency Analysis Results\n\n")
-            readme_file.write(f"**Analysis Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            readme_file.write(f"**Audio File:** {os.path.basename(audio_path)}\n\n")
-            readme_file.write(f"**Frequency Band:** {results['analysis_band'][0]}-{results['analysis_band'][1]} Hz\n\n")
-            readme_file.write(f"**Step Size:** {results['step_analysis']['step_size']} Hz\n\n")
-            readme_file.write(f"**Frequencies Scanned:** {len(step_events)}\n\n")
-
-            readme_file.write("## 🎯 Analysis Results\n\n")
-            readme_file.write(f"**Recommended Frequency:** {results['recommended_frequency']:.1f} Hz\n\n")
-
-            readme_file.write("### Top 3 Candidates\n\n")
-            readme_file.write("| Frequency | Events | Consistency | Power Score | Density |\n")
-            readme_file.write("|-----------|--------|-------------|-------------|---------|\n")
-
-            # Get top 3 frequencies by score
-            scored_freqs = results.get('step_analysis', {}).get('scoring_details', [])
-            scored_freqs.sort(key=lambda x: x['score'], reverse=True)
-            top_3 = scored_freqs[:3]
-
-            for freq_data in top_3:
-                freq = freq_data['frequency']
-                marker = "✓" if abs(freq - results['recommended_frequency']) < 1 else " "
-                readme_file.write(f"| {marker}{freq:.1f} Hz | {freq_data['events_detected']} | {freq_data['consistency_score']:.4f} | {freq_data['power_score']:.4f} | {freq_data['density_score']:.2f} |\n")
-
-            readme_file.write("\n## 📁 Files Generated\n\n")
-            readme_file.write(f"- `analysis_results.json` - Complete analysis report (JSON)\n")
-            readme_file.write(f"- `{os.path.basename(audio_path)}` - Copy of analyzed audio file\n")
-            readme_file.write(f"- `frequency_files/` - Individual frequency debug files\n")
-
-            readme_file.write("\n## 🔍 How to Use These Results\n\n")
-            readme_file.write("### Compare Frequency Files\n")
-            readme_file.write("```bash\n")
-            readme_file.write(f"meld frequency_files/\n")
-            readme_file.write(f"vimdiff frequency_files/bell_events_{{{{int(results['recommended_frequency'])}}}}Hz.txt frequency_files/bell_events_{{{{int(top_3[1]['frequency'])}}}}Hz.txt\n")
-            readme_file.write("```\n\n")
-            readme_file.write("### Quick Analysis Summary\n")
-            readme_file.write(f"- **Total events at recommended frequency:** {top_3[0]['events_detected']}\n")
-            readme_file.write(f"- **Consistency score:** {top_3[0]['consistency_score']:.3f}\n")
-            readme_file.write(f"- **Frequency range tested:** {len(step_events)} frequencies from {results['analysis_band'][0]}-{results['analysis_band'][1]} Hz\n")
-
-            readme_file.write("\n## 📊 Detailed Statistics\n\n")
-            readme_file.write("### All Scanned Frequencies\n\n")
-            readme_file.write("| Freq | Events | Consistency | Power | Density |\n")
-            readme_file.write("|------|-------|-------------|-------|---------|\n")
-
-            for freq_info in step_events:
-                freq = freq_info['frequency']
-                marker = "✓" if abs(freq - results['recommended_frequency']) < 1 else " "
-                # Calculate density for this frequency
-                density = calculate_event_density(freq_info.get('event_timestamps', []))
-                readme_file.write(f"| {marker}{freq:.1f} | {freq_info['events_detected']} | {freq_info['consistency_score']:.3f} | {freq_info['amplitude_stats']['max']:.4f} | {density:.2f} |\n")
-
-        logger.info(f"✓ Generated README: {readme_path}")
-
     return generated_files
 
+def generate_readme(scan, main_output_dir):
+    """
+    Generate the README summarizing a scan in the main output directory.
+
+    Args:
+        scan: FrequencyScan holding the evaluation results
+        main_output_dir: Main output directory
+
+    Returns:
+        str: Path of the README, or None if nothing was scanned
+    """
+    if scan.recommended_frequency is None:
+        return None
+
+    top_3 = scan.ranked()[:3]
+    compared = top_3[1] if len(top_3) > 1 else top_3[0]
+
+    readme_path = os.path.join(main_output_dir, "README_ANALYSIS_RESULTS.md")
+    with open(readme_path, 'w') as readme_file:
+        readme_file.write("# Bell Frequency Analysis Results\n\n")
+        readme_file.write(f"**Analysis Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        readme_file.write(f"**Audio File:** {os.path.basename(scan.audio_path)}\n\n")
+        readme_file.write(f"**Frequency Band:** {scan.analysis_band[0]}-{scan.analysis_band[1]} Hz\n\n")
+        readme_file.write(f"**Step Size:** {scan.step_size} Hz\n\n")
+        readme_file.write(f"**Frequencies Scanned:** {len(scan.frequency_results)}\n\n")
+
+        readme_file.write("## 🎯 Analysis Results\n\n")
+        readme_file.write(f"**Recommended Frequency:** {scan.recommended_frequency:.1f} Hz\n\n")
+
+        readme_file.write("### Top 3 Candidates\n\n")
+        readme_file.write("| Frequency | Events | Consistency | Power Score | Density |\n")
+        readme_file.write("|-----------|--------|-------------|-------------|---------|\n")
+
+        for freq_data in top_3:
+            freq = freq_data['frequency']
+            marker = "✓" if abs(freq - scan.recommended_frequency) < 1 else " "
+            readme_file.write(f"| {marker}{freq:.1f} Hz | {freq_data['events_detected']} | {freq_data['consistency_score']:.4f} | {freq_data['power_score']:.4f} | {freq_data['density_score']:.2f} |\n")
+
+        readme_file.write("\n## 📁 Files Generated\n\n")
+        readme_file.write(f"- `analysis_results.json` - Complete analysis report (JSON)\n")
+        readme_file.write(f"- `{os.path.basename(scan.audio_path)}` - Copy of analyzed audio file\n")
+        readme_file.write(f"- `frequency_files/` - Individual frequency debug files\n")
+
+        readme_file.write("\n## 🔍 How to Use These Results\n\n")
+        readme_file.write("### Compare Frequency Files\n")
+        readme_file.write("```bash\n")
+        readme_file.write(f"meld frequency_files/\n")
+        readme_file.write(f"vimdiff frequency_files/bell_events_{int(scan.recommended_frequency)}Hz.txt frequency_files/bell_events_{int(compared['frequency'])}Hz.txt\n")
+        readme_file.write("```\n\n")
+        readme_file.write("### Quick Analysis Summary\n")
+        readme_file.write(f"- **Total events at recommended frequency:** {top_3[0]['events_detected']}\n")
+        readme_file.write(f"- **Consistency score:** {top_3[0]['consistency_score']:.3f}\n")
+        readme_file.write(f"- **Frequency range tested:** {len(scan.frequency_results)} frequencies from {scan.analysis_band[0]}-{scan.analysis_band[1]} Hz\n")
+
+        readme_file.write("\n## 📊 Detailed Statistics\n\n")
+        readme_file.write("### All Scanned Frequencies\n\n")
+        readme_file.write("| Freq | Events | Consistency | Power | Density |\n")
+        readme_file.write("|------|-------|-------------|-------|---------|\n")
+
+        for freq_result, freq_data in zip(scan.frequency_results, scan.scored_frequencies):
+            freq = freq_result['frequency']
+            marker = "✓" if abs(freq - scan.recommended_frequency) < 1 else " "
+            readme_file.write(f"| {marker}{freq:.1f} | {freq_result['events_detected']} | {freq_result['consistency_score']:.3f} | {freq_result['amplitude_stats']['max']:.4f} | {freq_data['density_score']:.2f} |\n")
+
+    logger.info(f"✓ Generated README: {readme_path}")
+    return readme_path
+
 def main():
     # Parse command line arguments (homogeneous with split_rounds.py)
     parser = argparse.ArgumentParser(
@@ -460,6 +525,12 @@ def main():
                        help='Frequency analysis band in Hz (default: 2050 2100)')
     parser.add_argument('--step', type=float, default=10.0,
                        help='Frequency step size in Hz for scanning the band (default: 10.0)')
+    parser.add_argument('--engine', choices=['filterbank', 'exact'], default='filterbank',
+                       help='Scan engine: "filterbank" decimates the signal once, then filters each '
+                            'frequency at the decimated rate, "exact" runs one full bandpass filter per frequency (default: filterbank)')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Number of worker processes for the frequency scan; '
+                            '0 uses one per available core (default: 1)')
     parser.add_argument('--visualize', action='store_true',
                        help='Generate visualization graphs')
     parser.add_argument('--debug', action='store_true',
@@ -476,6 +547,12 @@ def main():
                        help='Maximum gap between peaks (default: 0.6)')
     parser.add_argument('--min-peaks', type=int, default=4,
                        help='Minimum peaks in row for detection (default: 4)')
+    parser.add_argument('--peak-hold-rate', type=int, default=DEFAULT_PEAK_HOLD_RATE,
+                       help='Frame rate of the peak-hold envelope used for peak picking, '
+                            f'0 to pick peaks on every sample (default: {DEFAULT_PEAK_HOLD_RATE})')
+    parser.add_argument('--trace',
+                       help='Write a trace of the SpectralAnalyzer calls (wall time, CPU time, RSS) '
+                            'to this JSON file, to open in chrome://tracing or Perfetto')
 
     args = parser.parse_args()
 
@@ -492,12 +569,18 @@ def main():
     if not args.audio_file.lower().endswith('.wav'):
         logger.warning(f"File '{args.audio_file}' may not be a WAV file.")
 
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    jobs = args.jobs or default_jobs()
+
     logger.info("=" * 60)
     logger.info("Bell Frequency Analyzer")
     logger.info("=" * 60)
     logger.info(f"Audio file: {args.audio_file}")
     logger.info(f"Analysis band: {args.band[0]}-{args.band[1]} Hz")
     logger.info(f"Frequency step: {args.step} Hz")
+    logger.info(f"Scan engine: {args.engine}")
+    logger.info(f"Scan jobs: {jobs}")
     logger.info("-" * 60)
 
     # Set up output directory - create automatically if not specified
@@ -530,49 +613,50 @@ def main():
         logger.warning(f"BANDWIDTH: {args.bandwidth}")
         logger.warning(f"MAX_GAP: {args.max_gap}")
         logger.warning(f"MIN_PEAKS: {args.min_peaks}")
+        logger.warning(f"PEAK_HOLD_RATE: {args.peak_hold_rate}")
 
     # Initialize the analyzer with expert parameters
     analyzer = SpectralAnalyzer(
         min_peak_height=args.min_peak_height,
         bandwidth=args.bandwidth,
         max_gap=args.max_gap,
-        min_peaks=args.min_peaks
+        min_peaks=args.min_peaks,
+        peak_hold_rate=args.peak_hold_rate,
+        tracer=Tracer() if args.trace else None
     )
 
-    # Perform spectral analysis with frequency scanning
+    # Perform spectral analysis with frequency scanning (evaluated once, reused below)
     logger.info("Analyzing spectral content...")
-    results, frequency_results = analyze_spectral_response_with_steps(
+    scan = scan_frequencies(
+        analyzer,
         args.audio_file,
         analysis_band=tuple(args.band),
         step_size=args.step,
-        output_report=output_report,
-        main_output_dir=output_dir  # Use the actual output_dir path
+        engine=args.engine,
+        jobs=jobs
     )
 
+    if scan.recommended_frequency is None:
+        logger.error("No frequency scanned - check --band and --step")
+        sys.exit(1)
+
     # Display results using logging
     logger.info(f"\nAnalysis complete!")
-    logger.info(f"Recommended frequency: {results['recommended_frequency']:.1f} Hz")
+    logger.info(f"Recommended frequency: {scan.recommended_frequency:.1f} Hz")
 
     # Show step analysis results
-    step_optimal = results['step_analysis']['optimal_frequency_by_step']
-    logger.info(f"Step analysis optimal: {step_optimal:.1f} Hz")
-    logger.info(f"Step size used: {results['step_analysis']['step_size']} Hz")
-    logger.info(f"Frequencies scanned: {len(results['step_analysis']['scanned_frequencies'])}")
+    logger.info(f"Step analysis optimal: {scan.recommended_frequency:.1f} Hz")
+    logger.info(f"Step size used: {scan.step_size} Hz")
+    logger.info(f"Frequencies scanned: {len(scan.frequency_results)}")
 
     logger.info(f"\nTop frequencies from step analysis:")
     logger.info("-" * 80)
 
-    # Get top frequencies from step analysis
-    scored_freqs = results['step_analysis']['scoring_details']
-
-    # Sort by score (descending)
-    scored_freqs.sort(key=lambda x: x['score'], reverse=True)
-
     # Show top 10 frequencies
-    top_freqs = scored_freqs[:10]
+    top_freqs = scan.ranked()[:10]
 
     for i, freq_data in enumerate(top_freqs, 1):
-        marker = "✓" if abs(freq_data['frequency'] - results['recommended_frequency']) < 1 else " "
+        marker = "✓" if abs(freq_data['frequency'] - scan.recommended_frequency) < 1 else " "
         logger.info(f"{marker} {i}. {freq_data['frequency']:6.1f} Hz | " +
                    f"Score: {freq_data['score']:.2f} | " +
                    f"Events: {freq_data['events_detected']} | " +
@@ -581,28 +665,19 @@ def main():
                    f"Density: {freq_data['density_score']:.2f}")
 
         # Show detailed event timestamps for the recommended frequency
-        if abs(freq_data['frequency'] - results['recommended_frequency']) < 1:
-            # Find the full frequency result with event timestamps
-            for scanned_freq in results['step_analysis']['scanned_frequencies']:
-                if abs(scanned_freq['frequency'] - freq_data['frequency']) < 1:
-                    # Get the full evaluation result for this frequency
-                    full_result = next(
-                        (result for result in frequency_results
-                         if abs(result['frequency'] - freq_data['frequency']) < 1), None
-                    )
-                    if full_result and 'event_timestamps' in full_result:
-                        logger.info(f"    🔔 Detected bell events at {freq_data['frequency']:.1f}Hz:")
-                        event_count = 0
-                        for event_idx, event in enumerate(full_result['event_timestamps'], 1):
-                            if event and len(event) > 0:
-                                timestamp = event[0]  # First timestamp of the event
-                                formatted_time = format_timestamp(timestamp)
-                                logger.info(f"    Event {event_idx}: {formatted_time} ({timestamp:.2f}s)")
-                                event_count += 1
-                                if event_count >= 5:  # Show first 5 events
-                                    logger.info(f"    ... and {len(full_result['event_timestamps']) - 5} more events")
-                                    break
-                    break
+        if freq_data['frequency'] == scan.recommended_frequency:
+            full_result = scan.result_for(freq_data['frequency'])
+            logger.info(f"    🔔 Detected bell events at {freq_data['frequency']:.1f}Hz:")
+            event_count = 0
+            for event_idx, event in enumerate(full_result['event_timestamps'], 1):
+                if event and len(event) > 0:
+                    timestamp = event[0]  # First timestamp of the event
+                    formatted_time = format_timestamp(timestamp)
+                    logger.info(f"    Event {event_idx}: {formatted_time} ({timestamp:.2f}s)")
+                    event_count += 1
+                    if event_count >= 5:  # Show first 5 events
+                        logger.info(f"    ... and {len(full_result['event_timestamps']) - 5} more events")
+                        break
 
     logger.info("-" * 60)
 
@@ -617,39 +692,38 @@ def main():
     viz_path = None
     if args.visualize:
         try:
-            viz_path = generate_visualization(results, args.audio_file, viz_dir, frequency_results)
+            y, sr = analyzer.load_audio(args.audio_file)
+            viz_path = generate_visualization(scan, y, sr, viz_dir)
             logger.info(f"\n✓ Visualization saved to: {viz_path}")
         except Exception as e:
             logger.warning(f"Could not generate visualization: {e}")
 
-    # Save report
-    logger.info(f"\n✓ Detailed report saved to: {output_report}")
-
-    # Add metadata to report
-    results['analysis_metadata'] = {
+    # Save report, debug files and README from the same scan
+    metadata = {
         'timestamp': datetime.now().isoformat(),
         'command': ' '.join(sys.argv),
         'analysis_parameters': {
             'band': args.band,
             'step': args.step,
+            'engine': args.engine,
+            'jobs': jobs,
+            'min_peak_height': args.min_peak_height,
+            'bandwidth': args.bandwidth,
+            'max_gap': args.max_gap,
+            'min_peaks': args.min_peaks,
+            'peak_hold_rate': args.peak_hold_rate,
             'visualization': viz_path if viz_path else None
         }
     }
+    write_analysis_artifacts(scan, output_report, main_output_dir=output_dir, metadata=metadata)
+    logger.info(f"\n✓ Detailed report saved to: {output_report}")
 
     # Show summary of all events for recommended frequency
     logger.info("\n📋 Event Summary for Recommended Frequency:")
     logger.info("-" * 60)
 
-    # Find the recommended frequency result from step analysis
-    recommended_freq = results['recommended_frequency']
-    all_events = []
-
-    # Get events from the frequency results
-    if frequency_results:
-        for result in frequency_results:
-            if abs(result['frequency'] - recommended_freq) < 1 and 'event_timestamps' in result:
-                all_events = result['event_timestamps']
-                break
+    recommended_freq = scan.recommended_frequency
+    all_events = scan.recommended_result()['event_timestamps']
 
     if all_events:
         logger.info(f"Total events detected at {recommended_freq:.1f}Hz: {len(all_events)}")
@@ -667,9 +741,13 @@ def main():
         logger.info("No events detected at recommended frequency")
 
     logger.info("\nSuggested usage:")
-    logger.info(f"  For future analysis, use --target-freq {results['recommended_frequency']:.0f}")
+    logger.info(f"  For future analysis, use --target-freq {scan.recommended_frequency:.0f}")
     logger.info("=" * 60)
 
+    if analyzer.tracer is not None:
+        analyzer.tracer.write(args.trace)
+        logger.info(f"Trace saved to: {args.trace}")
+
 if __name__ == "__main__":
     try:
         main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+DSP micro-benchmarks on synthetic boxing sessions.
+
+Each stage runs on a synthetic session (see synthetic.py) of every requested
+length and reports its throughput, in seconds of audio processed per second of
+wall time, and its peak memory (Python and numpy allocations, measured with
+tracemalloc in a separate run so that tracing does not skew the timings).
+
+Stages:
+    detect_bell_ringing      WAV file -> events, whole session in memory
+    detect_streaming         WAV file -> events, block by block (constant memory)
+    evaluate_frequency       SpectralAnalyzer.evaluate_frequency on decoded samples
+    group_peaks_into_events  SpectralAnalyzer.group_peaks_into_events on a peak train
+    step_scan                filterbank step scan of the analyzer's default band
+
+Stages that hold the whole session in memory only run up to --max-in-memory
+(default 4h, so that the default lengths cover them). A skipped stage is still
+listed in the results, with the reason instead of measurements.
+Results can be saved as a JSON baseline and compared with it on later runs:
+a stage whose throughput drops, or whose peak memory grows, by more than
+--threshold is reported as a regression and the script exits with status 1.
+A stage measured in the baseline but skipped in the current run is also a
+regression, so that lowering --max-in-memory cannot make a comparison pass.
+
+Usage:
+    python tests/benchmarks/bench_dsp.py --lengths 10m,1h,4h --save-baseline
+    python tests/benchmarks/bench_dsp.py --lengths 10m,1h,4h
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+import soundfile as sf
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.audio_source import DEFAULT_EXTRACT_SAMPLE_RATE
+from core.spectral_analyzer import SpectralAnalyzer
+from core.split_rounds import detect_bell_ringing, detect_bell_ringing_streaming
+from synthetic import SyntheticSession, format_duration, parse_duration
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "dsp.json")
+WORK_DIR = os.path.join("temp", "benchmarks")
+
+# Default step scan: band and step of analyze_bell_frequency.py
+SCAN_BAND = (2050, 2100)
+SCAN_STEP = 10.0
+
+
+class Stage:
+    """A benchmarked function, prepared once per session and then run repeatedly."""
+
+    def __init__(self, name, prepare, in_memory):
+        """
+        Args:
+            name (str): Stage name.
+            prepare (callable): prepare(context) -> callable run by the benchmark, returning
+                the detected events (or None when the stage does not detect events).
+            in_memory (bool): True if the stage holds the whole session in memory.
+        """
+        self.name = name
+        self.prepare = prepare
+        self.in_memory = in_memory
+
+
+class SessionContext:
+    """A synthetic session written to disk, with its decoded samples loaded on demand."""
+
+    def __init__(self, session, path):
+        self.session = session
+        self.path = path
+        self._samples = None
+
+    @property
+    def samples(self):
+        if self._samples is None:
+            self._samples, _ = sf.read(self.path, dtype='float32')
+        return self._samples
+
+    def release(self):
+        self._samples = None
+
+
+def prepare_detect(ctx):
+    return lambda: detect_bell_ringing(ctx.path)
+
+
+def prepare_detect_streaming(ctx):
+    return lambda: detect_bell_ringing_streaming(ctx.path)
+
+
+def prepare_evaluate_frequency(ctx):
+    analyzer = SpectralAnalyzer()
+    samples, session = ctx.samples, ctx.session
+    return lambda: analyzer.evaluate_frequency(samples, session.bell_freq,
+                                               sample_rate=session.sample_rate)['event_timestamps']
+
+
+def prepare_group_peaks(ctx):
+    analyzer = SpectralAnalyzer()
+    peak_times = ctx.session.noisy_peak_times()
+
+    def run():
+        analyzer.group_peaks_into_events(peak_times)
+
+    return run
+
+
+def prepare_step_scan(ctx):
+    analyzer = SpectralAnalyzer()
+    samples, sr = ctx.samples, ctx.session.sample_rate
+    frequencies = list(np.arange(SCAN_BAND[0], SCAN_BAND[1] + SCAN_STEP / 2, SCAN_STEP))
+
+    def run():
+        analyzer.evaluate_frequencies(samples, frequencies, sample_rate=sr)
+
+    return run
+
+
+STAGES = [
+    Stage("detect_bell_ringing", prepare_detect, in_memory=True),
+    Stage("detect_streaming", prepare_detect_streaming, in_memory=False),
+    Stage("evaluate_frequency", prepare_evaluate_frequency, in_memory=True),
+    Stage("group_peaks_into_events", prepare_group_peaks, in_memory=False),
+    Stage("step_scan", prepare_step_scan, in_memory=True),
+]
+
+
+def session_context(seconds, sample_rate, seed, work_dir):
+    """Synthetic session of `seconds`, written to `work_dir` unless an identical file is already there."""
+    session = SyntheticSession(seconds, sample_rate=sample_rate, seed=seed)
+    path = os.path.join(work_dir, f"session_{format_duration(seconds)}_{sample_rate}_{seed}.wav")
+    if not os.path.exists(path):
+        print(f"Generating {format_duration(seconds)} synthetic session -> {path}", flush=True)
+        session.write(path + ".tmp.wav")
+        os.replace(path + ".tmp.wav", path)
+    return SessionContext(session, path)
+
+
+def measure(run, repeat):
+    """
+    Best wall time over `repeat` runs, then peak traced memory over one more run.
+
+    Returns:
+        tuple: (seconds, peak memory in bytes, result of the last run)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def run_benchmarks(lengths, stages, sample_rate=DEFAULT_EXTRACT_SAMPLE_RATE, repeat=3,
+                   max_in_memory=14400.0, seed=0, work_dir=WORK_DIR):
+    """
+    Run every stage on a synthetic session of every length.
+
+    Returns:
+        dict: Results keyed by '<stage>@<length>' with seconds, audio_seconds_per_second,
+            peak_memory_mb and, for detection stages, events found and expected; stages
+            that were not run only have a 'skipped' reason.
+    """
+    results = {}
+    for seconds in lengths:
+        ctx = session_context(seconds, sample_rate, seed, work_dir)
+        expected = len(ctx.session.bell_times)
+        for stage in stages:
+            key = f"{stage.name}@{format_duration(seconds)}"
+            if stage.in_memory and seconds > max_in_memory:
+                results[key] = dict(skipped=f"in memory, longer than --max-in-memory "
+                                            f"({format_duration(max_in_memory)})")
+                print(f"{key:<36} skipped ({results[key]['skipped']})", flush=True)
+                continue
+            elapsed, peak, events = measure(stage.prepare(ctx), repeat)
+            result = dict(seconds=elapsed, audio_seconds_per_second=seconds / elapsed,
+                          peak_memory_mb=peak / 1e6)
+            if events is not None:
+                result.update(events=len(events), expected_events=expected)
+            results[key] = result
+            check = ""
+            if 'events' in result and result['events'] != expected:
+                check = f"  (found {result['events']} bells, expected {expected})"
+            print(f"{key:<36} {result['audio_seconds_per_second']:>12.0f} audio-s/s "
+                  f"{result['peak_memory_mb']:>10.1f} MB{check}", flush=True)
+        ctx.release()
+    return results
+
+
+def environment(sample_rate):
+    """Machine and library versions, stored with the results."""
+    return dict(python=platform.python_version(), numpy=np.__version__, scipy=scipy.__version__,
+                machine=platform.machine(), processor=platform.processor(), cpu_count=os.cpu_count(),
+                sample_rate=sample_rate)
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (dict): Results of `run_benchmarks`.
+        baseline (dict): Results of a previous run.
+        threshold (float): Tolerated relative slowdown or memory growth (0.2 = 20 %).
+
+    Returns:
+        list: (key, metric, baseline value, current value) for every regression; a stage
+            measured in the baseline but skipped now is reported with metric 'skipped'
+            and no current value.
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None or 'skipped' in reference:
+            continue
+        if 'skipped' in result:
+            regressions.append((key, 'skipped', reference['audio_seconds_per_second'], None))
+            continue
+        if result['audio_seconds_per_second'] < reference['audio_seconds_per_second'] * (1 - threshold):
+            regressions.append((key, 'audio_seconds_per_second', reference['audio_seconds_per_second'],
+                                result['audio_seconds_per_second']))
+        if result['peak_memory_mb'] > reference['peak_memory_mb'] * (1 + threshold):
+            regressions.append((key, 'peak_memory_mb', reference['peak_memory_mb'], result['peak_memory_mb']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DSP micro-benchmarks on synthetic boxing sessions.')
+    parser.add_argument('--lengths', default='10m,1h',
+                        help='Comma-separated session lengths, e.g. 10m,1h,4h (default: 10m,1h)')
+    parser.add_argument('--stages', help='Comma-separated stages to run (default: all)',
+                        default=','.join(stage.name for stage in STAGES))
+    parser.add_argument('--sample-rate', type=int, default=DEFAULT_EXTRACT_SAMPLE_RATE,
+                        help=f'Sample rate of the synthetic sessions (default: {DEFAULT_EXTRACT_SAMPLE_RATE})')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage, the best is kept (default: 3)')
+    parser.add_argument('--max-in-memory', default='4h',
+                        help='Longest session for stages that hold the whole session in memory (default: 4h)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic sessions (default: 0)')
+    parser.add_argument('--work-dir', default=WORK_DIR,
+                        help=f'Directory of the generated sessions, reused across runs (default: {WORK_DIR})')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help=f'Baseline JSON file (default: {BASELINE_PATH})')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative throughput drop or memory growth reported as a regression (default: 0.2)')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    by_name = {stage.name: stage for stage in STAGES}
+    unknown = [name for name in args.stages.split(',') if name not in by_name]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    stages = [by_name[name] for name in args.stages.split(',')]
+    lengths = [parse_duration(length) for length in args.lengths.split(',')]
+
+    results = run_benchmarks(lengths, stages, sample_rate=args.sample_rate, repeat=args.repeat,
+                             max_in_memory=parse_duration(args.max_in_memory), seed=args.seed,
+                             work_dir=args.work_dir)
+    report = dict(environment=environment(args.sample_rate), threshold=args.threshold, results=results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        baseline = dict(environment=report['environment'], results={})
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Keep the entries of stages and lengths that were not run this time
+        baseline['environment'] = report['environment']
+        baseline['results'].update(results)
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != report['environment']:
+        print("Warning: the baseline was recorded on a different machine or library versions")
+    regressions = compare(results, baseline['results'], args.threshold)
+    for key, metric, reference, current in regressions:
+        if current is None:
+            print(f"REGRESSION {key} not measured: {results[key]['skipped']}")
+        else:
+            print(f"REGRESSION {key} {metric}: {reference:.1f} -> {current:.1f}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regression beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Deterministic synthetic boxing-session audio for the DSP benchmarks.
+
+A session is crowd-noise-like background (pink-ish noise with slow swells and
+occasional cheers) plus bell bursts at known times: each burst is a train of
+decaying pings at `bell_freq`, like the bell of a round timer. The audio is
+generated chunk by chunk, each chunk seeded from (seed, chunk index), so a
+4-hour session can be written to disk with constant memory and the same
+parameters always give the same samples.
+"""
+
+import os
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import lfilter
+
+# Length of an independently seeded chunk (seconds)
+CHUNK_SECONDS = 60.0
+
+
+def parse_duration(text):
+    """Parse '90s', '10m', '1.5h' or a plain number of seconds."""
+    units = dict(s=1, m=60, h=3600)
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def format_duration(seconds):
+    """Shortest of '4h', '10m' or '90s' that represents `seconds` exactly."""
+    for unit, size in (('h', 3600), ('m', 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds:g}s"
+
+
+def round_bell_times(seconds, round_time=180.0, rest_time=60.0, first=30.0):
+    """
+    Bell times of a boxing session: one bell at the start and one at the end of every round.
+
+    Returns:
+        list: Bell times (seconds), all followed by at least 10 s of audio.
+    """
+    times = []
+    start = first
+    while start + round_time + 10 <= seconds:
+        times += [start, start + round_time]
+        start += round_time + rest_time
+    return times
+
+
+class SyntheticSession:
+    """Crowd-noise-like background with bell bursts at known times."""
+
+    def __init__(self, seconds, sample_rate=44100, bell_times=None, bell_freq=2080.0, pings=8,
+                 ping_spacing=0.2, bell_level=0.3, noise_level=0.05, cheer_rate=1 / 30, seed=0):
+        """
+        Args:
+            seconds (float): Session length.
+            sample_rate (int): Sample rate (Hz).
+            bell_times (list, optional): Start of each bell burst (seconds); defaults to
+                `round_bell_times(seconds)`.
+            bell_freq (float): Frequency of the bell pings (Hz).
+            pings (int): Pings per burst.
+            ping_spacing (float): Time between pings (seconds).
+            bell_level (float): Peak amplitude of a ping.
+            noise_level (float): Standard deviation of the background noise.
+            cheer_rate (float): Mean number of crowd cheers per second.
+            seed (int): Random seed.
+        """
+        self.seconds = seconds
+        self.sample_rate = sample_rate
+        self.bell_times = list(round_bell_times(seconds) if bell_times is None else bell_times)
+        self.bell_freq = bell_freq
+        self.pings = pings
+        self.ping_spacing = ping_spacing
+        self.bell_level = bell_level
+        self.noise_level = noise_level
+        self.cheer_rate = cheer_rate
+        self.seed = seed
+        t = np.arange(int(0.12 * sample_rate)) / sample_rate
+        self._ping = (bell_level * np.sin(2 * np.pi * bell_freq * t) * np.exp(-t * 15)).astype(np.float32)
+
+    @property
+    def samples(self):
+        return int(self.seconds * self.sample_rate)
+
+    def ping_times(self):
+        """Time of every ping of every burst (seconds)."""
+        return np.array([start + k * self.ping_spacing for start in self.bell_times for k in range(self.pings)])
+
+    def _background(self, rng, start, length):
+        """Pink-ish noise with slow crowd swells and a few broadband cheers."""
+        sr = self.sample_rate
+        # First-order low-pass tilts white noise towards the low end like a crowd
+        noise = lfilter([1.0], [1.0, -0.9], rng.normal(0, 1, length))
+        noise *= self.noise_level / np.sqrt(1 / (1 - 0.9 ** 2))
+
+        t = (start + np.arange(length)) / sr
+        swell = 1.0 + 0.5 * np.sin(2 * np.pi * t / 17.0 + self.seed) * np.sin(2 * np.pi * t / 71.0)
+        noise *= swell
+
+        for _ in range(rng.poisson(self.cheer_rate * length / sr)):
+            at = rng.integers(0, length)
+            size = min(length - at, int(rng.uniform(0.5, 2.0) * sr))
+            envelope = np.exp(-np.arange(size) / (0.4 * sr))
+            noise[at:at + size] += rng.normal(0, 2 * self.noise_level, size) * envelope
+        return noise.astype(np.float32)
+
+    def chunk(self, index):
+        """Samples of chunk `index` (CHUNK_SECONDS long, shorter at the end of the session)."""
+        sr = self.sample_rate
+        chunk_size = int(CHUNK_SECONDS * sr)
+        start = index * chunk_size
+        length = max(0, min(chunk_size, self.samples - start))
+        rng = np.random.default_rng([self.seed, 0, index])
+        y = self._background(rng, start, length)
+
+        ping_len = len(self._ping)
+        for ping_time in self.ping_times():
+            i = int(round(ping_time * sr)) - start
+            if -ping_len < i < length:
+                lo, hi = max(i, 0), min(i + ping_len, length)
+                y[lo:hi] += self._ping[lo - i:hi - i]
+        return y
+
+    def chunks(self):
+        """All chunks, in order."""
+        chunk_size = int(CHUNK_SECONDS * self.sample_rate)
+        for index in range((self.samples + chunk_size - 1) // chunk_size):
+            yield self.chunk(index)
+
+    def read_all(self):
+        """The whole session in memory (float32)."""
+        return np.concatenate(list(self.chunks()))
+
+    def write(self, path):
+        """Write the session to a 16-bit WAV file, one chunk at a time."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with sf.SoundFile(path, "w", samplerate=self.sample_rate, channels=1, subtype="PCM_16") as f:
+            for chunk in self.chunks():
+                f.write(np.clip(chunk, -1.0, 1.0))
+
+    def noisy_peak_times(self, false_peak_rate=1.0):
+        """
+        Peak times as the peak picker would report them: every ping plus random false peaks.
+
+        Args:
+            false_peak_rate (float): Mean number of isolated noise peaks per second.
+        """
+        rng = np.random.default_rng([self.seed, 1])
+        noise = rng.uniform(0, self.seconds, rng.poisson(false_peak_rate * self.seconds))
+        return np.sort(np.concatenate((self.ping_times(), noise)))
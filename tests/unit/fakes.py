@@ -0,0 +1,16 @@
+"""Test doubles shared by the unit tests."""
+
+
+class FakeClock:
+    """Manually advanced clock (monotonic or wall), returning `now`."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def idle_load():
+    """Load average of an idle machine (1, 5 and 15 minutes)."""
+    return (0.0, 0.0, 0.0)
@@ -0,0 +1,316 @@
+import unittest
+import os
+import sys
+import shutil
+import weakref
+import numpy as np
+import soundfile as sf
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.audio_source import (DecodedAudioCache, FFmpegAudioSource, ParallelAudioSource, WavAudioSource,
+                               bell_envelope_filter)
+from core.split_rounds import detect_bell_ringing, detect_bell_ringing_from_source
+
+
+class FakeDecoder:
+    """Per-file source returning fixed samples and counting the earlier pieces still alive."""
+
+    def __init__(self, samples, decoded):
+        self.samples = samples
+        self.decoded = decoded
+        self.sample_rate = 1000
+        self.is_envelope = False
+        self.latency = 0.0
+        self.alive_at_start = None
+        self.expected_seconds = None
+
+    def read_all(self, expected_seconds=None):
+        self.expected_seconds = expected_seconds
+        self.alive_at_start = sum(piece() is not None for piece in self.decoded)
+        piece = self.samples.copy()
+        self.decoded.append(weakref.ref(piece))
+        return piece
+
+
+class TestDecodedAudioCache(unittest.TestCase):
+    """Test cases for the in-process LRU cache of decoded audio."""
+
+    def setUp(self):
+        """Create two short audio files and a counting loader."""
+        self.temp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'temp_test_files'))
+        os.makedirs(self.temp_dir, exist_ok=True)
+        self.paths = []
+        for name in ('cache_a.wav', 'cache_b.wav'):
+            path = os.path.join(self.temp_dir, name)
+            sf.write(path, np.zeros(8000, dtype=np.float32), 8000)
+            self.paths.append(path)
+        self.decoded = []
+
+        def loader(path):
+            self.decoded.append(path)
+            y, sr = sf.read(path, dtype='float32')
+            return y, sr
+
+        self.loader = loader
+
+    def tearDown(self):
+        """Remove the test files."""
+        for path in self.paths:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def test_file_is_decoded_once(self):
+        """Repeated loads of the same file hit the cache."""
+        cache = DecodedAudioCache(loader=self.loader)
+        first, sr = cache.load(self.paths[0])
+        second, _ = cache.load(self.paths[0])
+
+        self.assertIs(first, second)
+        self.assertEqual(sr, 8000)
+        self.assertEqual(len(self.decoded), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_modified_file_is_decoded_again(self):
+        """A change of size or mtime invalidates the cached entry."""
+        cache = DecodedAudioCache(loader=self.loader)
+        cache.load(self.paths[0])
+        sf.write(self.paths[0], np.zeros(4000, dtype=np.float32), 8000)
+        y, _ = cache.load(self.paths[0])
+
+        self.assertEqual(len(y), 4000)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(len(self.decoded), 2)
+
+    def test_size_bound_evicts_least_recently_used(self):
+        """Entries beyond max_bytes are evicted in LRU order."""
+        cache = DecodedAudioCache(max_bytes=8000 * 4, loader=self.loader)
+        cache.load(self.paths[0])
+        cache.load(self.paths[1])
+
+        self.assertNotIn(self.paths[0], cache)
+        self.assertIn(self.paths[1], cache)
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+
+    def test_explicit_eviction(self):
+        """evict() and clear() drop entries and their byte count."""
+        cache = DecodedAudioCache(loader=self.loader)
+        cache.load(self.paths[0])
+        cache.load(self.paths[1])
+
+        self.assertEqual(cache.evict(self.paths[0]), 1)
+        self.assertNotIn(self.paths[0], cache)
+        cache.clear()
+        self.assertEqual((len(cache), cache.current_bytes), (0, 0))
+
+    def test_cached_samples_are_read_only(self):
+        """Shared cached arrays cannot be modified by callers."""
+        cache = DecodedAudioCache(loader=self.loader)
+        y, _ = cache.load(self.paths[0])
+        with self.assertRaises(ValueError):
+            y[0] = 1.0
+
+
+@unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is required")
+class TestFFmpegAudioSource(unittest.TestCase):
+    """Test cases for decoding audio through an ffmpeg stdout pipe."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a short PCM16 file to decode."""
+        cls.temp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'temp_test_files'))
+        os.makedirs(cls.temp_dir, exist_ok=True)
+        cls.audio_path = os.path.join(cls.temp_dir, 'pipe_source.wav')
+        rng = np.random.default_rng(3)
+        cls.samples = rng.normal(0, 0.2, 44100 * 3).clip(-1, 1).astype(np.float32)
+        sf.write(cls.audio_path, cls.samples, 44100, subtype='PCM_16')
+        cls.expected = WavAudioSource(cls.audio_path).read_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the test file."""
+        if os.path.exists(cls.audio_path):
+            os.unlink(cls.audio_path)
+
+    def test_read_all_matches_wav_reader(self):
+        """Piped PCM decodes to the same samples as reading the WAV file."""
+        source = FFmpegAudioSource(['-i', self.audio_path])
+        samples = source.read_all(expected_seconds=1)
+
+        self.assertEqual(samples.dtype, np.float32)
+        np.testing.assert_array_equal(samples, self.expected)
+        self.assertEqual(source.samples_read, len(self.expected))
+
+    def test_read_all_is_trimmed_whatever_the_size_hint(self):
+        """The expected duration only sizes the buffer: same samples, no over-allocated base kept alive."""
+        reference = FFmpegAudioSource(['-i', self.audio_path], sample_format='f32le').read_all()
+        for expected_seconds in (None, 0.5, 3, 600):
+            with self.subTest(expected_seconds=expected_seconds):
+                samples = FFmpegAudioSource(['-i', self.audio_path], sample_format='f32le').read_all(expected_seconds)
+
+                np.testing.assert_array_equal(samples, reference)
+                self.assertIsNone(samples.base)
+                self.assertEqual(samples.nbytes, len(self.expected) * 4)
+
+    def test_blocks_cover_whole_stream(self):
+        """Fixed-size blocks concatenate back to the whole stream."""
+        source = FFmpegAudioSource(['-i', self.audio_path])
+        blocks = [block.copy() for block in source.blocks(10000)]
+
+        self.assertTrue(all(len(block) == 10000 for block in blocks[:-1]))
+        np.testing.assert_array_equal(np.concatenate(blocks), self.expected)
+
+    def test_early_stop_terminates_ffmpeg(self):
+        """Stopping the iteration early does not raise."""
+        source = FFmpegAudioSource(['-i', self.audio_path])
+        for _ in source.blocks(1000):
+            break
+
+    def test_missing_input_raises(self):
+        """A decoding failure is reported as a RuntimeError."""
+        source = FFmpegAudioSource(['-i', os.path.join(self.temp_dir, 'missing.mp4')])
+        with self.assertRaises(RuntimeError):
+            source.read_all()
+
+
+@unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is required")
+class TestFFmpegBellEnvelope(unittest.TestCase):
+    """Test cases for the low-rate envelope computed inside ffmpeg."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create noise with 2080 Hz ping bursts at known times."""
+        cls.temp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'temp_test_files'))
+        os.makedirs(cls.temp_dir, exist_ok=True)
+        cls.audio_path = os.path.join(cls.temp_dir, 'envelope_bells.wav')
+        sr = 44100
+        rng = np.random.default_rng(0)
+        y = rng.normal(0, 0.05, sr * 90).astype(np.float32)
+        t = np.arange(int(0.12 * sr)) / sr
+        ping = (0.3 * np.sin(2 * np.pi * 2080 * t) * np.exp(-t * 15)).astype(np.float32)
+        for start in (10.0, 50.0):
+            for k in range(8):
+                i = int((start + k * 0.2) * sr)
+                y[i:i + len(ping)] += ping
+        sf.write(cls.audio_path, y, sr, subtype='PCM_16')
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the test file."""
+        if os.path.exists(cls.audio_path):
+            os.unlink(cls.audio_path)
+
+    def test_envelope_stream_is_low_rate(self):
+        """The envelope source delivers envelope_rate samples per second."""
+        source = FFmpegAudioSource.bell_envelope(['-i', self.audio_path], 2080, 50, envelope_rate=1000)
+        envelope = source.read_all()
+
+        self.assertTrue(source.is_envelope)
+        self.assertAlmostEqual(len(envelope) / 1000, 90, delta=0.1)
+        self.assertGreaterEqual(envelope.min(), -1e-3)
+
+    def test_same_events_as_full_rate_detection(self):
+        """Detection on the ffmpeg envelope finds the same events."""
+        expected = detect_bell_ringing(self.audio_path)
+        source = FFmpegAudioSource.bell_envelope(['-i', self.audio_path], 2080, 50, envelope_rate=1000)
+        events = detect_bell_ringing_from_source(source)
+
+        self.assertEqual(len(events), len(expected))
+        for event, reference in zip(events, expected):
+            self.assertAlmostEqual(event[0], reference[0], delta=0.01)
+
+    def test_filter_graph_uses_bandwidth(self):
+        """The filter graph is built from target frequency and bandwidth."""
+        graph = bell_envelope_filter(2080, 50, 500)
+        self.assertIn("bandpass=f=2080:width_type=h:width=100", graph)
+        self.assertTrue(graph.endswith("aresample=500"))
+
+
+@unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is required")
+class TestParallelAudioSource(unittest.TestCase):
+    """Test cases for per-file parallel extraction stitched on the concat timeline."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create three chapters of different lengths, with bell pings in the second one."""
+        cls.temp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'temp_test_files'))
+        os.makedirs(cls.temp_dir, exist_ok=True)
+        sr = 44100
+        rng = np.random.default_rng(5)
+        t = np.arange(int(0.12 * sr)) / sr
+        ping = (0.3 * np.sin(2 * np.pi * 2080 * t) * np.exp(-t * 15)).astype(np.float32)
+        cls.chapters = []
+        for index, seconds in enumerate((20.5, 30.25, 12.0)):
+            y = rng.normal(0, 0.05, int(seconds * sr)).astype(np.float32)
+            if index == 1:
+                for k in range(8):
+                    i = int((10.0 + k * 0.2) * sr)
+                    y[i:i + len(ping)] += ping
+            path = os.path.join(cls.temp_dir, f'chapter_{index}.wav')
+            sf.write(path, y, sr, subtype='PCM_16')
+            cls.chapters.append(path)
+        cls.video_list = os.path.join(cls.temp_dir, 'chapters.txt')
+        with open(cls.video_list, 'w') as f:
+            f.writelines(f"file '{path}'\n" for path in cls.chapters)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the test files."""
+        for path in cls.chapters + [cls.video_list]:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def test_stitched_audio_matches_concat(self):
+        """The stitched pieces are the samples of the concat decode, with exact per-file offsets."""
+        expected = FFmpegAudioSource.from_video_list(self.video_list).read_all()
+        source = ParallelAudioSource.from_videos(self.chapters, max_workers=3)
+
+        np.testing.assert_array_equal(source.read_all(), expected)
+        self.assertEqual(source.offsets, [0.0, 20.5, 50.75])
+
+        blocks = [block.copy() for block in source.blocks(44100)]
+        self.assertTrue(all(len(block) == 44100 for block in blocks[:-1]))
+        np.testing.assert_array_equal(np.concatenate(blocks), expected)
+
+    def test_envelope_events_match_concat(self):
+        """Bell events found on the per-file envelopes have the concat timestamps."""
+        concat = FFmpegAudioSource.bell_envelope(FFmpegAudioSource.concat_input(self.video_list), 2080, 50)
+        expected = detect_bell_ringing_from_source(concat)
+        events = detect_bell_ringing_from_source(ParallelAudioSource.bell_envelope(self.chapters, 2080, 50))
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(len(events), len(expected))
+        self.assertAlmostEqual(events[0][0], 30.5, delta=0.05)
+        self.assertAlmostEqual(events[0][0], expected[0][0], delta=0.002)
+
+    def test_pieces_are_released_as_they_are_stitched(self):
+        """Decoded files are freed once copied, and chapters of any length are stitched in order."""
+        decoded = []
+        lengths = (100, 300, 50, 0, 200)
+        sources = [FakeDecoder(np.full(length, index, dtype=np.float32), decoded)
+                   for index, length in enumerate(lengths)]
+        samples = ParallelAudioSource(sources, max_workers=1).read_all()
+
+        np.testing.assert_array_equal(samples, np.repeat(np.arange(len(lengths), dtype=np.float32), lengths))
+        self.assertEqual(samples.dtype, np.float32)
+        self.assertTrue(all(source.alive_at_start <= 1 for source in sources))
+
+    def test_expected_duration_is_shared_between_files(self):
+        """The session duration sizes the output and is split evenly as each file's size hint."""
+        sources = [FakeDecoder(np.full(1500, index, dtype=np.float32), []) for index in range(3)]
+        samples = ParallelAudioSource(sources, max_workers=1).read_all(expected_seconds=4.5)
+
+        self.assertEqual([source.expected_seconds for source in sources], [1.5, 1.5, 1.5])
+        self.assertEqual(len(samples), 4500)
+        self.assertIsNone(samples.base)
+
+    def test_failed_file_raises(self):
+        """A decoding failure in any file is reported as a RuntimeError."""
+        source = ParallelAudioSource.from_videos(self.chapters[:1] + [os.path.join(self.temp_dir, 'missing.mp4')])
+        with self.assertRaises(RuntimeError):
+            source.read_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+from argparse import Namespace
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.batch import BatchScheduler, find_session_videos, session_names, write_report
+from core.split_rounds import SessionError
+
+
+def session_report(video_files, output_root):
+    return dict(creation_date='2024-03-01', output_dir=os.path.join(output_root, '2024-03-01-boxing'),
+                videos=len(video_files), rounds=2, encoded=2, skipped=0, failed=0, media_seconds=240.0,
+                analysis_seconds=1.0, encode_seconds=2.0, elapsed_seconds=3.0)
+
+
+class TestBatch(unittest.TestCase):
+    """Test cases for multi-session batch processing."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.sessions = []
+        for name in ('monday', 'tuesday', 'wednesday'):
+            session_dir = os.path.join(self.temp_dir.name, 'ingest', name)
+            os.makedirs(session_dir)
+            for video in ('GX010001.MP4', 'GX010002.mov', 'GL010001.LRV', 'notes.txt'):
+                open(os.path.join(session_dir, video), 'w').close()
+            self.sessions.append((name, session_dir))
+
+    def run_batch(self, process, analysis_workers=1, max_sessions=3):
+        scheduler = BatchScheduler(governor=None, analysis_workers=analysis_workers, max_sessions=max_sessions,
+                                   process=process)
+        return scheduler.run(self.sessions, Namespace(), 'logo.png',
+                             output_root=os.path.join(self.temp_dir.name, 'out'),
+                             temp_root=os.path.join(self.temp_dir.name, 'temp'))
+
+    def test_session_discovery(self):
+        """Only video files are picked up, and duplicate directory names get a suffix."""
+        videos = find_session_videos(self.sessions[0][1])
+        self.assertEqual([os.path.basename(video) for video in videos], ['GX010001.MP4', 'GX010002.mov'])
+        self.assertEqual(session_names(['a/day1', 'b/day1/', 'day2']), ['day1', 'day1_2', 'day2'])
+
+    def test_analysis_budget_is_shared(self):
+        """Sessions run concurrently but at most `analysis_workers` analyse at once."""
+        lock = threading.Lock()
+        state = {'analysing': 0, 'peak': 0, 'sessions': 0, 'session_peak': 0}
+        all_started = threading.Barrier(3, timeout=5)
+
+        def process(video_files, args, logo_path, governor, temp_dir, output_root, analysis_slot, monitor, tracer):
+            all_started.wait()  # Fails unless the three sessions are in flight together
+            with analysis_slot:
+                with lock:
+                    state['analysing'] += 1
+                    state['peak'] = max(state['peak'], state['analysing'])
+                threading.Event().wait(0.02)
+                with lock:
+                    state['analysing'] -= 1
+            return session_report(video_files, output_root)
+
+        reports, _ = self.run_batch(process, analysis_workers=2)
+        self.assertEqual([report['status'] for report in reports], ['ok'] * 3)
+        self.assertLessEqual(state['peak'], 2)
+        self.assertEqual([report['session'] for report in reports], ['monday', 'tuesday', 'wednesday'])
+        self.assertTrue(reports[1]['output_dir'].startswith(os.path.join(self.temp_dir.name, 'out', 'tuesday')))
+
+    def test_failed_session_does_not_stop_the_batch(self):
+        """A session error is reported, the other sessions complete and totals add up."""
+        def process(video_files, args, logo_path, governor, temp_dir, output_root, analysis_slot, monitor, tracer):
+            if 'tuesday' in output_root:
+                raise SessionError("Erreur de lecture des sources")
+            return session_report(video_files, output_root)
+
+        reports, elapsed = self.run_batch(process)
+        self.assertEqual([report['status'] for report in reports], ['ok', 'error', 'ok'])
+        self.assertIn('sources', reports[1]['error'])
+
+        path = os.path.join(self.temp_dir.name, 'out', 'batch_report.json')
+        write_report(path, reports, 10.0, dict(cores=4))
+        with open(path) as f:
+            report = json.load(f)
+        totals = report['totals']
+        self.assertEqual((totals['sessions'], totals['failed_sessions'], totals['encoded']), (3, 1, 4))
+        self.assertEqual(totals['media_seconds'], 480.0)
+        self.assertAlmostEqual(totals['throughput'], 48.0)
+        self.assertEqual(report['settings'], dict(cores=4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add the src and benchmarks directories to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../benchmarks')))
+
+from core.split_rounds import detect_bell_ringing_samples
+from bench_dsp import compare
+from synthetic import CHUNK_SECONDS, SyntheticSession, format_duration, parse_duration, round_bell_times
+
+
+class TestSyntheticSession(unittest.TestCase):
+    """Test cases for the synthetic session generator and baseline comparison."""
+
+    def test_generation_is_deterministic(self):
+        first = SyntheticSession(90, sample_rate=8000, bell_times=[10.0], seed=3)
+        second = SyntheticSession(90, sample_rate=8000, bell_times=[10.0], seed=3)
+        y = first.read_all()
+        self.assertEqual(len(y), 90 * 8000)
+        np.testing.assert_array_equal(y, second.read_all())
+        # A single chunk can be regenerated on its own
+        np.testing.assert_array_equal(first.chunk(1), y[int(CHUNK_SECONDS * 8000):])
+        self.assertFalse(np.array_equal(y, SyntheticSession(90, sample_rate=8000, seed=4).read_all()))
+
+    def test_bells_are_detected_at_known_times(self):
+        # The second bell straddles a chunk boundary
+        bell_times = [20.0, CHUNK_SECONDS - 0.5, 100.0]
+        session = SyntheticSession(120, sample_rate=16000, bell_times=bell_times)
+        events = detect_bell_ringing_samples(session.read_all(), session.sample_rate)
+        self.assertEqual(len(events), len(bell_times))
+        for event, start in zip(events, bell_times):
+            self.assertAlmostEqual(event[0], start, delta=0.05)
+
+    def test_round_schedule_and_durations(self):
+        self.assertEqual(round_bell_times(600), [30.0, 210.0, 270.0, 450.0])
+        self.assertEqual([parse_duration(text) for text in ("10m", "4h", "90s", "30")], [600, 14400, 90, 30])
+        self.assertEqual([format_duration(seconds) for seconds in (600, 14400, 90)], ["10m", "4h", "90s"])
+
+    def test_compare_flags_slowdowns_and_memory_growth(self):
+        baseline = {"detect@10m": dict(audio_seconds_per_second=1000.0, peak_memory_mb=100.0),
+                    "scan@10m": dict(audio_seconds_per_second=100.0, peak_memory_mb=100.0)}
+        results = {"detect@10m": dict(audio_seconds_per_second=850.0, peak_memory_mb=130.0),
+                   "scan@10m": dict(audio_seconds_per_second=70.0, peak_memory_mb=90.0),
+                   "detect@4h": dict(audio_seconds_per_second=1.0, peak_memory_mb=1.0)}
+        regressions = compare(results, baseline, threshold=0.2)
+        self.assertEqual([(key, metric) for key, metric, _, _ in regressions],
+                         [("detect@10m", "peak_memory_mb"), ("scan@10m", "audio_seconds_per_second")])
+
+    def test_compare_flags_stages_skipped_since_the_baseline(self):
+        baseline = {"scan@1h": dict(audio_seconds_per_second=100.0, peak_memory_mb=100.0),
+                    "scan@4h": dict(skipped="in memory")}
+        results = {"scan@1h": dict(skipped="in memory"), "scan@4h": dict(skipped="in memory")}
+        self.assertEqual(compare(results, baseline, threshold=0.2), [("scan@1h", "skipped", 100.0, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.audio_source import ArrayAudioSource, RecordingAudioSource
+from core.cache import AnalysisCache, DiskLRUCache, MetadataCache, file_fingerprint
+from core.audio_source import PCM16_SCALE, WavAudioSource
+from core.split_rounds import record_wav_key, sort_videos_by_creation_date, wav_is_current, write_wav_samples
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Test cases for the persistent per-source analysis cache."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        self.video = os.path.join(self.temp_dir.name, 'video.mp4')
+        with open(self.video, 'wb') as f:
+            f.write(os.urandom(300 * 1024))
+
+    def test_fingerprint_tracks_content_and_mtime(self):
+        """The fingerprint is stable, and changes when sampled bytes or the mtime change."""
+        fingerprint = file_fingerprint(self.video)
+        self.assertEqual(file_fingerprint(self.video), fingerprint)
+
+        stat = os.stat(self.video)
+        with open(self.video, 'r+b') as f:
+            f.seek(0)
+            f.write(b'\0' * 16)
+        os.utime(self.video, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        changed = file_fingerprint(self.video)
+        self.assertNotEqual(changed, fingerprint)
+
+        os.utime(self.video, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertNotEqual(file_fingerprint(self.video), changed)
+
+    def test_lru_eviction_and_stats(self):
+        """Least recently used entries are evicted first and hits/misses are counted."""
+        cache = DiskLRUCache(self.cache_dir, max_bytes=2500)
+        for index, key in enumerate(('a', 'b')):
+            cache.put(key, samples=np.zeros(100, dtype=np.float64))
+            os.utime(os.path.join(self.cache_dir, key + '.npz'), ns=(index * 10**9, index * 10**9))
+        self.assertIsNotNone(cache.get('a'))  # 'a' becomes the most recent entry
+
+        cache.put('c', samples=np.zeros(100, dtype=np.float64))
+        self.assertIsNone(cache.get('b'))
+        np.testing.assert_array_equal(cache.get('a')['samples'], np.zeros(100))
+
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['hits'], stats['misses']), (2, 2, 1))
+        self.assertLessEqual(stats['bytes'], 2500)
+
+        with mock.patch('numpy.savez') as savez:
+            self.assertFalse(cache.put('huge', samples=np.zeros(1000)))
+        savez.assert_not_called()  # Rejected before anything is written
+        cache.clear()
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_events_and_audio_round_trip(self):
+        """Events and audio come back unchanged, keyed by the extraction and detection parameters."""
+        cache = AnalysisCache(DiskLRUCache(self.cache_dir), [self.video])
+        extraction = dict(mode='envelope', target_freq=2080, bandwidth=50, envelope_rate=1000)
+        detection = dict(min_peak_height=0.03, peaks_in_row=4)
+        events = [[1.5, 1.75, 2.0], [121.25, 121.5]]
+
+        self.assertIsNone(cache.load_events(extraction, detection))
+        cache.store_events(extraction, detection, events)
+        self.assertEqual(cache.load_events(extraction, detection), events)
+        self.assertIsNone(cache.load_events(extraction, dict(detection, min_peak_height=0.05)))
+        cache.store_events(extraction, detection, [])
+        self.assertEqual(cache.load_events(extraction, detection), [])
+
+        samples = np.linspace(-1, 1, 1000, dtype=np.float32)
+        cache.store_audio(extraction, samples, 1000, is_envelope=True, latency=0.003)
+        cached, sample_rate, is_envelope, latency = cache.load_audio(extraction)
+        np.testing.assert_array_equal(cached, samples)
+        self.assertEqual((sample_rate, is_envelope, latency), (1000, True, 0.003))
+
+        # Another run over modified footage does not see the entries
+        with open(self.video, 'ab') as f:
+            f.write(b'more')
+        self.assertIsNone(AnalysisCache(DiskLRUCache(self.cache_dir), [self.video]).load_audio(extraction))
+
+    def test_stats_are_flushed_once_and_add_up_across_runs(self):
+        """Lookups only touch stats.json on flush, and concurrent runs add their counters."""
+        first, second = DiskLRUCache(self.cache_dir), DiskLRUCache(self.cache_dir)
+        first.put('a', samples=np.zeros(10))
+        stats_path = os.path.join(self.cache_dir, 'stats.json')
+        for _ in range(3):
+            first.get('a')
+        second.get('a')
+        second.get('missing')
+        self.assertFalse(os.path.exists(stats_path))
+        self.assertEqual((first.stats()['hits'], first.stats()['misses']), (3, 0))
+
+        first.flush_stats()
+        second.flush_stats()
+        second.flush_stats()  # Nothing new to add
+        stats = DiskLRUCache(self.cache_dir).stats()
+        self.assertEqual((stats['hits'], stats['misses']), (4, 1))
+        self.assertEqual([name for name in os.listdir(self.cache_dir) if name.endswith('.tmp')], [])
+
+    def test_decoded_audio_is_stored_as_pcm16(self):
+        """Decoded PCM is kept at half the float32 size and read back as the same float samples."""
+        cache = AnalysisCache(DiskLRUCache(self.cache_dir), [self.video])
+        extraction = dict(mode='pcm', sample_rate=16000)
+        samples = (np.random.default_rng(1).integers(-32768, 32768, 16000) * PCM16_SCALE).astype(np.float32)
+        cache.store_audio(extraction, samples, 16000)
+
+        self.assertEqual(cache.disk_cache.get(cache.audio_key(extraction))['samples'].dtype, np.int16)
+        cached, sample_rate, is_envelope, _ = cache.load_audio(extraction)
+        self.assertEqual(cached.dtype, np.float32)
+        np.testing.assert_array_equal(cached, samples)
+        self.assertEqual((sample_rate, is_envelope), (16000, False))
+
+    def test_recording_source_keeps_read_blocks(self):
+        """The recording wrapper returns exactly the samples the detector read."""
+        samples = np.random.default_rng(0).standard_normal(2500).astype(np.float32)
+        source = RecordingAudioSource(ArrayAudioSource(samples, 1000, is_envelope=True, latency=0.01))
+        blocks = list(source.blocks(1000))
+        self.assertEqual([len(block) for block in blocks], [1000, 1000, 500])
+        np.testing.assert_array_equal(source.recorded(), samples)
+        self.assertEqual((source.sample_rate, source.is_envelope, source.latency), (1000, True, 0.01))
+
+    def test_wav_is_written_from_cached_audio(self):
+        """Cached PCM audio gives back the extracted WAV exactly, tagged with the audio key."""
+        cache = AnalysisCache(DiskLRUCache(self.cache_dir), [self.video])
+        extraction = dict(mode='pcm', sample_rate=44100)
+        pcm = np.random.default_rng(0).integers(-32768, 32768, 44100)
+        cache.store_audio(extraction, pcm * PCM16_SCALE, 44100)
+        samples, sample_rate, _, _ = cache.load_audio(extraction)
+
+        wav = os.path.join(self.temp_dir.name, 'temp_audio.wav')
+        key = cache.audio_key(extraction)
+        self.assertFalse(wav_is_current(wav, key))
+        write_wav_samples(wav, samples, sample_rate)
+        self.assertFalse(wav_is_current(wav, key))  # Untagged WAV, e.g. left by another session
+        record_wav_key(wav, key)
+        self.assertTrue(wav_is_current(wav, key))
+        self.assertFalse(wav_is_current(wav, cache.audio_key(dict(extraction, sample_rate=48000))))
+
+        source = WavAudioSource(wav)
+        self.assertEqual(source.sample_rate, 44100)
+        np.testing.assert_array_equal(source.read_all(), samples)
+
+
+class TestMetadataCache(unittest.TestCase):
+    """Test cases for parallel, cached creation-time probing."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache_path = os.path.join(self.temp_dir.name, 'cache', 'metadata.json')
+        self.creation_times = {}
+        self.videos = []
+        for index, stamp in enumerate(['2024-03-02T10:00:00.000000Z', None, '2024-03-01T09:30:00.000000Z']):
+            video = os.path.join(self.temp_dir.name, f'GX0{index}.MP4')
+            with open(video, 'wb') as f:
+                f.write(b'video')
+            self.creation_times[video] = stamp
+            self.videos.append(video)
+
+    def sort(self, probe, metadata_cache=None):
+        with mock.patch('core.split_rounds.probe_creation_time', side_effect=probe):
+            return sort_videos_by_creation_date(self.videos, metadata_cache)
+
+    def test_probes_concurrently_and_keeps_order(self):
+        """Files are probed in parallel and sorted by creation time, undated files last."""
+        barrier = threading.Barrier(len(self.videos), timeout=5)
+
+        def probe(video):
+            barrier.wait()  # Fails unless every probe runs at the same time
+            return self.creation_times[video]
+
+        sorted_files, first_date, _ = self.sort(probe)
+        self.assertEqual(sorted_files, [self.videos[2], self.videos[0], self.videos[1]])
+        self.assertEqual(first_date, '2024-03-01')
+
+    def test_repeat_invocation_uses_cache(self):
+        """A second sort reads the metadata file instead of probing, until a file changes."""
+        probed = []
+
+        def probe(video):
+            probed.append(video)
+            return self.creation_times[video]
+
+        expected = self.sort(probe, MetadataCache(self.cache_path))
+        self.assertEqual(len(probed), 3)
+
+        probed.clear()
+        self.assertEqual(self.sort(probe, MetadataCache(self.cache_path)), expected)
+        self.assertEqual(probed, [])
+
+        with open(self.videos[1], 'ab') as f:
+            f.write(b'more')
+        self.sort(probe, MetadataCache(self.cache_path))
+        self.assertEqual(probed, [self.videos[1]])
+
+    def test_failed_probe_is_not_cached(self):
+        """Probe errors are reported as before and retried on the next run."""
+        cache = MetadataCache(self.cache_path)
+        with mock.patch('core.split_rounds.probe_creation_time', side_effect=RuntimeError('ffprobe')):
+            _, first_date, _ = sort_videos_by_creation_date(self.videos[:1], cache)
+        self.assertTrue(first_date.startswith("Une erreur s'est produite"))
+        self.assertIsNone(MetadataCache(self.cache_path).get(self.videos[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
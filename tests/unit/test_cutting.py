@@ -0,0 +1,465 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+
+# Add the src and test helper directories to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.timeline import SourceTimeline
+from core.governor import EncodeGovernor, JobResources
+from core.cutting import (CutterFactory, GraphCutter, IncrementalRun, ReencodeCutter, RoundCutter, SmartCutCutter,
+                          StreamCopyCutter, following_keyframe, keyframes_from_probe, preceding_keyframe,
+                          read_manifest, smart_cut_encoding, write_keyframe_list, write_manifest)
+from fakes import idle_load
+
+# Video stream of the synthetic libx264 sources, as reported by probe_video_stream
+H264_STREAM = dict(codec_name='h264', profile='High', level=11, pix_fmt='yuv420p', width=160, height=120,
+                   time_base='1/12800')
+
+
+def ffmpeg_has_filter(name):
+    """Whether the installed ffmpeg provides the filter `name`."""
+    if not shutil.which('ffmpeg'):
+        return False
+    result = subprocess.run(['ffmpeg', '-hide_banner', '-filters'], capture_output=True, text=True)
+    return any(line.split()[1:2] == [name] for line in result.stdout.splitlines())
+
+
+def ffmpeg_has_encoder(name):
+    """Whether the installed ffmpeg provides the encoder `name`."""
+    if not shutil.which('ffmpeg'):
+        return False
+    result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True)
+    return any(line.split()[1:2] == [name] for line in result.stdout.splitlines())
+
+
+def decode_errors(path):
+    """Decode the video stream of `path` and return the decoder errors."""
+    result = subprocess.run(['ffmpeg', '-v', 'error', '-i', path, '-map', '0:v', '-f', 'null', '-'],
+                            capture_output=True, text=True)
+    return result.stderr.strip()
+
+
+def video_frame_hashes(path):
+    """Decode the video stream of `path` and return one MD5 per frame."""
+    result = subprocess.run(['ffmpeg', '-v', 'error', '-i', path, '-map', '0:v', '-f', 'framemd5', '-'],
+                            capture_output=True, text=True, check=True)
+    return [line.split(',')[-1].strip() for line in result.stdout.splitlines() if not line.startswith('#')]
+
+
+class FakeCutter(RoundCutter):
+    """Cutter writing a small file per round instead of running ffmpeg."""
+
+    mode = 'fake'
+
+    def __init__(self, logo_path=None, failing=()):
+        self.logo_path = logo_path
+        self.failing = set(failing)
+        self.cut_rounds = []
+
+    def run(self, temp_video_list, output_file, actual_start, duration, creation_date, resources=None):
+        self.cut_rounds.append(os.path.basename(output_file))
+        with open(output_file, 'w') as f:
+            f.write(f"{actual_start} {duration}")
+        returncode = 1 if os.path.basename(output_file) in self.failing else 0
+        return subprocess.CompletedProcess([], returncode, '', ''), self.mode
+
+
+class FakeMonitor:
+    """Progress monitor recording the ffmpeg commands instead of running them."""
+
+    def __init__(self, failing=lambda command: False):
+        self.failing = failing
+        self.commands = []
+
+    def run(self, command, name, duration=None):
+        self.commands.append(command)
+        return subprocess.CompletedProcess(command, 1 if self.failing(command) else 0, '', '')
+
+
+def run_incrementally(cutter, rounds, output_dir, fingerprints=('source',), force=False):
+    """Cut `rounds` through an IncrementalRun and return it."""
+    run = IncrementalRun(output_dir, cutter, list(fingerprints), force=force)
+    governor = EncodeGovernor(cores=[0], load_average=idle_load)
+    cutter.cut_all(run.pending(rounds), 'list.txt', governor=governor, on_cut=run.record)
+    run.write()
+    return run
+
+
+class TestRoundCutting(unittest.TestCase):
+    """Test cases for the round cutting strategies."""
+
+    def test_preceding_keyframe(self):
+        """The cut starts on the last keyframe at or before the requested start."""
+        keyframes = np.array([0.0, 2.0, 4.0, 6.0])
+        self.assertEqual(preceding_keyframe(keyframes, 3.9), 2.0)
+        self.assertEqual(preceding_keyframe(keyframes, 4.0), 4.0)
+        self.assertEqual(preceding_keyframe(keyframes, 100.0), 6.0)
+        self.assertEqual(preceding_keyframe(np.array([1.0]), 0.5), 0.0)
+        self.assertEqual(following_keyframe(keyframes, 3.9), 4.0)
+        self.assertEqual(following_keyframe(keyframes, 4.0), 4.0)
+        self.assertIsNone(following_keyframe(keyframes, 6.5))
+
+    def test_keyframes_from_probe(self):
+        """Only keyframe packets are kept, shifted by the file offset."""
+        probe = {'packets': [
+            {'pts_time': '2.000000', 'flags': 'K__'},
+            {'pts_time': '0.000000', 'flags': 'K_'},
+            {'pts_time': '1.000000', 'flags': '__'},
+            {'pts_time': 'N/A', 'flags': 'K_'},
+        ]}
+        np.testing.assert_array_equal(keyframes_from_probe(probe, offset=10.0), [10.0, 12.0])
+
+    def test_stream_copy_plan_keeps_round_end(self):
+        """Stream copy starts early by the drift and still ends at the requested end."""
+        cutter = StreamCopyCutter([0.0, 5.0, 10.0], SourceTimeline.from_durations(['/videos/a.mp4'], [600.0]))
+        actual_start, duration = cutter.plan(7.5, 120.0)
+        self.assertEqual(actual_start, 5.0)
+        self.assertEqual(actual_start + duration, 127.5)
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            [command] = cutter.commands('list.txt', 'out.mp4', actual_start, duration, '2026-01-01', temp_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self.assertIn('copy', command)
+        self.assertNotIn('-filter_complex', command)
+
+    def test_keyframe_list_seeks_in_one_source(self):
+        """The copy list opens the source holding the keyframe at its local offset."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            list_path = os.path.join(temp_dir, 'sources.txt')
+            timeline = SourceTimeline.from_durations(['/videos/a.mp4', '/videos/b.mp4', '/videos/c.mp4'],
+                                                     [600.0, 600.0, 600.0])
+            write_keyframe_list(list_path, timeline, 610.5)
+            with open(list_path) as f:
+                self.assertEqual(f.read(), "file '/videos/b.mp4'\ninpoint 10.500000\nfile '/videos/c.mp4'\n")
+
+            write_keyframe_list(list_path, timeline, 0.0)
+            with open(list_path) as f:
+                self.assertEqual(f.read().count('file'), 3)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_smart_cut_without_keyframe_falls_back(self):
+        """A round holding no keyframe cannot be smart-cut."""
+        cutter = SmartCutCutter([0.0, 200.0], SourceTimeline.from_durations(['/videos/a.mp4'], [600.0]),
+                                logo_path='logo.png', video_stream=H264_STREAM)
+        self.assertEqual(cutter.plan(7.5, 120.0), (7.5, 120.0))
+        self.assertIsNone(cutter.commands('list.txt', 'out.mp4', 7.5, 120.0, '2026-01-01', '/tmp'))
+
+    def test_smart_cut_audio_seeks_in_its_sources(self):
+        """The round audio of the final join is read from the sources it covers, not the whole concat list."""
+        timeline = SourceTimeline.from_durations(['/videos/a.mp4', '/videos/b.mp4', '/videos/c.mp4'],
+                                                 [600.0, 600.0, 600.0])
+        cutter = SmartCutCutter(np.arange(0.0, 1800.0, 2.0), timeline, video_stream=H264_STREAM)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            join = cutter.commands('list.txt', 'out.mp4', 1250.5, 120.0, '2026-01-01', temp_dir)[-1]
+            self.assertNotIn('list.txt', join)
+            self.assertEqual(join[join.index('-ss') + 1:join.index('-ss') + 6],
+                             ['50.500000', '-t', '120.000000', '-i', '/videos/c.mp4'])
+            self.assertEqual(join[join.index('-map') + 1:join.index('-map') + 4], ['1:v', '-map', '0:a?'])
+
+            # Across two files only their audio is joined, no frame is decoded
+            join = cutter.commands('list.txt', 'out.mp4', 550.5, 120.0, '2026-01-01', temp_dir)[-1]
+            self.assertEqual(join[join.index('-filter_complex') + 1], '[0:a][1:a]concat=n=2:v=0:a=1[src_a]')
+            self.assertEqual(join[join.index('-map') + 1:join.index('-map') + 4], ['2:v', '-map', '[src_a]'])
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_smart_cut_needs_a_matching_encoder(self):
+        """The head is encoded like the source; sources without a matching encoder are re-encoded."""
+        encoding, bitstream_filter = smart_cut_encoding(H264_STREAM)
+        self.assertEqual(encoding[encoding.index('-c:v') + 1], 'libx264')
+        self.assertEqual(encoding[encoding.index('-profile:v') + 1], 'high')
+        self.assertEqual(encoding[encoding.index('-level:v') + 1], '1.1')
+        self.assertEqual(encoding[encoding.index('-s') + 1], '160x120')
+        self.assertEqual(bitstream_filter, 'h264_mp4toannexb')
+
+        hevc = dict(H264_STREAM, codec_name='hevc', profile='Main 10', level=93, pix_fmt='yuv420p10le')
+        encoding, bitstream_filter = smart_cut_encoding(hevc)
+        self.assertEqual(encoding[encoding.index('-c:v') + 1], 'libx265')
+        self.assertEqual(encoding[encoding.index('-profile:v') + 1], 'main10')
+        self.assertIn('level-idc=3.1', encoding[encoding.index('-x265-params') + 1])
+        self.assertEqual(encoding[encoding.index('-pix_fmt') + 1], 'yuv420p10le')
+        self.assertEqual(bitstream_filter, 'hevc_mp4toannexb')
+
+        timeline = SourceTimeline.from_durations(['/videos/a.mp4'], [600.0])
+        for stream in (dict(H264_STREAM, codec_name='vp9'), None):
+            self.assertIsNone(smart_cut_encoding(stream))
+            cutter = SmartCutCutter([0.0, 10.0], timeline, logo_path='logo.png', video_stream=stream)
+            self.assertIsNone(cutter.commands('list.txt', 'out.mp4', 7.5, 120.0, '2026-01-01', '/tmp'))
+
+    def test_reencode_cuts_exactly(self):
+        """Re-encoding keeps the requested start and the branding."""
+        cutter = ReencodeCutter('logo.png')
+        self.assertEqual(cutter.plan(7.5, 120.0), (7.5, 120.0))
+        [command] = cutter.commands('list.txt', 'out.mp4', 7.5, 120.0, '2026-01-01', '/tmp')
+        self.assertIn('-filter_complex', command)
+
+    def test_factory(self):
+        """The factory maps modes to strategies and rejects unknown modes."""
+        self.assertIsInstance(CutterFactory.create_cutter('reencode', logo_path='logo.png'), ReencodeCutter)
+        with self.assertRaises(ValueError):
+            CutterFactory.create_cutter('fixed_duration')
+
+    def test_graph_decodes_once_for_all_rounds(self):
+        """One command reads the sources once and writes every round."""
+        rounds = [('r1.mp4', 10.0, 120.0, '2026-01-01'), ('r2.mp4', 190.0, 121.0, '2026-01-01')]
+        command = GraphCutter('logo.png').graph_command(rounds, 'list.txt')
+
+        self.assertEqual(command.count('list.txt'), 1)
+        self.assertEqual(command[command.index('-ss') + 1], '10.000')
+        self.assertEqual(command[command.index('-t') + 1], '301.000')
+        graph = command[command.index('-filter_complex') + 1]
+        self.assertIn('[0:v]split=2[v0][v1]', graph)
+        self.assertIn('[v1]trim=start=180.000000:end=301.000000', graph)
+        self.assertIn('[a1]atrim=start=180.000000:end=301.000000', graph)
+        self.assertEqual(command[-1], 'r2.mp4')
+
+        silent = GraphCutter('logo.png', has_audio=False).graph_command(rounds, 'list.txt')
+        self.assertNotIn('asplit', silent[silent.index('-filter_complex') + 1])
+
+    def test_graph_reads_the_sources_with_the_machine_reservation(self):
+        """The graph seeks in the files it covers and shares the reserved threads between its encoders."""
+        timeline = SourceTimeline.from_durations(['a.mp4', 'b.mp4'], [300.0, 300.0], has_audio=True)
+        rounds = [('r1.mp4', 190.0, 120.0, '2026-01-01'), ('r2.mp4', 330.0, 121.0, '2026-01-01')]
+        command = GraphCutter('logo.png', timeline).graph_command(rounds, 'list.txt', JobResources(8, (0, 1)))
+
+        self.assertNotIn('list.txt', command)
+        self.assertEqual(command[:3], ['taskset', '-c', '0,1'])
+        self.assertEqual(command[command.index('-ss') + 1], '190.000000')
+        self.assertIn(os.path.abspath('b.mp4'), command)
+        graph = command[command.index('-filter_complex') + 1]
+        self.assertIn('concat=n=2:v=1:a=1[src_v][src_a];[src_v]split=2[v0][v1]', graph)
+        self.assertIn('[src_a]asplit=2[a0][a1]', graph)
+        self.assertIn('[2:v]split=2', graph)
+        self.assertEqual(command.count('-threads'), 2)
+        self.assertEqual(command[command.index('-threads') + 1], '4')
+
+    def test_graph_failure_recuts_each_round(self):
+        """When the single graph fails, every round is re-encoded on its own through the governor."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(temp_dir, '2026-01-01-boxing'))
+            cutter = GraphCutter('logo.png', SourceTimeline.from_durations(['a.mp4'], [600.0], has_audio=True))
+            cutter.output_root = temp_dir
+            cutter.monitor = FakeMonitor(failing=lambda command: 'split=2[v0][v1]' in ' '.join(command))
+            governor = EncodeGovernor(cores=[0, 1], load_average=idle_load)
+            recorded = []
+            cuts = cutter.cut_all([(1, 10.0, 120.0, '2026-01-01'), (2, 190.0, 120.0, '2026-01-01')], 'list.txt',
+                                  governor=governor, on_cut=recorded.append)
+
+            self.assertEqual(len(cutter.monitor.commands), 3)
+            self.assertEqual(sorted(cut['round'] for cut in cuts), [1, 2])
+            self.assertTrue(all(cut['success'] and cut['mode'] == 'reencode' for cut in cuts))
+            self.assertEqual(sorted(cut['round'] for cut in recorded), [1, 2])
+            self.assertIsNotNone(governor.reserve(block=False))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_manifest_reports_drift(self):
+        """The manifest lists rounds in order with their drift."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            cuts = [
+                dict(round=2, output_file='b.mp4', mode='copy', requested_start=130.5,
+                     actual_start=130.0, drift=0.5, duration=120.5, success=True),
+                dict(round=1, output_file='a.mp4', mode='copy', requested_start=10.2,
+                     actual_start=8.0, drift=2.2, duration=122.2, success=True),
+            ]
+            with open(write_manifest(temp_dir, cuts, 'copy')) as f:
+                manifest = json.load(f)
+            self.assertEqual([cut['round'] for cut in manifest['rounds']], [1, 2])
+            self.assertEqual(manifest['max_drift'], 2.2)
+            self.assertEqual(manifest['mode'], 'copy')
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+    def test_incremental_run_redoes_only_changed_rounds(self):
+        """Reruns keep rounds whose signature and output checksum still match the manifest."""
+        temp_dir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            os.makedirs('d-boxing')
+            with open('logo.png', 'wb') as f:
+                f.write(b'logo')
+            rounds = [(1, 10.0, 120.0, 'd'), (2, 140.0, 121.0, 'd'), (3, 270.0, 119.5, 'd')]
+
+            cutter = FakeCutter('logo.png', failing={'d_round_03.mp4'})
+            run_incrementally(cutter, rounds, 'd-boxing')
+            self.assertEqual(sorted(cutter.cut_rounds), ['d_round_01.mp4', 'd_round_02.mp4', 'd_round_03.mp4'])
+            entries = read_manifest('d-boxing')
+            self.assertEqual(sorted(entries), [1, 2, 3])
+            self.assertEqual(entries[1]['signature']['sources'], ['source'])
+            self.assertIsNotNone(entries[1]['checksum'])
+
+            # Only the failed round is redone
+            cutter = FakeCutter('logo.png')
+            run = run_incrementally(cutter, rounds, 'd-boxing')
+            self.assertEqual(cutter.cut_rounds, ['d_round_03.mp4'])
+            self.assertEqual(run.skipped, 2)
+            self.assertTrue(all(entry['success'] for entry in read_manifest('d-boxing').values()))
+
+            # Modified output, moved start, and missing output
+            with open(os.path.join('d-boxing', 'd_round_01.mp4'), 'a') as f:
+                f.write('corrupted')
+            os.remove(os.path.join('d-boxing', 'd_round_03.mp4'))
+            moved = [rounds[0], (2, 141.0, 121.0, 'd'), rounds[2]]
+            cutter = FakeCutter('logo.png')
+            run_incrementally(cutter, moved, 'd-boxing')
+            self.assertEqual(sorted(cutter.cut_rounds), ['d_round_01.mp4', 'd_round_02.mp4', 'd_round_03.mp4'])
+
+            # Nothing changed
+            cutter = FakeCutter('logo.png')
+            run_incrementally(cutter, moved, 'd-boxing')
+            self.assertEqual(cutter.cut_rounds, [])
+
+            # A new logo, new sources or --force redo every round
+            with open('logo.png', 'wb') as f:
+                f.write(b'new logo')
+            for kwargs in (dict(), dict(fingerprints=('edited',)), dict(force=True)):
+                cutter = FakeCutter('logo.png')
+                run_incrementally(cutter, moved, 'd-boxing', **kwargs)
+                self.assertEqual(len(cutter.cut_rounds), 3, kwargs)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_read_manifest_tolerates_missing_or_invalid_file(self):
+        """A missing or corrupt manifest means every round is redone."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.assertEqual(read_manifest(temp_dir), {})
+            with open(os.path.join(temp_dir, 'manifest.json'), 'w') as f:
+                f.write('{"rounds": [')
+            self.assertEqual(read_manifest(temp_dir), {})
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is not available")
+class TestRoundCuttingWithFFmpeg(unittest.TestCase):
+    """Cut a synthetic 25 fps source with a keyframe every second."""
+
+    def setUp(self):
+        """Create the source, its concat list and the output directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.source = os.path.join(self.temp_dir, 'source.mp4')
+        subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=25',
+                        '-t', '10', '-c:v', 'libx264', '-g', '25', '-keyint_min', '25', '-sc_threshold', '0',
+                        self.source], check=True)
+        self.video_list = os.path.join(self.temp_dir, 'list.txt')
+        with open(self.video_list, 'w') as f:
+            f.write(f"file '{self.source}'\n")
+        os.makedirs('2026-01-01-boxing')
+        self.keyframes = np.arange(10.0)
+        self.timeline = SourceTimeline.from_durations([self.source], [10.0], has_audio=False)
+
+    def tearDown(self):
+        """Remove the synthetic session."""
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_stream_copy_cut(self):
+        """A stream-copied round starts exactly on the preceding keyframe."""
+        cut = StreamCopyCutter(self.keyframes, self.timeline).cut((1, 3.4, 4.0, '2026-01-01'), self.video_list)
+
+        self.assertTrue(cut['success'])
+        self.assertEqual(cut['actual_start'], 3.0)
+        self.assertAlmostEqual(cut['drift'], 0.4)
+        # Copied frames decode identically to the source from frame 75 (3.0 s) on
+        self.assertEqual(video_frame_hashes(cut['output_file'])[:10], video_frame_hashes(self.source)[75:85])
+
+    def test_smart_cut_keeps_start_and_copies_tail(self):
+        """Only the frames before the next keyframe are re-encoded."""
+        cut = SmartCutCutter(self.keyframes, self.timeline, video_stream=H264_STREAM).cut(
+            (1, 3.4, 4.0, '2026-01-01'), self.video_list)
+
+        self.assertTrue(cut['success'])
+        self.assertEqual(cut['mode'], 'smart')
+        self.assertEqual(cut['drift'], 0.0)
+        self.assertEqual(decode_errors(cut['output_file']), '')
+        frames = video_frame_hashes(cut['output_file'])
+        source = video_frame_hashes(self.source)
+        # 3.4 s -> 4.0 s is re-encoded (15 frames), the copy starts on the keyframe of frame 100
+        self.assertEqual(frames[15:25], source[100:110])
+        self.assertAlmostEqual(len(frames), 100, delta=2)
+
+    def test_smart_cut_keeps_audio_across_sources(self):
+        """A smart-cut round spanning two sources with audio gets the full round of audio."""
+        sources = []
+        for index in range(2):
+            path = os.path.join(self.temp_dir, f'part{index}.mp4')
+            subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=25',
+                            '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000', '-t', '10',
+                            '-c:v', 'libx264', '-g', '25', '-keyint_min', '25', '-sc_threshold', '0',
+                            '-c:a', 'aac', path], check=True)
+            sources.append(path)
+        with open(self.video_list, 'w') as f:
+            f.writelines(f"file '{path}'\n" for path in sources)
+        timeline = SourceTimeline.from_durations(sources, [10.0, 10.0], has_audio=True)
+
+        cut = SmartCutCutter(np.arange(20.0), timeline, video_stream=H264_STREAM).cut(
+            (1, 8.4, 4.0, '2026-01-01'), self.video_list)
+        self.assertTrue(cut['success'])
+        self.assertEqual(cut['mode'], 'smart')
+        probe = subprocess.run(['ffmpeg', '-v', 'error', '-i', cut['output_file'], '-map', '0:a',
+                                '-f', 'null', '-'], capture_output=True, text=True)
+        self.assertEqual(probe.returncode, 0, probe.stderr)
+        samples = subprocess.run(['ffmpeg', '-v', 'error', '-i', cut['output_file'], '-map', '0:a', '-ac', '1',
+                                  '-ar', '8000', '-f', 's16le', '-'], capture_output=True, check=True).stdout
+        self.assertAlmostEqual(len(samples) / 2 / 8000, 4.0, delta=0.1)
+
+    @unittest.skipUnless(ffmpeg_has_encoder('libx265'), "ffmpeg has no libx265 encoder")
+    def test_smart_cut_hevc_source(self):
+        """An HEVC source gets an HEVC head and a decodable copied tail."""
+        source = os.path.join(self.temp_dir, 'hevc.mp4')
+        subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=25',
+                        '-t', '10', '-c:v', 'libx265', '-x265-params',
+                        'keyint=25:min-keyint=25:scenecut=0:log-level=error', source], check=True)
+        with open(self.video_list, 'w') as f:
+            f.write(f"file '{source}'\n")
+        timeline = SourceTimeline.from_durations([source], [10.0], has_audio=False)
+        hevc = dict(H264_STREAM, codec_name='hevc', profile='Main', level=60)
+
+        cut = SmartCutCutter(self.keyframes, timeline, video_stream=hevc).cut((1, 3.4, 4.0, '2026-01-01'),
+                                                                            self.video_list)
+        self.assertTrue(cut['success'])
+        self.assertEqual(cut['mode'], 'smart')
+        self.assertEqual(decode_errors(cut['output_file']), '')
+        frames = video_frame_hashes(cut['output_file'])
+        self.assertEqual(frames[15:25], video_frame_hashes(source)[100:110])
+        self.assertAlmostEqual(len(frames), 100, delta=2)
+
+        # A head that does not match the source is caught by the junction check
+        logo = os.path.join(os.path.dirname(__file__), '../../src/core/logo.png')
+        cut = SmartCutCutter(self.keyframes, timeline, logo_path=logo, video_stream=H264_STREAM).cut(
+            (2, 3.4, 4.0, '2026-01-01'), self.video_list)
+        self.assertEqual(cut['mode'], 'reencode')
+
+    @unittest.skipUnless(ffmpeg_has_filter('drawtext'), "ffmpeg has no drawtext filter")
+    def test_graph_cut_writes_every_round(self):
+        """The single-graph mode writes every branded round with exact durations."""
+        logo = os.path.join(os.path.dirname(__file__), '../../src/core/logo.png')
+        params = [(1, 1.0, 4.0, '2026-01-01'), (2, 4.5, 3.0, '2026-01-01')]
+        cuts = GraphCutter(logo, has_audio=False).cut_all(params, self.video_list)
+
+        self.assertTrue(all(cut['success'] for cut in cuts))
+        self.assertEqual([len(video_frame_hashes(cut['output_file'])) for cut in cuts], [100, 75])
+
+
+if __name__ == '__main__':
+    unittest.main()
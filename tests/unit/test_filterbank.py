@@ -0,0 +1,126 @@
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.audio_source import DecodedAudioCache
+from core.spectral_analyzer import SpectralAnalyzer
+from core.parallel_scan import SharedArray, scan_frequencies_parallel
+import numpy as np
+from test_streaming_detection import write_synthetic_bells
+
+
+class TestFilterbankEngine(unittest.TestCase):
+    """Test cases for the single-pass filterbank frequency scan."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a synthetic session with three 2080 Hz bells."""
+        cls.temp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'temp_test_files'))
+        os.makedirs(cls.temp_dir, exist_ok=True)
+        cls.audio_path = os.path.join(cls.temp_dir, 'filterbank_bells.wav')
+        write_synthetic_bells(cls.audio_path, seconds=120, bell_starts=(10.0, 50.0, 95.0))
+        cls.analyzer = SpectralAnalyzer()
+        cls.frequencies = [2000.0, 2040.0, 2080.0, 2120.0, 2160.0]
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the synthetic session."""
+        if os.path.exists(cls.audio_path):
+            os.unlink(cls.audio_path)
+
+    def test_matches_per_frequency_evaluation(self):
+        """The filterbank finds the same events as one bandpass filter per frequency."""
+        results = self.analyzer.evaluate_frequencies(self.audio_path, self.frequencies)
+
+        self.assertEqual([r['frequency'] for r in results], self.frequencies)
+        for result in results:
+            expected = self.analyzer.evaluate_frequency(self.audio_path, result['frequency'])
+            self.assertEqual(result['events_detected'], expected['events_detected'])
+            self.assertAlmostEqual(result['consistency_score'], expected['consistency_score'], delta=0.05)
+            self.assertAlmostEqual(result['amplitude_stats']['max'], expected['amplitude_stats']['max'],
+                                   delta=0.03 * expected['amplitude_stats']['max'])
+            for event, reference in zip(result['event_timestamps'], expected['event_timestamps']):
+                self.assertAlmostEqual(event[0], reference[0], delta=0.01)
+
+    def test_matches_per_frequency_evaluation_on_clean_rings(self):
+        """Sustained rings with little or no noise give the same peak trains with both engines."""
+        sr = 44100
+        t = np.arange(int(2.5 * sr)) / sr
+        ring = 0.3 * np.sin(2 * np.pi * 2080 * t) * np.exp(-t * 1.2)
+        for noise in (0.0, 0.001):
+            y = np.random.default_rng(0).normal(0, noise, 60 * sr)
+            for start in (10, 30, 45):
+                y[start * sr:start * sr + len(ring)] += ring
+
+            result = self.analyzer.evaluate_frequencies(y, [2080.0], sample_rate=sr)[0]
+            expected = self.analyzer.evaluate_frequency(y, 2080.0, sample_rate=sr)
+            self.assertEqual(expected['events_detected'], 3)
+            self.assertEqual(result['events_detected'], 3)
+            self.assertEqual([len(event) for event in result['event_timestamps']],
+                             [len(event) for event in expected['event_timestamps']])
+            for event, reference in zip(result['event_timestamps'], expected['event_timestamps']):
+                self.assertAlmostEqual(event[0], reference[0], delta=0.01)
+
+    def test_bell_frequency_detects_all_bells(self):
+        """The bell frequency itself detects the three synthetic bells."""
+        result = self.analyzer.evaluate_frequencies(self.audio_path, [2080.0])[0]
+        self.assertEqual(result['events_detected'], 3)
+
+    def test_array_input_matches_path_input(self):
+        """Decoded samples give the same results as the file path."""
+        y, sr = self.analyzer.load_audio(self.audio_path)
+        from_path = self.analyzer.evaluate_frequency(self.audio_path, 2080.0)
+        from_array = self.analyzer.evaluate_frequency(y, 2080.0, sample_rate=sr)
+
+        self.assertEqual(from_array, from_path)
+        with self.assertRaises(ValueError):
+            self.analyzer.evaluate_frequency(y, 2080.0)
+
+    def test_analyze_spectral_response_decodes_once(self):
+        """The spectral peak analysis decodes the file a single time."""
+        cache = DecodedAudioCache()
+        analyzer = SpectralAnalyzer(audio_cache=cache)
+        analyzer.analyze_spectral_response(self.audio_path, analysis_band=(2000, 2200))
+        analyzer.evaluate_frequencies(self.audio_path, self.frequencies)
+
+        self.assertEqual(cache.misses, 1)
+
+    def test_parallel_scan_matches_serial_scan(self):
+        """Both engines give the serial results, in frequency order, on a process pool."""
+        y, sr = self.analyzer.load_audio(self.audio_path)
+        serial = self.analyzer.evaluate_frequencies(y, self.frequencies, sample_rate=sr)
+        parallel = scan_frequencies_parallel(self.analyzer, y, sr, self.frequencies, engine='filterbank', jobs=2)
+        self.assertEqual(parallel, serial)
+
+        exact = scan_frequencies_parallel(self.analyzer, y, sr, self.frequencies[:2], engine='exact', jobs=2)
+        self.assertEqual(exact, [self.analyzer.evaluate_frequency(y, f, sample_rate=sr) for f in self.frequencies[:2]])
+
+    def test_baseband_slices_match_whole_signal(self):
+        """Baseband slices computed separately, as by the parallel scan, equal the whole signal."""
+        y, sr = self.analyzer.load_audio(self.audio_path)
+        whole, _, _ = self.analyzer.baseband(y, sr, 2000.0, 2160.0)
+        bounds = [0, 1000, 1001, 50000, len(whole)]
+        slices = [self.analyzer.baseband(y, sr, 2000.0, 2160.0, start, stop)[0]
+                  for start, stop in zip(bounds, bounds[1:])]
+        np.testing.assert_array_equal(np.concatenate(slices), whole)
+
+    def test_shared_array_round_trip(self):
+        """A worker attached to the shared segment sees the original samples, read-only."""
+        data = np.arange(10, dtype=np.float32)
+        with SharedArray(data) as shared:
+            shm, view = SharedArray.attach(shared.descriptor)
+            np.testing.assert_array_equal(view, data)
+            self.assertFalse(view.flags.writeable)
+            del view
+            shm.close()
+
+    def test_empty_frequency_list(self):
+        """An empty scan returns no results."""
+        self.assertEqual(self.analyzer.evaluate_frequencies(self.audio_path, []), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
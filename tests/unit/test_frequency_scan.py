@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.spectral_analyzer import SpectralAnalyzer
+from tools.analyze_bell_frequency import scan_frequencies, write_analysis_artifacts
+from test_streaming_detection import write_synthetic_bells
+
+
+class CountingAnalyzer(SpectralAnalyzer):
+    """SpectralAnalyzer that counts how many frequencies it evaluates."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evaluated = 0
+
+    def evaluate_frequency(self, *args, **kwargs):
+        self.evaluated += 1
+        return super().evaluate_frequency(*args, **kwargs)
+
+    def evaluate_frequencies(self, audio, frequencies, sample_rate=None):
+        self.evaluated += len(frequencies)
+        return super().evaluate_frequencies(audio, frequencies, sample_rate=sample_rate)
+
+
+class TestFrequencyScan(unittest.TestCase):
+    """Test cases for the evaluate-once analysis pipeline of analyze_bell_frequency."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a synthetic session with two 2080 Hz bells."""
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.audio_path = os.path.join(cls.temp_dir, 'scan_bells.wav')
+        write_synthetic_bells(cls.audio_path, seconds=60, bell_starts=(10.0, 40.0))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the synthetic session and generated artifacts."""
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def test_artifacts_reuse_scan_results(self):
+        """Report, debug files and README cost no evaluation beyond the scan."""
+        analyzer = CountingAnalyzer()
+        scan = scan_frequencies(analyzer, self.audio_path, analysis_band=(2040, 2120), step_size=20)
+        self.assertEqual(analyzer.evaluated, 5)
+
+        output_report = os.path.join(self.temp_dir, 'analysis_results.json')
+        write_analysis_artifacts(scan, output_report, main_output_dir=self.temp_dir)
+        self.assertEqual(analyzer.evaluated, 5)
+
+        with open(output_report) as f:
+            report = json.load(f)
+        self.assertEqual(report['recommended_frequency'], scan.recommended_frequency)
+        self.assertEqual(len(report['step_analysis']['scanned_frequencies']), 5)
+        self.assertEqual(len(report['top_candidates']), 3)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, 'README_ANALYSIS_RESULTS.md')))
+        self.assertEqual(len(os.listdir(os.path.join(self.temp_dir, 'frequency_files'))), 5)
+
+    def test_scan_uses_analyzer_parameters(self):
+        """Detection parameters of the given analyzer drive the scan."""
+        strict = scan_frequencies(SpectralAnalyzer(min_peak_height=10.0), self.audio_path,
+                                  analysis_band=(2080, 2080), step_size=10)
+        default = scan_frequencies(SpectralAnalyzer(), self.audio_path,
+                                   analysis_band=(2080, 2080), step_size=10)
+
+        self.assertEqual(strict.recommended_result()['events_detected'], 0)
+        self.assertEqual(default.recommended_result()['events_detected'], 2)
+
+    def test_top_candidates_follow_scores(self):
+        """Top candidates are the best-scored frequencies, with their full results."""
+        scan = scan_frequencies(SpectralAnalyzer(), self.audio_path, analysis_band=(2040, 2120), step_size=20)
+        ranked = [freq['frequency'] for freq in scan.ranked()]
+
+        self.assertEqual([c['frequency'] for c in scan.top_candidates()], ranked[:3])
+        self.assertEqual(ranked[0], scan.recommended_frequency)
+
+
+if __name__ == '__main__':
+    unittest.main()
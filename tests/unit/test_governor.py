@@ -0,0 +1,180 @@
+import unittest
+import os
+import sys
+import threading
+
+# Add the src and test helper directories to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.governor import EncodeGovernor, JobResources, apply_resources
+from fakes import FakeClock, idle_load
+
+
+def run_generation(governor, clock, throughput):
+    """Complete one generation of `governor.jobs` 120 s rounds at `throughput` s of video per second."""
+    jobs = governor.jobs
+    resources = [governor.acquire() for _ in range(jobs)]
+    clock.now += 120.0 * jobs / throughput
+    for job in resources:
+        governor.release(job, 120.0)
+
+
+class TestEncodeGovernor(unittest.TestCase):
+    """Test cases for the adaptive encode governor."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def governor(self, **kwargs):
+        return EncodeGovernor(cores=list(range(16)), load_average=idle_load, clock=self.clock, **kwargs)
+
+    def test_initial_budget_fills_cores(self):
+        """Jobs times threads matches the core count instead of one job per core."""
+        governor = self.governor()
+        self.assertEqual((governor.jobs, governor.threads), (4, 4))
+        self.assertEqual(self.governor(max_jobs=2).jobs, 2)
+        self.assertEqual(EncodeGovernor(cores=[0], load_average=idle_load).threads, 1)
+
+    def test_climbs_while_throughput_improves(self):
+        """More jobs are tried while they raise throughput, then the best setting is kept."""
+        governor = self.governor()
+        for throughput in (10.0, 12.0, 11.0):
+            run_generation(governor, self.clock, throughput)
+        self.assertEqual(governor.jobs, 5)
+
+        run_generation(governor, self.clock, 50.0)
+        self.assertEqual(governor.jobs, 5)
+
+    def test_reverses_when_more_jobs_are_slower(self):
+        """Fewer jobs are tried when adding one lowers throughput."""
+        governor = self.governor()
+        run_generation(governor, self.clock, 10.0)
+        run_generation(governor, self.clock, 8.0)
+        self.assertEqual(governor.jobs, 3)
+        self.assertEqual(governor.threads, 5)
+
+        run_generation(governor, self.clock, 13.0)
+        self.assertEqual(governor.jobs, 2)
+        run_generation(governor, self.clock, 9.0)
+        self.assertEqual(governor.jobs, 3)
+
+    def test_backs_off_under_external_load(self):
+        """A load average above the core count removes a job."""
+        governor = EncodeGovernor(cores=list(range(16)), load_average=lambda: (24.0, 0.0, 0.0), clock=self.clock)
+        job = governor.acquire()
+        governor.release(job, 120.0)
+        self.assertEqual(governor.jobs, 3)
+
+    def test_own_encodes_do_not_count_as_load(self):
+        """A load average matching the governor's own allocation keeps every job."""
+        load = [0.0]
+        governor = EncodeGovernor(cores=list(range(16)), load_average=lambda: (load[0], 0.0, 0.0), clock=self.clock)
+        jobs = [governor.acquire() for _ in range(governor.jobs)]
+        # 4 x 4 encoder threads plus a few decoder and filter threads
+        load[0] = 16.0 + 3.0
+        for job in jobs:
+            governor.release(job, 120.0)
+            self.assertGreaterEqual(governor.jobs, 4)
+
+    def test_restores_jobs_when_external_load_drops(self):
+        """Jobs removed under external load come back once it is gone."""
+        load = [40.0]
+        governor = EncodeGovernor(cores=list(range(16)), load_average=lambda: (load[0], 0.0, 0.0), clock=self.clock)
+        for _ in range(2):
+            governor.release(governor.acquire(), 120.0)
+        self.assertEqual(governor.jobs, 2)
+
+        load[0] = governor.threads
+        for _ in range(3):
+            governor.release(governor.acquire(), 120.0)
+        self.assertEqual(governor.jobs, 4)
+
+    def test_pinned_jobs_get_disjoint_cores(self):
+        """Pinned jobs never share a core and return them when done."""
+        governor = self.governor()
+        governor.pin = True
+        jobs = [governor.acquire() for _ in range(governor.jobs)]
+        cpus = [cpu for job in jobs for cpu in job.cpus]
+        self.assertEqual(sorted(cpus), list(range(16)))
+
+        governor.release(jobs[0], 120.0)
+        self.assertEqual(governor.acquire().cpus, jobs[0].cpus)
+
+    def test_machine_reservation_is_exclusive(self):
+        """The whole-machine reservation waits for running jobs and holds back new ones."""
+        governor = self.governor()
+        governor.pin = True
+        job = governor.acquire()
+        reserved = []
+        waiting = threading.Thread(target=lambda: reserved.append(governor.reserve_machine()))
+        waiting.start()
+        waiting.join(0.2)
+        self.assertEqual(reserved, [])
+
+        governor.release(job, 120.0)
+        waiting.join(5)
+        self.assertEqual(reserved, [JobResources(16, tuple(range(16)))])
+        self.assertIsNone(governor.reserve(block=False))
+
+        governor.release_machine(reserved[0])
+        self.assertEqual(len(governor.reserve(block=False).cpus), governor.threads)
+
+    def test_apply_resources(self):
+        """The thread count is set on the output and pinned jobs run under taskset."""
+        command = ['nice', '-n', '10', 'ffmpeg', '-i', 'in.mp4', '-c:v', 'libx264', 'out.mp4']
+        self.assertEqual(apply_resources(command, None), command)
+        self.assertEqual(apply_resources(command, JobResources(4, ()))[-3:], ['-threads', '4', 'out.mp4'])
+        self.assertEqual(apply_resources(command, JobResources(2, (6, 7)))[:3], ['taskset', '-c', '6,7'])
+
+    def test_map_respects_concurrency(self):
+        """No more than `jobs` tasks run at once and every task completes."""
+        governor = EncodeGovernor(cores=list(range(4)), threads_per_job=2, load_average=idle_load)
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def task(item, resources):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            with lock:
+                state['running'] -= 1
+            return item * 2
+
+        results = sorted(future.result() for future in governor.map(task, list(range(10)), lambda item: 1.0))
+        self.assertEqual(results, [item * 2 for item in range(10)])
+        self.assertLessEqual(state['peak'], governor.max_jobs)
+
+    def test_concurrent_maps_share_the_budget(self):
+        """Two sessions mapping on one governor never exceed its jobs together."""
+        governor = EncodeGovernor(cores=list(range(4)), max_jobs=2, threads_per_job=2, load_average=idle_load)
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        release = threading.Event()
+
+        def task(item, resources):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            release.wait(timeout=0.05)
+            with lock:
+                state['running'] -= 1
+            return item
+
+        results = []
+
+        def session(items):
+            results.extend(future.result() for future in governor.map(task, items, lambda item: 1.0))
+
+        threads = [threading.Thread(target=session, args=(range(start, start + 5),)) for start in (0, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        self.assertEqual(sorted(results), list(range(10)))
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(governor.active, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
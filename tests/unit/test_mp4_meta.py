@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import shutil
+import struct
+import subprocess
+import tempfile
+from unittest import mock
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.mp4_meta import MP4_EPOCH_OFFSET, UnsupportedContainer, read_creation_time
+from core.split_rounds import probe_creation_time
+
+# 2024-03-01T09:30:15Z
+UNIX_TIME = 1709285415
+
+
+def box(box_type, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def mvhd(seconds, version=0):
+    if version == 1:
+        return box(b'mvhd', bytes([1, 0, 0, 0]) + struct.pack('>QQ', seconds, seconds) + b'\0' * 80)
+    return box(b'mvhd', bytes(4) + struct.pack('>II', seconds, seconds) + b'\0' * 80)
+
+
+def quicktime_meta(value):
+    name = b'com.apple.quicktime.creationdate'
+    key = struct.pack('>I4s', 8 + len(name), b'mdta') + name
+    other = struct.pack('>I4s', 8 + 4, b'mdta') + b'make'
+    keys = box(b'keys', bytes(4) + struct.pack('>I', 2) + other + key)
+    data = box(b'data', struct.pack('>II', 1, 0) + value.encode())
+    # In ilst, an item's type is the 1-based index of its key
+    item = struct.pack('>II', 8 + len(data), 2) + data
+    return box(b'meta', box(b'hdlr', bytes(24)) + keys + box(b'ilst', item))
+
+
+class TestMp4CreationTime(unittest.TestCase):
+    """Test cases for the native ISO-BMFF creation-time reader."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write(self, *boxes):
+        path = os.path.join(self.temp_dir.name, f'video{len(os.listdir(self.temp_dir.name))}.mp4')
+        with open(path, 'wb') as f:
+            f.write(b''.join(boxes))
+        return path
+
+    def test_reads_mvhd_like_ffprobe(self):
+        """mvhd v0/v1 dates, moov after a large mdat, and Unix-epoch dates."""
+        ftyp = box(b'ftyp', b'isom\0\0\0\0isom')
+        large_mdat = struct.pack('>I4sQ', 1, b'mdat', 16 + 4096) + bytes(4096)
+        for moov_box in (mvhd(UNIX_TIME + MP4_EPOCH_OFFSET), mvhd(UNIX_TIME + MP4_EPOCH_OFFSET, version=1),
+                         mvhd(UNIX_TIME)):
+            path = self.write(ftyp, large_mdat, box(b'moov', moov_box + box(b'trak')))
+            self.assertEqual(read_creation_time(path), '2024-03-01T09:30:15.000000Z')
+
+    def test_values_below_the_epoch_offset_are_unix_dates(self):
+        """Like ffmpeg, the 1904 offset is only removed from values that exceed it."""
+        ftyp = box(b'ftyp', b'isom\0\0\0\0isom')
+        for seconds, expected in ((MP4_EPOCH_OFFSET - 1, '2036-01-01T23:59:59.000000Z'),
+                                  (86400, '1970-01-02T00:00:00.000000Z'),
+                                  (MP4_EPOCH_OFFSET, '1970-01-01T00:00:00.000000Z')):
+            path = self.write(ftyp, box(b'moov', mvhd(seconds)))
+            self.assertEqual(read_creation_time(path), expected)
+
+    def test_falls_back_to_metadata_atoms(self):
+        """Without a mvhd date, the QuickTime creationdate key then the udta date are used."""
+        ftyp = box(b'ftyp', b'qt  \0\0\0\0qt  ')
+        path = self.write(ftyp, box(b'moov', mvhd(0) + quicktime_meta('2024-03-01T10:30:15+0100')))
+        self.assertEqual(read_creation_time(path), '2024-03-01T09:30:15.000000Z')
+
+        day = struct.pack('>HH', 20, 0) + b'2024-03-01T09:30:15Z'
+        path = self.write(ftyp, box(b'moov', mvhd(0) + box(b'udta', box(b'\xa9day', day))))
+        self.assertEqual(read_creation_time(path), '2024-03-01T09:30:15.000000Z')
+
+        self.assertIsNone(read_creation_time(self.write(ftyp, box(b'moov', mvhd(0)))))
+
+    def test_rejects_other_containers(self):
+        """Non ISO-BMFF files and files without moov raise UnsupportedContainer."""
+        with self.assertRaises(UnsupportedContainer):
+            read_creation_time(self.write(b'\x1a\x45\xdf\xa3' + bytes(60)))
+        with self.assertRaises(UnsupportedContainer):
+            read_creation_time(self.write(box(b'ftyp', b'isom'), box(b'mdat', bytes(16))))
+
+    def test_probe_falls_back_to_ffprobe(self):
+        """probe_creation_time only spawns ffprobe for unsupported containers."""
+        mp4 = self.write(box(b'ftyp', b'isom'), box(b'moov', mvhd(UNIX_TIME)))
+        mkv = self.write(b'\x1a\x45\xdf\xa3' + bytes(60))
+        with mock.patch('core.split_rounds.ffprobe_creation_time', return_value='2020-01-01T00:00:00.000000Z') as ffprobe:
+            self.assertEqual(probe_creation_time(mp4), '2024-03-01T09:30:15.000000Z')
+            ffprobe.assert_not_called()
+            self.assertEqual(probe_creation_time(mkv), '2020-01-01T00:00:00.000000Z')
+            ffprobe.assert_called_once_with(mkv)
+
+    @unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is not available")
+    def test_reads_ffmpeg_written_files(self):
+        """The creation_time written by ffmpeg is read back from MP4 and MOV, with or without faststart."""
+        for name, flags in (('a.mp4', []), ('b.mp4', ['-movflags', '+faststart']), ('c.mov', [])):
+            path = os.path.join(self.temp_dir.name, name)
+            subprocess.run(['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=d=0.2:s=32x32',
+                            '-metadata', 'creation_time=2024-03-01T09:30:15Z'] + flags + [path], check=True)
+            self.assertEqual(read_creation_time(path), '2024-03-01T09:30:15.000000Z')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.bell_dsp import StreamingPeakGrouper, events_from_bounds, group_peak_times
+from core.spectral_analyzer import SpectralAnalyzer
+
+
+def loop_grouping(peak_times, max_gap, min_peaks):
+    """Reference implementation: the element-by-element loop previously used by both call sites."""
+    valid_events = []
+    if len(peak_times) > 0:
+        current_group = [peak_times[0]]
+        for t in peak_times[1:]:
+            if t - current_group[-1] <= max_gap:
+                current_group.append(t)
+            else:
+                if len(current_group) >= min_peaks:
+                    valid_events.append(current_group)
+                current_group = [t]
+        if len(current_group) >= min_peaks:
+            valid_events.append(current_group)
+    return valid_events
+
+
+def read_reference_peak_times(path):
+    """Read every timestamp of a debug file (hh:mm:ss.mmm) as seconds, in order."""
+    times = []
+    with open(path) as f:
+        for line in f:
+            if ':' not in line or '[' not in line:
+                continue
+            for stamp in line[line.index('[') + 1:line.rindex(']')].split(','):
+                hours, minutes, seconds = stamp.strip().strip("'").split(':')
+                times.append(int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+    return np.array(times)
+
+
+class TestPeakGrouping(unittest.TestCase):
+    """Test cases for the vectorized peak grouping kernel."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the reference bell timestamps."""
+        cls.reference_times = read_reference_peak_times(
+            os.path.join(os.path.dirname(__file__), 'test_bell_reference_timestamps.txt'))
+
+    def test_identical_to_loop_on_reference_timestamps(self):
+        """The kernel reproduces the loop exactly on the reference timestamps."""
+        self.assertGreater(len(self.reference_times), 0)
+        for max_gap in (0.05, 0.1, 0.15, 0.2, 0.6, 1.0, 200.0):
+            for min_peaks in (1, 2, 4, 6, 8, 30):
+                expected = loop_grouping(list(self.reference_times), max_gap, min_peaks)
+                events = events_from_bounds(self.reference_times,
+                                            *group_peak_times(self.reference_times, max_gap, min_peaks))
+                self.assertEqual(events, expected, f"max_gap={max_gap}, min_peaks={min_peaks}")
+
+    def test_identical_to_loop_on_random_peaks(self):
+        """The kernel reproduces the loop on dense random peak trains."""
+        rng = np.random.default_rng(5)
+        peak_times = np.cumsum(rng.exponential(0.4, 20000))
+        for max_gap, min_peaks in ((0.6, 4), (0.3, 2), (1.2, 10)):
+            expected = loop_grouping(list(peak_times), max_gap, min_peaks)
+            starts, stops = group_peak_times(peak_times, max_gap, min_peaks)
+            self.assertEqual(events_from_bounds(peak_times, starts, stops), expected)
+
+    def test_returns_index_bounds(self):
+        """Events are returned as start/stop offsets into the peak array."""
+        starts, stops = group_peak_times(np.array([1.0, 1.2, 1.4, 5.0, 9.0, 9.1]), 0.6, 2)
+        np.testing.assert_array_equal(starts, [0, 4])
+        np.testing.assert_array_equal(stops, [3, 6])
+
+        starts, stops = group_peak_times(np.empty(0), 0.6, 4)
+        self.assertEqual((len(starts), len(stops)), (0, 0))
+
+    def test_call_sites_share_kernel(self):
+        """SpectralAnalyzer and the streaming grouper give the loop output."""
+        expected = loop_grouping(list(self.reference_times), 0.6, 4)
+        analyzer = SpectralAnalyzer(max_gap=0.6, min_peaks=4)
+        self.assertEqual(analyzer.group_peaks_into_events(self.reference_times), expected)
+
+        grouper = StreamingPeakGrouper(max_gap=0.6, min_peaks=4)
+        streamed = []
+        for chunk in np.array_split(self.reference_times, 7):
+            streamed.extend(grouper.push(chunk))
+        streamed.extend(grouper.flush())
+        self.assertEqual(streamed, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
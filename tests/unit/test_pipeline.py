@@ -0,0 +1,115 @@
+import unittest
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Add the src and test helper directories to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.governor import EncodeGovernor
+from core.split_rounds import RoundPlanner, iter_bell_events_from_source, plan_rounds
+from fakes import idle_load
+
+
+def loop_rounds(valid_events, round_time, creation_date):
+    """Reference implementation: the look-ahead loop previously inlined in main()."""
+    round_params_list = []
+    round = 0
+    for i, group in enumerate(valid_events):
+        start_time = group[0] - 0.5
+        if i + 1 < len(valid_events):
+            delta_sec = valid_events[i + 1][0] - start_time + 1
+            if round_time - 2 <= delta_sec <= round_time + 2:
+                round += 1
+                round_params_list.append((round, start_time, delta_sec, creation_date))
+    return round_params_list
+
+
+class ArraySource:
+    """In-memory audio source exposing the block interface of the real sources."""
+
+    def __init__(self, samples, sample_rate):
+        self.samples = samples
+        self.sample_rate = sample_rate
+
+    def blocks(self, block_size):
+        for start in range(0, len(self.samples), block_size):
+            yield self.samples[start:start + block_size]
+
+
+class TestPipeline(unittest.TestCase):
+    """Test cases for overlapping bell detection with round encoding."""
+
+    def test_planner_matches_look_ahead_loop(self):
+        """Incremental planning gives the rounds of the batch loop."""
+        rng = np.random.default_rng(3)
+        starts = np.cumsum(rng.choice([60.0, 119.0, 121.5, 123.0, 200.0], 40))
+        valid_events = [[start, start + 0.3, start + 0.6] for start in starts]
+        expected = loop_rounds(valid_events, 120, "2024-01-01")
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(plan_rounds(valid_events, 120, "2024-01-01"), expected)
+
+        planner = RoundPlanner(120, "2024-01-01")
+        self.assertIsNone(planner.push([10.0]))
+        self.assertEqual(planner.push([129.0]), (1, 9.5, 120.5, "2024-01-01"))
+        self.assertIsNone(planner.push([400.0]))
+
+    def test_events_are_emitted_before_the_end_of_audio(self):
+        """A bell event is yielded while later blocks are still unread."""
+        sr = 8000
+        t = np.arange(sr) / sr
+        bell = (0.5 * np.sin(2 * np.pi * 2080 * t) * (np.sin(2 * np.pi * 4 * t) > 0)).astype(np.float32)
+        samples = np.concatenate([np.zeros(sr, np.float32), bell, np.zeros(20 * sr, np.float32)])
+        for peak_hold_rate in (0, 200):
+            source = ArraySource(samples, sr)
+            read = []
+            source.blocks = lambda size, blocks=source.blocks: (read.append(len(block)) or block
+                                                                for block in blocks(size))
+
+            events = iter_bell_events_from_source(source, block_seconds=1.0, peak_hold_rate=peak_hold_rate,
+                                                  peaks_in_row=2)
+            first = next(events)
+            self.assertTrue(1.0 <= first[0] < 2.0)
+            self.assertLessEqual(sum(read), 4 * sr)
+
+    def test_encoding_starts_while_items_are_produced(self):
+        """The governor submits an item before the producing generator has finished."""
+        produced_all = threading.Event()
+        started_early = []
+
+        def items():
+            yield 1
+            yield 2
+            # Give the encodes time to start before producing the rest
+            produced_all.wait(timeout=2.0)
+            yield 3
+
+        def encode(item, resources):
+            started_early.append(not produced_all.is_set())
+            produced_all.set()
+            return item
+
+        governor = EncodeGovernor(cores=[0, 1], max_jobs=2, threads_per_job=1, load_average=idle_load)
+        results = sorted(future.result() for future in governor.map(encode, items(), media_seconds=float))
+        self.assertEqual(results, [1, 2, 3])
+        self.assertTrue(started_early[0])
+
+    def test_producer_error_is_raised_after_running_jobs(self):
+        """An exception from the item generator propagates once submitted jobs are done."""
+        def items():
+            yield 1
+            raise RuntimeError("audio")
+
+        governor = EncodeGovernor(cores=[0], load_average=idle_load)
+        finished = []
+        with self.assertRaises(RuntimeError):
+            for future in governor.map(lambda item, resources: item, items(), media_seconds=float):
+                finished.append(future.result())
+        self.assertEqual(finished, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Add the src and test helper directories to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.progress import JobProgress, ProgressMonitor, progress_command
+from fakes import FakeClock
+
+
+def progress_block(out_time, speed, fps='30.00', total_size='1000', progress='continue'):
+    return dict(frame='90', fps=fps, out_time_us=str(int(out_time * 1e6)), total_size=total_size,
+                speed=speed, progress=progress)
+
+
+class TestProgress(unittest.TestCase):
+    """Test cases for the ffmpeg progress monitor."""
+
+    def test_progress_command_follows_the_executable(self):
+        command = progress_command(["nice", "-n", "10", "ffmpeg", "-y", "-i", "in.mp4", "out.mp4"], 7)
+        self.assertEqual(command[:6], ["nice", "-n", "10", "ffmpeg", "-progress", "pipe:7"])
+        self.assertEqual(command[-4:], ["-y", "-i", "in.mp4", "out.mp4"])
+
+    def test_job_parses_blocks_and_estimates_eta(self):
+        job = JobProgress("round 1", duration=120.0, clock=FakeClock())
+        job.update(progress_block(30.0, '2.5x'))
+        self.assertEqual((job.frame, job.fps, job.total_size), (90, 30.0, 1000))
+        self.assertAlmostEqual(job.out_time, 30.0)
+        self.assertAlmostEqual(job.eta, 90.0 / 2.5)
+
+        # Values ffmpeg reports as N/A keep their last known value
+        job.update(progress_block(40.0, 'N/A', fps='N/A', total_size='N/A'))
+        self.assertEqual((job.fps, job.speed, job.total_size), (30.0, 2.5, 1000))
+        self.assertAlmostEqual(job.out_time, 40.0)
+
+        self.assertIsNone(JobProgress("audio", clock=FakeClock()).eta)
+
+    def test_snapshot_aggregates_running_jobs(self):
+        monitor = ProgressMonitor(interval=0, clock=FakeClock())
+        first = JobProgress("round 1", duration=100.0)
+        second = JobProgress("round 2", duration=60.0)
+        first.update(progress_block(40.0, '2.0x'))
+        second.update(progress_block(20.0, '1.0x', fps='10.00', total_size='500'))
+        monitor._running.extend([first, second])
+
+        totals = monitor.snapshot()['totals']
+        self.assertEqual(totals['running'], 2)
+        self.assertAlmostEqual(totals['fps'], 40.0)
+        self.assertAlmostEqual(totals['speed'], 3.0)
+        self.assertEqual(totals['bytes'], 1500)
+        # (60 + 40) seconds left at a combined x3
+        self.assertAlmostEqual(totals['eta'], 100.0 / 3.0)
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg n'est pas installé")
+    def test_run_reads_the_progress_channel(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_path = os.path.join(temp_dir, "progress.json")
+            monitor = ProgressMonitor(interval=0, report_path=report_path)
+            output = os.path.join(temp_dir, "tone.wav")
+            result = monitor.run(["ffmpeg", "-v", "error", "-nostdin", "-y", "-f", "lavfi",
+                                  "-i", "sine=frequency=440:duration=3", output], "tone", duration=3.0)
+            self.assertIsInstance(result, subprocess.CompletedProcess)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            monitor.stop()
+
+            with open(report_path) as f:
+                snapshot = json.load(f)
+        self.assertEqual(snapshot['totals']['running'], 0)
+        self.assertEqual(snapshot['totals']['completed'], 1)
+        job = snapshot['recent'][0]
+        self.assertEqual(job['name'], "tone")
+        self.assertAlmostEqual(job['out_time'], 3.0, places=1)
+        self.assertGreater(job['bytes'], 0)
+        self.assertEqual(job['eta'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import os
+import sys
+import numpy as np
+import soundfile as sf
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.split_rounds import detect_bell_ringing, detect_bell_ringing_streaming
+from core.bell_dsp import (StreamingPeakPicker, StreamingPeakGrouper, StreamingPeakHold,
+                           design_bandpass, find_bell_peaks, peak_hold_envelope)
+from scipy.signal import find_peaks, sosfiltfilt
+
+
+def write_synthetic_bells(path, seconds=200, sr=44100, bell_starts=(20.0, 100.0, 170.0), seed=0):
+    """Write noise plus bursts of 2080 Hz pings (8 pings, 200 ms apart) at the given times."""
+    rng = np.random.default_rng(seed)
+    y = rng.normal(0, 0.05, int(seconds * sr)).astype(np.float32)
+    ping_len = int(0.12 * sr)
+    t = np.arange(ping_len) / sr
+    ping = (0.3 * np.sin(2 * np.pi * 2080 * t) * np.exp(-t * 15)).astype(np.float32)
+    for start in bell_starts:
+        for k in range(8):
+            i = int((start + k * 0.2) * sr)
+            y[i:i + ping_len] += ping
+    sf.write(path, y, sr)
+
+
+class TestStreamingDetection(unittest.TestCase):
+    """Test cases for the bounded-memory streaming bell detection."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a synthetic session with three bells."""
+        cls.temp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'temp_test_files'))
+        os.makedirs(cls.temp_dir, exist_ok=True)
+        cls.audio_path = os.path.join(cls.temp_dir, 'streaming_bells.wav')
+        cls.bell_starts = (20.0, 100.0, 170.0)
+        write_synthetic_bells(cls.audio_path, bell_starts=cls.bell_starts)
+        cls.batch_events = detect_bell_ringing(cls.audio_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the synthetic session."""
+        if os.path.exists(cls.audio_path):
+            os.unlink(cls.audio_path)
+
+    def test_same_events_as_batch(self):
+        """Streaming mode finds the same events, first peaks within 10 ms."""
+        events = detect_bell_ringing_streaming(self.audio_path)
+
+        self.assertEqual(len(events), len(self.batch_events))
+        self.assertEqual(len(events), len(self.bell_starts))
+        for streamed, batch in zip(events, self.batch_events):
+            self.assertAlmostEqual(streamed[0], batch[0], delta=0.01)
+            self.assertAlmostEqual(streamed[-1], batch[-1], delta=0.01)
+
+    def test_block_size_does_not_change_results(self):
+        """Results do not depend on where block boundaries fall."""
+        small = detect_bell_ringing_streaming(self.audio_path, block_seconds=0.37)
+        large = detect_bell_ringing_streaming(self.audio_path, block_seconds=60)
+        self.assertEqual(small, large)
+
+    def test_debug_file_generation(self):
+        """Streaming mode writes the same debug file format."""
+        debug_file_path = os.path.join(self.temp_dir, 'streaming_debug.txt')
+        events = detect_bell_ringing_streaming(self.audio_path, debug_file_path)
+
+        with open(debug_file_path, 'r') as f:
+            content = f.read()
+        os.unlink(debug_file_path)
+        self.assertEqual(content.count("Événement"), len(events))
+
+    def test_peak_picker_matches_find_peaks(self):
+        """Block-wise peak picking matches find_peaks on the whole signal."""
+        rng = np.random.default_rng(1)
+        signal = np.abs(rng.normal(0, 1, 50000)).astype(np.float32)
+        expected, _ = find_peaks(signal, height=3.0, distance=300)
+
+        picker = StreamingPeakPicker(height=3.0, distance=300)
+        found = [picker.push(block) for block in np.array_split(signal, 37)]
+        found.append(picker.flush())
+
+        np.testing.assert_array_equal(np.concatenate(found), expected)
+
+    def test_peak_picker_memory_is_bounded(self):
+        """A continuous tone above threshold does not grow the pending buffer."""
+        tone = np.abs(np.sin(2 * np.pi * 2080 * np.arange(44100 * 20) / 44100)).astype(np.float32)
+
+        picker = StreamingPeakPicker(height=0.5, distance=4410)
+        peaks = []
+        pending = []
+        for block in np.array_split(tone, 200):
+            peaks.append(picker.push(block))
+            pending.append(len(picker._buffer))
+        peaks.append(picker.flush())
+
+        self.assertLessEqual(max(pending), picker.max_pending + len(tone) // 200)
+        self.assertGreater(len(np.concatenate(peaks)), 150)
+
+    def test_peak_hold_matches_per_sample_detection(self):
+        """The peak-hold envelope finds the same events, at sample-exact local maxima."""
+        legacy = detect_bell_ringing(self.audio_path, peak_hold_rate=0)
+
+        self.assertEqual(len(self.batch_events), len(legacy))
+        for event, reference in zip(self.batch_events, legacy):
+            self.assertAlmostEqual(event[0], reference[0], delta=0.001)
+            self.assertAlmostEqual(event[-1], reference[-1], delta=0.01)
+
+    def test_streaming_peak_hold_matches_batch_envelope(self):
+        """Block-wise peak-hold frames equal the whole-signal envelope."""
+        rng = np.random.default_rng(2)
+        amplitude = np.abs(rng.normal(0, 1, 20000)).astype(np.float32)
+        expected_envelope, expected_offsets = peak_hold_envelope(amplitude, 88)
+
+        hold = StreamingPeakHold(88)
+        pushed = [hold.push(block) for block in np.array_split(amplitude, 23)]
+        pushed.append(hold.flush())
+
+        np.testing.assert_array_equal(np.concatenate([e for e, _ in pushed]), expected_envelope)
+        np.testing.assert_array_equal(np.concatenate([o for _, o in pushed]), expected_offsets)
+
+    def test_peak_hold_disabled_is_find_peaks(self):
+        """peak_hold_rate=0 keeps the per-sample find_peaks behaviour."""
+        rng = np.random.default_rng(4)
+        y = rng.normal(0, 0.3, 44100 * 5)
+        amplitude = np.abs(sosfiltfilt(design_bandpass(44100, 2080, 50), y))
+        expected, _ = find_peaks(amplitude, height=0.03, distance=4410)
+
+        np.testing.assert_array_equal(find_bell_peaks(amplitude, 44100, 0.03, peak_hold_rate=0), expected)
+        peaks = find_bell_peaks(amplitude, 44100, 0.03)
+        self.assertTrue(np.all(amplitude[peaks] > amplitude[peaks - 1]))
+        self.assertTrue(np.all(amplitude[peaks] >= amplitude[peaks + 1]))
+
+    def test_grouper_keeps_open_group_across_pushes(self):
+        """A group split across two pushes is emitted once, when it closes."""
+        grouper = StreamingPeakGrouper(max_gap=0.6, min_peaks=4)
+        self.assertEqual(grouper.push([1.0, 1.2]), [])
+        self.assertEqual(grouper.push([1.4, 1.6, 5.0]), [[1.0, 1.2, 1.4, 1.6]])
+        self.assertEqual(grouper.flush(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
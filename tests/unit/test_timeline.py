@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.timeline import SourceTimeline, Span, concat_inputs
+
+
+class TestSourceTimeline(unittest.TestCase):
+    """Test cases for the per-source timeline map."""
+
+    def setUp(self):
+        """Three 10-minute sources."""
+        self.timeline = SourceTimeline.from_durations(['/v/a.mp4', '/v/b.mp4', '/v/c.mp4'], [600.0, 600.0, 600.0])
+
+    def test_offsets_follow_durations(self):
+        """Sources are laid end to end in order."""
+        self.assertEqual([source.offset for source in self.timeline.sources], [0.0, 600.0, 1200.0])
+        self.assertEqual(self.timeline.duration, 1800.0)
+        self.assertEqual(self.timeline.source_index(599.9), 0)
+        self.assertEqual(self.timeline.source_index(600.0), 1)
+        self.assertEqual(self.timeline.source_index(5000.0), 2)
+
+    def test_round_inside_one_source(self):
+        """A round inside a late source maps to a local offset in that source only."""
+        self.assertEqual(self.timeline.spans(1300.0, 120.0), [Span('/v/c.mp4', 100.0, 120.0)])
+
+    def test_round_across_two_sources(self):
+        """A round over a file boundary is split in two local ranges."""
+        spans = self.timeline.spans(550.0, 120.0)
+        self.assertEqual([span.path for span in spans], ['/v/a.mp4', '/v/b.mp4'])
+        self.assertAlmostEqual(spans[0].start, 550.0)
+        self.assertAlmostEqual(spans[0].duration, 50.0)
+        self.assertAlmostEqual(spans[1].start, 0.0)
+        self.assertAlmostEqual(spans[1].duration, 70.0)
+
+    def test_last_source_absorbs_overrun(self):
+        """A round running past the end of the session stays in the last source."""
+        self.assertEqual(self.timeline.spans(1750.0, 121.0), [Span('/v/c.mp4', 550.0, 121.0)])
+
+    def test_direct_inputs(self):
+        """One or two sources are opened directly, with fast input seeking."""
+        single = self.timeline.round_inputs('list.txt', 1300.0, 120.0)
+        self.assertEqual(single.args, ['-ss', '100.000000', '-t', '120.000000', '-i', '/v/c.mp4'])
+        self.assertEqual((single.count, single.filter, single.video, single.audio), (1, '', '0:v', '0:a?'))
+
+        double = self.timeline.round_inputs('list.txt', 550.0, 120.0)
+        self.assertEqual(double.count, 2)
+        self.assertNotIn('list.txt', double.args)
+        self.assertEqual(double.filter, '[0:v][0:a][1:v][1:a]concat=n=2:v=1:a=1[src_v][src_a];')
+        self.assertEqual((double.video, double.audio), ('src_v', '[src_a]'))
+
+        silent = self.timeline.round_inputs('list.txt', 550.0, 120.0, audio=False)
+        self.assertEqual(silent.filter, '[0:v][1:v]concat=n=2:v=1:a=0[src_v];')
+        self.assertIsNone(silent.audio)
+
+        audio_only = self.timeline.round_inputs('list.txt', 550.0, 120.0, video=False)
+        self.assertEqual(audio_only.filter, '[0:a][1:a]concat=n=2:v=0:a=1[src_a];')
+        self.assertEqual((audio_only.video, audio_only.audio), (None, '[src_a]'))
+
+    def test_concat_fallback(self):
+        """A round over more than two sources, or an empty timeline, uses the concat list."""
+        expected = concat_inputs('list.txt', 500.0, 800.0)
+        self.assertEqual(self.timeline.round_inputs('list.txt', 500.0, 800.0), expected)
+        self.assertEqual(SourceTimeline([]).round_inputs('list.txt', 500.0, 800.0), expected)
+        self.assertIn('concat', expected.args)
+
+    @unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is not available")
+    def test_direct_inputs_across_files(self):
+        """ffmpeg reads a round spanning two files from the direct inputs."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            sources = []
+            for name in ('a.mp4', 'b.mp4'):
+                sources.append(os.path.join(temp_dir, name))
+                subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=25',
+                                '-f', 'lavfi', '-i', 'sine=f=440', '-t', '5', '-c:v', 'libx264', '-c:a', 'aac',
+                                '-shortest', sources[-1]], check=True)
+            timeline = SourceTimeline.from_durations(sources, [5.0, 5.0])
+            inputs = timeline.round_inputs('unused.txt', 3.0, 4.0)
+            output = os.path.join(temp_dir, 'round.mp4')
+            subprocess.run(['ffmpeg', '-y', '-v', 'error'] + inputs.args +
+                           ['-filter_complex', inputs.filter.rstrip(';'), '-map', f'[{inputs.video}]',
+                            '-map', inputs.audio, '-c:v', 'libx264', '-c:a', 'aac', output], check=True)
+
+            result = subprocess.run(['ffmpeg', '-v', 'error', '-i', output, '-map', '0:v', '-f', 'framemd5', '-'],
+                                    capture_output=True, text=True, check=True)
+            frames = [line for line in result.stdout.splitlines() if not line.startswith('#')]
+            self.assertAlmostEqual(len(frames), 100, delta=1)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.progress import ProgressMonitor
+from core.spectral_analyzer import SpectralAnalyzer
+from core.tracing import Tracer, trace_span
+
+
+def spans(tracer):
+    return [event for event in tracer.events() if event['ph'] == 'X']
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for stage tracing and the trace-event export."""
+
+    def test_span_records_times_and_thread(self):
+        tracer = Tracer()
+        with trace_span(tracer, "detect", "detection", block=1) as span:
+            span['events'] = 3
+            with trace_span(tracer, "filter", "detection"):
+                sum(range(10000))
+
+        detect, inner = sorted(spans(tracer), key=lambda event: event['ts'])
+        self.assertEqual((detect['name'], detect['cat']), ("detect", "detection"))
+        self.assertEqual((detect['args']['block'], detect['args']['events']), (1, 3))
+        for key in ('thread_cpu_ms', 'process_cpu_ms', 'lifetime_peak_rss_delta_mb'):
+            self.assertIn(key, detect['args'])
+        # The nested span lies inside its parent on the same thread
+        self.assertEqual(inner['tid'], detect['tid'])
+        self.assertGreaterEqual(inner['ts'], detect['ts'])
+        self.assertLessEqual(inner['ts'] + inner['dur'], detect['ts'] + detect['dur'])
+
+    @unittest.skipUnless(os.path.exists('/proc/self/statm'), "RSS courante lisible seulement sous Linux")
+    def test_rss_is_measured_per_span(self):
+        """Each span reports its own RSS change, not the lifetime high-water mark of the process."""
+        tracer = Tracer()
+        with trace_span(tracer, "allocate"):
+            block = np.ones(64 * 1024 * 1024 // 8)
+        del block
+        with trace_span(tracer, "idle"):
+            pass
+
+        allocate, idle = sorted(spans(tracer), key=lambda event: event['ts'])
+        self.assertGreater(allocate['args']['rss_delta_mb'], 40)
+        self.assertLess(abs(idle['args']['rss_delta_mb']), 10)
+        self.assertEqual(idle['args']['lifetime_peak_rss_delta_mb'], 0)
+        self.assertLess(idle['args']['rss_mb'], allocate['args']['rss_mb'])
+
+    def test_write_can_rotate_the_trace(self):
+        """A clearing write empties the tracer, and the next file only has the later spans."""
+        tracer = Tracer()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, f"trace-{index}.json") for index in range(2)]
+            for name, path in zip(("first", "second"), paths):
+                with trace_span(tracer, name):
+                    pass
+                tracer.write(path, clear=True)
+                self.assertEqual(spans(tracer), [])
+            names = []
+            for path in paths:
+                with open(path) as f:
+                    names.append([event['name'] for event in json.load(f)['traceEvents'] if event['ph'] == 'X'])
+        self.assertEqual(names, [["first"], ["second"]])
+
+    def test_worker_threads_get_their_own_tracks(self):
+        tracer = Tracer()
+
+        def work():
+            with trace_span(tracer, "round", "encode"):
+                pass
+
+        workers = [threading.Thread(target=work, name=f"worker-{i}") for i in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len({event['tid'] for event in spans(tracer)}), 2)
+        names = {event['args']['name'] for event in tracer.events() if event['name'] == 'thread_name'}
+        self.assertEqual(names, {"worker-0", "worker-1"})
+
+    def test_disabled_tracing_records_nothing(self):
+        with trace_span(None, "detect") as span:
+            span['events'] = 3
+
+    def test_write_produces_trace_event_json(self):
+        tracer = Tracer()
+        with trace_span(tracer, "sort", "probe"):
+            pass
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "trace.json")
+            tracer.write(path)
+            with open(path) as f:
+                trace = json.load(f)
+        self.assertIn("sort", [event['name'] for event in trace['traceEvents']])
+
+    def test_spectral_analyzer_methods_are_traced(self):
+        tracer = Tracer()
+        analyzer = SpectralAnalyzer(tracer=tracer)
+        sr = 8000
+        t = np.arange(sr * 2) / sr
+        analyzer.evaluate_frequency(0.5 * np.sin(2 * np.pi * 2080 * t), 2080, sample_rate=sr)
+
+        names = [event['name'] for event in spans(tracer)]
+        for name in ("evaluate_frequency", "load", "filter", "peak-pick", "group"):
+            self.assertIn(name, names)
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg n'est pas installé")
+    def test_ffmpeg_processes_get_their_own_track(self):
+        tracer = Tracer()
+        monitor = ProgressMonitor(interval=0, tracer=tracer)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = monitor.run(["ffmpeg", "-v", "error", "-nostdin", "-y", "-f", "lavfi",
+                                  "-i", "sine=frequency=440:duration=2", os.path.join(temp_dir, "tone.wav")],
+                                 "tone", duration=2.0)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        process, = [event for event in spans(tracer) if event['cat'] == 'ffmpeg']
+        self.assertEqual(process['name'], "tone")
+        self.assertNotEqual(process['pid'], tracer.pid)
+        for key in ('user_cpu_ms', 'system_cpu_ms', 'peak_rss_mb'):
+            self.assertIn(key, process['args'])
+        self.assertGreater(process['args']['peak_rss_mb'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add the src and test helper directories to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.tracing import Tracer, trace_span
+from core.watch import IngestWatcher, WatchDaemon, WatchState, group_sessions
+from fakes import FakeClock
+
+MORNING = datetime(2024, 3, 1, 9, 0, 0)
+
+
+class FakeScheduler:
+    """Records the sessions handed to it instead of splitting them."""
+
+    max_sessions = 1
+
+    def __init__(self, tracer=None):
+        self.processed = []
+        self.tracer = tracer
+
+    def process_files(self, name, video_files, **options):
+        with trace_span(self.tracer, f"session {name}", "session"):
+            self.processed.append((name, [os.path.basename(video) for video in video_files]))
+        return dict(session=name, status='ok')
+
+
+class TestWatch(unittest.TestCase):
+    """Test cases for the ingest watch-folder daemon."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.ingest = os.path.join(self.temp_dir.name, 'ingest')
+        os.makedirs(os.path.join(self.ingest, 'DCIM'))
+        self.state_path = os.path.join(self.temp_dir.name, 'state', 'watch_state.json')
+        self.clock = FakeClock(10_000.0)
+        self.created = {}
+
+    def add(self, name, created, mtime=1_000.0, size=16):
+        path = os.path.join(self.ingest, 'DCIM', name)
+        with open(path, 'wb') as f:
+            f.write(b'\0' * size)
+        os.utime(path, (mtime, mtime))
+        self.created[path] = created
+        return path
+
+    def daemon(self, scheduler, max_queued=4, trace_path=None):
+        watcher = IngestWatcher(self.ingest, settle_seconds=60, clock=self.clock)
+        return WatchDaemon(watcher, WatchState(self.state_path), scheduler, {}, max_queued=max_queued,
+                           trace_path=trace_path)
+
+    def poll(self, daemon):
+        with mock.patch('core.watch.get_video_creation_info',
+                        side_effect=lambda path, cache: ('', self.created[os.path.abspath(path)])):
+            return daemon.poll()
+
+    def drain(self, daemon):
+        stop = threading.Event()
+        daemon.start(stop)
+        daemon.jobs.join()
+        stop.set()
+        daemon.join()
+
+    def test_files_complete_after_settling(self):
+        """A file counts as complete only once unchanged for the settle delay."""
+        watcher = IngestWatcher(self.ingest, settle_seconds=60, clock=self.clock)
+        path = self.add('GX010001.MP4', MORNING, mtime=self.clock.now)
+        self.add('notes.txt', MORNING)
+        self.assertEqual(watcher.scan(), ({}, 1))
+
+        self.clock.now += 30
+        with open(path, 'ab') as f:
+            f.write(b'more')
+        os.utime(path, (self.clock.now, self.clock.now))
+        self.clock.now += 59
+        self.assertEqual(watcher.scan(), ({}, 1))
+
+        self.clock.now += 61
+        complete, writing = watcher.scan()
+        self.assertEqual((list(complete), writing), ([path], 0))
+
+    def test_groups_by_creation_time(self):
+        """Files further apart than the session gap start a new session."""
+        files = [('c', MORNING + timedelta(hours=5)), ('a', MORNING), ('b', MORNING + timedelta(minutes=12))]
+        sessions = group_sessions(files, timedelta(minutes=60))
+        self.assertEqual([[path for path, _ in session] for session in sessions], [['a', 'b'], ['c']])
+
+    def test_sessions_wait_for_copies_and_fill_a_bounded_queue(self):
+        """Nothing is queued while a copy is in progress; a full queue defers sessions to the next poll."""
+        scheduler = FakeScheduler()
+        daemon = self.daemon(scheduler, max_queued=1)
+        self.add('GX010001.MP4', MORNING)
+        self.add('GX020001.MP4', MORNING + timedelta(minutes=12))
+        self.add('GX010002.MP4', MORNING + timedelta(hours=6))
+        copying = self.add('GX010003.MP4', MORNING + timedelta(hours=6, minutes=10), mtime=self.clock.now)
+
+        self.assertEqual(self.poll(daemon), 0)
+        self.clock.now += 120
+        with open(copying, 'ab') as f:
+            f.write(b'more')
+        os.utime(copying, (self.clock.now, self.clock.now))
+        self.assertEqual(self.poll(daemon), 0)
+
+        self.clock.now += 61
+        self.assertEqual(self.poll(daemon), 1)
+        self.assertEqual(daemon.jobs.qsize(), 1)
+
+        self.drain(daemon)
+        self.assertEqual(self.poll(daemon), 1)
+        self.drain(daemon)
+        self.assertEqual(self.poll(daemon), 0)
+        self.assertEqual(scheduler.processed, [
+            ('2024-03-01_090000', ['GX010001.MP4', 'GX020001.MP4']),
+            ('2024-03-01_150000', ['GX010002.MP4', 'GX010003.MP4']),
+        ])
+
+    def test_trace_is_written_and_cleared_per_session(self):
+        """Each finished session gets its own trace file and the tracer does not keep its spans."""
+        tracer = Tracer()
+        daemon = self.daemon(FakeScheduler(tracer), trace_path=os.path.join(self.temp_dir.name, 'trace.json'))
+        self.add('GX010001.MP4', MORNING)
+        self.add('GX010002.MP4', MORNING + timedelta(hours=6))
+        self.clock.now += 120
+        self.assertEqual(self.poll(daemon), 2)
+        self.drain(daemon)
+
+        for name in ('2024-03-01_090000', '2024-03-01_150000'):
+            with open(os.path.join(self.temp_dir.name, f'trace-{name}.json')) as f:
+                events = json.load(f)['traceEvents']
+            self.assertEqual([event['name'] for event in events if event['ph'] == 'X'], [f'session {name}'])
+        self.assertEqual([event for event in tracer.events() if event['ph'] == 'X'], [])
+
+    def test_once_mode_stops_with_sessions_still_queued(self):
+        """A stop request during --once returns, and the queued session is resumed on the next start."""
+        stop = threading.Event()
+
+        class StoppingScheduler(FakeScheduler):
+            def process_files(self, name, video_files, **options):
+                stop.set()  # SIGINT while the first session is processed
+                return super().process_files(name, video_files, **options)
+
+        scheduler = StoppingScheduler()
+        daemon = self.daemon(scheduler)
+        self.add('GX010001.MP4', MORNING)
+        self.add('GX010002.MP4', MORNING + timedelta(hours=6))
+        self.clock.now += 120
+        with mock.patch('core.watch.get_video_creation_info',
+                        side_effect=lambda path, cache: ('', self.created[os.path.abspath(path)])):
+            runner = threading.Thread(target=daemon.run, args=(stop,), kwargs=dict(once=True), daemon=True)
+            runner.start()
+            runner.join(timeout=10)
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(len(scheduler.processed), 1)
+        self.assertEqual(WatchState(self.state_path).get('2024-03-01_150000')['status'], 'queued')
+
+    def test_restart_resumes_interrupted_sessions(self):
+        """Queued or running sessions are resumed after a restart, finished ones are not redone."""
+        state = WatchState(self.state_path)
+        first = self.add('GX010001.MP4', MORNING)
+        second = self.add('GX010002.MP4', MORNING + timedelta(hours=6))
+        state.update('2024-03-01_090000', 'ok', files=[[first, '16:1000000000000']])
+        state.update('2024-03-01_150000', 'running', files=[[second, '16:1000000000000']])
+
+        scheduler = FakeScheduler()
+        daemon = self.daemon(scheduler)
+        daemon.resume()
+        self.drain(daemon)
+        self.assertEqual(scheduler.processed, [('2024-03-01_150000', ['GX010002.MP4'])])
+        self.assertEqual(WatchState(self.state_path).get('2024-03-01_150000')['status'], 'ok')
+
+        # The files found on the first poll match the finished sessions
+        self.clock.now += 120
+        self.poll(daemon)
+        self.assertEqual(self.poll(daemon), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()